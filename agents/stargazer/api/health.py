@@ -296,6 +296,11 @@ stargazer_collection_credential_state_redis_error_total {stats.get("credential_s
                         f"{stats.get(key, 0)}\n"
                     )
 
+        # 固定桶直方图（按插件/模型标签），累计值不随抓取重置
+        metrics = getattr(get_collection_application(), "metrics", None)
+        if metrics is not None:
+            prometheus_text += metrics.render_prometheus()
+
         return response.text(prometheus_text, content_type="text/plain; version=0.0.4")
 
     except Exception as e:
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+云接口并发分页工具
+
+- 首页请求拿到 TotalCount，其余页在有界线程池中并发拉取，结果按页码顺序拼接
+- 同一账号（AccessKey）的所有请求共享一个令牌桶，多种资源并发翻页时也不超过账号级 QPS
+- 接口未返回总数时退化为顺序翻页，直到返回空页（与原有行为一致）
+"""
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 单次分页查询内的并发页数
+PAGE_CONCURRENCY = int(os.getenv("CLOUD_PAGE_CONCURRENCY", "5"))
+# 单账号每秒请求数上限，<=0 表示不限速
+ACCOUNT_QPS = float(os.getenv("CLOUD_ACCOUNT_QPS", "20"))
+
+
+class RateLimiter(object):
+    """线程安全的令牌桶；rate<=0 时不限速"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_account_limiters = {}
+_account_limiters_lock = threading.Lock()
+
+
+def get_account_rate_limiter(account, rate=None):
+    """按账号获取共享的令牌桶，同一账号的所有客户端实例共用"""
+    with _account_limiters_lock:
+        limiter = _account_limiters.get(account)
+        if limiter is None:
+            limiter = RateLimiter(ACCOUNT_QPS if rate is None else rate)
+            _account_limiters[account] = limiter
+        return limiter
+
+
+def fetch_pages(fetch_page, items_of, page_size, total_of=None, first_page=1, max_workers=None, rate_limiter=None):
+    """
+    拉取全部分页，返回按页码排序的响应列表
+    Args:
+        fetch_page (callable): fetch_page(page_number) -> 响应(dict)，会在多个线程中调用，不得共享可变请求对象
+        items_of (callable): items_of(response) -> 当前页的资源列表
+        page_size (int): 每页条数
+        total_of (callable): total_of(response) -> 资源总数；为空或返回 None 时顺序翻页直到空页
+        first_page (int): 首页页码
+        max_workers (int): 并发页数上限，默认 CLOUD_PAGE_CONCURRENCY
+        rate_limiter (RateLimiter): 账号级限速器
+    Returns:
+        list: 各页响应
+    """
+
+    def call(page_number):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return fetch_page(page_number)
+
+    first = call(first_page)
+    responses = [first]
+    total = total_of(first) if total_of else None
+    if total is None:
+        page_number = first_page
+        response = first
+        while items_of(response):
+            page_number += 1
+            response = call(page_number)
+            responses.append(response)
+        return responses
+
+    page_count = int(math.ceil(float(total) / page_size))
+    remaining = list(range(first_page + 1, first_page + page_count))
+    if not remaining or not items_of(first):
+        return responses
+    workers = max(1, min(max_workers or PAGE_CONCURRENCY, len(remaining)))
+    if workers == 1:
+        responses.extend(call(page_number) for page_number in remaining)
+        return responses
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map 保证按页码顺序返回，任一页失败时异常向上抛出
+        responses.extend(executor.map(call, remaining))
+    return responses
+
+
+def fetch_all_items(fetch_page, items_of, page_size, **kwargs):
+    """fetch_pages 的便捷封装，直接返回拼接后的资源列表"""
+    items = []
+    for response in fetch_pages(fetch_page, items_of, page_size, **kwargs):
+        items.extend(items_of(response) or [])
+    return items
@@ -3,10 +3,11 @@
 from __future__ import annotations
 
 import asyncio
+import gc
 import os
 import socket
 import threading
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from core.collection.capacity_observer import (
     CapacityUsageReporter,
@@ -58,6 +59,23 @@ def concurrency_limit_from_env(name: str, default: int) -> int:
     return value
 
 
+def plugin_limits_from_env(name: str) -> dict[str, int]:
+    """从环境变量读取插件级并发上限，格式：vmware_info=20,aliyun_info=10（键为插件名，即 model_id / monitor_type）"""
+    limits: dict[str, int] = {}
+    for item in str(os.getenv(name) or "").split(","):
+        if not item.strip():
+            continue
+        plugin, separator, raw = item.partition("=")
+        if not separator or not plugin.strip():
+            raise ValueError(f"{name} entries must look like plugin=limit")
+        value = int(raw.strip())
+        if value < 0:
+            raise ValueError(f"{name} limits must be >= 0 (0 means unlimited)")
+        if value:
+            limits[plugin.strip()] = value
+    return limits
+
+
 def _open_file_descriptor_count() -> int:
     for path in ("/proc/self/fd", "/dev/fd"):
         try:
@@ -87,6 +105,10 @@ class CollectionApplicationSettings:
     publish_max_attempts: int = 2
     access_probe_enabled: bool = True
     capacity_log_interval_seconds: float = 180.0
+    # 插件级并发上限（全局窗口内），未配置的插件不单独限制
+    plugin_concurrency_limits: dict[str, int] = field(default_factory=dict)
+    # Run 距 deadline 不足该秒数时优先派发
+    schedule_deadline_slack_seconds: float = 30.0
 
     def __post_init__(self) -> None:
         if self.max_active_runs <= 0:
@@ -144,6 +166,12 @@ class CollectionApplicationSettings:
             capacity_log_interval_seconds=float(
                 os.getenv("CAPACITY_LOG_INTERVAL", "180")
             ),
+            plugin_concurrency_limits=plugin_limits_from_env(
+                "PLUGIN_CONCURRENCY_LIMITS"
+            ),
+            schedule_deadline_slack_seconds=float(
+                os.getenv("SCHEDULE_DEADLINE_SLACK", "30")
+            ),
         )
 
 
@@ -218,6 +246,8 @@ class CollectionApplication:
         self._scheduler = CollectionScheduler(
             max_in_flight=min(scheduler_limits) if scheduler_limits else 1_000_000,
             metrics=self._metrics,
+            plugin_limits=self.settings.plugin_concurrency_limits,
+            deadline_slack_seconds=self.settings.schedule_deadline_slack_seconds,
         )
         self._submission_counts: dict[str, int] = {}
         self._loop_lag = EventLoopLagMonitor(
@@ -244,6 +274,7 @@ class CollectionApplication:
             max_no_response_attempts=self.settings.max_no_response_attempts,
             publish_max_attempts=self.settings.publish_max_attempts,
             access_probe_enabled=self.settings.access_probe_enabled,
+            run_deadline_seconds=self.settings.run_deadline_seconds,
         )
         self.runtime = CollectionRuntime(
             state_store=RedisRunStateStore(redis_client, key_prefix=prefix),
@@ -258,6 +289,10 @@ class CollectionApplication:
             owner_id=owner_id,
         )
 
+    @property
+    def metrics(self) -> CollectionMetrics:
+        return self._metrics
+
     @property
     def active_runs(self) -> int:
         return self.runtime.active_runs
@@ -425,6 +460,14 @@ def initialize_collection_application(app) -> None:
             redis_client = await get_redis_client()
             await redis_client.ping()
             app.ctx.redis = redis_client
+        if os.getenv("PLUGIN_WARMUP", "true").strip().lower() in {"1", "true", "yes", "on"}:
+            from core.plugin.registry import plugin_registry
+
+            # 预读插件配置并导入采集器类，首批目标不再逐个导入；耗时在日志中报告
+            await asyncio.to_thread(plugin_registry.warm_up)
+            # 预热导入的模块常驻内存，移出 GC 跟踪，避免每次整堆回收在事件循环线程上重复扫描
+            gc.freeze()
+            plugin_registry.start_watch()
         owner_id = os.getenv("POD_NAME") or (f"{socket.gethostname()}:{os.getpid()}")
         _application = CollectionApplication(
             redis_client=redis_client,
@@ -444,4 +487,7 @@ def initialize_collection_application(app) -> None:
         application = getattr(app.ctx, "collection_application", None)
         if application is not None:
             await application.shutdown()
+        from core.plugin.registry import plugin_registry
+
+        await plugin_registry.stop_watch()
         _application = None
@@ -177,6 +177,8 @@ class TargetExecutorSettings:
     # 0 = 不限制；默认 3 = 连续 protocol_no_response 最多尝试次数
     max_no_response_attempts: int = 3
     publish_max_attempts: int = 2
+    # 0 = 不限制；用于调度器的 deadline 感知，与 CollectionRuntimeSettings 一致
+    run_deadline_seconds: float = 0.0
 
     def __post_init__(self) -> None:
         if self.max_active_targets < 0:
@@ -195,6 +197,8 @@ class TargetExecutorSettings:
             raise ValueError("publish_total_timeout_seconds must be greater than zero")
         if self.max_no_response_attempts < 0:
             raise ValueError("max_no_response_attempts must be >= 0")
+        if self.run_deadline_seconds < 0:
+            raise ValueError("run_deadline_seconds cannot be negative")
         if self.publish_max_attempts <= 0:
             raise ValueError("publish_max_attempts must be greater than zero")
 
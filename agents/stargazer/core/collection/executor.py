@@ -200,6 +200,21 @@ class TargetCollectionExecutor:
         self._metrics = metrics or CollectionMetrics()
         self._scheduler = scheduler
 
+    def _scheduling_hints(self, request: CollectionRequest) -> dict:
+        """调度提示：插件并发归属（插件名，与 PLUGIN_CONCURRENCY_LIMITS 的键一致）、权重/优先级（请求参数）与 Run 截止时间"""
+        params = request.params
+        deadline = None
+        if self._settings.run_deadline_seconds > 0:
+            deadline = (
+                asyncio.get_running_loop().time() + self._settings.run_deadline_seconds
+            )
+        return {
+            "plugin": _scheduling_plugin(request.plugin_ref),
+            "weight": _positive_float(params.get("schedule_weight"), 1.0),
+            "priority": _int_or_default(params.get("schedule_priority"), 0),
+            "deadline": deadline,
+        }
+
     # fmt: off
     async def execute(  # noqa: C901
         self, request: CollectionRequest, lease: RunLease
@@ -333,6 +348,7 @@ class TargetCollectionExecutor:
                 f"{request.task_id}:{lease.fence}",
                 range(len(targets)),
                 execute_index,
+                **self._scheduling_hints(request),
             )
             pending_publishes = scheduled
             for pending in scheduled:
@@ -1045,7 +1061,14 @@ class TargetCollectionExecutor:
                 "plugin_duration_seconds_total",
                 duration,
             )
-            self._metrics.observe("plugin_duration_seconds", duration)
+            self._metrics.observe(
+                "plugin_duration_seconds",
+                duration,
+                labels={
+                    "plugin": context.plugin_ref,
+                    "model_id": context.params.get("model_id") or "-",
+                },
+            )
             self._metrics.observe(f"execution_mode_{mode}_duration_seconds", duration)
             self._metrics.observe(f"capacity_group_{group}_duration_seconds", duration)
             self._metrics.increment("plugin_total")
@@ -1132,3 +1155,26 @@ class _AttemptDecision:
     result: TargetCollectionResult | None = None
     no_response_attempts: int = 0
     credential_failure: CredentialFailureResult | None = None
+
+
+def _scheduling_plugin(plugin_ref: str) -> str:
+    """plugin_ref（vmware_info.config / host.monitor）去掉采集族后缀，得到插件级并发上限的键"""
+    plugin, separator, family = str(plugin_ref or "").rpartition(".")
+    if separator and family in ("config", "monitor"):
+        return plugin
+    return str(plugin_ref or "")
+
+
+def _positive_float(value, default: float) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+def _int_or_default(value, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
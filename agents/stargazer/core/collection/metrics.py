@@ -1,8 +1,95 @@
-"""进程内采集指标；由健康接口导出，避免引入额外运行时依赖。"""
+"""进程内采集指标；由健康接口导出，避免引入额外运行时依赖。
+
+- 计数器与直方图均为进程生命周期内累计值，抓取不会清空历史
+- 直方图采用固定桶（1-2-5 对数刻度），可按标签合并，观测与导出成本与样本数无关
+- 滚动窗口分位数（*_p95 / *_p99）保留给 /health/stats，反映最近 sample_capacity 个样本
+"""
 
 from __future__ import annotations
 
+import heapq
+from bisect import bisect_left
 from collections import deque
+from typing import Iterable, Mapping
+
+
+def _default_buckets() -> tuple[float, ...]:
+    """1ms ~ 5e6 的 1-2-5 刻度，同时覆盖耗时（秒）与批量大小/字节数"""
+    bounds = []
+    scale = 0.001
+    while scale < 1e7:
+        bounds.extend(round(scale * step, 6) for step in (1, 2, 5))
+        scale *= 10
+    return tuple(bounds)
+
+
+DEFAULT_BUCKETS = _default_buckets()
+# 单个指标允许的标签组合上限，超出后归入 OVERFLOW_LABEL_VALUE，避免插件/模型标签基数失控
+MAX_LABEL_SETS_PER_METRIC = 1000
+OVERFLOW_LABEL_VALUE = "__other__"
+
+
+class Histogram:
+    """固定桶直方图；桶边界相同的直方图可直接合并"""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        if list(self.bounds) != sorted(set(self.bounds)):
+            raise ValueError("histogram bounds must be strictly increasing")
+        # 最后一个桶为 +Inf
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        value = float(value)
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        if other.bounds != self.bounds:
+            raise ValueError("cannot merge histograms with different bounds")
+        for index, value in enumerate(other.counts):
+            self.counts[index] += value
+        self.count += other.count
+        self.sum += other.sum
+        return self
+
+    def copy(self) -> "Histogram":
+        return Histogram(self.bounds).merge(self)
+
+    def quantile(self, fraction: float) -> float:
+        """桶内线性插值估算分位数；误差不超过所在桶宽度"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            if cumulative + bucket_count >= rank:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.bounds[-1]
+
+    def cumulative_buckets(self) -> list[tuple[float, int]]:
+        """Prometheus 累积桶 [(le, count)]，最后一项 le=inf"""
+        buckets = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += bucket_count
+            buckets.append((bound, cumulative))
+        return buckets
+
+
+LabelKey = tuple[tuple[str, str], ...]
 
 
 class CollectionMetrics:
@@ -35,33 +122,100 @@ class CollectionMetrics:
         }
         self._sample_capacity = int(sample_capacity)
         self._samples: dict[str, deque[float]] = {}
+        self._histograms: dict[str, dict[LabelKey, Histogram]] = {}
         self._gauges: dict[str, float] = {"sync_calls_in_flight": 0}
 
     def increment(self, name: str, value: float = 1) -> None:
         self._counters[name] = self._counters.get(name, 0) + value
 
-    def observe(self, name: str, value: float) -> None:
+    def observe(self, name: str, value: float, labels: Mapping[str, str] | None = None) -> None:
+        """记录一个样本：写入滚动窗口，同时累计到（带标签的）直方图"""
         samples = self._samples.get(name)
         if samples is None:
             samples = deque(maxlen=self._sample_capacity)
             self._samples[name] = samples
         samples.append(float(value))
 
+        series = self._histograms.get(name)
+        if series is None:
+            series = {}
+            self._histograms[name] = series
+        label_key = _label_key(labels)
+        histogram = series.get(label_key)
+        if histogram is None:
+            if len(series) >= MAX_LABEL_SETS_PER_METRIC:
+                label_key = tuple((key, OVERFLOW_LABEL_VALUE) for key, _ in label_key)
+                histogram = series.get(label_key)
+            if histogram is None:
+                histogram = Histogram()
+                series[label_key] = histogram
+        histogram.observe(value)
+
     def add_gauge(self, name: str, value: float) -> None:
         self._gauges[name] = max(0.0, self._gauges.get(name, 0.0) + float(value))
 
+    def histograms(self) -> dict[str, dict[LabelKey, Histogram]]:
+        """全部直方图的副本：{name: {label_key: Histogram}}"""
+        return {
+            name: {label_key: histogram.copy() for label_key, histogram in series.items()}
+            for name, series in self._histograms.items()
+        }
+
+    def merged_histogram(self, name: str, **label_filter: str) -> Histogram:
+        """按标签过滤后合并为一个直方图，如 merged_histogram("plugin_duration_seconds", model_id="host")"""
+        merged = Histogram()
+        for label_key, histogram in self._histograms.get(name, {}).items():
+            labels = dict(label_key)
+            if all(labels.get(key) == value for key, value in label_filter.items()):
+                merged.merge(histogram)
+        return merged
+
     def snapshot(self) -> dict[str, float]:
         snapshot = dict(self._counters)
         snapshot.update(self._gauges)
         for name, samples in self._samples.items():
-            ordered = sorted(samples)
-            snapshot[f"{name}_p95"] = _percentile(ordered, 0.95)
-            snapshot[f"{name}_p99"] = _percentile(ordered, 0.99)
+            p95, p99 = _window_percentiles(samples, (0.95, 0.99))
+            snapshot[f"{name}_p95"] = p95
+            snapshot[f"{name}_p99"] = p99
         return snapshot
 
+    def render_prometheus(self, prefix: str = "stargazer_collection") -> str:
+        """直方图的 Prometheus 文本格式（_bucket/_sum/_count）"""
+        lines = []
+        for name in sorted(self._histograms):
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for label_key, histogram in sorted(self._histograms[name].items()):
+                for bound, cumulative in histogram.cumulative_buckets():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{metric}_bucket{_format_labels(label_key + (('le', le),))} {cumulative}")
+                lines.append(f"{metric}_sum{_format_labels(label_key)} {histogram.sum}")
+                lines.append(f"{metric}_count{_format_labels(label_key)} {histogram.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _label_key(labels: Mapping[str, str] | None) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((str(key), str(value if value is not None else "-")) for key, value in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_key: LabelKey) -> str:
+    if not label_key:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in label_key) + "}"
+
+
+def _window_percentiles(samples: deque[float], fractions: tuple[float, ...]) -> list[float]:
+    """只取所需的最大若干个样本（堆选择），避免每次抓取对整个窗口排序"""
+    if not samples:
+        return [0.0 for _ in fractions]
+    size = len(samples)
+    indexes = [int((size - 1) * fraction) for fraction in fractions]
+    largest = heapq.nlargest(size - min(indexes), samples)
+    return [largest[size - 1 - index] for index in indexes]
 
-def _percentile(ordered: list[float], fraction: float) -> float:
-    if not ordered:
-        return 0.0
-    index = int((len(ordered) - 1) * fraction)
-    return ordered[index]
@@ -1,13 +1,20 @@
-"""跨 CollectionRun 公平派发目标的全局调度模块。"""
+"""跨 CollectionRun 公平派发目标的全局调度模块。
+
+选择下一个派发的 Run（全局窗口内）：
+1. priority 高者优先（如按需调试任务）
+2. 同优先级中，距 deadline 不足 deadline_slack_seconds 的 Run 按最早 deadline 优先
+3. 其余按加权公平（虚拟时间 / stride）：每派发一个目标，Run 的虚拟时间前进 1/weight，
+   虚拟时间最小者优先；新 Run 从当前虚拟时钟起步，不会因“迟到”积累额度
+4. plugin_limits 为插件级并发上限，达到上限的 Run 暂不参与选择，避免慢插件占满全局窗口
+"""
 
 from __future__ import annotations
 
 import asyncio
 import operator
 import time
-from collections import deque
 from dataclasses import dataclass, field
-from typing import Awaitable, Callable, Generic, Iterable, Iterator, TypeVar
+from typing import Awaitable, Callable, Generic, Iterable, Iterator, Mapping, TypeVar
 
 T = TypeVar("T")
 R = TypeVar("R")
@@ -25,19 +32,42 @@ class _RunState(Generic[T, R]):
     first_dispatched: bool = False
     pending: int = 0
     tasks: set[asyncio.Task] = field(default_factory=set)
+    plugin: str = ""
+    weight: float = 1.0
+    priority: int = 0
+    deadline: float | None = None
+    virtual_time: float = 0.0
+    sequence: int = 0
 
 
 class CollectionScheduler:
-    """以 round-robin 和全局窗口公平执行多个 Run 的目标。"""
+    """以加权公平、优先级与 deadline 感知在全局窗口内执行多个 Run 的目标。"""
 
-    def __init__(self, *, max_in_flight: int, metrics=None) -> None:
+    def __init__(
+        self,
+        *,
+        max_in_flight: int,
+        metrics=None,
+        plugin_limits: Mapping[str, int] | None = None,
+        deadline_slack_seconds: float = 30.0,
+    ) -> None:
         if max_in_flight <= 0:
             raise ValueError("max_in_flight must be greater than zero")
+        if deadline_slack_seconds < 0:
+            raise ValueError("deadline_slack_seconds cannot be negative")
         self._max_in_flight = int(max_in_flight)
         self._metrics = metrics
+        self._plugin_limits = {
+            plugin: int(limit)
+            for plugin, limit in (plugin_limits or {}).items()
+            if int(limit) > 0
+        }
+        self._deadline_slack_seconds = float(deadline_slack_seconds)
         self._condition = asyncio.Condition()
         self._runs: dict[str, _RunState] = {}
-        self._order: deque[str] = deque()
+        self._plugin_active: dict[str, int] = {}
+        self._virtual_clock = 0.0
+        self._sequence = 0
         self._dispatcher: asyncio.Task | None = None
         self._closing = False
         self.active = 0
@@ -55,12 +85,30 @@ class CollectionScheduler:
     def pending_runs(self) -> int:
         return len(self._runs)
 
+    def plugin_active(self, plugin: str) -> int:
+        return self._plugin_active.get(plugin, 0)
+
     async def execute(
         self,
         run_id: str,
         items: Iterable[T],
         handler: Callable[[T], Awaitable[R]],
+        *,
+        plugin: str = "",
+        weight: float = 1.0,
+        priority: int = 0,
+        deadline: float | None = None,
     ) -> tuple[R, ...]:
+        """
+        执行一个 Run 的全部目标
+
+        :param plugin: 插件名（不含 .config/.monitor 后缀），用于插件级并发上限
+        :param weight: 加权公平中的份额，越大每轮获得的槽位越多
+        :param priority: 优先级，越大越先派发（严格优先）
+        :param deadline: Run 截止时间（event loop 时钟），临近时提前派发
+        """
+        if weight <= 0:
+            raise ValueError("weight must be greater than zero")
         loop = asyncio.get_running_loop()
         state = _RunState(
             items=iter(items),
@@ -69,15 +117,22 @@ class CollectionScheduler:
             done=loop.create_future(),
             enqueued_at=time.monotonic(),
             pending=max(0, operator.length_hint(items, 0)),
+            plugin=plugin,
+            weight=float(weight),
+            priority=int(priority),
+            deadline=deadline,
         )
         async with self._condition:
             if self._closing:
                 raise RuntimeError("collection scheduler is shutting down")
             if run_id in self._runs:
                 raise ValueError(f"run already registered: {run_id}")
+            # 新 Run 从当前虚拟时钟起步，并在同虚拟时间下优先于已有 Run，
+            # 以获得下一空闲槽位，避免大 Run 的剩余目标插队。
+            self._sequence += 1
+            state.sequence = self._sequence
+            state.virtual_time = self._virtual_clock
             self._runs[run_id] = state
-            # 新 Run 优先获得下一空闲槽位，避免大 Run 的剩余目标插队。
-            self._order.appendleft(run_id)
             if self._dispatcher is None or self._dispatcher.done():
                 self._dispatcher = asyncio.create_task(
                     self._dispatch_loop(), name="collection-target-dispatcher"
@@ -89,6 +144,32 @@ class CollectionScheduler:
             await self._cancel_run(run_id)
             raise
 
+    def _plugin_has_capacity(self, plugin: str) -> bool:
+        limit = self._plugin_limits.get(plugin)
+        return limit is None or self._plugin_active.get(plugin, 0) < limit
+
+    def _select_run(self, now: float) -> str | None:
+        """按 priority > 临近 deadline > 虚拟时间 选择下一个可派发的 Run"""
+        best_id = None
+        best_key = None
+        for run_id, state in self._runs.items():
+            if state.exhausted or not self._plugin_has_capacity(state.plugin):
+                continue
+            urgent = (
+                state.deadline is not None
+                and state.deadline - now <= self._deadline_slack_seconds
+            )
+            key = (
+                -state.priority,
+                0 if urgent else 1,
+                state.deadline if urgent else 0.0,
+                state.virtual_time,
+                -state.sequence,
+            )
+            if best_key is None or key < best_key:
+                best_id, best_key = run_id, key
+        return best_id
+
     async def shutdown(self) -> None:
         async with self._condition:
             self._closing = True
@@ -100,7 +181,6 @@ class CollectionScheduler:
                 if not state.done.done():
                     state.done.cancel()
             self._runs.clear()
-            self._order.clear()
             self._condition.notify_all()
         for task in tasks:
             task.cancel()
@@ -112,19 +192,23 @@ class CollectionScheduler:
             await asyncio.gather(dispatcher, return_exceptions=True)
 
     async def _dispatch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
         while True:
             async with self._condition:
                 await self._condition.wait_for(
                     lambda: self._closing
-                    or (self.active < self._max_in_flight and bool(self._order))
+                    or (
+                        self.active < self._max_in_flight
+                        and self._select_run(loop.time()) is not None
+                    )
                 )
                 if self._closing:
                     return
-                while self.active < self._max_in_flight and self._order:
-                    run_id = self._order.popleft()
-                    state = self._runs.get(run_id)
-                    if state is None or state.exhausted:
-                        continue
+                while self.active < self._max_in_flight:
+                    run_id = self._select_run(loop.time())
+                    if run_id is None:
+                        break
+                    state = self._runs[run_id]
                     try:
                         item = next(state.items)
                     except StopIteration:
@@ -146,7 +230,11 @@ class CollectionScheduler:
                                 "run_first_schedule_wait_seconds",
                                 time.monotonic() - state.enqueued_at,
                             )
-                    self._order.append(run_id)
+                    self._virtual_clock = max(self._virtual_clock, state.virtual_time)
+                    state.virtual_time += 1.0 / state.weight
+                    self._plugin_active[state.plugin] = (
+                        self._plugin_active.get(state.plugin, 0) + 1
+                    )
                     self.active += 1
                     self.peak = max(self.peak, self.active)
                     task = asyncio.create_task(
@@ -182,6 +270,11 @@ class CollectionScheduler:
             async with self._condition:
                 state.tasks.discard(current)
                 self.active = max(0, self.active - 1)
+                remaining = self._plugin_active.get(state.plugin, 0) - 1
+                if remaining > 0:
+                    self._plugin_active[state.plugin] = remaining
+                else:
+                    self._plugin_active.pop(state.plugin, None)
                 self._condition.notify_all()
 
     async def _cancel_run(
@@ -191,7 +284,6 @@ class CollectionScheduler:
             state = self._runs.pop(run_id, None)
             if state is None:
                 return
-            self._order = deque(item for item in self._order if item != run_id)
             tasks = tuple(
                 task for task in state.tasks if task is not exclude and not task.done()
             )
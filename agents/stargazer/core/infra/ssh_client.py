@@ -2,15 +2,22 @@
 # @File: ssh_client.py
 # @Time: 2025/4/30 15:59
 # @Author: windyzhao
+import logging
 import os
+import select
 import time
 
 import paramiko
 from typing import Optional
 from dataclasses import dataclass
 
+# 不依赖 Sanic，便于在线程池与独立脚本中复用
+logger = logging.getLogger("stargazer.ssh_client")
 
-# from sanic.log import logger
+# 单次从通道读取的最大字节数
+CHANNEL_RECV_SIZE = 32768
+# 通道无数据时的等待间隔（秒），同时用于检查 stderr 与退出状态
+CHANNEL_POLL_INTERVAL = 0.05
 
 
 @dataclass
@@ -55,7 +62,7 @@ class SSHClient:
         :raises: ConnectionError 如果连接失败
         """
         try:
-            print(f"Connecting to {host}:{port} as {username}...")
+            logger.debug(f"Connecting to {host}:{port} as {username}...")
             self._client.connect(
                 hostname=host,
                 port=port,
@@ -67,63 +74,86 @@ class SSHClient:
                 allow_agent=False,
                 look_for_keys=False
             )
-            print(f"Connected to {host} successfully")
+            logger.debug(f"Connected to {host} successfully")
         except Exception as e:
             self.close()
             raise ConnectionError(f"SSH connection failed to {host}: {str(e)}")
 
-    # 修改 SSHClient 类的 execute_command 方法
+    def is_active(self) -> bool:
+        """底层 transport 是否仍可用"""
+        transport = self._client.get_transport() if self._client else None
+        return bool(transport and transport.is_active())
 
-    def execute_command(self, command, timeout=None):
+    def execute_command(self, command, timeout=None, get_pty: bool = False):
         """
         在远程主机上执行命令并获取结果
 
+        stdout 与 stderr 在同一循环中交替读取，避免任一侧缓冲区写满导致远端阻塞（死锁）。
+
         :param command: 要执行的命令
         :param timeout: 命令执行超时时间(秒)
+        :param get_pty: 是否分配伪终端；分配后 stderr 会合并到 stdout，仅交互式命令需要
         :return: SSHResult对象
+        :raises: TimeoutError 命令在 timeout 内未结束
         """
         # 检查连接
-        if not self._client or not self._client.get_transport() or not self._client.get_transport().is_active():
+        if not self.is_active():
             raise Exception("Not connected")
 
         # 创建会话
         channel = self._client.get_transport().open_session()
+        try:
+            if get_pty:
+                channel.get_pty()
 
-        # 获取伪终端（有时需要这个来确保输出正确）
-        channel.get_pty()
-
-        # 设置超时
-        if timeout:
-            channel.settimeout(timeout)
-
-        # 执行命令
-        start_time = time.time()
-        channel.exec_command(command)
-
-        # 读取输出
-        stdout_data = channel.makefile('r').read()
-        stderr_data = channel.makefile_stderr('r').read()
-
-        # 等待命令完成
-        exit_status = channel.recv_exit_status()
+            # 执行命令
+            start_time = time.time()
+            channel.exec_command(command)
+            stdout_data, stderr_data = self._drain_channel(channel, timeout)
 
-        # 关闭通道
-        channel.close()
+            # 等待命令完成
+            exit_status = channel.recv_exit_status()
+        finally:
+            # 关闭通道
+            channel.close()
 
         # 记录命令执行时间
         exec_time = time.time() - start_time
-        print(f"Command executed in {exec_time:.2f}s")
-
-        # 如果输出是二进制，转换为字符串
-        if isinstance(stdout_data, bytes):
-            stdout_data = stdout_data.decode('utf-8', errors='replace')
-        if isinstance(stderr_data, bytes):
-            stderr_data = stderr_data.decode('utf-8', errors='replace')
-
-        # 打印原始输出大小以便调试
-        print(f"DEBUG: Raw stdout size: {len(stdout_data)}, stderr size: {len(stderr_data)}")
-
-        return SSHResult(stdout_data, stderr_data, exit_status, exec_time)
+        logger.debug(
+            f"Command executed in {exec_time:.2f}s, stdout size: {len(stdout_data)}, stderr size: {len(stderr_data)}"
+        )
+
+        return SSHResult(
+            stdout_data.decode('utf-8', errors='replace'),
+            stderr_data.decode('utf-8', errors='replace'),
+            exit_status,
+            exec_time,
+        )
+
+    @staticmethod
+    def _drain_channel(channel, timeout=None):
+        """并发读取 stdout/stderr 直至远端退出且两路数据读尽"""
+        deadline = time.monotonic() + timeout if timeout else None
+        stdout_chunks, stderr_chunks = [], []
+        while True:
+            progressed = False
+            while channel.recv_ready():
+                stdout_chunks.append(channel.recv(CHANNEL_RECV_SIZE))
+                progressed = True
+            while channel.recv_stderr_ready():
+                stderr_chunks.append(channel.recv_stderr(CHANNEL_RECV_SIZE))
+                progressed = True
+            if progressed:
+                continue
+
+            if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"SSH command timed out after {timeout}s")
+            # 有 stdout 数据时 channel 可读；stderr 与退出状态依靠轮询间隔检查
+            select.select([channel], [], [], CHANNEL_POLL_INTERVAL)
+
+        return b"".join(stdout_chunks), b"".join(stderr_chunks)
 
     def close(self) -> None:
         """关闭SSH连接"""
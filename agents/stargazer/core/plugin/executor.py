@@ -1,10 +1,10 @@
 import asyncio
-import importlib
 import inspect
 from typing import Any, Dict, Optional
 
 from core.collection.contracts import AccessProbeResult, AccessProbeStatus
 from core.logger import logger
+from core.plugin.registry import plugin_registry
 from core.plugin.source_resolver import PluginResolution
 from core.plugin.yaml_reader import ExecutorConfig
 
@@ -75,9 +75,11 @@ class PluginExecutor:
         logger.debug(
             f" Loading collector: {collector_info['module']}.{collector_info['class']}"
         )
-        collector_class = await asyncio.to_thread(
-            self._load_collector_with_fallback, collector_info
-        )
+        collector_class = self._get_cached_collector(collector_info)
+        if collector_class is None:
+            collector_class = await asyncio.to_thread(
+                self._load_collector_with_fallback, collector_info
+            )
         if self.executor_config.is_job:
             os_type = self._determine_os_type()
             script_path = self.executor_config.get_script_path(os_type)
@@ -116,12 +118,22 @@ class PluginExecutor:
         # 使用默认值
         return self.executor_config.config.get("default_script", "linux")
 
+    def _get_cached_collector(self, collector_info: Dict[str, str]):
+        """注册表命中时直接返回类，避免每个目标一次线程池往返；导入失败需走回退逻辑时返回 None"""
+        try:
+            return plugin_registry.get_cached(
+                collector_info["module"], collector_info["class"]
+            )
+        except Exception:
+            return None
+
     @staticmethod
     def _load_collector(module_name: str, class_name: str):
-        """动态加载采集器类"""
+        """动态加载采集器类（经注册表缓存）"""
         try:
-            module = importlib.import_module(module_name)
-            collector_class = getattr(module, class_name)
+            collector_class = plugin_registry.load_collector_class(
+                module_name, class_name
+            )
             logger.debug(f"✅ Collector loaded: {module_name}.{class_name}")
             return collector_class
         except Exception as e:
@@ -0,0 +1,234 @@
+"""
+插件预热注册表
+
+- 启动时遍历插件目录，预读 plugin.yml、解析各执行器配置并导入采集器类，记录加载耗时
+- 运行期按 (module, class) 缓存采集器类（含导入失败），每个目标只做一次字典查找，不触碰文件系统
+- 后台任务定期（在线程中）比较插件目录签名（plugin.yml 增删改）与已加载采集器模块文件的修改时间，
+  变化时清空注册表与 YAML 缓存，并从 sys.modules 移除已加载的采集器模块，下次使用时重新导入；
+  采集器模块引用的公共模块（如 common/ 下的 SDK 封装）不会重新加载，修改后仍需重启进程
+"""
+
+import asyncio
+import importlib
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.logger import logger
+from core.plugin.yaml_reader import PluginYamlReader, yaml_reader
+
+CollectorKey = Tuple[str, str]
+
+
+@dataclass
+class PluginLoadReport:
+    loaded: int = 0
+    failed: int = 0
+    duration_seconds: float = 0.0
+    # (model_id, 耗时秒)，按耗时降序
+    slowest: List[Tuple[str, float]] = field(default_factory=list)
+    failures: Dict[str, str] = field(default_factory=dict)
+
+
+class PluginRegistry:
+    """采集器类与执行器配置的进程级缓存"""
+
+    def __init__(
+        self,
+        reader: Optional[PluginYamlReader] = None,
+        *,
+        check_interval_seconds: float = 30.0,
+    ):
+        self.reader = reader or yaml_reader
+        self.check_interval_seconds = float(check_interval_seconds)
+        self._classes: Dict[CollectorKey, type] = {}
+        self._failures: Dict[CollectorKey, Exception] = {}
+        # 已加载采集器模块 -> (源文件路径, 加载时的修改时间)，用于发现代码变更
+        self._module_files: Dict[str, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+        self._signature: Optional[tuple] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self.last_report: Optional[PluginLoadReport] = None
+
+    # ========== 采集器类 ==========
+
+    def get_cached(self, module_name: str, class_name: str) -> Optional[type]:
+        """命中返回类；未加载返回 None；曾导入失败则重新抛出原异常（纯内存查找，可在事件循环中调用）"""
+        key = (module_name, class_name)
+        collector_class = self._classes.get(key)
+        if collector_class is not None:
+            return collector_class
+        failure = self._failures.get(key)
+        if failure is not None:
+            raise failure
+        return None
+
+    def load_collector_class(self, module_name: str, class_name: str) -> type:
+        """导入并缓存采集器类（阻塞，调用方负责放到线程中）"""
+        key = (module_name, class_name)
+        cached = self._classes.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._classes.get(key)
+            if cached is not None:
+                return cached
+            failure = self._failures.get(key)
+            if failure is not None:
+                raise failure
+            try:
+                module = importlib.import_module(module_name)
+                collector_class = getattr(module, class_name)
+            except Exception as exc:
+                self._failures[key] = exc
+                raise
+            self._classes[key] = collector_class
+            self._remember_module_file(module)
+            return collector_class
+
+    def _remember_module_file(self, module) -> None:
+        path = getattr(module, "__file__", None)
+        if not path or module.__name__ in self._module_files:
+            return
+        try:
+            self._module_files[module.__name__] = (path, os.stat(path).st_mtime_ns)
+        except OSError:
+            return
+
+    def _changed_modules(self) -> List[str]:
+        changed = []
+        for module_name, (path, mtime_ns) in list(self._module_files.items()):
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime_ns:
+                changed.append(module_name)
+        return changed
+
+    # ========== 预热与失效 ==========
+
+    def _plugin_dirs(self) -> List[Path]:
+        resolver = self.reader.resolver
+        dirs = [Path(resolver.oss_plugins_base_dir)]
+        if resolver.is_enterprise_available():
+            dirs.append(Path(resolver.enterprise_plugins_base_dir))
+        return [path for path in dirs if path.is_dir()]
+
+    def _plugin_models(self) -> List[str]:
+        models = set()
+        for base_dir in self._plugin_dirs():
+            for entry in os.scandir(base_dir):
+                if entry.is_dir() and (Path(entry.path) / "plugin.yml").is_file():
+                    models.add(entry.name)
+        return sorted(models)
+
+    def compute_signature(self) -> tuple:
+        """插件目录签名：plugin.yml 路径与修改时间"""
+        items = []
+        for base_dir in self._plugin_dirs():
+            for entry in os.scandir(base_dir):
+                config_path = Path(entry.path) / "plugin.yml"
+                try:
+                    items.append((str(config_path), config_path.stat().st_mtime_ns))
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+        return tuple(sorted(items))
+
+    def invalidate(self) -> None:
+        """清空缓存并移除已加载的采集器模块，下次使用时按最新代码重新导入"""
+        with self._lock:
+            module_names = {module_name for module_name, _ in self._classes}
+            module_names.update(module_name for module_name, _ in self._failures)
+            self._classes.clear()
+            self._failures.clear()
+            self._module_files.clear()
+            for module_name in module_names:
+                sys.modules.pop(module_name, None)
+        self.reader.clear_cache()
+        importlib.invalidate_caches()
+
+    def refresh_if_changed(self) -> bool:
+        """检查插件目录与采集器模块文件，变化时失效缓存；返回是否发生失效（阻塞，需在线程中调用）"""
+        if self._signature is None:
+            return False
+        signature = self.compute_signature()
+        changed_modules = self._changed_modules()
+        if signature == self._signature and not changed_modules:
+            return False
+        self._signature = signature
+        logger.info(
+            "Plugin directory changed, invalidating plugin registry: changed_modules=%s",
+            ", ".join(changed_modules) or "-",
+        )
+        self.invalidate()
+        return True
+
+    def start_watch(self) -> None:
+        """启动后台变更检测任务（check_interval_seconds <= 0 时不启动）"""
+        if self.check_interval_seconds <= 0:
+            return
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(
+                self._watch(), name="plugin-registry-watch"
+            )
+
+    async def stop_watch(self) -> None:
+        task = self._watch_task
+        self._watch_task = None
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval_seconds)
+            try:
+                await asyncio.to_thread(self.refresh_if_changed)
+            except Exception:  # noqa: BLE001 - 检测失败不得终止采集运行时
+                logger.exception("Plugin registry change check failed")
+
+    def warm_up(self) -> PluginLoadReport:
+        """预读所有插件配置并导入采集器类（阻塞，启动时在线程中调用）"""
+        report = PluginLoadReport()
+        started = time.perf_counter()
+        self._signature = self.compute_signature()
+        timings = []
+        for model in self._plugin_models():
+            model_started = time.perf_counter()
+            try:
+                executors = self.reader.list_executors(model)
+                for executor_type in executors:
+                    resolved = self.reader.get_executor_config_with_resolution(model, executor_type)
+                    collector = resolved.executor_config.get_collector_info()
+                    self.load_collector_class(collector["module"], collector["class"])
+                    self.reader.remember_resolved(model, executor_type, resolved)
+            except Exception as exc:  # noqa: BLE001 - 单个插件缺依赖不影响启动
+                report.failed += 1
+                report.failures[model] = f"{type(exc).__name__}: {exc}"
+                logger.warning(f"Plugin warm-up failed: model_id={model}, error={exc}")
+                continue
+            report.loaded += 1
+            timings.append((model, time.perf_counter() - model_started))
+        report.duration_seconds = time.perf_counter() - started
+        report.slowest = sorted(timings, key=lambda item: item[1], reverse=True)[:5]
+        self.last_report = report
+        logger.info(
+            "Plugin registry warmed up: loaded=%s failed=%s duration=%.2fs slowest=%s",
+            report.loaded,
+            report.failed,
+            report.duration_seconds,
+            ", ".join(f"{model}={cost * 1000:.0f}ms" for model, cost in report.slowest) or "-",
+        )
+        return report
+
+
+# 全局实例
+plugin_registry = PluginRegistry(
+    check_interval_seconds=float(os.getenv("PLUGIN_REGISTRY_CHECK_INTERVAL", "30"))
+)
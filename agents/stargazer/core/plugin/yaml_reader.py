@@ -235,6 +235,16 @@ class PluginYamlReader:
                 self._resolved_executor_cache[cache_key] = cached
             return cached
 
+    def remember_resolved(
+        self,
+        model: str,
+        executor_type: str,
+        resolved: ResolvedExecutorConfig,
+        prefer_enterprise: bool = True,
+    ) -> None:
+        """写入异步解析缓存（插件预热时使用）"""
+        self._resolved_executor_cache[(model, executor_type, prefer_enterprise)] = resolved
+
     def get_executor_config(self, model: str, executor_type: str) -> ExecutorConfig:
         """
         获取执行器配置
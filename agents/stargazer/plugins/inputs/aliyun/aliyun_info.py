@@ -89,6 +89,11 @@ from aliyunsdkvpc.request.v20160428 import (
     DescribeVSwitchesRequest,
 )
 from common.cmp.cloud_apis.constant import CloudType
+from common.cmp.cloud_apis.resource_apis.concurrent_paging import (
+    fetch_all_items,
+    fetch_pages,
+    get_account_rate_limiter,
+)
 from common.cmp.cloud_apis.resource_apis.cw_aliyun import RESOURCE_MAP
 from common.cmp.cloud_apis.resource_apis.resource_format.common.base_format import (
     get_format_method,
@@ -272,6 +277,8 @@ class Aliyun(object):
         self.cloud_type = CloudType.ALIYUN.value
         self.auth_config = auth_config
         self.custom_endpoint = custom_endpoint
+        # 同一账号的所有分页请求共享限速，多种资源并发翻页时不触发流控
+        self.rate_limiter = get_account_rate_limiter(auth_config.access_key_id)
 
         # 如果有自定义endpoint，优先使用自定义endpoint
         domain_config = copy.deepcopy(auth_config)
@@ -408,26 +415,24 @@ class Aliyun(object):
 
     def _handle_list_request_with_page(self, resource, request):
         """
-        获取有分页的资源数据
+        获取有分页的资源数据：首页取 TotalCount，其余页并发拉取
         Args:
             resource (str):
             request (client of sdk):
         Returns:
 
         """
-        page_number = 1
         page_size = 50
+        key1, key2 = RESOURCE_MAP[resource]
+
+        def fetch_page(page_number):
+            page_request = copy.deepcopy(request)
+            page_request.set_PageSize(page_size)
+            page_request.set_PageNumber(page_number)
+            return self._get_result(page_request, True)
+
         try:
-            request.set_PageSize(page_size)
-            request.set_PageNumber(page_number)
-            ali_response = self._get_result(request, True)
-            total_count = ali_response.get("TotalCount", 0)
-            page = total_count // 50 if total_count % 50 == 0 else total_count // 50 + 1
-            key1, key2 = RESOURCE_MAP[resource]
-            for i in range(page):
-                request.set_PageNumber(str(i + 2))
-                ali_res = self._get_result(request, True)
-                ali_response[key1][key2].extend(ali_res[key1][key2])
+            ali_response = self._merge_pages(fetch_page, key1, key2, page_size)
         except Exception as e:
             print("获取阿里云资源{}调用接口失败{}".format(resource, e))
             return {"result": False, "message": str(e)}
@@ -436,26 +441,57 @@ class Aliyun(object):
 
     def _handle_list_request_with_page_c(self, resource, request):
         """CommonRequest 获取有分页的资源数据"""
-        page_number = 1
         page_size = 50
-        try:
-            request = self._add_required_params(
-                request, {"PageNumber": page_number, "PageSize": page_size}
+        key1, key2 = RESOURCE_MAP[resource]
+
+        def fetch_page(page_number):
+            page_request = self._add_required_params(
+                copy.deepcopy(request), {"PageNumber": page_number, "PageSize": page_size}
             )
-            ali_response = self._get_result_c(request, True)
-            total_count = ali_response.get("TotalCount", 0)
-            page = (total_count + page_size - 1) // page_size
-            key1, key2 = RESOURCE_MAP[resource]
-            for i in range(page):
-                request = self._add_required_params(request, {"PageNumber": str(i + 2)})
-                ali_res = self._get_result_c(request, True)
-                ali_response[key1][key2].extend(ali_res[key1][key2])
+            return self._get_result_c(page_request, True)
+
+        try:
+            ali_response = self._merge_pages(fetch_page, key1, key2, page_size)
         except Exception as e:
             print("获取阿里云资源{}调用接口失败{}".format(resource, e))
             return {"result": False, "message": str(e)}
         data = self._format_resource_result(resource, ali_response)
         return {"result": True, "data": data}
 
+    def _merge_pages(self, fetch_page, key1, key2, page_size):
+        """并发拉取全部分页，并把后续页的资源合并到首页响应的 key1.key2 中"""
+        responses = fetch_pages(
+            fetch_page,
+            lambda response: response.get(key1, {}).get(key2, []),
+            page_size,
+            total_of=lambda response: response.get("TotalCount", 0),
+            rate_limiter=self.rate_limiter,
+        )
+        ali_response = responses[0]
+        for response in responses[1:]:
+            ali_response[key1][key2].extend(response[key1][key2])
+        return ali_response
+
+    def _list_all_pages(self, send, request, items_of, page_size=100, total_of=None, page_attr="page_number"):
+        """
+        新版 SDK（Tea）分页查询：每页复制一份请求对象，首页取总数后其余页并发拉取
+        Args:
+            send (callable): send(request) -> TeaCore.to_map 后的响应
+            request: 已设置好查询条件的请求对象
+            items_of (callable): 从响应中取出当前页资源
+            page_size (int): 每页条数
+            total_of (callable): 从响应中取出总数；为 None 时顺序翻页直到空页
+            page_attr (str): 页码字段名
+        """
+
+        def fetch_page(page_number):
+            page_request = copy.deepcopy(request)
+            setattr(page_request, page_attr, page_number)
+            page_request.page_size = page_size
+            return send(page_request)
+
+        return fetch_all_items(fetch_page, items_of, page_size, total_of=total_of, rate_limiter=self.rate_limiter)
+
     def _handle_list_request_with_next_token(self, resource, request, **kwargs):
         """
         获取有分页的资源数据,根据NextToke获得下一页数据.
@@ -1048,21 +1084,16 @@ class Aliyun(object):
         if engine:
             describe_db_instances_request.engine = engine
         describe_db_instances_request.region_id = self.RegionId
-        describe_db_instances_request.page_number = 1
-        describe_db_instances_request.page_size = 100
         describe_db_instances_request.instance_level = 1
-        rds_instances = []
         try:
-            while True:
-                resp = self.rds_client.describe_dbinstances_with_options(
-                    describe_db_instances_request, runtime
-                )
-                result = TeaCore.to_map(resp.body)
-                db_instances = result.get("Items", {}).get("DBInstance", [])
-                if not db_instances:
-                    break
-                rds_instances.extend(db_instances)
-                describe_db_instances_request.page_number += 1
+            rds_instances = self._list_all_pages(
+                lambda request: TeaCore.to_map(
+                    self.rds_client.describe_dbinstances_with_options(request, runtime).body
+                ),
+                describe_db_instances_request,
+                lambda result: result.get("Items", {}).get("DBInstance", []),
+                total_of=lambda result: result.get("TotalRecordCount"),
+            )
             return {"result": True, "data": rds_instances}
         except Exception as e:
             import traceback
@@ -1079,20 +1110,15 @@ class Aliyun(object):
         )
         runtime = util_models.RuntimeOptions()
         describe_instances_request.region_id = self.RegionId
-        describe_instances_request.page_number = 1
-        describe_instances_request.page_size = 100
-        redis_instances = []
         try:
-            while True:
-                resp = self.kvs_client.describe_instances_with_options(
-                    describe_instances_request, runtime
-                )
-                result = TeaCore.to_map(resp.body)
-                instances = result.get("Instances", {}).get("KVStoreInstance", [])
-                if not instances:
-                    break
-                redis_instances.extend(instances)
-                describe_instances_request.page_number += 1
+            redis_instances = self._list_all_pages(
+                lambda request: TeaCore.to_map(
+                    self.kvs_client.describe_instances_with_options(request, runtime).body
+                ),
+                describe_instances_request,
+                lambda result: result.get("Instances", {}).get("KVStoreInstance", []),
+                total_of=lambda result: result.get("TotalCount"),
+            )
             return {"result": True, "data": redis_instances}
         except Exception as e:
             import traceback
@@ -1118,18 +1144,16 @@ serverless"""
         try:
             for inst_type in db_instance_types:
                 describe_db_instances_request.dbinstance_type = inst_type
-                describe_db_instances_request.page_number = 1
-                describe_db_instances_request.page_size = 100
-                while True:
-                    resp = self.dds_client.describe_dbinstances_with_options(
-                        describe_db_instances_request, runtime
+                mongodb_instances.extend(
+                    self._list_all_pages(
+                        lambda request: TeaCore.to_map(
+                            self.dds_client.describe_dbinstances_with_options(request, runtime).body
+                        ),
+                        describe_db_instances_request,
+                        lambda result: result.get("DBInstances", {}).get("DBInstance", []),
+                        total_of=lambda result: result.get("TotalCount"),
                     )
-                    result = TeaCore.to_map(resp.body)
-                    instances = result.get("DBInstances", {}).get("DBInstance", [])
-                    if not instances:
-                        break
-                    mongodb_instances.extend(instances)
-                    describe_db_instances_request.page_number += 1
+                )
             return {"result": True, "data": mongodb_instances}
         except Exception as e:
             import traceback
@@ -1291,27 +1315,15 @@ serverless"""
         )
         runtime = util_models.RuntimeOptions()
         describe_load_balancers_request.region_id = self.RegionId
-        describe_load_balancers_request.page_number = 1
-        describe_load_balancers_request.page_size = 100
-        clb_instances = []
         try:
-            while True:
-                resp = self.slb_client.describe_load_balancers_with_options(
-                    describe_load_balancers_request, runtime
-                )
-                result = TeaCore.to_map(resp.body)
-                instances = result.get("LoadBalancers", {}).get("LoadBalancer", [])
-                if not instances:
-                    break
-                clb_instances.extend(instances)
-                total = result.get("TotalCount", 0)
-                if (
-                    total
-                    <= describe_load_balancers_request.page_number
-                    * describe_load_balancers_request.page_size
-                ):
-                    break
-                describe_load_balancers_request.page_number += 1
+            clb_instances = self._list_all_pages(
+                lambda request: TeaCore.to_map(
+                    self.slb_client.describe_load_balancers_with_options(request, runtime).body
+                ),
+                describe_load_balancers_request,
+                lambda result: result.get("LoadBalancers", {}).get("LoadBalancer", []),
+                total_of=lambda result: result.get("TotalCount", 0),
+            )
             return {"result": True, "data": clb_instances}
         except Exception as e:
             import traceback
@@ -1326,27 +1338,15 @@ serverless"""
         describe_clusters_request = cs20151215_models.DescribeClustersV1Request()
         runtime = util_models.RuntimeOptions()
         describe_clusters_request.region_id = self.RegionId
-        describe_clusters_request.page_number = 1
-        describe_clusters_request.page_size = 100
-        k8s_clusters = []
         try:
-            while True:
-                resp = self.cs_client.describe_clusters_v1with_options(
-                    describe_clusters_request, {}, runtime
-                )
-                result = TeaCore.to_map(resp.body)
-                clusters = result.get("clusters", [])
-                if not clusters:
-                    break
-                k8s_clusters.extend(clusters)
-                total = result.get("page_info").get("total", 0)
-                if (
-                    total
-                    <= describe_clusters_request.page_number
-                    * describe_clusters_request.page_size
-                ):
-                    break
-                describe_clusters_request.page_number += 1
+            k8s_clusters = self._list_all_pages(
+                lambda request: TeaCore.to_map(
+                    self.cs_client.describe_clusters_v1with_options(request, {}, runtime).body
+                ),
+                describe_clusters_request,
+                lambda result: result.get("clusters", []),
+                total_of=lambda result: (result.get("page_info") or {}).get("total", 0),
+            )
             return {"result": True, "data": k8s_clusters}
         except Exception as e:
             print("list_k8s_clusters error")
@@ -1361,27 +1361,15 @@ serverless"""
         )
         runtime = util_models.RuntimeOptions()
         describe_eip_addresses_request.region_id = self.RegionId
-        describe_eip_addresses_request.page_number = 1
-        describe_eip_addresses_request.page_size = 100
-        eips = []
         try:
-            while True:
-                resp = self.vpc_client.describe_eip_addresses_with_options(
-                    describe_eip_addresses_request, runtime
-                )
-                result = TeaCore.to_map(resp.body)
-                eip_addresses = result.get("EipAddresses", {}).get("EipAddress", [])
-                if not eip_addresses:
-                    break
-                eips.extend(eip_addresses)
-                total = result.get("TotalCount", 0)
-                if (
-                    total
-                    <= describe_eip_addresses_request.page_number
-                    * describe_eip_addresses_request.page_size
-                ):
-                    break
-                describe_eip_addresses_request.page_number += 1
+            eips = self._list_all_pages(
+                lambda request: TeaCore.to_map(
+                    self.vpc_client.describe_eip_addresses_with_options(request, runtime).body
+                ),
+                describe_eip_addresses_request,
+                lambda result: result.get("EipAddresses", {}).get("EipAddress", []),
+                total_of=lambda result: result.get("TotalCount", 0),
+            )
             return {"result": True, "data": eips}
         except Exception as e:
             print("list_eips error")
@@ -1394,26 +1382,16 @@ serverless"""
         list_clusters_request = mse20190531_models.ListClustersRequest()
         runtime = util_models.RuntimeOptions()
         list_clusters_request.region_id = self.RegionId
-        list_clusters_request.page_num = 1
-        list_clusters_request.page_size = 100
-        mse_clusters = []
         try:
-            while True:
-                resp = self.mse_client.list_clusters_with_options(
-                    list_clusters_request, runtime
-                )
-                result = TeaCore.to_map(resp.body)
-                clusters = result.get("Data", [])
-                if not clusters:
-                    break
-                mse_clusters.extend(clusters)
-                total = result.get("TotalCount", 0)
-                if (
-                    total
-                    <= list_clusters_request.page_num * list_clusters_request.page_size
-                ):
-                    break
-                list_clusters_request.page_num += 1
+            mse_clusters = self._list_all_pages(
+                lambda request: TeaCore.to_map(
+                    self.mse_client.list_clusters_with_options(request, runtime).body
+                ),
+                list_clusters_request,
+                lambda result: result.get("Data", []),
+                total_of=lambda result: result.get("TotalCount", 0),
+                page_attr="page_num",
+            )
             return {"result": True, "data": mse_clusters}
         except Exception as e:
             print("list_mse_clusters error")
@@ -1554,29 +1532,17 @@ serverless"""
         list_load_balancers_request = alb_20200616_models.ListLoadBalancersRequest()
         runtime = util_models.RuntimeOptions()
         list_load_balancers_request.region_id = self.RegionId
-        list_load_balancers_request.page_number = 1
-        list_load_balancers_request.page_size = 100
-        alb_instances = []
         try:
-            while True:
-                resp = self.alb_client.list_load_balancers_with_options(
-                    list_load_balancers_request, runtime
-                )
-                result = TeaCore.to_map(resp.body)
-                instances = result.get("LoadBalancers", {})
-                if not instances:
-                    break
-                for i in instances:
-                    i.update(region_id=self.RegionId)
-                alb_instances.extend(instances)
-                total = result.get("TotalCount", 0)
-                if (
-                    total
-                    <= list_load_balancers_request.page_number
-                    * list_load_balancers_request.page_size
-                ):
-                    break
-                list_load_balancers_request.page_number += 1
+            alb_instances = self._list_all_pages(
+                lambda request: TeaCore.to_map(
+                    self.alb_client.list_load_balancers_with_options(request, runtime).body
+                ),
+                list_load_balancers_request,
+                lambda result: result.get("LoadBalancers", {}),
+                total_of=lambda result: result.get("TotalCount", 0),
+            )
+            for i in alb_instances:
+                i.update(region_id=self.RegionId)
             return {"result": True, "data": alb_instances}
         except Exception as e:
             print("list_alb error")
@@ -1587,27 +1553,15 @@ serverless"""
         describe_file_systems_request = nas20170626_models.DescribeFileSystemsRequest()
         runtime = util_models.RuntimeOptions()
         describe_file_systems_request.region_id = self.RegionId
-        describe_file_systems_request.page_number = 1
-        describe_file_systems_request.page_size = 100
-        nas_instances = []
         try:
-            while True:
-                resp = self.nas_client.describe_file_systems_with_options(
-                    describe_file_systems_request, runtime
-                )
-                result = TeaCore.to_map(resp.body)
-                instances = result.get("FileSystems", {}).get("FileSystem", [])
-                if not instances:
-                    break
-                nas_instances.extend(instances)
-                total = result.get("TotalCount", 0)
-                if (
-                    total
-                    <= describe_file_systems_request.page_number
-                    * describe_file_systems_request.page_size
-                ):
-                    break
-                describe_file_systems_request.page_number += 1
+            nas_instances = self._list_all_pages(
+                lambda request: TeaCore.to_map(
+                    self.nas_client.describe_file_systems_with_options(request, runtime).body
+                ),
+                describe_file_systems_request,
+                lambda result: result.get("FileSystems", {}).get("FileSystem", []),
+                total_of=lambda result: result.get("TotalCount", 0),
+            )
             return {"result": True, "data": nas_instances}
         except Exception as e:
             print("list_nas error")
@@ -0,0 +1,178 @@
+"""
+CollectionScheduler 确定性仿真基准
+
+在虚拟时钟事件循环上运行（不真正 sleep、结果可复现），对比：
+- round_robin：所有 Run 等权、无插件上限、无优先级（等价于旧调度）
+- weighted：按需调试 Run 高优先级、云采集 Run 权重更高、VMware 插件并发上限
+
+输出每个 Run 的目标时延 p50/p99、完成时间，以及竞争期内的加权 Jain 公平性指数。
+
+用法：
+    python -m scripts.bench_collection_scheduler
+"""
+
+from __future__ import annotations
+
+import asyncio
+import selectors
+from dataclasses import dataclass
+
+from core.collection.scheduler import CollectionScheduler
+
+
+class _VirtualClockSelector(selectors.SelectSelector):
+    """没有就绪 IO 时直接把虚拟时钟推进到下一个定时器，而不是真正等待"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.loop: VirtualTimeEventLoop | None = None
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if not events and timeout and self.loop is not None:
+            self.loop.advance(timeout)
+        return events
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self) -> None:
+        selector = _VirtualClockSelector()
+        super().__init__(selector=selector)
+        selector.loop = self
+        self._virtual_now = 0.0
+
+    def time(self) -> float:
+        return self._virtual_now
+
+    def advance(self, seconds: float) -> None:
+        self._virtual_now += seconds
+
+
+@dataclass(frozen=True)
+class SimRun:
+    run_id: str
+    plugin: str
+    targets: int
+    cost_seconds: float
+    arrival_seconds: float = 0.0
+    weight: float = 1.0
+    priority: int = 0
+    deadline_seconds: float | None = None
+
+
+def default_workload() -> list[SimRun]:
+    return [
+        SimRun("cloud", "aliyun_info", targets=2000, cost_seconds=0.5),
+        SimRun("vmware", "vmware_info", targets=400, cost_seconds=6.0),
+        SimRun("network", "snmp_facts", targets=600, cost_seconds=1.0, arrival_seconds=5.0),
+        SimRun("debug", "host_info", targets=5, cost_seconds=0.5, arrival_seconds=20.0),
+        SimRun("nightly", "mysql_info", targets=300, cost_seconds=1.0, arrival_seconds=10.0, deadline_seconds=90.0),
+    ]
+
+
+SCENARIOS = {
+    "round_robin": {
+        "plugin_limits": {},
+        "overrides": {},
+    },
+    "weighted": {
+        "plugin_limits": {"vmware_info": 20},
+        "overrides": {
+            "cloud": {"weight": 2.0},
+            "debug": {"priority": 10},
+        },
+    },
+}
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[int((len(ordered) - 1) * fraction)]
+
+
+def jain_index(values: list[float]) -> float:
+    if not values or not any(values):
+        return 1.0
+    return sum(values) ** 2 / (len(values) * sum(value * value for value in values))
+
+
+async def _simulate(workload: list[SimRun], *, max_in_flight: int, scenario: dict) -> dict:
+    loop = asyncio.get_running_loop()
+    scheduler = CollectionScheduler(
+        max_in_flight=max_in_flight,
+        plugin_limits=scenario["plugin_limits"],
+    )
+    latencies: dict[str, list[float]] = {run.run_id: [] for run in workload}
+    dispatch_log: list[tuple[float, str]] = []
+    finished: dict[str, float] = {}
+    weights: dict[str, float] = {}
+
+    async def submit(run: SimRun) -> None:
+        await asyncio.sleep(run.arrival_seconds)
+        options = {"weight": run.weight, "priority": run.priority, **scenario["overrides"].get(run.run_id, {})}
+        weights[run.run_id] = options["weight"]
+        submitted_at = loop.time()
+        deadline = submitted_at + run.deadline_seconds if run.deadline_seconds else None
+
+        async def handle(index: int) -> int:
+            dispatch_log.append((loop.time(), run.run_id))
+            await asyncio.sleep(run.cost_seconds)
+            latencies[run.run_id].append(loop.time() - submitted_at)
+            return index
+
+        await scheduler.execute(run.run_id, range(run.targets), handle, plugin=run.plugin, deadline=deadline, **options)
+        finished[run.run_id] = loop.time() - submitted_at
+
+    await asyncio.gather(*(submit(run) for run in workload))
+    await scheduler.shutdown()
+
+    # 竞争期：持续积压的 Run（目标数不少于窗口、且不受插件上限约束）均已到达且均未完成的时间段，
+    # 统计各 Run 单位权重获得的派发数
+    backlogged = [
+        run for run in workload if run.targets >= max_in_flight and run.plugin not in scenario["plugin_limits"]
+    ]
+    contention_start = max(run.arrival_seconds for run in backlogged)
+    contention_end = min(run.arrival_seconds + finished[run.run_id] for run in backlogged)
+    shares = {run.run_id: 0 for run in backlogged}
+    for dispatched_at, run_id in dispatch_log:
+        if run_id in shares and contention_start <= dispatched_at < contention_end:
+            shares[run_id] += 1
+    return {
+        "runs": {
+            run.run_id: {
+                "p50": _percentile(sorted(latencies[run.run_id]), 0.5),
+                "p99": _percentile(sorted(latencies[run.run_id]), 0.99),
+                "finished": finished[run.run_id],
+            }
+            for run in workload
+        },
+        "fairness": jain_index([shares[run_id] / weights[run_id] for run_id in shares]),
+        "makespan": loop.time(),
+    }
+
+
+def run_simulation(workload: list[SimRun] | None = None, *, max_in_flight: int = 50) -> dict[str, dict]:
+    """运行全部场景，返回 {scenario: report}"""
+    workload = workload or default_workload()
+    reports = {}
+    for name, scenario in SCENARIOS.items():
+        loop = VirtualTimeEventLoop()
+        try:
+            reports[name] = loop.run_until_complete(_simulate(workload, max_in_flight=max_in_flight, scenario=scenario))
+        finally:
+            loop.close()
+    return reports
+
+
+def main() -> None:
+    reports = run_simulation()
+    for name, report in reports.items():
+        print(f"== {name}  makespan={report['makespan']:.1f}s  fairness(jain)={report['fairness']:.3f}")
+        print(f"{'run':<10}{'p50(s)':>10}{'p99(s)':>10}{'finished(s)':>14}")
+        for run_id, stats in report["runs"].items():
+            print(f"{run_id:<10}{stats['p50']:>10.1f}{stats['p99']:>10.1f}{stats['finished']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""阿里云采集插件真实采集路径的并发分页测试：SDK 客户端替换为按页返回的桩，不访问云端。"""
+
+import importlib.abc
+import importlib.util
+import json
+import sys
+import threading
+import time
+import types
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# 采集插件依赖的阿里云 SDK 顶层包；未安装时以空壳模块代替，采集中用到的客户端/请求类在下面逐个替换
+_SDK_ROOTS = ("oss2", "Tea", "alibabacloud_", "aliyunsdk")
+
+
+class _StubType(type):
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return MagicMock(name=f"{cls.__name__}.{name}")
+
+
+class _StubObject(metaclass=_StubType):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return MagicMock(name=name)
+
+
+class _StubModule(types.ModuleType):
+    __path__ = []
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        # 小写名按子模块处理（models / client 等），其余按类处理
+        if name[0].islower():
+            value = _StubModule(f"{self.__name__}.{name}")
+        else:
+            value = _StubType(name, (_StubObject,), {"__module__": self.__name__})
+        setattr(self, name, value)
+        return value
+
+
+class _MissingSDKFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def __init__(self):
+        self._installed = {}
+
+    def _is_missing(self, root):
+        if root not in self._installed:
+            sys.meta_path.remove(self)
+            try:
+                self._installed[root] = importlib.util.find_spec(root) is not None
+            finally:
+                sys.meta_path.insert(0, self)
+        return not self._installed[root]
+
+    def find_spec(self, fullname, path, target=None):
+        root = fullname.split(".")[0]
+        if root.startswith(_SDK_ROOTS) and self._is_missing(root):
+            return importlib.util.spec_from_loader(fullname, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        return _StubModule(spec.name)
+
+    def exec_module(self, module):
+        pass
+
+
+@pytest.fixture
+def aliyun_info():
+    finder = _MissingSDKFinder()
+    with patch.dict(sys.modules):
+        sys.meta_path.insert(0, finder)
+        try:
+            sys.modules.pop("plugins.inputs.aliyun.aliyun_info", None)
+            sys.modules.pop("common.cmp.cloud_apis.resource_apis.cw_aliyun", None)
+            yield importlib.import_module("plugins.inputs.aliyun.aliyun_info")
+        finally:
+            sys.meta_path.remove(finder)
+
+
+class _TeaRequest:
+    """Tea 请求模型：只承载查询字段"""
+
+
+class _AcsRequest:
+    """旧版 SDK 请求：set_Xxx 记录到 params"""
+
+    def __init__(self):
+        self.params = {}
+
+    def __getattr__(self, name):
+        if name.startswith("set_"):
+            return lambda value: self.params.__setitem__(name[4:], value)
+        raise AttributeError(name)
+
+
+_TEA_MODELS = types.SimpleNamespace(
+    DescribeDBInstancesRequest=_TeaRequest,
+    DescribeInstancesRequest=_TeaRequest,
+    DescribeLoadBalancersRequest=_TeaRequest,
+    GetInstanceListRequest=_TeaRequest,
+    ListBucketsRequest=_TeaRequest,
+    ListBucketsHeaders=_TeaRequest,
+)
+
+
+class _CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            self.acquired += 1
+
+
+class _PagedAPI:
+    """按页号返回数据，记录请求的页号与并发峰值"""
+
+    def __init__(self, total, page_size, make_item, delay=0.02):
+        self.total, self.page_size, self.make_item, self.delay = total, page_size, make_item, delay
+        self.pages = []
+        self._active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def page(self, page_number):
+        page_number = int(page_number)
+        with self._lock:
+            self.pages.append(page_number)
+            self._active += 1
+            self.peak = max(self.peak, self._active)
+        time.sleep(self.delay)
+        with self._lock:
+            self._active -= 1
+        start = (page_number - 1) * self.page_size
+        return [self.make_item(i) for i in range(start, min(start + self.page_size, self.total))]
+
+
+def _ecs_instance(i):
+    return {
+        "InstanceId": f"i-{i}",
+        "InstanceName": f"ecs-{i}",
+        "SecurityGroupIds": {"SecurityGroupId": []},
+        "EipAddress": {"IpAddress": ""},
+        "PublicIpAddress": {"IpAddress": []},
+        "NetworkInterfaces": {"NetworkInterface": []},
+        "VpcAttributes": {"PrivateIpAddress": {"IpAddress": [f"10.0.0.{i % 250}"]}, "VpcId": "vpc-1"},
+        "InstanceChargeType": "PostPaid",
+    }
+
+
+@pytest.mark.asyncio
+async def test_list_all_resources_fetches_pages_concurrently(aliyun_info, monkeypatch):
+    ecs = _PagedAPI(230, 50, _ecs_instance)
+    rds = _PagedAPI(250, 100, lambda i: {"DBInstanceId": f"rm-{i}", "RegionId": "cn-hangzhou"})
+    clb = _PagedAPI(120, 100, lambda i: {"LoadBalancerId": f"lb-{i}", "CreateTime": "2026-01-01T00:00Z"})
+
+    class AcsClient:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def do_action_with_exception(self, request):
+            instances = ecs.page(request.params["PageNumber"])
+            return json.dumps({"TotalCount": ecs.total, "Instances": {"Instance": instances}})
+
+    def tea_client(respond):
+        return lambda config: types.SimpleNamespace(**respond)
+
+    def body(**payload):
+        return types.SimpleNamespace(body=payload)
+
+    monkeypatch.setattr(aliyun_info, "client", types.SimpleNamespace(AcsClient=AcsClient))
+    monkeypatch.setattr(aliyun_info, "DescribeInstancesRequest", types.SimpleNamespace(DescribeInstancesRequest=_AcsRequest))
+    monkeypatch.setattr(aliyun_info, "TeaCore", types.SimpleNamespace(to_map=lambda payload: payload))
+    monkeypatch.setattr(aliyun_info, "open_api_models", types.SimpleNamespace(Config=lambda **kwargs: types.SimpleNamespace(**kwargs)))
+    for name in (
+        "rds_20140815_models",
+        "r_kvstore_20150101_models",
+        "dds_20151201_models",
+        "slb_20140515_models",
+        "alikafka_20190916_models",
+        "oss_20190517_models",
+    ):
+        monkeypatch.setattr(aliyun_info, name, _TEA_MODELS)
+    monkeypatch.setattr(
+        aliyun_info,
+        "Rds20140815Client",
+        tea_client({"describe_dbinstances_with_options": lambda request, runtime: body(
+            TotalRecordCount=rds.total, Items={"DBInstance": rds.page(request.page_number)}
+        )}),
+    )
+    monkeypatch.setattr(
+        aliyun_info,
+        "Slb20140515Client",
+        tea_client({"describe_load_balancers_with_options": lambda request, runtime: body(
+            TotalCount=clb.total, LoadBalancers={"LoadBalancer": clb.page(request.page_number)}
+        )}),
+    )
+    monkeypatch.setattr(
+        aliyun_info,
+        "R_kvstore20150101Client",
+        tea_client({"describe_instances_with_options": lambda request, runtime: body(TotalCount=0, Instances={})}),
+    )
+    monkeypatch.setattr(
+        aliyun_info,
+        "Dds20151201Client",
+        tea_client({"describe_dbinstances_with_options": lambda request, runtime: body(TotalCount=0, DBInstances={})}),
+    )
+    monkeypatch.setattr(
+        aliyun_info,
+        "alikafka20190916Client",
+        tea_client({"get_instance_list_with_options": lambda request, runtime: body(InstanceList={})}),
+    )
+    monkeypatch.setattr(
+        aliyun_info,
+        "Oss20190517Client",
+        tea_client({"list_buckets_with_options": lambda request, headers, runtime: body(buckets=[])}),
+    )
+    limiters = {}
+    monkeypatch.setattr(aliyun_info, "get_account_rate_limiter", lambda account: limiters.setdefault(account, _CountingLimiter()))
+
+    collector = aliyun_info.CwAliyun({"secret_id": "ak", "secret_key": "sk", "region_id": "cn-hangzhou"})
+    result = await collector.list_all_resources()
+
+    assert result["success"] is True
+    data = result["result"]
+    assert [item["resource_id"] for item in data["aliyun_ecs"]] == [f"i-{i}" for i in range(230)]
+    assert [item["resource_id"] for item in data["aliyun_mysql"]] == [f"rm-{i}" for i in range(250)]
+    assert [item["resource_id"] for item in data["aliyun_clb"]] == [f"lb-{i}" for i in range(120)]
+    # 首页取总数后只请求剩余页，不再多请求一个空页；其余页并发拉取
+    assert sorted(ecs.pages) == [1, 2, 3, 4, 5]
+    assert ecs.peak > 1
+    assert sorted(clb.pages) == [1, 2]
+    assert sorted(rds.pages) == [1, 1, 2, 2, 3, 3]  # Mysql / PostgreSQL 各一轮
+    # 所有资源的分页请求都经过同一账号的限速器
+    assert list(limiters) == ["ak"]
+    assert limiters["ak"].acquired >= len(ecs.pages) + len(rds.pages) + len(clb.pages)
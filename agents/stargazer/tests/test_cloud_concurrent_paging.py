@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from common.cmp.cloud_apis.resource_apis.concurrent_paging import (
+    RateLimiter,
+    fetch_all_items,
+    fetch_pages,
+    get_account_rate_limiter,
+)
+
+
+def _paged_api(total, page_size, delay=0.0):
+    calls = []
+    active = [0]
+    peak = [0]
+    lock = threading.Lock()
+
+    def fetch_page(page_number):
+        with lock:
+            calls.append(page_number)
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(delay)
+        start = (page_number - 1) * page_size
+        items = list(range(start, min(start + page_size, total)))
+        with lock:
+            active[0] -= 1
+        return {"TotalCount": total, "Items": items}
+
+    return fetch_page, calls, peak
+
+
+def test_fetches_remaining_pages_concurrently_in_order():
+    fetch_page, calls, peak = _paged_api(total=1050, page_size=100, delay=0.02)
+
+    items = fetch_all_items(
+        fetch_page,
+        lambda response: response["Items"],
+        100,
+        total_of=lambda response: response["TotalCount"],
+        max_workers=4,
+    )
+
+    assert items == list(range(1050))
+    assert sorted(calls) == list(range(1, 12))
+    assert calls[0] == 1
+    assert 1 < peak[0] <= 4
+
+
+def test_without_total_falls_back_to_sequential_until_empty_page():
+    fetch_page, calls, peak = _paged_api(total=250, page_size=100)
+
+    responses = fetch_pages(fetch_page, lambda response: response["Items"], 100)
+
+    assert calls == [1, 2, 3, 4]
+    assert peak[0] == 1
+    assert sum(len(response["Items"]) for response in responses) == 250
+
+
+def test_page_failure_propagates():
+    def fetch_page(page_number):
+        if page_number == 3:
+            raise RuntimeError("Throttling.User")
+        return {"TotalCount": 500, "Items": [page_number]}
+
+    with pytest.raises(RuntimeError):
+        fetch_all_items(fetch_page, lambda response: response["Items"], 100, total_of=lambda r: r["TotalCount"])
+
+
+def test_rate_limiter_is_shared_per_account_and_bounds_rate():
+    assert get_account_rate_limiter("ak-1") is get_account_rate_limiter("ak-1")
+    assert get_account_rate_limiter("ak-1") is not get_account_rate_limiter("ak-2")
+
+    limiter = RateLimiter(rate=50, burst=1)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - started >= 0.09
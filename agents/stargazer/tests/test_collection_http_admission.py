@@ -4,6 +4,7 @@ import api.collect as collect_api
 import api.health as health_api
 import api.monitor as monitor_api
 import pytest
+from core.collection.metrics import CollectionMetrics
 from core.collection.request_identity import build_request_task_id
 from core.collection.runtime import Submission, SubmissionStatus
 from core.collection.yaml_target_policy import apply_yaml_target_policy
@@ -353,3 +354,32 @@ async def test_health_metrics_expose_capacity_and_event_loop_lag(monkeypatch):
     assert "stargazer_collection_job_node_info_lookup_found_total 140" in body
     assert "stargazer_collection_job_node_info_lookup_duration_seconds_p99 0.085" in body
     assert 'stargazer_collection_execution_mode_success_total{execution_mode="async"} 119' in body
+
+
+@pytest.mark.asyncio
+async def test_health_metrics_expose_labeled_histograms(monkeypatch):
+    metrics = CollectionMetrics()
+    metrics.observe(
+        "plugin_duration_seconds",
+        0.3,
+        labels={"plugin": "host_info", "model_id": "host"},
+    )
+
+    class RuntimeApplication:
+        async def stats(self):
+            return {"healthy": True}
+
+    monkeypatch.setattr(
+        health_api,
+        "get_collection_application",
+        lambda: SimpleNamespace(stats=RuntimeApplication().stats, metrics=metrics),
+    )
+
+    result = await health_api.prometheus_metrics(_request())
+    body = result.body.decode()
+
+    assert "# TYPE stargazer_collection_plugin_duration_seconds histogram" in body
+    assert (
+        'stargazer_collection_plugin_duration_seconds_count{model_id="host",plugin="host_info"} 1'
+        in body
+    )
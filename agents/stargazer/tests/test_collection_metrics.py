@@ -1,4 +1,6 @@
-from core.collection.metrics import CollectionMetrics
+import pytest
+
+from core.collection.metrics import CollectionMetrics, Histogram
 
 
 def test_collection_metrics_exposes_rolling_stage_percentiles():
@@ -32,3 +34,47 @@ def test_collection_metrics_tracks_non_negative_in_flight_gauges():
 
     metrics.add_gauge("sync_calls_in_flight", -10)
     assert metrics.snapshot()["sync_calls_in_flight"] == 0
+
+
+def test_collection_metrics_histograms_keep_full_history_per_label():
+    metrics = CollectionMetrics(sample_capacity=3)
+    for value in (0.01, 0.02, 0.03, 0.4):
+        metrics.observe("plugin_duration_seconds", value, labels={"plugin": "host", "model_id": "host"})
+    metrics.observe("plugin_duration_seconds", 2.0, labels={"plugin": "mysql", "model_id": "mysql"})
+
+    host = metrics.merged_histogram("plugin_duration_seconds", plugin="host")
+    total = metrics.merged_histogram("plugin_duration_seconds")
+
+    assert host.count == 4
+    assert total.count == 5
+    assert abs(total.sum - 2.46) < 1e-9
+    assert 0.2 < host.quantile(0.99) <= 0.5
+
+
+def test_histogram_merge_requires_same_buckets():
+    left = Histogram((1, 2))
+    right = Histogram((1, 2))
+    left.observe(0.5)
+    right.observe(1.5)
+    right.observe(9)
+
+    merged = left.copy().merge(right)
+
+    assert merged.cumulative_buckets() == [(1, 1), (2, 2), (float("inf"), 3)]
+    with pytest.raises(ValueError):
+        merged.merge(Histogram((1, 3)))
+
+
+def test_collection_metrics_renders_prometheus_histogram():
+    metrics = CollectionMetrics()
+    metrics.observe("plugin_duration_seconds", 0.3, labels={"plugin": 'a"b', "model_id": "host"})
+
+    text = metrics.render_prometheus()
+
+    assert "# TYPE stargazer_collection_plugin_duration_seconds histogram" in text
+    assert 'stargazer_collection_plugin_duration_seconds_bucket{model_id="host",plugin="a\\"b",le="0.5"} 1' in text
+    assert 'stargazer_collection_plugin_duration_seconds_bucket{model_id="host",plugin="a\\"b",le="0.2"} 0' in text
+    assert 'stargazer_collection_plugin_duration_seconds_count{model_id="host",plugin="a\\"b"} 1' in text
+    # 两次抓取之间累计值不丢失
+    metrics.observe("plugin_duration_seconds", 0.3, labels={"plugin": 'a"b', "model_id": "host"})
+    assert 'le="+Inf"} 2' in metrics.render_prometheus()
@@ -109,3 +109,211 @@ async def test_three_thousand_targets_remain_bounded_by_one_hundred_fifty_window
     assert results[0] == 0
     assert results[-1] == 2999
     await scheduler.shutdown()
+
+
+async def _dispatch_order(scheduler, runs, *, window):
+    """在窗口占满后依次提交 runs，逐个释放槽位并记录派发顺序"""
+    started = []
+    gate = asyncio.Event()
+    blockers = [asyncio.Event() for _ in range(window)]
+
+    async def hold(index):
+        await blockers[index].wait()
+        return index
+
+    holder = asyncio.create_task(scheduler.execute("holder", range(window), hold))
+    await asyncio.sleep(0.01)
+
+    async def handle(item):
+        started.append(item)
+        await gate.wait()
+        return item
+
+    tasks = [
+        asyncio.create_task(scheduler.execute(run_id, items, handle, **options))
+        for run_id, items, options in runs
+    ]
+    await asyncio.sleep(0.01)
+    for blocker in blockers:
+        blocker.set()
+    await asyncio.sleep(0.01)
+    gate.set()
+    await asyncio.gather(holder, *tasks)
+    await scheduler.shutdown()
+    return started
+
+
+@pytest.mark.asyncio
+async def test_weighted_runs_share_slots_by_weight():
+    scheduler = CollectionScheduler(max_in_flight=6)
+    started = await _dispatch_order(
+        scheduler,
+        [
+            ("heavy", [f"h{i}" for i in range(10)], {"weight": 2}),
+            ("light", [f"l{i}" for i in range(10)], {"weight": 1}),
+        ],
+        window=6,
+    )
+
+    first_window = started[:6]
+    assert sum(item.startswith("h") for item in first_window) == 4
+    assert sum(item.startswith("l") for item in first_window) == 2
+
+
+@pytest.mark.asyncio
+async def test_priority_run_is_served_before_earlier_runs():
+    scheduler = CollectionScheduler(max_in_flight=2)
+    started = await _dispatch_order(
+        scheduler,
+        [
+            ("bulk", ["b1", "b2", "b3"], {}),
+            ("debug", ["d1", "d2"], {"priority": 10}),
+        ],
+        window=2,
+    )
+
+    assert started[:2] == ["d1", "d2"]
+
+
+@pytest.mark.asyncio
+async def test_near_deadline_run_is_served_first():
+    scheduler = CollectionScheduler(max_in_flight=2, deadline_slack_seconds=5)
+    now = asyncio.get_running_loop().time()
+    started = await _dispatch_order(
+        scheduler,
+        [
+            ("relaxed", ["r1", "r2"], {"deadline": now + 600}),
+            ("urgent", ["u1", "u2"], {"deadline": now + 1}),
+            ("fresh", ["f1", "f2"], {}),
+        ],
+        window=2,
+    )
+
+    assert started[:2] == ["u1", "u2"]
+
+
+@pytest.mark.asyncio
+async def test_plugin_limit_caps_slow_plugin_inside_global_window():
+    scheduler = CollectionScheduler(max_in_flight=4, plugin_limits={"vmware_info": 1})
+    release = asyncio.Event()
+    peak = {"vmware_info": 0}
+
+    async def handle(item):
+        peak["vmware_info"] = max(peak["vmware_info"], scheduler.plugin_active("vmware_info"))
+        await release.wait()
+        return item
+
+    slow = asyncio.create_task(scheduler.execute("vmware", range(5), handle, plugin="vmware_info"))
+    fast = asyncio.create_task(scheduler.execute("cloud", range(5), handle, plugin="aliyun_info"))
+    await asyncio.sleep(0.01)
+
+    assert scheduler.active == 4
+    assert scheduler.plugin_active("vmware_info") == 1
+    assert scheduler.plugin_active("aliyun_info") == 3
+
+    release.set()
+    assert await slow == tuple(range(5))
+    assert await fast == tuple(range(5))
+    assert peak["vmware_info"] == 1
+    assert scheduler.plugin_active("vmware_info") == 0
+    await scheduler.shutdown()
+
+
+def test_simulation_benchmark_is_deterministic():
+    from scripts.bench_collection_scheduler import SimRun, run_simulation
+
+    workload = [
+        SimRun("big", "aliyun_info", targets=40, cost_seconds=1.0),
+        SimRun("slow", "vmware_info", targets=10, cost_seconds=5.0),
+        SimRun("debug", "host_info", targets=2, cost_seconds=1.0, arrival_seconds=3.0),
+    ]
+
+    first = run_simulation(workload, max_in_flight=5)
+    second = run_simulation(workload, max_in_flight=5)
+
+    assert first == second
+    assert first["weighted"]["runs"]["debug"]["p99"] <= first["round_robin"]["runs"]["debug"]["p99"]
+
+
+@pytest.mark.asyncio
+async def test_plugin_limit_from_env_caps_plugin_on_application_path(monkeypatch):
+    from core.collection.application import CollectionApplication, CollectionApplicationSettings
+    from core.collection.contracts import CollectOutcome, CollectOutcomeStatus, PreflightResult, PreflightStatus
+    from core.collection.credential_policy import CredentialPolicy, InMemoryCredentialStateStore
+    from core.collection.request_builder import build_collection_request
+    from core.collection.result_publisher import NatsResultPublisher
+    from core.collection.runtime import RunLease
+
+    monkeypatch.setenv("PLUGIN_CONCURRENCY_LIMITS", "vmware_info=1")
+    monkeypatch.setenv("MAX_ACTIVE_TARGETS", "4")
+    monkeypatch.setenv("TARGET_TASK_WINDOW", "4")
+    monkeypatch.setenv("PREFLIGHT_TIMEOUT", "5")
+    release = asyncio.Event()
+    active = {"vmware_info": 0, "aliyun_info": 0}
+    peak = dict(active)
+
+    class Preflight:
+        async def check(self, target, request, *, timeout_seconds, plan=None):
+            return PreflightResult(status=PreflightStatus.REACHABLE)
+
+    class Plugin:
+        supports_access_probe = False
+
+        def __init__(self, name):
+            self.name = name
+
+        async def collect(self, target, credential, context):
+            active[self.name] += 1
+            peak[self.name] = max(peak[self.name], active[self.name])
+            try:
+                await release.wait()
+            finally:
+                active[self.name] -= 1
+            return CollectOutcome(status=CollectOutcomeStatus.SUCCESS, value=f'{self.name}{{host="{target}"}} 1')
+
+    class PluginFactory:
+        def resolve(self, request):
+            return Plugin(request.params["model_id"])
+
+    async def publish_metrics(ctx, value, params, task_id):
+        return None
+
+    application = CollectionApplication(
+        redis_client=None,
+        schedule=asyncio.create_task,
+        owner_id="pod-test",
+        settings=CollectionApplicationSettings.from_env(),
+        plugin_factory=PluginFactory(),
+        preflight=Preflight(),
+        publisher=NatsResultPublisher(metrics_publish=publish_metrics),
+    )
+    application._credential_policy = CredentialPolicy(store=InMemoryCredentialStateStore())
+
+    def run(model_id):
+        request = build_collection_request(
+            task_id=f"task-{model_id}",
+            params={
+                "model_id": model_id,
+                "hosts": ",".join(f"10.0.0.{i}" for i in range(1, 6)),
+                "username": "collector",
+                "password": "secret",
+                "preflight_kind": "none",
+            },
+        )
+        lease = RunLease(task_id=request.task_id, request_digest="digest", owner_id="pod-test", fence=1, expires_at=1e12)
+        return asyncio.create_task(application._execute(request, lease))
+
+    vmware, aliyun = run("vmware_info"), run("aliyun_info")
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if application._scheduler.active == 4:
+            break
+
+    # 以插件名配置的上限在 plugin_ref（vmware_info.config）上生效：慢插件只占一个槽位
+    assert application._scheduler.plugin_active("vmware_info") == 1
+    assert active == {"vmware_info": 1, "aliyun_info": 3}
+
+    release.set()
+    await asyncio.gather(vmware, aliyun)
+    assert peak["vmware_info"] == 1
+    await application.shutdown()
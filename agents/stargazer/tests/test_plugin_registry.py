@@ -0,0 +1,164 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from core.plugin import executor as executor_module
+from core.plugin.executor import PluginExecutor
+from core.plugin.registry import PluginRegistry
+from core.plugin.source_resolver import PluginSourceResolver
+from core.plugin.yaml_reader import PluginYamlReader
+
+
+def _write_plugin(base_dir, model, module_name, class_name="Collector"):
+    plugin_dir = base_dir / model
+    plugin_dir.mkdir(parents=True, exist_ok=True)
+    (plugin_dir / "plugin.yml").write_text(
+        f"""
+name: {model}
+metadata:
+  model_id: {model}
+default_executor: protocol
+executors:
+  protocol:
+    type: protocol
+    collector:
+      module: {module_name}
+      class: {class_name}
+""".strip(),
+        encoding="utf-8",
+    )
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    plugins_dir = tmp_path / "plugins" / "inputs"
+    plugins_dir.mkdir(parents=True)
+    modules_dir = tmp_path / "modules"
+    modules_dir.mkdir()
+    (modules_dir / "registry_demo_plugin.py").write_text(
+        """
+class Collector:
+    def __init__(self, params):
+        self.params = params
+
+    async def list_all_resources(self):
+        return {"success": True, "result": {"host": self.params.get("host")}}
+""",
+        encoding="utf-8",
+    )
+    monkeypatch.syspath_prepend(str(modules_dir))
+    sys.modules.pop("registry_demo_plugin", None)
+    _write_plugin(plugins_dir, "demo", "registry_demo_plugin")
+    _write_plugin(plugins_dir, "broken", "registry_missing_plugin")
+
+    reader = PluginYamlReader(
+        str(plugins_dir),
+        resolver=PluginSourceResolver(
+            oss_plugins_base_dir=plugins_dir, enterprise_root=tmp_path / "none"
+        ),
+    )
+    registry = PluginRegistry(reader, check_interval_seconds=0)
+    monkeypatch.setattr(executor_module, "plugin_registry", registry)
+    return registry, plugins_dir
+
+
+def test_warm_up_loads_classes_and_reports(registry):
+    registry, _ = registry
+
+    report = registry.warm_up()
+
+    assert report.loaded == 1
+    assert report.failed == 1
+    assert "broken" in report.failures
+    assert [model for model, _ in report.slowest] == ["demo"]
+    assert registry.get_cached("registry_demo_plugin", "Collector").__name__ == "Collector"
+    assert registry.reader._resolved_executor_cache[("demo", "protocol", True)]
+    with pytest.raises(ModuleNotFoundError):
+        registry.get_cached("registry_missing_plugin", "Collector")
+
+
+def test_plugin_directory_change_invalidates_cache(registry):
+    registry, plugins_dir = registry
+    registry.warm_up()
+    assert registry.get_cached("registry_demo_plugin", "Collector") is not None
+
+    config_path = plugins_dir / "demo" / "plugin.yml"
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert registry.get_cached("registry_demo_plugin", "Collector") is not None
+    assert registry.refresh_if_changed() is True
+    assert registry.get_cached("registry_demo_plugin", "Collector") is None
+    assert registry.reader._resolved_executor_cache == {}
+
+
+def test_collector_source_change_reloads_module(registry, tmp_path):
+    registry, _ = registry
+    registry.warm_up()
+    assert registry.refresh_if_changed() is False
+
+    module_path = tmp_path / "modules" / "registry_demo_plugin.py"
+    module_path.write_text(
+        """
+class Collector:
+    VERSION = 2
+
+    def __init__(self, params):
+        self.params = params
+""",
+        encoding="utf-8",
+    )
+    stat = module_path.stat()
+    os.utime(module_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert registry.refresh_if_changed() is True
+    assert "registry_demo_plugin" not in sys.modules
+    assert registry.load_collector_class("registry_demo_plugin", "Collector").VERSION == 2
+
+
+def test_get_cached_does_not_touch_filesystem(registry, monkeypatch):
+    registry, _ = registry
+    registry.warm_up()
+
+    def fail_scan():
+        raise AssertionError("lookup must not scan plugin directories")
+
+    monkeypatch.setattr(registry, "compute_signature", fail_scan)
+
+    assert registry.get_cached("registry_demo_plugin", "Collector") is not None
+
+
+@pytest.mark.asyncio
+async def test_watch_task_detects_changes_in_background(registry):
+    registry, plugins_dir = registry
+    registry.warm_up()
+    registry.check_interval_seconds = 0.01
+    registry.start_watch()
+    try:
+        config_path = plugins_dir / "demo" / "plugin.yml"
+        stat = config_path.stat()
+        os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        for _ in range(200):
+            if registry.get_cached("registry_demo_plugin", "Collector") is None:
+                break
+            await asyncio.sleep(0.01)
+        assert registry.get_cached("registry_demo_plugin", "Collector") is None
+    finally:
+        await registry.stop_watch()
+
+
+@pytest.mark.asyncio
+async def test_executor_uses_registry_without_thread_hop_for_class(registry, monkeypatch):
+    registry, _ = registry
+    registry.warm_up()
+    resolved = registry.reader.get_executor_config_with_resolution("demo", "protocol")
+
+    def fail_load(*args, **kwargs):
+        raise AssertionError("collector class should come from registry")
+
+    monkeypatch.setattr(PluginExecutor, "_load_collector_with_fallback", fail_load)
+    result = await PluginExecutor("demo", resolved.executor_config, {"host": "10.0.0.1"}).execute()
+
+    assert result == {"success": True, "result": {"host": "10.0.0.1"}}
@@ -0,0 +1,54 @@
+"""SSHClient stdout/stderr 并发读取测试（不连接真实主机）。"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.infra import ssh_client as ssh_module
+from core.infra.ssh_client import SSHClient
+
+
+class FakeChannel:
+    """stdout 与 stderr 交替产出数据，顺序读取任一侧都会阻塞在另一侧"""
+
+    def __init__(self, stdout_chunks, stderr_chunks):
+        self._stdout = list(stdout_chunks)
+        self._stderr = list(stderr_chunks)
+
+    def recv_ready(self):
+        return bool(self._stdout)
+
+    def recv(self, size):
+        return self._stdout.pop(0)
+
+    def recv_stderr_ready(self):
+        return bool(self._stderr)
+
+    def recv_stderr(self, size):
+        return self._stderr.pop(0)
+
+    def exit_status_ready(self):
+        return not self._stdout and not self._stderr
+
+    def fileno(self):
+        raise OSError("not selectable")
+
+
+def test_drain_channel_reads_both_streams():
+    channel = FakeChannel([b"out-1\n", b"out-2\n"], [b"err-1\n", b"err-2\n"])
+    stdout, stderr = SSHClient._drain_channel(channel, timeout=5)
+    assert stdout == b"out-1\nout-2\n"
+    assert stderr == b"err-1\nerr-2\n"
+
+
+def test_drain_channel_times_out(monkeypatch):
+    class SilentChannel(FakeChannel):
+        def exit_status_ready(self):
+            return False
+
+    monkeypatch.setattr(ssh_module.select, "select", lambda *args: ([], [], []))
+    with pytest.raises(TimeoutError):
+        SSHClient._drain_channel(SilentChannel([], []), timeout=0.01)
@@ -1,13 +1,62 @@
 import duckdb
 import json
-from typing import List, Dict, Any
+import time
+from datetime import timedelta
+from typing import List, Dict, Any, Optional
 import threading
 import pandas as pd
 
+from django.conf import settings
+from django.utils import timezone
+
+from apps.alerts.constants import EventAction
+from apps.alerts.models.models import Event
 from apps.core.logger import alert_logger as logger
 
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow 为可选依赖，缺失时退回 pandas DataFrame
+    pa = None
+
+# 聚合 SQL 依赖的事件列及其 DuckDB 类型（labels/tags 以 JSON 字符串存储）
+EVENT_COLUMNS = (
+    ("event_id", "VARCHAR"),
+    ("title", "VARCHAR"),
+    ("description", "VARCHAR"),
+    ("level", "VARCHAR"),
+    ("resource_name", "VARCHAR"),
+    ("resource_id", "VARCHAR"),
+    ("resource_type", "VARCHAR"),
+    ("item", "VARCHAR"),
+    ("external_id", "VARCHAR"),
+    ("received_at", "TIMESTAMPTZ"),
+    ("action", "VARCHAR"),
+    ("source_id", "BIGINT"),
+    ("push_source_id", "VARCHAR"),
+    ("labels", "VARCHAR"),
+    ("service", "VARCHAR"),
+    ("location", "VARCHAR"),
+    ("event_type", "INTEGER"),
+    ("tags", "VARCHAR"),
+)
+EVENT_FIELDS = tuple(name for name, _ in EVENT_COLUMNS)
+_JSON_FIELDS = ("labels", "tags")
+_CAST_SELECT = ", ".join(f"CAST({name} AS {sql_type}) AS {name}" for name, sql_type in EVENT_COLUMNS)
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
 
 class DuckDBConnection:
+    """
+    线程级 DuckDB 内存连接。
+
+    除了按查询集整表装载的 events_table 外，还维护一张常驻的 event_store：
+    按 received_at 水位增量追加、按最长策略窗口淘汰，同一 worker 内所有策略共享，
+    每个策略只需把命中的 event_id 绑定成 events_table，不再逐策略从数据库拉全量事件。
+    """
+
     _local = threading.local()
 
     def __init__(self):
@@ -16,6 +65,7 @@ class DuckDBConnection:
     def _ensure_connection(self):
         if not hasattr(self._local, "conn") or self._local.conn is None:
             self._local.conn = duckdb.connect(":memory:")
+            self._local.store = None
 
     def execute_query(self, sql: str) -> List[Dict[str, Any]]:
         self._ensure_connection()
@@ -24,11 +74,36 @@ class DuckDBConnection:
         columns = [desc[0] for desc in conn.description]
         return [dict(zip(columns, row)) for row in result]
 
+    @staticmethod
+    def _frame(columns: Dict[str, list]):
+        """列式数据 → Arrow Table（已安装 pyarrow 时）或 pandas DataFrame，供 DuckDB 零拷贝扫描"""
+        if pa is not None:
+            return pa.table(columns)
+        frame = pd.DataFrame(columns)
+        # pandas 3.0（或 future.infer_string=True）会把字符串列建成扩展 string dtype
+        # （'str' / 'string' / 'string[pyarrow]'），而 duckdb<1.2 不识别它们，register 会抛
+        # NotImplementedException("Data type 'str' not recognized")，导致整条聚合失败。
+        # 统一把扩展 string 列降级为 object，保证跨 pandas/duckdb 版本兼容；
+        # object / datetime / 数值列不受影响（duckdb 本就支持）。
+        for col, dtype in frame.dtypes.items():
+            if dtype != object and pd.api.types.is_string_dtype(dtype):
+                frame[col] = frame[col].astype(object)
+        return frame
+
+    @staticmethod
+    def _event_columns(rows) -> Dict[str, list]:
+        """values_list 元组行 → 按列组织，并把 labels/tags 序列化为 JSON 字符串（DuckDB 要求字符串格式）"""
+        columns = {name: list(values) for name, values in zip(EVENT_FIELDS, zip(*rows))}
+        for name in _JSON_FIELDS:
+            columns[name] = [json.dumps(value) if value else None for value in columns[name]]
+        return columns
+
     def load_events_to_memory(self, events_queryset):
         """
         将 Event QuerySet 加载到 DuckDB 内存表中供聚合查询使用
 
-        每个策略的事件范围不同（基于 window_size），所以需要每次重新加载
+        按查询集整表装载；常规聚合轮次走 sync_event_store + bind_strategy_events 共享常驻表，
+        此方法保留给常驻表不可用时兜底。
 
         Args:
             events_queryset: Django QuerySet，已过滤的事件集合（必须非空）
@@ -40,59 +115,158 @@ class DuckDBConnection:
         conn = self._local.conn
 
         # 1. 从 QuerySet 提取需要的字段
-        events_data = list(
-            events_queryset.values(
-                "event_id",
-                "title",
-                "description",
-                "level",
-                "resource_name",
-                "resource_id",
-                "resource_type",
-                "item",
-                "external_id",
-                "received_at",
-                "action",
-                "source_id",
-                "push_source_id",
-                "labels",
-                "service",
-                "location",
-                "event_type",
-                "tags",
-            )
-        )
+        events_data = list(events_queryset.values(*EVENT_FIELDS))
 
         # 2. 防御性检查：理论上不应该出现空数据（上游已过滤）
         if not events_data:
             logger.warning("load_events_to_memory 收到空数据，策略调节筛选event为空")
             return
 
-        # 3. 序列化 JSON 字段（DuckDB 要求字符串格式）
-        # 性能优化：使用条件表达式，避免重复get()调用
-        for event in events_data:
-            labels = event.get("labels")
-            tags = event.get("tags")
-            event["labels"] = json.dumps(labels) if labels else None
-            event["tags"] = json.dumps(tags) if tags else None
+        # 3. 按列组织并序列化 JSON 字段，批量加载到 DuckDB
+        rows = [tuple(event.get(name) for name in EVENT_FIELDS) for event in events_data]
+        conn.register("events_df", self._frame(self._event_columns(rows)))
+        try:
+            conn.execute("DROP TABLE IF EXISTS events_table")
+            conn.execute("CREATE TEMP TABLE events_table AS SELECT * FROM events_df")
+        finally:
+            conn.unregister("events_df")
 
-        # 4. 使用 pandas DataFrame 批量加载数据到 DuckDB
-        events_df = pd.DataFrame(events_data)
-        # pandas 3.0（或 future.infer_string=True）会把字符串列建成扩展 string dtype
-        # （'str' / 'string' / 'string[pyarrow]'），而 duckdb<1.2 不识别它们，register 会抛
-        # NotImplementedException("Data type 'str' not recognized")，导致整条聚合失败。
-        # 统一把扩展 string 列降级为 object，保证跨 pandas/duckdb 版本兼容；
-        # object / datetime / 数值列不受影响（duckdb 本就支持）。
-        for col, dtype in events_df.dtypes.items():
-            if dtype != object and pd.api.types.is_string_dtype(dtype):
-                events_df[col] = events_df[col].astype(object)
-        conn.execute("DROP TABLE IF EXISTS events_table")
-        conn.register("events_df", events_df)
-        conn.execute("CREATE TABLE events_table AS SELECT * FROM events_df")
+        return True
+
+    def _create_event_store(self):
+        columns = ", ".join(f"{name} {sql_type}" for name, sql_type in EVENT_COLUMNS)
+        self._local.conn.execute(f"CREATE OR REPLACE TABLE event_store ({columns})")
 
+    def _append_events(self, queryset) -> tuple:
+        """把查询集中尚未进入 event_store 的事件分批追加进去，返回 (新增行数, 最大 received_at)"""
+        conn = self._local.conn
+        chunk_size = _setting("ALERT_EVENT_STORE_CHUNK_SIZE", 20000)
+        added = 0
+        latest = None
+        batch = []
+
+        def _flush():
+            nonlocal added, latest
+            conn.register("event_batch", self._frame(self._event_columns(batch)))
+            try:
+                added += conn.execute(
+                    f"INSERT INTO event_store SELECT {_CAST_SELECT} FROM event_batch b "
+                    "WHERE NOT EXISTS (SELECT 1 FROM event_store s WHERE s.event_id = b.event_id)"
+                ).fetchone()[0]
+            finally:
+                conn.unregister("event_batch")
+            batch_latest = max(row[EVENT_FIELDS.index("received_at")] for row in batch)
+            latest = batch_latest if latest is None else max(latest, batch_latest)
+            batch.clear()
+
+        for row in queryset.values_list(*EVENT_FIELDS).iterator(chunk_size=chunk_size):
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                _flush()
+        if batch:
+            _flush()
+        return added, latest
+
+    def sync_event_store(self, retention_minutes: int, now=None) -> int:
+        """
+        按 received_at 水位把新事件增量追加到常驻 event_store，并淘汰早于最长策略窗口的事件。
+
+        水位回退 ALERT_EVENT_STORE_OVERLAP_SECONDS 秒重读，覆盖晚提交的事务；重复事件按 event_id 去重。
+        最长窗口变大时补读更早区间；每 ALERT_EVENT_STORE_RESYNC_SECONDS 秒整表重建一次，兜底删除/修订。
+
+        Returns:
+            本次新增的事件行数
+        """
+        self._ensure_connection()
+        conn = self._local.conn
+        now = now or timezone.now()
+        horizon = now - timedelta(minutes=retention_minutes)
+        store = self._local.store
+        started = time.monotonic()
+
+        ranges = []
+        if store is None or started - store["built_at"] > _setting("ALERT_EVENT_STORE_RESYNC_SECONDS", 3600):
+            self._create_event_store()
+            store = self._local.store = {"watermark": None, "horizon": horizon, "built_at": started}
+            ranges.append((horizon, None))
+        else:
+            if horizon < store["horizon"]:
+                ranges.append((horizon, store["horizon"]))
+            start = store["horizon"]
+            if store["watermark"] is not None:
+                start = max(start, store["watermark"] - timedelta(seconds=_setting("ALERT_EVENT_STORE_OVERLAP_SECONDS", 60)))
+            ranges.append((start, None))
+
+        added = 0
+        for range_start, range_end in ranges:
+            queryset = Event.objects.filter(action=EventAction.CREATED, received_at__gte=range_start)
+            if range_end is not None:
+                queryset = queryset.filter(received_at__lt=range_end)
+            count, latest = self._append_events(queryset.order_by())
+            added += count
+            if latest is not None and (store["watermark"] is None or latest > store["watermark"]):
+                store["watermark"] = latest
+
+        evicted = conn.execute("DELETE FROM event_store WHERE received_at < ?", [horizon]).fetchone()[0]
+        store["horizon"] = horizon
+        total = conn.execute("SELECT count(*) FROM event_store").fetchone()[0]
+        logger.info(
+            "[AlertAggregation] event_store_sync added=%s evicted=%s rows=%s retention_minutes=%s duration_ms=%s",
+            added,
+            evicted,
+            total,
+            retention_minutes,
+            int((time.monotonic() - started) * 1000),
+        )
+        return added
+
+    @property
+    def event_store_ready(self) -> bool:
+        return getattr(self._local, "conn", None) is not None and getattr(self._local, "store", None) is not None
+
+    def bind_strategy_events(self, events_queryset) -> Optional[bool]:
+        """
+        把策略命中的事件从 event_store 中选出，物化为本策略的 events_table
+
+        只从数据库读取 (event_id, received_at)；常驻表缺失或 received_at 不一致（事件被重建）的行按 event_id 补读。
+        """
+        self._ensure_connection()
+        conn = self._local.conn
+        keys = list(events_queryset.order_by().values_list("event_id", "received_at"))
+        if not keys:
+            logger.warning("bind_strategy_events 收到空数据，策略调节筛选event为空")
+            return None
+
+        event_ids, received = (list(values) for values in zip(*keys))
+        conn.register("strategy_events", self._frame({"event_id": event_ids, "received_at": received}))
+        try:
+            stale = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT i.event_id FROM strategy_events i LEFT JOIN event_store s ON s.event_id = i.event_id "
+                    "WHERE s.event_id IS NULL OR s.received_at <> CAST(i.received_at AS TIMESTAMPTZ)"
+                ).fetchall()
+            ]
+            for start in range(0, len(stale), 1000):
+                chunk = stale[start : start + 1000]
+                conn.execute("DELETE FROM event_store WHERE event_id IN (SELECT unnest(?))", [chunk])
+                self._append_events(Event.objects.filter(event_id__in=chunk).order_by())
+            conn.execute("DROP TABLE IF EXISTS events_table")
+            conn.execute(
+                "CREATE TEMP TABLE events_table AS SELECT s.* FROM event_store s "
+                "WHERE s.event_id IN (SELECT event_id FROM strategy_events) ORDER BY s.received_at DESC"
+            )
+        finally:
+            conn.unregister("strategy_events")
         return True
 
+    def release_round(self):
+        """聚合轮次结束：只释放本轮的 events_table，保留常驻 event_store 供下一轮增量使用"""
+        if getattr(self._local, "conn", None) is not None:
+            self._local.conn.execute("DROP TABLE IF EXISTS events_table")
+
     def close(self):
         if hasattr(self._local, "conn") and self._local.conn is not None:
             self._local.conn.close()
             self._local.conn = None
+            self._local.store = None
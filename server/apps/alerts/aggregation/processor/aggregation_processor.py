@@ -83,6 +83,8 @@ class AggregationProcessor:
                 sum(1 for strategy in active_strategies if strategy.strategy_type == AlarmStrategyType.MISSING_DETECTION),
             )
 
+            self._sync_event_store(active_strategies)
+
             # 策略级隔离：单策略失败不中断同轮后续策略。
             for strategy in active_strategies:
                 strategy_started = time.monotonic()
@@ -133,6 +135,27 @@ class AggregationProcessor:
             raise
         finally:
             AlertBuilder.clear_event_cache()
+            self.db_conn.release_round()
+
+    @staticmethod
+    def _event_retention_minutes(strategies: List[AlarmStrategy]) -> int:
+        """常驻事件表需要覆盖的时长：所有聚合策略窗口的最大值"""
+        windows = [
+            parse_aggregation_window_size(cast(Dict[str, Any], strategy.params or {}).get("window_size"), clamp=True)[0]
+            for strategy in strategies
+            if strategy.strategy_type != AlarmStrategyType.MISSING_DETECTION
+        ]
+        return max(windows, default=0)
+
+    def _sync_event_store(self, strategies: List[AlarmStrategy]) -> None:
+        """轮次开始时增量同步常驻事件表；失败时本轮退回逐策略整表装载"""
+        retention = self._event_retention_minutes(strategies)
+        if not retention:
+            return
+        try:
+            self.db_conn.sync_event_store(retention, timezone.now())
+        except Exception:  # noqa
+            logger.exception("[AlertAggregation] event_store 同步失败，本轮退回逐策略装载事件")
             self.db_conn.close()
 
     def _get_active_strategies(self) -> List[AlarmStrategy]:
@@ -575,7 +598,10 @@ class AggregationProcessor:
         """对指定维度执行聚合"""
         try:
             # 优化：直接使用已过滤的 events QuerySet，避免重复查询
-            load_success = self.db_conn.load_events_to_memory(events)
+            if self.db_conn.event_store_ready:
+                load_success = self.db_conn.bind_strategy_events(events)
+            else:
+                load_success = self.db_conn.load_events_to_memory(events)
             if not load_success:
                 logger.info("[AlertAggregation] 策略 %s 过滤后无事件，跳过聚合", strategy.name)
                 self._mark_strategy_executed(strategy, now)
@@ -15,7 +15,7 @@ from apps.alerts.models.models import Event
 from apps.alerts.models.alert_operator import AlertShield
 from apps.alerts.constants.constants import AlertShieldMatchType, EventStatus
 from apps.alerts.utils.time_range_checker import TimeRangeChecker
-from apps.alerts.utils.rule_matcher import RuleMatcher
+from apps.alerts.utils.compiled_rules import ORM, CompiledRuleSet, RuleSetCache
 from apps.core.logger import alert_logger as logger
 
 
@@ -37,19 +37,23 @@ class EventShieldOperator(object):
         "event_id": "event_id",
     }
 
-    def __init__(self, event_id_list: List[str], active_shields=None):
+    def __init__(self, event_id_list: List[str], active_shields=None, compiled_rules: CompiledRuleSet = None):
         """
         初始化事件屏蔽操作器（性能优化版）
 
         Args:
             event_id_list: 事件ID列表
             active_shields: 预加载的活跃屏蔽策略（可选，避免重复查询）
+            compiled_rules: active_shields 对应的编译规则（可选，多批次复用同一份编译结果）
         """
-        # 优化：支持传入预加载的屏蔽策略
-        if active_shields is not None:
-            self.active_shields = active_shields
+        # 优化：支持传入预加载的屏蔽策略；未传入时使用进程级编译缓存（规则未变更时只有一次聚合查询）
+        if compiled_rules is not None:
+            self.compiled_rules = compiled_rules
+        elif active_shields is not None:
+            self.compiled_rules = self.compile_shields(active_shields)
         else:
-            self.active_shields = self.get_shields()
+            self.compiled_rules = _SHIELD_RULES.get()
+        self.active_shields = self.compiled_rules.rules
 
         if not self.active_shields:
             raise ShieldNotFoundError()
@@ -58,8 +62,19 @@ class EventShieldOperator(object):
         self.events = self.get_event_map()
         if not self.events:
             raise EventNotFoundError()
-        # 初始化规则匹配器
-        self.rule_matcher = RuleMatcher(self.FIELD_MAPPING)
+
+    @classmethod
+    def compile_shields(cls, shields) -> CompiledRuleSet:
+        """把屏蔽策略编译为索引化匹配器；全部匹配类型视为空规则，未知匹配类型不匹配任何事件"""
+
+        def rules_of(shield):
+            if shield.match_type == AlertShieldMatchType.ALL:
+                return None
+            if shield.match_type == AlertShieldMatchType.FILTER:
+                return shield.match_rules or []
+            return [[]]
+
+        return CompiledRuleSet(list(shields), rules_of, semantics=ORM, field_mapping=cls.FIELD_MAPPING)
 
     def get_event_map(self) -> Dict[int, Event]:
         """获取事件实例映射"""
@@ -104,13 +119,18 @@ class EventShieldOperator(object):
         # 记录已屏蔽的事件ID
         shielded_event_ids = set()
 
-        # 按屏蔽策略批量处理事件
+        # 一次性计算每个事件命中的屏蔽策略
+        matched_by_shield = self._match_events()
+
+        # 按屏蔽策略顺序批量处理事件
         for shield in self.active_shields:
             try:
-                # 批量查找匹配该屏蔽策略的事件（排除已屏蔽的）
-                matched_event_ids = self._batch_find_matching_events(
-                    shield, shielded_event_ids
-                )
+                # 匹配该屏蔽策略的事件（排除已屏蔽的）
+                matched_event_ids = [
+                    event_id
+                    for event_id in matched_by_shield.get(shield.id, [])
+                    if event_id not in shielded_event_ids
+                ]
 
                 if not matched_event_ids:
                     continue
@@ -155,41 +175,26 @@ class EventShieldOperator(object):
 
         return time_matched_shields
 
-    def _batch_find_matching_events(
-        self, shield: AlertShield, excluded_ids: set = None
-    ) -> List[int]:
+    def _match_events(self) -> Dict[int, List[int]]:
         """
-        批量查找匹配指定屏蔽策略的事件ID列表
-
-        Args:
-            shield: 屏蔽策略
-            excluded_ids: 需要排除的事件ID集合
+        一次读取待屏蔽事件的匹配字段，在内存中用编译规则匹配
 
         Returns:
-            匹配的事件ID列表
+            屏蔽策略ID -> 匹配的事件ID列表
         """
         # 先过滤活跃状态的事件（未关闭且未屏蔽的事件才需要屏蔽）
         # 支持 RECEIVED（新事件）和 PENDING（待响应）两种状态
-        base_queryset = Event.objects.filter(
+        candidates = Event.objects.filter(
             event_id__in=self.event_id_list,
             status__in=[EventStatus.RECEIVED, EventStatus.PENDING],
-        )
-
-        # 排除已屏蔽的事件
-        if excluded_ids:
-            base_queryset = base_queryset.exclude(id__in=excluded_ids)
-
-        if shield.match_type == AlertShieldMatchType.ALL:
-            # 全部匹配，返回所有活跃的事件
-            return list(base_queryset.values_list("id", flat=True))
-
-        elif shield.match_type == AlertShieldMatchType.FILTER:
-            # 过滤匹配，使用规则匹配器
-            return self.rule_matcher.filter_queryset(
-                base_queryset, shield.match_rules or []
-            )
+        ).values("id", *set(self.FIELD_MAPPING.values()))
 
-        return []
+        rules = self.compiled_rules.rules
+        matched_by_shield: Dict[int, List[int]] = {}
+        for event in candidates:
+            for index in self.compiled_rules.match(event):
+                matched_by_shield.setdefault(rules[index].id, []).append(event["id"])
+        return matched_by_shield
 
     def _batch_execute_shield(
         self, event_ids: List[int], shield: AlertShield
@@ -265,7 +270,7 @@ class EventShieldOperator(object):
 
 
 def execute_shield_check_for_events(
-    event_ids: List[str], active_shields=None
+    event_ids: List[str], active_shields=None, compiled_rules: CompiledRuleSet = None
 ) -> Dict[str, Any]:
     """
     为指定事件列表执行屏蔽检查（性能优化版）
@@ -273,6 +278,7 @@ def execute_shield_check_for_events(
     Args:
         event_ids: 事件ID列表
         active_shields: 预加载的活跃屏蔽策略（可选，避免重复查询）
+        compiled_rules: active_shields 的编译结果（可选，多批次复用）
 
     Returns:
         执行结果
@@ -318,7 +324,9 @@ def execute_shield_check_for_events(
                 "shield_results": [],
             }
         try:
-            operator = EventShieldOperator(event_ids, active_shields=active_shields)
+            operator = EventShieldOperator(
+                event_ids, active_shields=active_shields, compiled_rules=compiled_rules
+            )
         except EventNotFoundError:
             logger.warning("No events found for shielding, skipping shield check")
             return {
@@ -331,3 +339,10 @@ def execute_shield_check_for_events(
     result = operator.execute_shield_check()
     logger.info("[AlertShield] === 屏蔽检查完成: %s ===", result)
     return result
+
+
+_SHIELD_RULES = RuleSetCache(
+    "shield",
+    EventShieldOperator.get_shields,
+    EventShieldOperator.compile_shields,
+)
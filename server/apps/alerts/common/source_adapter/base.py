@@ -9,12 +9,15 @@ import uuid
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 
-from django.db import IntegrityError
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
 from django.db.models import Prefetch
+from django.db.models.constants import OnConflict
+from django.db.models.sql import InsertQuery
 from django.utils import timezone
 
 from apps.alerts.aggregation.recovery.recovery_handler import RecoveryHandler
-from apps.alerts.common.shield import execute_shield_check_for_events
+from apps.alerts.common.shield import EventShieldOperator, execute_shield_check_for_events
 from apps.alerts.common.source_adapter import logger
 from apps.alerts.constants.constants import DEFAULT_GROUP_ID, SNMP_TRAP_SOURCE_ID, AlertStatus, EventAction, LevelType
 from apps.alerts.enrichment.engine import EnrichmentEngine
@@ -468,18 +471,19 @@ class AlertSourceAdapter(ABC):
         批量保存事件（性能优化版）
 
         优化点：
-        1. 使用 bulk_create 批量入库
-        2. 立即查询返回带 pk 的对象（避免后续重复查询）
-        3. 保持分批逻辑（每批 100 个）
+        1. 支持 RETURNING 的数据库（PostgreSQL / SQLite 3.35+）走 INSERT ... ON CONFLICT DO NOTHING RETURNING，
+           一次往返写入并取回主键，唯一约束冲突（ingest_key / event_id）由数据库跳过，无需预查询和回查
+        2. 其余数据库保持 bulk_create + 按 event_id 回查的旧路径
+        3. 返回结果保持分批结构（每批 100 个）
 
         Returns:
-            List[List[Event]]: 分批后的事件列表（带 pk）
+            List[List[Event]]: 分批后的事件列表（带 pk，仅包含本次新写入的事件）
         """
         if not events:
             return []
 
         # 当前采用 ingest_key 作为接入幂等键：
-        # - 应用层先按 ingest_key 批内去重和预查询
+        # - 应用层先按 ingest_key 批内去重
         # - 数据库再通过唯一约束兜底，减少并发重复写入
         unique_events = []
         seen_dedup_keys = set()
@@ -500,6 +504,66 @@ class AlertSourceAdapter(ABC):
         if not unique_events:
             return []
 
+        using = router.db_for_write(Event)
+        if getattr(settings, "ALERT_EVENT_INGEST_RETURNING", True) and connections[using].features.can_return_rows_from_bulk_insert:
+            saved_events = AlertSourceAdapter._insert_events_returning(unique_events, using)
+        else:
+            saved_events = AlertSourceAdapter._bulk_create_and_reload(unique_events)
+
+        if not saved_events:
+            logger.info("No new events to save after ingress deduplication.")
+            return []
+        return split_list(saved_events, 100)
+
+    @staticmethod
+    def _ingest_batch_size(fields, objs, connection) -> int:
+        """单条 INSERT 的行数：取配置上限、数据库参数上限（PostgreSQL 单语句最多 65535 个参数）与后端建议值的最小值"""
+        limit = getattr(settings, "ALERT_EVENT_INGEST_BATCH_SIZE", 2000)
+        return max(1, min(limit, connection.ops.bulk_batch_size(fields, objs), 65535 // len(fields)))
+
+    @staticmethod
+    def _insert_events_returning(events: List[Event], using: str) -> List[Event]:
+        """INSERT ... ON CONFLICT DO NOTHING RETURNING id：冲突行由数据库跳过，返回本次真正写入的事件"""
+        connection = connections[using]
+        opts = Event._meta
+        fields = [field for field in opts.concrete_fields if not field.primary_key]
+        batch_size = AlertSourceAdapter._ingest_batch_size(fields, events, connection)
+
+        saved_events = []
+        conflicts = 0
+        for event_batch in split_list(events, batch_size):
+            query = InsertQuery(Event, on_conflict=OnConflict.IGNORE)
+            query.insert_values(fields, event_batch)
+            try:
+                with transaction.atomic(using=using):
+                    rows = query.get_compiler(using=using).execute_sql(returning_fields=[opts.pk, opts.get_field("event_id")])
+            except IntegrityError:
+                # ON CONFLICT 已忽略唯一冲突，这里只会是 NOT NULL 等其它约束；与旧路径一致，丢弃整批并继续
+                logger.warning("Bulk insert hit DB constraint; batch of %s events dropped.", len(event_batch), exc_info=True)
+                continue
+
+            pk_by_event_id = {event_id: pk for pk, event_id in (row for row in rows if row)}
+            for event in event_batch:
+                pk = pk_by_event_id.get(event.event_id)
+                if pk is None:
+                    conflicts += 1
+                    continue
+                event.pk = pk
+                event._state.adding = False
+                event._state.db = using
+                saved_events.append(event)
+
+        logger.info(
+            "[AlertSource] 批量写入 %s 条事件 (batch_size=%s, conflicts_skipped=%s)",
+            len(saved_events),
+            batch_size,
+            conflicts,
+        )
+        return saved_events
+
+    @staticmethod
+    def _bulk_create_and_reload(unique_events: List[Event]) -> List[Event]:
+        """不支持 RETURNING 的数据库：预查询已存在的 ingest_key，bulk_create 后按 event_id 回查主键"""
         queryable_ingest_keys = [event.ingest_key for event in unique_events if getattr(event, "ingest_key", None)]
         existing_ingest_keys = set()
         if queryable_ingest_keys:
@@ -527,7 +591,6 @@ class AlertSourceAdapter(ABC):
             events_to_create.append(event)
 
         if not events_to_create:
-            logger.info("No new events to save after ingress deduplication.")
             return []
 
         # 1. 分批保存
@@ -547,16 +610,10 @@ class AlertSourceAdapter(ABC):
 
         logger.info("[AlertSource] 批量写入 %s 条事件", len(events_to_create))
 
-        # 2. 优化：立即查询返回带 pk 的对象（1 次查询）
-        # 避免后续 event_operator 需要用 event_id 再查一遍
-        created_events = Event.objects.filter(event_id__in=all_event_ids)
-
-        # 3. 重新分批返回（保持与原来相同的数据结构）
-        created_events_list = list(created_events)
-        result = split_list(created_events_list, 100)
-
+        # 2. 立即查询返回带 pk 的对象（1 次查询），避免后续 event_operator 需要用 event_id 再查一遍
+        created_events_list = list(Event.objects.filter(event_id__in=all_event_ids))
         logger.debug("[AlertSource] 重新加载 %s 条带 pk 的事件", len(created_events_list))
-        return result
+        return created_events_list
 
     @staticmethod
     def timestamp_to_datetime(timestamp: str) -> datetime:
@@ -601,12 +658,15 @@ class AlertSourceAdapter(ABC):
             events_list: 事件批次列表
         """
 
-        # 优化：预先查询活跃屏蔽策略，避免每批次重复查询
+        # 优化：预先查询活跃屏蔽策略并编译一次，避免每批次重复查询和重复解析规则
         active_shields = self.get_active_shields()
+        compiled_rules = EventShieldOperator.compile_shields(active_shields) if active_shields is not None else None
 
         for event_list in events_list:
             try:
-                execute_shield_check_for_events([i.event_id for i in event_list], active_shields=active_shields)
+                execute_shield_check_for_events(
+                    [i.event_id for i in event_list], active_shields=active_shields, compiled_rules=compiled_rules
+                )
             except Exception as err:  # noqa
                 logger.error("[AlertSource] 事件屏蔽检查失败", exc_info=True)
 
@@ -6,9 +6,9 @@ from typing import Dict, List, Optional
 from django.core.cache import cache
 
 from apps.alerts.enrichment.keys import resolve_binding, build_binding_key
-from apps.alerts.enrichment.matcher import event_matches
 from apps.alerts.enrichment.projection import project
 from apps.alerts.enrichment.providers.base import get_provider
+from apps.alerts.utils.compiled_rules import EVENT, CompiledRuleSet, RuleSetCache
 
 logger = logging.getLogger(__name__)
 
@@ -18,15 +18,27 @@ CACHE_TTL_SECONDS = 60
 _MISS = "__enrich_miss__"
 
 
+def _compile_rules(rules) -> CompiledRuleSet:
+    return CompiledRuleSet(rules, lambda rule: rule.match_rules, semantics=EVENT)
+
+
+def _active_rule_queryset():
+    from apps.alerts.models.enrichment import EnrichmentRule
+    return EnrichmentRule.objects.filter(is_active=True)
+
+
+# 活跃丰富规则的进程级编译缓存，规则变更（增删改）后下一批自动重建
+_ACTIVE_RULES = RuleSetCache("enrichment", _active_rule_queryset, _compile_rules)
+
+
 class EnrichmentEngine:
     def __init__(self, rules: Optional[List] = None):
         self._rules = rules
 
-    def _active_rules(self):
+    def _active_rules(self) -> CompiledRuleSet:
         if self._rules is not None:
-            return self._rules
-        from apps.alerts.models.enrichment import EnrichmentRule
-        return list(EnrichmentRule.objects.filter(is_active=True))
+            return _compile_rules(self._rules)
+        return _ACTIVE_RULES.get()
 
     @staticmethod
     def _cache_key(provider_type, provider_config, binding_key) -> str:
@@ -45,13 +57,21 @@ class EnrichmentEngine:
         except Exception:
             logger.error("[Enrichment] 加载丰富规则失败", exc_info=True)
             return
-        for rule in rules:
+        # 每个事件只过一遍索引化匹配器，按规则归集命中的事件
+        matched: Dict[int, List[Dict]] = {}
+        for event in events:
+            for index in rules.match(event):
+                matched.setdefault(index, []).append(event)
+        for index, rule in enumerate(rules.rules):
+            if index not in matched:
+                continue
             try:
-                self._apply_rule(rule, events)
+                self._apply_rule(rule, matched[index])
             except Exception:
                 logger.error("[Enrichment] 规则执行失败 rule=%s", getattr(rule, "name", "?"), exc_info=True)
 
     def _apply_rule(self, rule, events: List[Dict]) -> None:
+        """events 为已命中该规则 match_rules 的事件"""
         rule_team = {int(team_id) for team_id in (getattr(rule, "team", None) or [])}
         events_by_scope: Dict[tuple, List[Dict]] = {}
         for event in events:
@@ -71,11 +91,9 @@ class EnrichmentEngine:
         namespace = rule.resolved_namespace
         provider_type = rule.provider_type
 
-        # 1. 匹配 + 绑定 + 批内去重
+        # 1. 绑定 + 批内去重（匹配已在 enrich_batch 中完成）
         key_to_events: Dict = {}
         for event in events:
-            if not event_matches(event, rule.match_rules):
-                continue
             params = resolve_binding(event, rule.input_binding)
             if params is None:
                 continue
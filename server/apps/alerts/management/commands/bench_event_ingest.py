@@ -0,0 +1,83 @@
+import json
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from apps.alerts.models.alert_source import AlertSource
+from apps.alerts.models.models import Event
+from apps.alerts.views.receiver import receiver_data
+
+TITLE_PREFIX = "bench-ingest"
+
+
+def _payload(source_id, secret, run_id, offset, size):
+    return {
+        "source_id": source_id,
+        "secret": secret,
+        "events": [
+            {
+                "title": f"{TITLE_PREFIX} {run_id} cpu high",
+                "description": "synthetic event",
+                "level": "2",
+                "item": "cpu_usage",
+                "resource_id": f"host-{(offset + i) % 5000}",
+                "resource_name": f"host-{(offset + i) % 5000}",
+                "resource_type": "host",
+                "value": "95",
+                "external_id": f"{run_id}-{offset + i}",
+                "start_time": str(int(time.time())),
+            }
+            for i in range(size)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = "告警接收端压测：通过 receiver_data 视图写入合成事件，对比 INSERT...RETURNING 与 bulk_create+回查两种入库路径（会写入数据库）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source-id", required=True, dest="source_id", help="已启用的告警源 source_id")
+        parser.add_argument("--secret", required=True, help="告警源的组织级 secret（team_secrets 中的值）")
+        parser.add_argument("--events", type=int, default=50000, help="每种模式写入的事件总数")
+        parser.add_argument("--request-size", type=int, default=5000, dest="request_size", help="单个请求携带的事件数")
+        parser.add_argument("--mode", choices=["returning", "legacy", "both"], default="both")
+        parser.add_argument("--keep", action="store_true", help="保留压测写入的事件（默认结束后删除）")
+
+    def handle(self, *args, **options):
+        if not AlertSource.objects.filter(source_id=options["source_id"], is_active=True).exists():
+            raise CommandError(f"告警源不存在或未启用: {options['source_id']}")
+
+        modes = ["returning", "legacy"] if options["mode"] == "both" else [options["mode"]]
+        factory = RequestFactory()
+        for mode in modes:
+            run_id = uuid.uuid4().hex[:8]
+            latencies = []
+            accepted = 0
+            started = time.perf_counter()
+            with override_settings(ALERT_EVENT_INGEST_RETURNING=mode == "returning"):
+                for offset in range(0, options["events"], options["request_size"]):
+                    size = min(options["request_size"], options["events"] - offset)
+                    body = json.dumps(_payload(options["source_id"], options["secret"], run_id, offset, size))
+                    request = factory.post("/api/v1/alerts/api/receiver_data/", data=body, content_type="application/json")
+                    request_started = time.perf_counter()
+                    response = receiver_data(request)
+                    latencies.append(time.perf_counter() - request_started)
+                    result = json.loads(response.content)
+                    if response.status_code >= 400:
+                        raise CommandError(f"接收失败 status={response.status_code} body={result}")
+                    accepted += result.get("ingestion", {}).get("accepted", 0)
+            elapsed = time.perf_counter() - started
+
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(
+                f"mode={mode:<9} events={options['events']} accepted={accepted} "
+                f"吞吐={accepted / max(elapsed, 1e-9):,.0f} events/s "
+                f"请求耗时 p50={statistics.median(latencies) * 1000:.0f}ms p95={p95 * 1000:.0f}ms"
+            )
+            if not options["keep"]:
+                Event.objects.filter(title__startswith=f"{TITLE_PREFIX} {run_id}").delete()
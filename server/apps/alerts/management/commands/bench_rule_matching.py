@@ -0,0 +1,91 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.alerts.common.shield import EventShieldOperator
+from apps.alerts.enrichment.matcher import event_matches
+from apps.alerts.utils.compiled_rules import EVENT, ORM, CompiledRuleSet
+
+RESOURCE_TYPES = ["host", "mysql", "redis", "k8s_pod", "switch", "nginx", "kafka", "oracle"]
+
+
+def _rules(count, seed):
+    """合成规则：多数按 source_id/resource_type 精确匹配再叠加模糊条件，少量纯模糊/正则规则"""
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.6:
+            group = [
+                {"key": "source_id", "operator": "eq", "value": f"src-{rng.randrange(200)}"},
+                {"key": "title", "operator": "contains", "value": rng.choice(["cpu", "disk", "down", "timeout"])},
+            ]
+        elif roll < 0.9:
+            group = [
+                {"key": "resource_type", "operator": "eq", "value": rng.choice(RESOURCE_TYPES)},
+                {"key": "resource_id", "operator": "eq", "value": f"res-{rng.randrange(5000)}"},
+            ]
+        else:
+            group = [{"key": "title", "operator": "re", "value": rf"node-{rng.randrange(100)}\b"}]
+        rules.append([group])
+    return rules
+
+
+def _events(count, seed):
+    rng = random.Random(seed)
+    return [
+        {
+            "source_id": f"src-{rng.randrange(200)}",
+            "resource_type": rng.choice(RESOURCE_TYPES),
+            "resource_id": f"res-{rng.randrange(5000)}",
+            "title": f"node-{rng.randrange(100)} {rng.choice(['cpu high', 'disk full', 'service down', 'timeout'])}",
+            "level": str(rng.randrange(4)),
+        }
+        for _ in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "告警规则匹配基准：对比逐事件逐规则解释匹配(旧)与编译索引匹配的事件吞吐(合成数据，不读写数据库)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rules", type=int, default=1000, help="规则数")
+        parser.add_argument("--events", type=int, default=20000, help="事件数")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rules = _rules(options["rules"], options["seed"])
+        events = _events(options["events"], options["seed"] + 1)
+
+        started = time.perf_counter()
+        compiled = CompiledRuleSet(rules, lambda r: r, semantics=EVENT)
+        compile_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        legacy_hits = sum(1 for event in events for match_rules in rules if event_matches(event, match_rules))
+        legacy_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        compiled_hits = sum(len(compiled.match(event)) for event in events)
+        compiled_seconds = time.perf_counter() - started
+        if compiled_hits != legacy_hits:
+            self.stderr.write(f"警告：丰富规则匹配结果不一致 legacy={legacy_hits} compiled={compiled_hits}")
+
+        # 屏蔽策略语义：事件字段按 FIELD_MAPPING 映射为 ORM 路径
+        shield_events = [
+            {EventShieldOperator.FIELD_MAPPING.get(key, key): value for key, value in event.items()} for event in events
+        ]
+        shields = CompiledRuleSet(rules, lambda r: r, semantics=ORM, field_mapping=EventShieldOperator.FIELD_MAPPING)
+        started = time.perf_counter()
+        shield_hits = sum(len(shields.match(event)) for event in shield_events)
+        shield_seconds = time.perf_counter() - started
+
+        total = len(events)
+        self.stdout.write(
+            f"rules={len(rules)} events={total} 编译耗时={compile_seconds * 1000:.1f}ms\n"
+            f"丰富规则 逐条解释(旧)={total / max(legacy_seconds, 1e-9):,.0f} events/s "
+            f"编译索引={total / max(compiled_seconds, 1e-9):,.0f} events/s "
+            f"加速={legacy_seconds / max(compiled_seconds, 1e-9):.1f}x hits={compiled_hits}\n"
+            f"屏蔽策略 编译索引={total / max(shield_seconds, 1e-9):,.0f} events/s hits={shield_hits}"
+        )
@@ -309,6 +309,58 @@ def test_duckdb_load_with_future_infer_string():
     conn.close()
 
 
+@pytest.mark.django_db
+def test_event_store_appends_incrementally_and_evicts_old_events(source):
+    from apps.alerts.aggregation.engine.connection import DuckDBConnection
+
+    now = timezone.now()
+
+    def _event(event_id, minutes_ago):
+        event = Event.objects.create(
+            source=source, raw_data={}, title=event_id, level="0", start_time=now, event_id=event_id, action=EventAction.CREATED
+        )
+        Event.objects.filter(pk=event.pk).update(received_at=now - datetime.timedelta(minutes=minutes_ago))
+
+    _event("OLD", 90)
+    _event("E1", 10)
+    conn = DuckDBConnection()
+    conn.close()
+    assert conn.sync_event_store(60, now) == 1
+    assert conn.event_store_ready
+
+    _event("E2", 0)
+    assert conn.sync_event_store(60, now) == 1  # 只追加水位之后的新事件
+    assert conn.sync_event_store(60, now + datetime.timedelta(minutes=55)) == 0
+    assert conn.execute_query("SELECT list(event_id ORDER BY event_id) AS ids FROM event_store")[0]["ids"] == ["E2"]
+    conn.close()
+
+
+@pytest.mark.django_db
+def test_bind_strategy_events_selects_matches_and_refreshes_stale_rows(source):
+    from apps.alerts.aggregation.engine.connection import DuckDBConnection
+
+    now = timezone.now()
+    for event_id in ("E1", "E2", "E3"):
+        Event.objects.create(
+            source=source, raw_data={}, title=event_id, level="0", start_time=now, event_id=event_id, action=EventAction.CREATED
+        )
+    conn = DuckDBConnection()
+    conn.close()
+    conn.sync_event_store(60, now)
+
+    Event.objects.filter(event_id="E2").update(title="renamed", received_at=now + datetime.timedelta(seconds=1))
+    Event.objects.create(source=source, raw_data={}, title="E4", level="0", start_time=now, event_id="E4", action=EventAction.CREATED)
+
+    assert conn.bind_strategy_events(Event.objects.filter(event_id__in=["E2", "E3", "E4"])) is True
+    rows = conn.execute_query("SELECT event_id, title FROM events_table ORDER BY event_id")
+    assert rows == [{"event_id": "E2", "title": "renamed"}, {"event_id": "E3", "title": "E3"}, {"event_id": "E4", "title": "E4"}]
+    assert conn.bind_strategy_events(Event.objects.none()) is None
+
+    conn.release_round()
+    assert conn.execute_query("SELECT count(*) AS c FROM event_store")[0]["c"] == 4
+    conn.close()
+
+
 # --------------------------------------------------------------------------
 # process_aggregation 端到端
 # --------------------------------------------------------------------------
@@ -0,0 +1,130 @@
+"""编译型规则匹配测试。
+
+CompiledRuleSet 须与原有两套匹配语义逐条等价：屏蔽策略对照 RuleMatcher 生成的 ORM 查询，
+丰富规则对照 enrichment.matcher.event_matches；RuleSetCache 在规则增删改后重新编译。
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+from django.utils import timezone
+
+from apps.alerts.common.shield import EventShieldOperator
+from apps.alerts.enrichment.matcher import event_matches
+from apps.alerts.models.alert_operator import AlertShield
+from apps.alerts.models.alert_source import AlertSource
+from apps.alerts.models.models import Event
+from apps.alerts.utils.compiled_rules import EVENT, ORM, CompiledRuleSet, RuleSetCache
+from apps.alerts.utils.rule_matcher import RuleMatcher
+
+KEYS = ["source_id", "level", "resource_type", "resource_id", "content", "title", "event_id", "unknown"]
+VALUES = ["s1", "s2", "0", "1", "host", "HOST", "db-01", "cpu high", "", None, ["s1", "1"], [], "^db", "["]
+OPERATORS = ["eq", "ne", "contains", "not_contains", "re", "bogus"]
+
+
+def _random_rules(rng, count):
+    rules = []
+    for _ in range(count):
+        rules.append(
+            [
+                [
+                    {"key": rng.choice(KEYS), "operator": rng.choice(OPERATORS), "value": rng.choice(VALUES)}
+                    for _ in range(rng.randint(0, 3))
+                ]
+                for _ in range(rng.randint(0, 3))
+            ]
+        )
+    return rules
+
+
+@pytest.mark.django_db
+def test_orm_semantics_match_rule_matcher():
+    sources = [
+        AlertSource.objects.create(name=f"源{i}", source_id=f"s{i}", source_type="restful", secret="x") for i in (1, 2)
+    ]
+    rng = random.Random(7)
+    for i in range(30):
+        Event.objects.create(
+            source=rng.choice(sources),
+            raw_data={},
+            title=rng.choice(["cpu high", "disk", "HOST down"]),
+            description=rng.choice([None, "host db-01", ""]),
+            level=rng.choice(["0", "1"]),
+            resource_type=rng.choice(["host", "db", None]),
+            resource_id=rng.choice(["db-01", "1", None]),
+            start_time=timezone.now(),
+            event_id=f"E{i}",
+        )
+    matcher = RuleMatcher(EventShieldOperator.FIELD_MAPPING)
+    events = list(Event.objects.values("id", *set(EventShieldOperator.FIELD_MAPPING.values())))
+    rule_sets = _random_rules(rng, 200)
+    compiled = CompiledRuleSet(rule_sets, lambda r: r, semantics=ORM, field_mapping=EventShieldOperator.FIELD_MAPPING)
+
+    for index, match_rules in enumerate(rule_sets):
+        try:
+            expected = set(matcher.filter_queryset(Event.objects.all(), match_rules))
+        except ValueError:
+            # icontains/iregex 取 None 时 ORM 直接报错，编译版把该组视为无效
+            continue
+        actual = {event["id"] for event in events if index in compiled.match(event)}
+        assert actual == expected, match_rules
+
+
+def test_event_semantics_match_event_matches():
+    rng = random.Random(11)
+    rule_sets = _random_rules(rng, 300)
+    for rules in rule_sets:
+        for group in rules:
+            for cond in group:
+                cond["operator"] = rng.choice(OPERATORS + ["in", "not_in", "等于", "正则"])
+    compiled = CompiledRuleSet(rule_sets, lambda r: r, semantics=EVENT)
+    for _ in range(50):
+        event = {key: rng.choice(["s1", "0", "host", "HOST", "db-01", "", None, 1]) for key in KEYS if rng.random() < 0.8}
+        expected = [index for index, rules in enumerate(rule_sets) if event_matches(event, rules)]
+        assert compiled.match(event) == expected, event
+
+
+def test_index_skips_groups_without_candidate_value():
+    rules = [[[{"key": "source_id", "operator": "eq", "value": f"s{i}"}]] for i in range(100)]
+    compiled = CompiledRuleSet(rules, lambda r: r, semantics=EVENT)
+    assert compiled.match({"source_id": "s42"}) == [42]
+    assert compiled.match({"source_id": "nope"}) == []
+
+
+@pytest.mark.django_db
+def test_rule_set_cache_recompiles_on_change():
+    compiles = []
+
+    def compiler(rules):
+        compiles.append(len(rules))
+        return EventShieldOperator.compile_shields(rules)
+
+    cache = RuleSetCache("test", lambda: AlertShield.objects.filter(is_active=True), compiler)
+    shield = AlertShield.objects.create(name="s", match_type="all", match_rules=[], suppression_time={})
+    assert len(cache.get()) == 1
+    assert len(cache.get()) == 1
+    assert compiles == [1]
+
+    shield.match_rules = [[{"key": "title", "operator": "eq", "value": "x"}]]
+    shield.match_type = "filter"
+    shield.save()
+    assert cache.get().match({"title": "y"}) == []
+    AlertShield.objects.create(name="s2", match_type="all", match_rules=[], suppression_time={})
+    assert len(cache.get()) == 2
+    assert compiles == [1, 1, 2]
+
+
+def test_enrichment_engine_uses_compiled_matching():
+    from apps.alerts.enrichment.engine import EnrichmentEngine
+
+    seen = []
+    engine = EnrichmentEngine(
+        rules=[
+            SimpleNamespace(name="a", match_rules=[[{"key": "resource_type", "operator": "eq", "value": "host"}]]),
+            SimpleNamespace(name="b", match_rules=[]),
+        ]
+    )
+    engine._apply_rule = lambda rule, events: seen.append((rule.name, [e["id"] for e in events]))
+    engine.enrich_batch([{"id": 1, "resource_type": "host"}, {"id": 2, "resource_type": "db"}])
+    assert seen == [("a", [1]), ("b", [1, 2])]
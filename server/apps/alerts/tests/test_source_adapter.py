@@ -398,6 +398,50 @@ def test_bulk_save_events_dedups_in_batch(event_levels, restful_source):
     assert len(flat) == 1
 
 
+def _ingest_event(source, event_id, external_id, start):
+    return Event(source=source, raw_data={}, title="t", level="0", start_time=start,
+                 event_id=event_id, external_id=external_id, action="created", push_source_id="default")
+
+
+@pytest.mark.django_db
+def test_bulk_save_events_returns_pks_without_reselect(event_levels, restful_source, settings):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.utils import timezone
+
+    settings.ALERT_EVENT_INGEST_BATCH_SIZE = 500
+    start = timezone.now()
+    events = [_ingest_event(restful_source, f"E{i}", f"ext-{i}", start) for i in range(250)]
+    with CaptureQueriesContext(connection) as ctx:
+        result = AlertSourceAdapter.bulk_save_events(events)
+    statements = [query["sql"].split(" ", 1)[0] for query in ctx.captured_queries]
+    # 只有 INSERT ... RETURNING（及批次 savepoint），不再预查询 ingest_key 或按 event_id 回查
+    assert "SELECT" not in statements
+    assert all("RETURNING" in query["sql"] for query in ctx.captured_queries if query["sql"].startswith("INSERT"))
+    flat = [e for batch in result for e in batch]
+    assert [len(batch) for batch in result] == [100, 100, 50]
+    assert {e.pk for e in flat} == set(Event.objects.values_list("id", flat=True))
+    assert Event.objects.get(pk=flat[0].pk).event_id == flat[0].event_id
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("returning", [True, False])
+def test_bulk_save_events_skips_already_persisted(event_levels, restful_source, settings, returning):
+    from django.utils import timezone
+
+    settings.ALERT_EVENT_INGEST_RETURNING = returning
+    start = timezone.now()
+    AlertSourceAdapter.bulk_save_events([_ingest_event(restful_source, "E1", "ext-1", start)])
+    # 同 ingest_key 的重推 + 新事件 → 只返回新事件
+    result = AlertSourceAdapter.bulk_save_events(
+        [_ingest_event(restful_source, "E1-retry", "ext-1", start), _ingest_event(restful_source, "E2", "ext-2", start)]
+    )
+    flat = [e for batch in result for e in batch]
+    assert [e.event_id for e in flat] == ["E2"]
+    assert flat[0].pk is not None
+    assert Event.objects.count() == 2
+
+
 # --------------------------------------------------------------------------
 # resolve_recovery_external_id
 # --------------------------------------------------------------------------
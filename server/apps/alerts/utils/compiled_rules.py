@@ -0,0 +1,260 @@
+# -- coding: utf-8 --
+"""
+编译型规则匹配
+
+屏蔽策略与丰富规则都使用 OR-of-AND 结构的 match_rules。逐事件 × 逐规则解释执行在告警风暴下
+是 O(事件数 × 规则数)，这里把整套规则编译一次：
+- 每个 AND 组取一个等值条件建倒排索引（字段 → 取值 → 规则组），事件只评估索引命中的候选组
+  与少量无等值条件的组；
+- 正则预编译，条件预先绑定为闭包；
+- 编译结果按进程缓存，以规则表的 (行数, 最大 ID, 最近更新时间) 作为版本戳，
+  每批只需一次聚合查询即可发现规则变更，变更后重新加载并编译。
+
+两种条件语义：
+- ORM：与 RuleMatcher 生成的 Q 对象等价（屏蔽策略），contains/re 不区分大小写，
+  ne/not_contains 对空值为真，未知字段/操作符或非法正则使整组失效；
+- EVENT：与 enrichment.matcher.event_matches 等价（丰富规则），字段缺失或为空时整组不匹配。
+"""
+
+import re as regex_module
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from apps.core.logger import alert_logger as logger
+
+ORM = "orm"
+EVENT = "event"
+
+
+class _InvalidCondition(Exception):
+    pass
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value)
+
+
+def _compile_orm_condition(cond: Dict[str, Any], field_mapping: Dict[str, str]):
+    """返回 (字段, 判定函数, 可索引取值)；规则无效时抛 _InvalidCondition（与 RuleMatcher 返回 None 一致）"""
+    field = field_mapping.get(cond.get("key", ""))
+    operator = cond.get("operator", "eq")
+    value = cond.get("value", "")
+    if not field:
+        raise _InvalidCondition(f"未知字段键: {cond.get('key')}")
+    if isinstance(value, list) and not value:
+        raise _InvalidCondition(f"规则值数组不能为空: {cond}")
+
+    if operator in ("eq", "ne"):
+        if isinstance(value, list):
+            expected = {_text(item) for item in value}
+            keys = expected
+        elif value is None:
+            expected, keys = None, None
+        else:
+            expected = {_text(value)}
+            keys = expected
+        if expected is None:
+            hit = lambda actual: actual is None  # noqa: E731
+        else:
+            hit = lambda actual: actual is not None and _text(actual) in expected  # noqa: E731
+        if operator == "eq":
+            return field, hit, keys
+        return field, lambda actual: not hit(actual), None
+
+    if operator in ("contains", "not_contains", "re") and value is None:
+        # ORM 不接受 None 作为 icontains/iregex 的取值
+        raise _InvalidCondition(f"规则值不能为空: {cond}")
+
+    if operator in ("contains", "not_contains"):
+        needle = _text(value).lower()
+        hit = lambda actual: actual is not None and needle in _text(actual).lower()  # noqa: E731
+        if operator == "contains":
+            return field, hit, None
+        return field, lambda actual: not hit(actual), None
+
+    if operator == "re":
+        if not isinstance(value, str):
+            raise _InvalidCondition(f"正则表达式必须为字符串: {cond}")
+        try:
+            pattern = regex_module.compile(value, regex_module.IGNORECASE)
+        except regex_module.error as e:
+            raise _InvalidCondition(f"无效的正则表达式 '{value}': {e}")
+        return field, lambda actual: actual is not None and pattern.search(_text(actual)) is not None, None
+
+    raise _InvalidCondition(f"未知操作符: {operator}")
+
+
+def _compile_event_condition(cond: Dict[str, Any]):
+    """返回 (字段, 判定函数, 可索引取值)，语义与 enrichment.matcher._match_group/_cmp 一致"""
+    field = cond.get("key")
+    operator = cond.get("operator", "eq")
+    expected = cond.get("value")
+    e = _text(expected)
+
+    if operator in ("eq", "等于"):
+        compare, keys = (lambda a: a == e), {e}
+    elif operator in ("ne", "不等于"):
+        compare, keys = (lambda a: a != e), None
+    elif operator in ("contains", "包含"):
+        lowered = e.lower()
+        compare, keys = (lambda a: lowered in a.lower()), None
+    elif operator in ("not_contains", "不包含"):
+        lowered = e.lower()
+        compare, keys = (lambda a: lowered not in a.lower()), None
+    elif operator in ("re", "正则", "regex"):
+        try:
+            pattern = regex_module.compile(e)
+        except regex_module.error:
+            logger.warning("[AlertRules] 非法正则匹配条件，已忽略: %s", e)
+            compare, keys = (lambda a: False), None
+        else:
+            compare, keys = (lambda a: pattern.search(a) is not None), None
+    elif operator in ("in", "字中串"):
+        container = expected if isinstance(expected, (list, tuple, set)) else e
+        compare, keys = (lambda a: a in container), None
+    elif operator == "not_in":
+        container = expected if isinstance(expected, (list, tuple, set)) else e
+        compare, keys = (lambda a: a not in container), None
+    else:
+        compare, keys = (lambda a: False), None
+
+    def predicate(actual):
+        if actual is None or actual == "":
+            return False
+        return compare(_text(actual))
+
+    return field, predicate, keys
+
+
+class CompiledRuleSet:
+    """
+    一组规则的编译结果
+
+    Args:
+        rules: 规则对象序列，match() 返回其下标（按原顺序）
+        rules_of: 规则对象 → match_rules；返回 None 或空列表表示该规则匹配全部事件
+        semantics: ORM 或 EVENT
+        field_mapping: ORM 语义下规则 key → 事件字典字段名
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[Any],
+        rules_of: Callable[[Any], Optional[List[List[Dict[str, Any]]]]],
+        semantics: str = EVENT,
+        field_mapping: Optional[Dict[str, str]] = None,
+    ):
+        self.rules = list(rules)
+        self._match_all = set()
+        self._groups = []
+        self._index: Dict[str, Dict[str, List[int]]] = {}
+        self._unindexed: List[int] = []
+        for rule_index, rule in enumerate(self.rules):
+            match_rules = rules_of(rule)
+            # 两种语义下空规则都匹配全部事件
+            if not match_rules:
+                self._match_all.add(rule_index)
+                continue
+            for group in match_rules:
+                if group:
+                    self._add_group(rule_index, group, semantics, field_mapping or {})
+
+    def _add_group(self, rule_index, group, semantics, field_mapping):
+        conditions = []
+        for cond in group:
+            try:
+                if semantics == ORM:
+                    conditions.append(_compile_orm_condition(cond, field_mapping))
+                else:
+                    conditions.append(_compile_event_condition(cond))
+            except _InvalidCondition as e:
+                logger.warning("[AlertRules] 规则组因规则失效: %s", e)
+                return
+        if not conditions:
+            return
+
+        group_id = len(self._groups)
+        self._groups.append((rule_index, tuple((field, predicate) for field, predicate, _ in conditions)))
+        indexable = next(((field, keys) for field, _, keys in conditions if keys), None)
+        if indexable is None:
+            self._unindexed.append(group_id)
+            return
+        field, keys = indexable
+        table = self._index.setdefault(field, {})
+        for key in keys:
+            table.setdefault(key, []).append(group_id)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match(self, event: Dict[str, Any]) -> List[int]:
+        """返回事件命中的规则下标（升序）"""
+        matched = set(self._match_all)
+        candidates = set(self._unindexed)
+        for field, table in self._index.items():
+            value = event.get(field)
+            if value is None:
+                continue
+            group_ids = table.get(_text(value))
+            if group_ids:
+                candidates.update(group_ids)
+        for group_id in candidates:
+            rule_index, predicates = self._groups[group_id]
+            if rule_index in matched:
+                continue
+            if all(predicate(event.get(field)) for field, predicate in predicates):
+                matched.add(rule_index)
+        return sorted(matched)
+
+    def match_many(self, events: Iterable[Dict[str, Any]]) -> List[List[int]]:
+        return [self.match(event) for event in events]
+
+
+class RuleSetCache:
+    """
+    进程级编译规则缓存
+
+    版本戳取自规则表 (行数, 最大 ID, 最近更新时间) 的一次聚合查询；
+    ALERT_RULE_SET_MAX_AGE_SECONDS 为兜底重建周期（覆盖只改 JSON 且未刷新 updated_at 的异常写入）。
+    """
+
+    def __init__(self, name: str, queryset_factory: Callable[[], Any], compiler: Callable[[List[Any]], CompiledRuleSet]):
+        self.name = name
+        self._queryset_factory = queryset_factory
+        self._compiler = compiler
+        self._lock = threading.Lock()
+        self._entry = None
+
+    def _version(self, queryset):
+        stamp = queryset.aggregate(total=Count("id"), max_id=Max("id"), updated=Max("updated_at"))
+        return stamp["total"], stamp["max_id"], stamp["updated"]
+
+    def get(self) -> CompiledRuleSet:
+        queryset = self._queryset_factory()
+        version = self._version(queryset)
+        max_age = getattr(settings, "ALERT_RULE_SET_MAX_AGE_SECONDS", 300)
+        entry = self._entry
+        if entry is not None and entry[0] == version and time.monotonic() - entry[1] < max_age:
+            return entry[2]
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry[0] == version and time.monotonic() - entry[1] < max_age:
+                return entry[2]
+            started = time.monotonic()
+            compiled = self._compiler(list(queryset.order_by("id")))
+            self._entry = (version, time.monotonic(), compiled)
+            logger.info(
+                "[AlertRules] 规则集已编译 name=%s rules=%s duration_ms=%s",
+                self.name,
+                len(compiled),
+                int((time.monotonic() - started) * 1000),
+            )
+            return compiled
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
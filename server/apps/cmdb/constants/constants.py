@@ -61,6 +61,9 @@ NETWORK_INTERFACE_BELONG_ASST = "belong"
 NETWORK_TOPO_DEFAULT_HOP = 2
 NETWORK_TOPO_MAX_HOP = 4
 NETWORK_TOPO_NODE_LIMIT = 100
+# 实例流式导出：按 ID 游标分页读取的每页实例数；后台导出文件/进度状态保留时长（秒）
+EXPORT_PAGE_SIZE = 1000
+EXPORT_TASK_CACHE_TTL = 86400
 # 运营分析网络状态拓扑闭集：默认勾选上限与系统硬顶（不改变编辑页 BFS 的 100）
 NETWORK_STATUS_TOPOLOGY_DEFAULT_NODES = 100
 NETWORK_STATUS_TOPOLOGY_MAX_NODES = 200
@@ -22,6 +22,7 @@ from apps.cmdb.constants.field_constraints import (
 from apps.cmdb.display_field import ExcludeFieldsCache
 from apps.cmdb.graph.falkordb_format import FormatDBResult
 from apps.cmdb.graph.format_type import FORMAT_TYPE, FORMAT_TYPE_PARAMS, ParameterCollector
+from apps.cmdb.graph.search_index import InstanceSearchIndex
 from apps.cmdb.graph.validators import CQLValidator
 from apps.cmdb.services.instance_identity import (
     EDGE_DST_UUID_FIELD,
@@ -30,7 +31,12 @@ from apps.cmdb.services.instance_identity import (
     normalize_inst_uuid,
     prepare_edge_endpoint_properties,
 )
-from apps.cmdb.services.unique_rule import raise_unique_rule_conflict_if_needed
+from apps.cmdb.services.unique_rule import (
+    UniqueValueIndex,
+    build_exist_item_map,
+    build_unique_key,
+    raise_unique_rule_conflict_if_needed,
+)
 from apps.core.exceptions.base_app_exception import BaseAppException
 from apps.core.logger import cmdb_logger as logger
 
@@ -106,6 +112,11 @@ class FalkorDBConnectionPool:
 class FalkorDBClient:
     # 参数化查询开关（可通过环境变量控制）
     ENABLE_PARAMETERIZATION = True
+    # 全文检索倒排索引开关（索引未就绪时自动回退全表扫描）
+    ENABLE_SEARCH_INDEX = True
+    # 批量写入开关：batch_create_entity / batch_create_edge 按分块一次 UNWIND 写入
+    ENABLE_BULK_WRITE = True
+    BULK_WRITE_CHUNK_SIZE = 500
 
     def __init__(self):
         self._pool = FalkorDBConnectionPool()
@@ -113,6 +124,7 @@ class FalkorDBClient:
         self._graph = None
         # 初始化参数收集器
         self._param_collector = ParameterCollector()
+        self._search_index = None
 
     def connect(self):
         """建立连接并选择Graph"""
@@ -189,6 +201,103 @@ class FalkorDBClient:
             logger.error(f"[CQL Error] 查询失败，耗时: {execution_time:.2f}ms，错误: {str(e)}")
             raise
 
+    # ========== 全文检索倒排索引 ==========
+
+    def get_search_index(self):
+        """获取全文检索倒排索引（与 FalkorDB 共用 Redis 连接），不可用时返回 None"""
+        if self._search_index is not None:
+            return self._search_index
+        if self._client is None and not self.connect():
+            return None
+        connection = getattr(self._client, "connection", None)
+        if connection is None:
+            return None
+        self._search_index = InstanceSearchIndex(connection, getattr(self._graph, "name", None))
+        return self._search_index
+
+    def _search_candidate_ids(self, search: str, exclude_fields: list, exact: bool = False):
+        """通过倒排索引计算候选实例 ID；返回 None 表示回退全表扫描"""
+        if not self.ENABLE_SEARCH_INDEX:
+            return None
+        try:
+            search_index = self.get_search_index()
+            if search_index is None or not search_index.is_ready(exclude_fields):
+                return None
+            return search_index.candidate_ids(search, exact=exact)
+        except Exception as e:
+            logger.warning(f"[全文索引] 候选集计算失败，回退全表扫描: {e}")
+            return None
+
+    def _sync_search_index(self, entities: list):
+        """增量维护倒排索引；失败时撤销就绪标记，不影响写入本身"""
+        if not entities:
+            return
+        search_index = None
+        try:
+            search_index = self.get_search_index()
+            if search_index is None:
+                return
+            exclude_fields = ExcludeFieldsCache.get_exclude_fields()
+            if not exclude_fields:
+                search_index.mark_stale()
+                return
+            search_index.index_entities(entities, exclude_fields)
+        except Exception as e:
+            logger.warning(f"[全文索引] 增量维护失败，索引已标记为过期: {e}")
+            if search_index is not None:
+                search_index.mark_stale()
+
+    def _sync_search_index_from_result(self, result):
+        """按写入语句 RETURN n 的原始结果维护索引（保持表格字段为图中存储的 JSON 字符串）"""
+        self._sync_search_index(FormatDBResult(result).to_list_of_lists())
+
+    def _remove_from_search_index(self, entity_ids: list):
+        search_index = None
+        try:
+            search_index = self.get_search_index()
+            if search_index is not None:
+                search_index.remove_entities(entity_ids)
+        except Exception as e:
+            logger.warning(f"[全文索引] 删除索引失败，索引已标记为过期: {e}")
+            if search_index is not None:
+                search_index.mark_stale()
+
+    def rebuild_search_index(self, batch_size: int = 2000) -> int:
+        """全量重建全文检索倒排索引，按节点 ID 游标分页读取实例，返回写入的实例数"""
+        search_index = self.get_search_index()
+        if search_index is None:
+            raise BaseAppException("FalkorDB 连接不可用，无法重建全文索引")
+        exclude_fields = ExcludeFieldsCache.get_exclude_fields()
+        if not exclude_fields:
+            raise BaseAppException("排除字段缓存未初始化")
+
+        search_index.clear()
+        cursor, total = -1, 0
+        while True:
+            result = self._execute_query(
+                f"MATCH (n:{INSTANCE}) WHERE ID(n) > $cursor RETURN n ORDER BY ID(n) LIMIT $limit",
+                params={"cursor": cursor, "limit": batch_size},
+            )
+            entities = FormatDBResult(result).to_list_of_lists()
+            if not entities:
+                break
+            search_index.index_entities(entities, exclude_fields)
+            total += len(entities)
+            cursor = entities[-1]["_id"]
+            logger.info(f"[全文索引] 重建进度: {total}")
+        search_index.mark_ready(exclude_fields, total)
+        return total
+
+    def _full_text_match_clause(self, candidate_ids, conditions: list, query_params: dict) -> str:
+        """构建全文检索 MATCH 子句；有候选集时按 ID 逐个定位节点，避免全表扫描"""
+        if candidate_ids is None:
+            return f"MATCH (n:{INSTANCE})"
+        conditions.insert(0, "ID(n) = candidate_id")
+        if self.ENABLE_PARAMETERIZATION:
+            query_params["candidate_ids"] = candidate_ids
+            return f"UNWIND $candidate_ids AS candidate_id MATCH (n:{INSTANCE})"
+        return f"UNWIND {CQLValidator.validate_ids(candidate_ids)} AS candidate_id MATCH (n:{INSTANCE})"
+
     def entity_to_list(self, data):
         """将使用fetchall查询的结果转换成列表类型"""
         _format = FormatDBResult(data)
@@ -341,7 +450,13 @@ class FalkorDBClient:
         exist_items,
         attrs_by_id,
         exclude_instance_ids=None,
+        unique_index: UniqueValueIndex = None,
     ):
+        if unique_index is not None:
+            # 批量场景：使用批次级哈希索引，不再逐行遍历 exist_items
+            for item in items:
+                unique_index.check_rules(item, exclude_instance_ids=exclude_instance_ids)
+            return
         raise_unique_rule_conflict_if_needed(
             unique_rules=unique_rules,
             items=items,
@@ -431,7 +546,7 @@ class FalkorDBClient:
 
         return result_list
 
-    def _create_entity(
+    def _prepare_entity_properties(
         self,
         label: str,
         properties: dict,
@@ -439,7 +554,9 @@ class FalkorDBClient:
         exist_items: list,
         operator: str = None,
         attrs: list = None,
+        unique_index: UniqueValueIndex = None,
     ):
+        """创建实体前的校验与属性整理（身份标识、字段约束、唯一性、必填、创建人、表格序列化）"""
         properties = ensure_graph_instance_identity(label, properties)
 
         # 验证标签（不能参数化）
@@ -456,14 +573,18 @@ class FalkorDBClient:
                 error_msg = "; ".join([f"{err['field_name']}: {err['error']}" for err in validation_errors])
                 raise BaseAppException(f"字段校验失败: {error_msg}")
 
-        # 校验唯一属性
-        self.check_unique_attr(properties, check_attr_map.get("is_only", {}), exist_items)
+        # 校验唯一属性（批量场景走批次级哈希索引）
+        if unique_index is not None:
+            unique_index.check_attrs(properties)
+        else:
+            self.check_unique_attr(properties, check_attr_map.get("is_only", {}), exist_items)
 
         self.check_unique_rules(
             [properties],
             check_attr_map.get("unique_rules", []),
             exist_items,
             check_attr_map.get("attrs_by_id", {}),
+            unique_index=unique_index,
         )
 
         # 校验必填项
@@ -474,9 +595,10 @@ class FalkorDBClient:
             properties = {**properties, "_creator": operator}
 
         # 序列化表格字段为 JSON 字符串
-        properties = self._serialize_table_fields(label, properties, attrs)
+        return self._serialize_table_fields(label, properties, attrs)
 
-        # 创建实体
+    def _write_entity(self, validated_label: str, properties: dict):
+        """写入单个已校验的实体"""
         if self.ENABLE_PARAMETERIZATION:
             # 参数化: CREATE + SET += 以支持 list 类型属性
             # inline map (CREATE (n $props)) 不支持 list 类型,必须用运行时赋值
@@ -489,7 +611,41 @@ class FalkorDBClient:
             query = f"CREATE (n:{validated_label} {properties_str}) RETURN n"
             entity = self._execute_query(query)
 
-        return self.entity_to_dict(entity)
+        entity = self.entity_to_dict(entity)
+        if validated_label == INSTANCE:
+            self._sync_search_index([entity])
+        return entity
+
+    def _create_entity(
+        self,
+        label: str,
+        properties: dict,
+        check_attr_map: dict,
+        exist_items: list,
+        operator: str = None,
+        attrs: list = None,
+        unique_index: UniqueValueIndex = None,
+    ):
+        properties = self._prepare_entity_properties(label, properties, check_attr_map, exist_items, operator, attrs, unique_index)
+        return self._write_entity(CQLValidator.validate_label(label), properties)
+
+    def _bulk_write_entities(self, validated_label: str, rows: list) -> dict:
+        """
+        一次 UNWIND 参数化查询写入多个已校验的实体
+
+        Returns:
+            dict: {行序号: 实体}，未写入的行不在结果中
+        """
+        params = {"rows": [self.format_properties_params(row).get("props", {}) for row in rows]}
+        query = (
+            f"UNWIND range(0, size($rows) - 1) AS idx WITH idx, $rows[idx] AS row "
+            f"CREATE (n:{validated_label}) SET n += row RETURN idx, n"
+        )
+        result = self._execute_query(query, params=params)
+        created = FormatDBResult(result).to_indexed_dict()
+        if validated_label == INSTANCE:
+            self._sync_search_index(list(created.values()))
+        return created
 
     def create_edge(
         self,
@@ -615,15 +771,80 @@ class FalkorDBClient:
         exist_items: list,
         operator: str = None,
         attrs: list = None,
+        unique_index: UniqueValueIndex = None,
     ):
-        """批量创建实体"""
+        """
+        批量创建实体
+
+        unique_index: 批次级唯一值索引，未传入时按 exist_items 构建一次；
+        调用方跨多次调用复用时需与 exist_items 保持一致
+        """
+        if unique_index is None:
+            unique_index = UniqueValueIndex(check_attr_map, exist_items)
+        if not (self.ENABLE_BULK_WRITE and self.ENABLE_PARAMETERIZATION):
+            return self._batch_create_entity_by_row(label, properties_list, check_attr_map, exist_items, operator, attrs, unique_index)
+
+        # 第一阶段：整批在 Python 中完成校验，已通过的数据加入 exist_items 参与后续行的唯一性校验
+        results = [None] * len(properties_list)
+        pending = []
+        for index, properties in enumerate(properties_list):
+            try:
+                prepared = self._prepare_entity_properties(label, properties, check_attr_map, exist_items, operator, attrs, unique_index)
+            except Exception as e:
+                results[index] = {"message": f"article {index + 1} data, {e}", "success": False, "data": properties}
+                continue
+            exist_items.append(prepared)
+            unique_index.add(prepared)
+            pending.append((index, properties, prepared))
+
+        # 第二阶段：按分块一次 UNWIND 写入，分块失败时逐行写入以保留逐行结果
+        validated_label = CQLValidator.validate_label(label) if pending else ""
+        failed_items = set()
+        for start in range(0, len(pending), self.BULK_WRITE_CHUNK_SIZE):
+            chunk = pending[start : start + self.BULK_WRITE_CHUNK_SIZE]
+            try:
+                created = self._bulk_write_entities(validated_label, [item[2] for item in chunk])
+            except Exception as e:
+                logger.warning(f"[batch_create_entity] 批量写入失败，改为逐行写入: {e}")
+                created = None
+
+            for offset, (index, properties, prepared) in enumerate(chunk):
+                try:
+                    entity = created.get(offset) if created is not None else self._write_entity(validated_label, prepared)
+                    if not entity:
+                        raise BaseAppException("entity not created")
+                except Exception as e:
+                    failed_items.add(id(prepared))
+                    unique_index.remove(prepared)
+                    results[index] = {"message": f"article {index + 1} data, {e}", "success": False, "data": properties}
+                    continue
+                prepared.update(entity)
+                results[index] = {"data": entity, "success": True, "message": ""}
+
+        if failed_items:
+            exist_items[:] = [item for item in exist_items if id(item) not in failed_items]
+        return results
+
+    def _batch_create_entity_by_row(
+        self,
+        label: str,
+        properties_list: list,
+        check_attr_map: dict,
+        exist_items: list,
+        operator: str = None,
+        attrs: list = None,
+        unique_index: UniqueValueIndex = None,
+    ):
+        """逐行创建实体（非参数化模式或关闭批量写入时使用）"""
         results = []
         for index, properties in enumerate(properties_list):
             result = {}
             try:
-                entity = self._create_entity(label, properties, check_attr_map, exist_items, operator, attrs)
+                entity = self._create_entity(label, properties, check_attr_map, exist_items, operator, attrs, unique_index)
                 result.update(data=entity, success=True, message="")
                 exist_items.append(entity)
+                if unique_index is not None:
+                    unique_index.add(entity)
             except Exception as e:
                 message = f"article {index + 1} data, {e}"
                 result.update(message=message, success=False, data=properties)
@@ -639,6 +860,132 @@ class FalkorDBClient:
         check_asst_key: str,
     ):
         """批量创建边"""
+        if not (self.ENABLE_BULK_WRITE and self.ENABLE_PARAMETERIZATION):
+            return self._batch_create_edge_by_row(label, a_label, b_label, edge_list, check_asst_key)
+
+        results = [None] * len(edge_list)
+
+        def _fail(index, error):
+            results[index] = {"message": f"article {index + 1} data, {error}", "success": False}
+
+        try:
+            validated_label = CQLValidator.validate_relation(label)
+            validated_a_label = CQLValidator.validate_label(a_label)
+            validated_b_label = CQLValidator.validate_label(b_label)
+            validated_check_key = CQLValidator.validate_field(check_asst_key)
+            if not validated_label:
+                raise BaseAppException("label is empty")
+        except Exception as e:
+            for index in range(len(edge_list)):
+                _fail(index, e)
+            return results
+
+        # 第一阶段：Python 中校验 ID，并剔除本批内重复的边
+        rows = []
+        seen = set()
+        for index, edge_info in enumerate(edge_list):
+            try:
+                a_id = CQLValidator.validate_id(edge_info["src_id"])
+                b_id = CQLValidator.validate_id(edge_info["dst_id"])
+                check_val = edge_info.get(check_asst_key)
+                edge_key = (frozenset((a_id, b_id)), json.dumps(check_val, sort_keys=True, default=str))
+                if edge_key in seen:
+                    raise BaseAppException("edge already exists")
+                seen.add(edge_key)
+                rows.append({"idx": index, "a_id": a_id, "b_id": b_id, "check_val": check_val, "props": edge_info})
+            except Exception as e:
+                _fail(index, e)
+
+        match_pattern = f"(a:{validated_a_label})-[e]-(b:{validated_b_label})"
+        for start in range(0, len(rows), self.BULK_WRITE_CHUNK_SIZE):
+            chunk = rows[start : start + self.BULK_WRITE_CHUNK_SIZE]
+
+            # 一次查询本分块中已存在的边
+            check_rows = [{"idx": row["idx"], "a_id": row["a_id"], "b_id": row["b_id"], "check_val": row["check_val"]} for row in chunk]
+            existing = self._execute_query(
+                f"UNWIND $rows AS row MATCH {match_pattern} "
+                f"WHERE ID(a) = row.a_id AND ID(b) = row.b_id AND e.{validated_check_key} = row.check_val "
+                f"RETURN row.idx AS idx, COUNT(e) AS count",
+                params={"rows": check_rows},
+            )
+            existing_counts = FormatDBResult(existing).to_result_of_count()
+
+            write_rows = []
+            for row in chunk:
+                if existing_counts.get(row["idx"], 0) > 0:
+                    _fail(row["idx"], "edge already exists")
+                    continue
+                write_rows.append(row)
+
+            # model_association / 分类边等非实例关联不写入 src/dst_inst_uuid
+            if validated_label == INSTANCE_ASSOCIATION:
+                write_rows = self._bulk_resolve_edge_endpoint_uuids(write_rows, _fail)
+            if not write_rows:
+                continue
+
+            params = {
+                "rows": [
+                    {"idx": row["idx"], "a_id": row["a_id"], "b_id": row["b_id"], **self.format_properties_params(row["props"])}
+                    for row in write_rows
+                ]
+            }
+            try:
+                created = self._execute_query(
+                    f"UNWIND $rows AS row "
+                    f"MATCH (a:{validated_a_label}) WHERE ID(a) = row.a_id "
+                    f"WITH row, a MATCH (b:{validated_b_label}) WHERE ID(b) = row.b_id "
+                    f"CREATE (a)-[e:{validated_label}]->(b) SET e += row.props RETURN row.idx AS idx, e",
+                    params=params,
+                )
+                created_edges = FormatDBResult(created).to_indexed_dict()
+            except Exception as e:
+                for row in write_rows:
+                    _fail(row["idx"], e)
+                continue
+
+            for row in write_rows:
+                edge = created_edges.get(row["idx"])
+                if edge is None:
+                    _fail(row["idx"], "edge endpoint not found")
+                else:
+                    results[row["idx"]] = {"data": edge, "success": True}
+        return results
+
+    def _bulk_resolve_edge_endpoint_uuids(self, rows: list, on_error) -> list:
+        """实例关联边批量补齐 UUID 端点：缺失的端点 UUID 一次查询回填"""
+        missing_ids = set()
+        for row in rows:
+            if not row["props"].get(EDGE_SRC_UUID_FIELD):
+                missing_ids.add(row["a_id"])
+            if not row["props"].get(EDGE_DST_UUID_FIELD):
+                missing_ids.add(row["b_id"])
+        uuid_map = {}
+        if missing_ids:
+            uuid_map = {item["_id"]: item.get("inst_uuid") for item in self.query_entity_by_ids(sorted(missing_ids))}
+
+        resolved = []
+        for row in rows:
+            try:
+                row["props"] = prepare_edge_endpoint_properties(
+                    dict(row["props"]),
+                    src_inst_uuid=uuid_map.get(row["a_id"]),
+                    dst_inst_uuid=uuid_map.get(row["b_id"]),
+                )
+            except Exception as e:
+                on_error(row["idx"], e)
+                continue
+            resolved.append(row)
+        return resolved
+
+    def _batch_create_edge_by_row(
+        self,
+        label: str,
+        a_label: str,
+        b_label: str,
+        edge_list: list,
+        check_asst_key: str,
+    ):
+        """逐行创建边（非参数化模式或关闭批量写入时使用）"""
         results = []
         for index, edge_info in enumerate(edge_list):
             result = {}
@@ -1169,6 +1516,8 @@ class FalkorDBClient:
             properties_str = self.format_properties_set(properties)
             nodes = self._execute_query(f"MATCH (n{label_str}) WHERE ID(n) IN {validated_ids} SET {properties_str} RETURN n")
 
+        if validated_label in (INSTANCE, ""):
+            self._sync_search_index_from_result(nodes)
         return nodes
 
     def batch_update_node_property_values(self, label: str, field: str, property_values: list[dict]):
@@ -1186,6 +1535,8 @@ class FalkorDBClient:
             query,
             params={"property_values": validated_property_values},
         )
+        if validated_label == INSTANCE:
+            self._sync_search_index_from_result(result)
         return self.entity_to_list(result)
 
     def ensure_node_property_index(self, label: str, field: str):
@@ -1233,14 +1584,17 @@ class FalkorDBClient:
             param_collector = ParameterCollector()
             params_str, query_params = self.format_search_params(params, param_collector=param_collector)
             params_str = f"WHERE {params_str}" if params_str else ""
-            self._execute_query(
+            nodes = self._execute_query(
                 f"MATCH (n{label_str}) {params_str} REMOVE {properties_str} RETURN n",
                 params=query_params if query_params else None,
             )
         else:
             params_str, _ = self.format_search_params(params)
             params_str = f"WHERE {params_str}" if params_str else ""
-            self._execute_query(f"MATCH (n{label_str}) {params_str} REMOVE {properties_str} RETURN n")
+            nodes = self._execute_query(f"MATCH (n{label_str}) {params_str} REMOVE {properties_str} RETURN n")
+
+        if label in (INSTANCE, ""):
+            self._sync_search_index_from_result(nodes)
 
     def batch_delete_entity(self, label: str, entity_ids: list):
         """批量删除实体（参数化版本）"""
@@ -1256,6 +1610,9 @@ class FalkorDBClient:
         else:
             self._execute_query(f"MATCH (n{label_str}) WHERE ID(n) IN {validated_ids} DETACH DELETE n")
 
+        if validated_label in (INSTANCE, ""):
+            self._remove_from_search_index(validated_ids)
+
     def detach_delete_entity(self, label: str, id: int):
         """删除实体，以及实体的关联关系（参数化版本）"""
         validated_label = CQLValidator.validate_label(label) if label else ""
@@ -1270,6 +1627,9 @@ class FalkorDBClient:
         else:
             self._execute_query(f"MATCH (n{label_str}) WHERE ID(n) = {validated_id} DETACH DELETE n")
 
+        if validated_label in (INSTANCE, ""):
+            self._remove_from_search_index([validated_id])
+
     def delete_edge(self, edge_id: int):
         """删除边（参数化版本）"""
         validated_id = CQLValidator.validate_id(edge_id)
@@ -1870,6 +2230,12 @@ class FalkorDBClient:
         if not exclude_fields:
             raise BaseAppException("排除字段缓存未初始化")
 
+        # 倒排索引预过滤：候选为空时直接返回
+        candidate_ids = self._search_candidate_ids(search, exclude_fields, exact=case_sensitive)
+        if candidate_ids == []:
+            logger.info("[全文检索统计] 索引无候选，总数: 0")
+            return {"total": 0, "model_stats": []}
+
         # 参数化查询参数（合并权限参数）
         query_params = permission_params_dict.copy() if permission_params_dict else {}
         conditions = []
@@ -1934,10 +2300,11 @@ class FalkorDBClient:
 
         conditions.append(search_condition)
 
+        match_clause = self._full_text_match_clause(candidate_ids, conditions, query_params)
         where_clause = " AND ".join(conditions) if conditions else "true"
 
         # 执行统计查询
-        query = f"MATCH (n:{INSTANCE}) WHERE {where_clause} RETURN n.model_id AS model_id, COUNT(n) AS count ORDER BY count DESC"
+        query = f"{match_clause} WHERE {where_clause} RETURN n.model_id AS model_id, COUNT(n) AS count ORDER BY count DESC"
 
         result = self._execute_query(query, params=query_params if self.ENABLE_PARAMETERIZATION else None)
         formatted_result = FormatDBResult(result).to_result_of_count()
@@ -2006,6 +2373,12 @@ class FalkorDBClient:
         if not exclude_fields:
             raise BaseAppException("排除字段缓存未初始化")
 
+        # 倒排索引预过滤：候选为空时直接返回
+        candidate_ids = self._search_candidate_ids(search, exclude_fields, exact=case_sensitive)
+        if candidate_ids == []:
+            logger.info(f"[全文检索数据] 索引无候选，模型: {model_id}, 总数: 0")
+            return {"model_id": model_id, "total": 0, "page": page, "page_size": page_size, "data": []}
+
         # 参数化查询参数（合并权限参数）
         query_params = permission_params_dict.copy() if permission_params_dict else {}
         conditions = []
@@ -2077,10 +2450,11 @@ class FalkorDBClient:
                 )
 
         conditions.append(search_condition)
+        match_clause = self._full_text_match_clause(candidate_ids, conditions, query_params)
         where_clause = " AND ".join(conditions) if conditions else "true"
 
         # 第一步：查询该模型的总数
-        count_query = f"MATCH (n:{INSTANCE}) WHERE {where_clause} RETURN COUNT(n) AS total"
+        count_query = f"{match_clause} WHERE {where_clause} RETURN COUNT(n) AS total"
 
         count_result = self._execute_query(count_query, params=query_params if self.ENABLE_PARAMETERIZATION else None)
         count_data = FormatDBResult(count_result).to_list_of_lists()
@@ -2090,7 +2464,7 @@ class FalkorDBClient:
 
         # 第二步：查询分页数据
         skip = (page - 1) * page_size
-        data_query = f"MATCH (n:{INSTANCE}) WHERE {where_clause} RETURN n ORDER BY ID(n) SKIP {skip} LIMIT {page_size}"
+        data_query = f"{match_clause} WHERE {where_clause} RETURN n ORDER BY ID(n) SKIP {skip} LIMIT {page_size}"
 
         data_result = self._execute_query(data_query, params=query_params if self.ENABLE_PARAMETERIZATION else None)
         data = self.entity_to_list(data_result)
@@ -2134,6 +2508,12 @@ class FalkorDBClient:
         if not exclude_fields:
             raise BaseAppException("排除字段缓存未初始化")
 
+        # 倒排索引预过滤（旧接口区分大小写时同样是子串匹配）
+        candidate_ids = self._search_candidate_ids(search, exclude_fields)
+        if candidate_ids == []:
+            logger.info("[全文检索] 索引无候选，返回: 0 条数据")
+            return []
+
         # 参数化查询参数
         query_params = {}
         conditions = []
@@ -2196,9 +2576,10 @@ class FalkorDBClient:
                 )
 
         conditions.append(search_condition)
+        match_clause = self._full_text_match_clause(candidate_ids, conditions, query_params)
         where_clause = " AND ".join(conditions) if conditions else "true"
 
-        query = f"MATCH (n:{INSTANCE}) WHERE {where_clause} RETURN n"
+        query = f"{match_clause} WHERE {where_clause} RETURN n"
 
         objs = self._execute_query(query, params=query_params if self.ENABLE_PARAMETERIZATION else None)
         result = self.entity_to_list(objs)
@@ -2214,22 +2595,25 @@ class FalkorDBClient:
         exist_items: list,
         operator: str = None,
         attrs: list = None,
+        unique_index: UniqueValueIndex = None,
+        exist_item_map: dict = None,
     ):
-        """批量保存实体，支持新增与更新"""
+        """
+        批量保存实体，支持新增与更新
+
+        exist_item_map: 唯一键 -> 已有实例的映射（build_exist_item_map），未传入时按 exist_items 构建；
+        调用方跨多次调用复用时，本次新增成功的实例会同步登记进该映射
+        """
         unique_key = check_attr_map.get(ModelConstraintKey.unique.value, {}).keys()
         add_nodes = []
         update_results = []
         if unique_key:
             properties_map = {}
             for properties in properties_list:
-                properties_key = tuple(properties.get(k) for k in unique_key if k in properties)
                 # 对参数中的节点按唯一键进行去重
-                properties_map[properties_key] = properties
+                properties_map[build_unique_key(properties, unique_key)] = properties
             # 已有节点处理
-            item_map = {}
-            for item in exist_items:
-                item_key = tuple(item.get(k) for k in unique_key if k in item)
-                item_map[item_key] = item
+            item_map = exist_item_map if exist_item_map is not None else build_exist_item_map(exist_items, unique_key)
             for properties_key, properties in properties_map.items():
                 node = item_map.get(properties_key)
                 if node:
@@ -2266,5 +2650,10 @@ class FalkorDBClient:
             exist_items=exist_items,
             operator=operator,
             attrs=attrs,
+            unique_index=unique_index,
         )
+        if unique_key and exist_item_map is not None:
+            for result in add_results:
+                if result["success"]:
+                    exist_item_map[build_unique_key(result["data"], unique_key)] = result["data"]
         return add_results, update_results
@@ -78,6 +78,15 @@ class FormatDBResult:
             result.extend([self._format_value(value) for value in record])
         return result
 
+    def to_indexed_dict(self) -> Dict[Any, Any]:
+        """
+        将 (序号, 值) 两列结果转换为字典，用于 UNWIND 批量写入按行回填结果
+
+        Returns:
+            Dict: {序号: 格式化后的值}
+        """
+        return {record[0]: self._format_value(record[1]) for record in self.records if len(record) > 1}
+
     def to_json(self, indent: int = 2) -> str:
         """
         将结果转换为 JSON 字符串
@@ -9,7 +9,7 @@ from neo4j.graph import Path
 from apps.cmdb.constants.constants import INSTANCE, ModelConstraintKey
 from apps.cmdb.graph.format_type import FORMAT_TYPE_PARAMS, ParameterCollector
 from apps.cmdb.graph.validators import CQLValidator
-from apps.cmdb.services.unique_rule import raise_unique_rule_conflict_if_needed
+from apps.cmdb.services.unique_rule import build_exist_item_map, build_unique_key, raise_unique_rule_conflict_if_needed
 from apps.core.exceptions.base_app_exception import BaseAppException
 from apps.core.logger import cmdb_logger as logger
 
@@ -261,8 +261,9 @@ class Neo4jClient:
         exist_items: list,
         operator: str = None,
         attrs: list = None,
+        unique_index=None,
     ):
-        """批量创建实体"""
+        """批量创建实体（Neo4j 驱动保留逐行唯一性校验，unique_index 仅为接口兼容）"""
         results = []
         for index, properties in enumerate(properties_list):
             result = {}
@@ -1039,22 +1040,21 @@ class Neo4jClient:
         check_attr_map: dict,
         exist_items: list,
         operator: str = None,
+        attrs: list = None,
+        unique_index=None,
+        exist_item_map: dict = None,
     ):
-        """批量保存实体，支持新增与更新"""
+        """批量保存实体，支持新增与更新（unique_index 仅为接口兼容，exist_item_map 语义同 FalkorDB 驱动）"""
         unique_key = check_attr_map.get(ModelConstraintKey.unique.value, {}).keys()
         add_nodes = []
         update_results = []
         if unique_key:
             properties_map = {}
             for properties in properties_list:
-                properties_key = tuple(properties.get(k) for k in unique_key if k in properties)
                 # 对参数中的节点按唯一键进行去重
-                properties_map[properties_key] = properties
+                properties_map[build_unique_key(properties, unique_key)] = properties
             # 已有节点处理
-            item_map = {}
-            for item in exist_items:
-                item_key = tuple(item.get(k) for k in unique_key if k in item)
-                item_map[item_key] = item
+            item_map = exist_item_map if exist_item_map is not None else build_exist_item_map(exist_items, unique_key)
             for properties_key, properties in properties_map.items():
                 node = item_map.get(properties_key)
                 if node:
@@ -1077,4 +1077,8 @@ class Neo4jClient:
         add_results = self.batch_create_entity(
             label=label, properties_list=add_nodes, check_attr_map=check_attr_map, exist_items=exist_items, operator=operator
         )
+        if unique_key and exist_item_map is not None:
+            for result in add_results:
+                if result["success"]:
+                    exist_item_map[build_unique_key(result["data"], unique_key)] = result["data"]
         return add_results, update_results
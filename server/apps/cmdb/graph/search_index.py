@@ -0,0 +1,239 @@
+# -- coding: utf-8 --
+"""
+CMDB 全文检索倒排索引
+
+职责：
+1. 为每个 instance 节点维护 token（整值）+ trigram 倒排表，存储在 FalkorDB 所在的 Redis 中
+2. 实例创建/更新/删除时增量维护；管理命令 rebuild_cmdb_search_index 全量重建
+3. 为 full_text / full_text_stats / full_text_by_model 提供候选节点 ID（预过滤）
+
+检索语义：
+- 索引只负责“缩小候选集”，候选节点仍由原 Cypher 条件复核，结果与全表扫描完全一致
+- 关键词短于 3 个字符、候选集过大、索引未就绪或排除字段发生变化时返回 None，调用方回退全表扫描
+- 超长属性值的节点不拆 trigram，记入 long 集合，始终作为候选参与复核
+
+存储结构（prefix = cmdb:fts:<graph>）：
+- <prefix>:g:<trigram>   -> set(node_id)   trigram 倒排表（小写）
+- <prefix>:v:<value>     -> set(node_id)   整值 token 倒排表（小写，用于精确匹配）
+- <prefix>:doc:<node_id> -> set(term)      节点已写入的 term，用于增量删除
+- <prefix>:long          -> set(node_id)   含超长属性值的节点
+- <prefix>:meta          -> hash           就绪标记：排除字段签名、重建时间、文档数
+"""
+
+import hashlib
+import os
+import time
+from typing import Iterable, List, Optional, Set
+
+from apps.cmdb.constants.constants import INSTANCE
+from apps.core.logger import cmdb_logger as logger
+
+# 节点上不参与检索的内部键（FormatDBResult 附加字段）
+INTERNAL_KEYS = frozenset(["_id", "_labels"])
+
+
+class InstanceSearchIndex:
+    """基于 Redis Set 的实例倒排索引"""
+
+    NGRAM_SIZE = 3
+    # 单个属性值超过该长度时不拆 trigram，节点记入 long 集合
+    MAX_VALUE_LENGTH = 1024
+    # 整值 token 的最大长度，超过时仅依赖 trigram
+    MAX_TOKEN_LENGTH = 256
+    # 候选集上限，超过则回退全表扫描（大结果集下扫描与 ID 过滤代价相当）
+    MAX_CANDIDATES = 50000
+    WRITE_BATCH_SIZE = 500
+
+    def __init__(self, connection, graph_name: str = None):
+        self._conn = connection
+        graph_name = graph_name or os.getenv("FALKORDB_DATABASE", "cmdb_graph")
+        self.prefix = f"cmdb:fts:{graph_name}"
+        self.meta_key = f"{self.prefix}:meta"
+        self.long_key = f"{self.prefix}:long"
+
+    # ========== 分词 ==========
+
+    @staticmethod
+    def exclude_signature(exclude_fields: Iterable[str]) -> str:
+        """排除字段签名，排除字段变化后索引需重建"""
+        joined = ",".join(sorted(set(exclude_fields or [])))
+        return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _value_texts(value) -> List[str]:
+        """与 Cypher toString(n[key]) 对齐的候选文本（宁多勿少）"""
+        if value is None:
+            return []
+        if isinstance(value, bool):
+            return ["true" if value else "false"]
+        if isinstance(value, float):
+            return list({repr(value), "%f" % value})
+        if isinstance(value, (list, tuple)):
+            texts = []
+            for item in value:
+                texts.extend(InstanceSearchIndex._value_texts(item))
+            texts.append(", ".join(str(item) for item in value))
+            return texts
+        return [str(value)]
+
+    @classmethod
+    def ngrams(cls, text: str) -> Set[str]:
+        size = cls.NGRAM_SIZE
+        if len(text) < size:
+            return set()
+        return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+    def build_terms(self, properties: dict, exclude_fields: Set[str]):
+        """
+        计算节点的索引 term
+
+        Returns:
+            (terms, is_long): term 集合，以及是否包含超长属性值
+        """
+        terms = set()
+        is_long = False
+        for key, value in properties.items():
+            if key in INTERNAL_KEYS or key in exclude_fields:
+                continue
+            for text in self._value_texts(value):
+                lowered = text.lower()
+                if len(lowered) <= self.MAX_TOKEN_LENGTH:
+                    terms.add(f"v:{lowered}")
+                if len(lowered) > self.MAX_VALUE_LENGTH:
+                    is_long = True
+                    continue
+                terms.update(f"g:{gram}" for gram in self.ngrams(lowered))
+        return terms, is_long
+
+    def _term_key(self, term: str) -> str:
+        return f"{self.prefix}:{term}"
+
+    def _doc_key(self, node_id) -> str:
+        return f"{self.prefix}:doc:{node_id}"
+
+    # ========== 维护 ==========
+
+    def is_ready(self, exclude_fields: Iterable[str]) -> bool:
+        meta = self._conn.hgetall(self.meta_key)
+        if not meta:
+            return False
+        signature = meta.get(b"exclude_signature") or meta.get("exclude_signature")
+        if isinstance(signature, bytes):
+            signature = signature.decode("utf-8")
+        return signature == self.exclude_signature(exclude_fields)
+
+    def mark_ready(self, exclude_fields: Iterable[str], doc_count: int):
+        self._conn.hset(
+            self.meta_key,
+            mapping={
+                "exclude_signature": self.exclude_signature(exclude_fields),
+                "built_at": int(time.time()),
+                "doc_count": doc_count,
+            },
+        )
+
+    def mark_stale(self):
+        """增量维护失败时撤销就绪标记，检索回退全表扫描直至重建"""
+        try:
+            self._conn.delete(self.meta_key)
+        except Exception as e:  # noqa
+            logger.warning(f"[全文索引] 撤销就绪标记失败: {e}")
+
+    def index_entities(self, entities: List[dict], exclude_fields: Iterable[str]):
+        """增量写入/覆盖节点索引；非 instance 节点忽略"""
+        exclude_set = set(exclude_fields or [])
+        docs = [e for e in entities if e and e.get("_id") is not None and e.get("_labels", INSTANCE) == INSTANCE]
+        for start in range(0, len(docs), self.WRITE_BATCH_SIZE):
+            batch = docs[start : start + self.WRITE_BATCH_SIZE]
+            read_pipe = self._conn.pipeline(transaction=False)
+            for doc in batch:
+                read_pipe.smembers(self._doc_key(doc["_id"]))
+            old_terms_list = read_pipe.execute()
+
+            write_pipe = self._conn.pipeline(transaction=False)
+            for doc, old_terms in zip(batch, old_terms_list):
+                node_id = doc["_id"]
+                old_terms = {t.decode("utf-8") if isinstance(t, bytes) else t for t in old_terms or ()}
+                new_terms, is_long = self.build_terms(doc, exclude_set)
+                for term in old_terms - new_terms:
+                    write_pipe.srem(self._term_key(term), node_id)
+                for term in new_terms - old_terms:
+                    write_pipe.sadd(self._term_key(term), node_id)
+                doc_key = self._doc_key(node_id)
+                write_pipe.delete(doc_key)
+                if new_terms:
+                    write_pipe.sadd(doc_key, *new_terms)
+                if is_long:
+                    write_pipe.sadd(self.long_key, node_id)
+                else:
+                    write_pipe.srem(self.long_key, node_id)
+            write_pipe.execute()
+
+    def remove_entities(self, node_ids: Iterable[int]):
+        node_ids = list(node_ids or [])
+        if not node_ids:
+            return
+        read_pipe = self._conn.pipeline(transaction=False)
+        for node_id in node_ids:
+            read_pipe.smembers(self._doc_key(node_id))
+        old_terms_list = read_pipe.execute()
+
+        write_pipe = self._conn.pipeline(transaction=False)
+        for node_id, old_terms in zip(node_ids, old_terms_list):
+            for term in old_terms or ():
+                term = term.decode("utf-8") if isinstance(term, bytes) else term
+                write_pipe.srem(self._term_key(term), node_id)
+            write_pipe.delete(self._doc_key(node_id))
+            write_pipe.srem(self.long_key, node_id)
+        write_pipe.execute()
+
+    def clear(self):
+        """删除全部索引键（重建前调用）"""
+        deleted = 0
+        batch = []
+        for key in self._conn.scan_iter(match=f"{self.prefix}:*", count=1000):
+            batch.append(key)
+            if len(batch) >= 1000:
+                deleted += self._conn.delete(*batch)
+                batch = []
+        if batch:
+            deleted += self._conn.delete(*batch)
+        return deleted
+
+    # ========== 检索 ==========
+
+    def candidate_ids(self, search: str, exact: bool = False) -> Optional[List[int]]:
+        """
+        计算候选节点 ID
+
+        Args:
+            search: 关键词
+            exact: True=整值精确匹配（toString(n[key]) = search），False=子串匹配
+
+        Returns:
+            候选 ID 列表（可能为空列表）；None 表示索引无法处理，调用方需回退全表扫描
+        """
+        lowered = (search or "").lower()
+        if exact and 0 < len(lowered) <= self.MAX_TOKEN_LENGTH:
+            keys = [self._term_key(f"v:{lowered}")]
+        else:
+            grams = self.ngrams(lowered)
+            if not grams:
+                return None
+            keys = [self._term_key(f"g:{gram}") for gram in grams]
+
+        pipe = self._conn.pipeline(transaction=False)
+        for key in keys:
+            pipe.scard(key)
+        pipe.scard(self.long_key)
+        cards = pipe.execute()
+        long_count = cards.pop()
+        if min(cards) + long_count > self.MAX_CANDIDATES:
+            return None
+
+        ids = self._conn.sinter(keys) if min(cards) else set()
+        if long_count:
+            ids = set(ids) | set(self._conn.smembers(self.long_key))
+        if len(ids) > self.MAX_CANDIDATES:
+            return None
+        return sorted(int(i) for i in ids)
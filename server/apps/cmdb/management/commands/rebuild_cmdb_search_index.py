@@ -0,0 +1,69 @@
+# -- coding: utf-8 --
+import os
+import time
+
+from django.core.management import BaseCommand
+from django.core.management.base import CommandError
+
+from apps.cmdb.display_field import ExcludeFieldsCache
+from apps.core.logger import cmdb_logger as logger
+
+
+class Command(BaseCommand):
+    help = "全量重建 CMDB 全文检索倒排索引（仅 FalkorDB），可选对比索引与全表扫描耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000, help="每批读取的实例数")
+        parser.add_argument("--skip-rebuild", action="store_true", help="跳过重建，仅执行 benchmark")
+        parser.add_argument(
+            "--benchmark",
+            nargs="*",
+            default=None,
+            metavar="KEYWORD",
+            help="重建后使用给定关键词对比 full_text_stats 索引/全表扫描耗时",
+        )
+        parser.add_argument("--rounds", type=int, default=3, help="benchmark 每个关键词的执行轮数")
+
+    def handle(self, *args, **options):
+        if not os.getenv("FALKORDB_HOST", ""):
+            raise CommandError("全文检索倒排索引仅支持 FalkorDB，请配置 FALKORDB_HOST")
+
+        from apps.cmdb.graph.falkordb import FalkorDBClient
+
+        if not ExcludeFieldsCache.get_exclude_fields():
+            ExcludeFieldsCache.initialize_all()
+
+        with FalkorDBClient() as ag:
+            if not options["skip_rebuild"]:
+                start = time.perf_counter()
+                try:
+                    total = ag.rebuild_search_index(batch_size=options["batch_size"])
+                except Exception as exc:
+                    logger.error(f"[全文索引] 重建失败: {exc}", exc_info=True)
+                    raise CommandError(f"全文索引重建失败: {exc}") from exc
+                cost = time.perf_counter() - start
+                self.stdout.write(self.style.SUCCESS(f"全文索引重建完成: 实例数={total}, 耗时={cost:.2f}s"))
+
+            if options["benchmark"]:
+                self._benchmark(ag, options["benchmark"], max(options["rounds"], 1))
+
+    def _benchmark(self, ag, keywords, rounds):
+        self.stdout.write(f"{'keyword':<24}{'scan(ms)':>12}{'index(ms)':>12}{'speedup':>10}{'total':>10}")
+        for keyword in keywords:
+            timings = {}
+            totals = {}
+            for use_index in (False, True):
+                ag.ENABLE_SEARCH_INDEX = use_index
+                costs = []
+                for _ in range(rounds):
+                    start = time.perf_counter()
+                    result = ag.full_text_stats(search=keyword)
+                    costs.append((time.perf_counter() - start) * 1000)
+                timings[use_index] = min(costs)
+                totals[use_index] = result["total"]
+            ag.ENABLE_SEARCH_INDEX = True
+
+            speedup = timings[False] / timings[True] if timings[True] else 0
+            self.stdout.write(f"{keyword:<24}{timings[False]:>12.1f}{timings[True]:>12.1f}{speedup:>9.1f}x{totals[True]:>10}")
+            if totals[False] != totals[True]:
+                self.stdout.write(self.style.WARNING(f"关键词 {keyword} 结果不一致: scan={totals[False]}, index={totals[True]}"))
@@ -1,5 +1,6 @@
 from apps.cmdb.constants.constants import (
     ENUM_SELECT_MODE_DEFAULT,
+    EXPORT_PAGE_SIZE,
     INSTANCE,
     INSTANCE_ASSOCIATION,
     NETWORK_TOPO_NODE_LIMIT,
@@ -2237,54 +2238,58 @@ class InstanceManage(object):
         with GraphClient() as ag:
             exist_items, _ = ag.query_entity(INSTANCE, [{"field": "model_id", "type": "str=", "value": model_id}])
 
+        exist_items__id_map = {i["_id"]: i for i in exist_items}
+        saved_inst_ids = []
+
+        def _on_chunk(add_results, update_results):
+            """每块保存后立即落变更记录，仅保留实例ID用于自动关联"""
+            add_changes = [
+                dict(
+                    inst_id=i["data"]["_id"],
+                    model_id=i["data"]["model_id"],
+                    after_data=i["data"],
+                    model_object=OPERATOR_INSTANCE,
+                    message=f"导入模型实例. 模型:{model_info['model_name']} 新增模型实例:{i['data'].get('inst_name') or i['data'].get('ip_addr', '')}",
+                )
+                for i in add_results
+                if i["success"]
+            ]
+            update_changes = [
+                dict(
+                    inst_id=i["data"]["_id"],
+                    model_id=i["data"]["model_id"],
+                    before_data=exist_items__id_map.get(i["data"]["_id"], {}),
+                    after_data=i["data"],
+                    model_object=OPERATOR_INSTANCE,
+                    message=f"导入模型实例. 模型:{model_info['model_name']} 更新模型实例:{i['data'].get('inst_name') or i['data'].get('ip_addr', '')}",
+                )
+                for i in update_results
+                if i["success"]
+            ]
+            batch_create_change_record(INSTANCE, CREATE_INST, add_changes, operator=operator)
+            batch_create_change_record(INSTANCE, UPDATE_INST, update_changes, operator=operator)
+            saved_inst_ids.extend(change["inst_id"] for change in add_changes + update_changes)
+
         _import = Import(model_id, attrs, exist_items, operator)
-        add_results, update_results, asso_result = _import.import_inst_list_support_edit(
+        _import.import_inst_list_support_edit(
             file_stream,
             allowed_org_ids=allowed_org_ids,
+            on_chunk=_on_chunk,
         )
+
+        from apps.cmdb.services.auto_relation_reconcile import schedule_instance_auto_relation_reconcile
+
+        schedule_instance_auto_relation_reconcile(saved_inst_ids)
+
         # 检查是否存在验证错误
         if _import.validation_errors:
             error_summary = f"数据导入失败：发现 {len(_import.validation_errors)} 个数据验证错误\n"
             error_details = "\n".join(_import.validation_errors)
             logger.warning("[InstanceImport] 数据导入验证失败 model_id=%s, error_count=%s", model_id, len(_import.validation_errors))
-            success_count = len([i for i in add_results if i.get("success", False)])
-            error_summary += f"已成功导入 {success_count} 条数据，失败 {len(_import.inst_list) - success_count} 条数据。\n 错误信息: {error_summary + error_details}"
+            success_count = _import.import_result_message["add"]["success"]
+            error_summary += f"已成功导入 {success_count} 条数据，失败 {_import.row_count - success_count} 条数据。\n 错误信息: {error_summary + error_details}"
             return {"success": False, "message": error_summary}
 
-        add_changes = [
-            dict(
-                inst_id=i["data"]["_id"],
-                model_id=i["data"]["model_id"],
-                after_data=i["data"],
-                model_object=OPERATOR_INSTANCE,
-                message=f"导入模型实例. 模型:{model_info['model_name']} 新增模型实例:{i['data'].get('inst_name') or i['data'].get('ip_addr', '')}",
-            )
-            for i in add_results
-            if i["success"]
-        ]
-        exist_items__id_map = {i["_id"]: i for i in exist_items}
-        update_changes = [
-            dict(
-                inst_id=i["data"]["_id"],
-                model_id=i["data"]["model_id"],
-                before_data=exist_items__id_map[i["data"]["_id"]],
-                after_data=i["data"],
-                model_object=OPERATOR_INSTANCE,
-                message=f"导入模型实例. 模型:{model_info['model_name']} 更新模型实例:{i['data'].get('inst_name') or i['data'].get('ip_addr', '')}",
-            )
-            for i in update_results
-            if i["success"]
-        ]
-        batch_create_change_record(INSTANCE, CREATE_INST, add_changes, operator=operator)
-        batch_create_change_record(INSTANCE, UPDATE_INST, update_changes, operator=operator)
-
-        from apps.cmdb.services.auto_relation_reconcile import schedule_instance_auto_relation_reconcile
-
-        schedule_instance_auto_relation_reconcile(
-            [item["data"]["_id"] for item in add_results if item.get("success")]
-            + [item["data"]["_id"] for item in update_results if item.get("success")]
-        )
-
         res_status, result_message = self.format_result_message(_import.import_result_message)
         logger.info("[InstanceImport] 数据导入成功 model_id=%s", model_id)
 
@@ -2362,16 +2367,19 @@ class InstanceManage(object):
         return cls._transport_topology_result(result)
 
     @staticmethod
-    def inst_export(
+    def build_export_context(
         model_id: str,
         ids: list,
         permissions_map: dict = {},
-        created: str = "",
         creator: str = "",
         attr_list: list = [],
         association_list: list = [],
     ):
-        """实例导出"""
+        """构建导出上下文
+
+        Returns:
+            tuple: (exporter, query_list, format_permission_dict)
+        """
         attrs = ModelManage.search_model_attr_v2(model_id)
         association = ModelManage.model_association_search(
             model_id,
@@ -2389,6 +2397,70 @@ class InstanceManage(object):
         else:
             query_list = [{"field": "model_id", "type": "str=", "value": model_id}]
 
+        if attr_list:
+            attr_map = {attr["attr_id"]: attr for attr in attrs}
+            attrs = [attr_map[attr_id] for attr_id in attr_list if attr_id in attr_map]
+        # 只有当用户明确选择了关联关系时才包含关联关系
+        association = [i for i in association if i["model_asst_id"] in association_list] if association_list else []
+
+        logger.info(f"过滤后的关联关系: {len(association)} 个")
+
+        return Export(attrs, model_id=model_id, association=association), query_list, format_permission_dict
+
+    @staticmethod
+    def iter_export_instances(query_list: list, format_permission_dict: dict, page_size: int = None, on_total=None):
+        """按递增图节点 ID 游标分页读取待导出实例，避免一次性加载全部实例
+
+        Args:
+            on_total: 首页读取时回调 on_total(total)，用于进度展示
+        """
+        size = max(1, min(int(page_size or EXPORT_PAGE_SIZE), 5000))
+        cursor = None
+        with GraphClient() as ag:
+            while True:
+                params = list(query_list)
+                if cursor is not None:
+                    params.append({"field": "id", "type": "id>", "value": cursor})
+                first_page = cursor is None and on_total is not None
+                rows, total = ag.query_entity(
+                    INSTANCE,
+                    params,
+                    format_permission_dict=format_permission_dict,
+                    page={"skip": 0, "limit": size},
+                    include_count=first_page,
+                )
+                if first_page:
+                    on_total(total or 0)
+                if not rows:
+                    break
+                next_cursor = int(rows[-1]["_id"])
+                if cursor is not None and next_cursor <= cursor:
+                    raise RuntimeError(f"实例导出游标未推进: cursor={cursor}")
+                yield from rows
+                if len(rows) < size:
+                    break
+                cursor = next_cursor
+
+    @staticmethod
+    def inst_export(
+        model_id: str,
+        ids: list,
+        permissions_map: dict = {},
+        created: str = "",
+        creator: str = "",
+        attr_list: list = [],
+        association_list: list = [],
+    ):
+        """实例导出"""
+        exporter, query_list, format_permission_dict = InstanceManage.build_export_context(
+            model_id,
+            ids,
+            permissions_map=permissions_map,
+            creator=creator,
+            attr_list=attr_list,
+            association_list=association_list,
+        )
+
         with GraphClient() as ag:
             # 使用新的基础权限过滤方法获取有权限的实例
             query = dict(
@@ -2397,17 +2469,8 @@ class InstanceManage(object):
                 format_permission_dict=format_permission_dict,
             )
             inst_list, _ = ag.query_entity(**query)
-        if attr_list:
-            attr_map = {attr["attr_id"]: attr for attr in attrs}
-            attrs = [attr_map[attr_id] for attr_id in attr_list if attr_id in attr_map]
-        else:
-            attrs = attrs
-        # 只有当用户明确选择了关联关系时才包含关联关系
-        association = [i for i in association if i["model_asst_id"] in association_list] if association_list else []
-
-        logger.info(f"过滤后的关联关系: {len(association)} 个")
 
-        return Export(attrs, model_id=model_id, association=association).export_inst_list(inst_list)
+        return exporter.export_inst_list(inst_list)
 
     @staticmethod
     def topo_search(inst_id: int):
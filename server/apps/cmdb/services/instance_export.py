@@ -0,0 +1,239 @@
+# -- coding: utf-8 --
+"""
+实例流式导出与后台导出
+
+- 流式导出：按 ID 游标分页读取实例，内存占用与实例总数无关。
+  只有 csv 真正边生成边返回；xlsx 为 zip 格式，openpyxl 需写完全部行后才能生成文件，
+  因此以只写模式先落临时文件（缓冲在磁盘），写完后再分块返回，响应在整个文件生成后才开始
+- 后台导出：Celery 任务写入导出目录，进度/结果状态记录在缓存中，前端轮询后下载
+"""
+
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from django.core.cache import cache
+
+from apps.cmdb.constants.constants import EXPORT_TASK_CACHE_TTL
+from apps.cmdb.services.instance import InstanceManage
+from apps.core.exceptions.base_app_exception import BaseAppException
+from apps.core.logger import cmdb_logger as logger
+
+EXPORT_FORMAT_XLSX = "xlsx"
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_CONTENT_TYPES = {
+    EXPORT_FORMAT_XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    EXPORT_FORMAT_CSV: "text/csv; charset=utf-8",
+}
+EXPORT_TASK_CACHE_PREFIX = "cmdb_inst_export:"
+EXPORT_POLL_INTERVAL_MS = 2000
+EXPORT_FILE_CHUNK_SIZE = 64 * 1024
+
+
+class InstanceExportService:
+    @staticmethod
+    def normalize_format(export_format: str) -> str:
+        export_format = (export_format or EXPORT_FORMAT_XLSX).lower()
+        if export_format not in EXPORT_CONTENT_TYPES:
+            raise BaseAppException(f"不支持的导出格式: {export_format}")
+        return export_format
+
+    @staticmethod
+    def build_file_name(model_id: str, export_format: str) -> str:
+        return f"{model_id}_export.{export_format}"
+
+    @staticmethod
+    def iter_file(file_path: str, delete: bool = False):
+        """分块读取文件，delete=True 时读取结束后删除（用于临时文件）"""
+        try:
+            with open(file_path, "rb") as fp:
+                while True:
+                    chunk = fp.read(EXPORT_FILE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            if delete:
+                InstanceExportService._remove_file(file_path)
+
+    @staticmethod
+    def _remove_file(file_path: str):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"[InstanceExport] 删除导出文件失败 path={file_path}, error={e}")
+
+    @staticmethod
+    def write_export_file(exporter, instances, export_format: str, file_path: str):
+        """将实例写入导出文件"""
+        if export_format == EXPORT_FORMAT_CSV:
+            # newline="" 交由 csv.writer 控制行尾
+            with open(file_path, "w", encoding="utf-8", newline="") as fp:
+                for chunk in exporter.iter_inst_list_csv(instances):
+                    fp.write(chunk)
+            return
+        exporter.write_inst_list(instances, file_path)
+
+    @staticmethod
+    def stream_export(export_format: str, **export_kwargs):
+        """
+        流式导出：csv 逐块生成返回；xlsx 先完整写入临时文件再分块返回（不是边生成边返回）
+
+        Args:
+            export_format: xlsx / csv
+            export_kwargs: 透传给 InstanceManage.build_export_context 的参数
+
+        Returns:
+            bytes 块迭代器，可直接作为 StreamingHttpResponse 的内容
+        """
+        export_format = InstanceExportService.normalize_format(export_format)
+        exporter, query_list, format_permission_dict = InstanceManage.build_export_context(**export_kwargs)
+        instances = InstanceManage.iter_export_instances(query_list, format_permission_dict)
+
+        if export_format == EXPORT_FORMAT_CSV:
+            return (chunk.encode("utf-8") for chunk in exporter.iter_inst_list_csv(instances))
+
+        # xlsx 需在保存时写入 zip 目录，无法边生成边返回：先以只写模式完整落临时文件，再分块返回并删除
+        fd, file_path = tempfile.mkstemp(suffix=".xlsx", prefix="cmdb_export_")
+        os.close(fd)
+        try:
+            exporter.write_inst_list(instances, file_path)
+        except Exception:
+            InstanceExportService._remove_file(file_path)
+            raise
+        return InstanceExportService.iter_file(file_path, delete=True)
+
+    # ========== 后台导出 ==========
+
+    @staticmethod
+    def artifact_root() -> Path:
+        """后台导出文件目录；多节点部署时需配置 Web 与 Celery Worker 共享的 CMDB_EXPORT_ARTIFACT_ROOT"""
+        configured = os.getenv("CMDB_EXPORT_ARTIFACT_ROOT")
+        root = Path(configured).expanduser() if configured else Path(tempfile.gettempdir()) / "bk-lite-cmdb-exports"
+        root.mkdir(parents=True, exist_ok=True)
+        return root.resolve()
+
+    @staticmethod
+    def cleanup_expired_artifacts(root: Path):
+        """清理超过状态保留期的导出文件（状态过期后文件已无法下载）"""
+        expire_before = time.time() - EXPORT_TASK_CACHE_TTL
+        for entry in os.scandir(root):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < expire_before:
+                    os.remove(entry.path)
+            except OSError as e:
+                logger.warning(f"[InstanceExport] 清理过期导出文件失败 path={entry.path}, error={e}")
+
+    @staticmethod
+    def create_export_id() -> str:
+        return f"exp_{uuid.uuid4().hex[:12]}"
+
+    @staticmethod
+    def get_cache_key(export_id: str) -> str:
+        return f"{EXPORT_TASK_CACHE_PREFIX}{export_id}"
+
+    @staticmethod
+    def save_export_state(export_id: str, status: str, **fields) -> dict:
+        previous = cache.get(InstanceExportService.get_cache_key(export_id)) or {}
+        state = dict(previous)
+        state.update(fields)
+        state.update(
+            {
+                "export_id": export_id,
+                "status": status,
+                "poll_interval_ms": EXPORT_POLL_INTERVAL_MS,
+            }
+        )
+        cache.set(InstanceExportService.get_cache_key(export_id), state, timeout=EXPORT_TASK_CACHE_TTL)
+        return state
+
+    @staticmethod
+    def get_export_state(export_id: str) -> dict | None:
+        return cache.get(InstanceExportService.get_cache_key(export_id))
+
+    @staticmethod
+    def build_owner(request) -> dict:
+        return {
+            "username": getattr(request.user, "username", ""),
+            "domain": getattr(request.user, "domain", ""),
+        }
+
+    @staticmethod
+    def can_access_export_state(state: dict, request) -> bool:
+        owner = state.get("owner") or {}
+        return owner.get("username") == getattr(request.user, "username", None) and owner.get("domain") == getattr(request.user, "domain", None)
+
+    @staticmethod
+    def to_public_state(state: dict) -> dict:
+        """对外返回的状态，不暴露服务器文件路径与属主"""
+        return {k: v for k, v in state.items() if k not in {"file_path", "owner"}}
+
+    @staticmethod
+    def enqueue_export(model_id: str, export_format: str, export_kwargs: dict, owner: dict) -> dict:
+        from apps.cmdb.tasks.celery_tasks import export_instances_task
+
+        export_format = InstanceExportService.normalize_format(export_format)
+        export_id = InstanceExportService.create_export_id()
+        state = InstanceExportService.save_export_state(
+            export_id,
+            "pending",
+            owner=owner,
+            model_id=model_id,
+            export_format=export_format,
+            processed=0,
+            total=None,
+        )
+        export_instances_task.delay(export_id, export_format, dict(export_kwargs, model_id=model_id))
+        return state
+
+    @staticmethod
+    def run_export(export_id: str, export_format: str, export_kwargs: dict) -> dict:
+        """执行后台导出（Celery 任务内调用），按块更新进度"""
+        export_kwargs = dict(export_kwargs)
+        # Celery json 序列化会将组织 ID 键转为字符串，这里还原为整型以匹配图中的组织字段
+        export_kwargs["permissions_map"] = {
+            int(org_id) if str(org_id).isdigit() else org_id: data for org_id, data in (export_kwargs.get("permissions_map") or {}).items()
+        }
+        model_id = export_kwargs["model_id"]
+        root = InstanceExportService.artifact_root()
+        InstanceExportService.cleanup_expired_artifacts(root)
+        file_path = str(root / f"{export_id}.{export_format}")
+
+        InstanceExportService.save_export_state(export_id, "running", started_at=int(time.time()))
+        start = time.perf_counter()
+        processed = 0
+
+        def _on_total(total):
+            InstanceExportService.save_export_state(export_id, "running", total=total)
+
+        def _track(instances, step):
+            nonlocal processed
+            for inst_info in instances:
+                yield inst_info
+                processed += 1
+                if processed % step == 0:
+                    InstanceExportService.save_export_state(export_id, "running", processed=processed)
+
+        try:
+            exporter, query_list, format_permission_dict = InstanceManage.build_export_context(**export_kwargs)
+            instances = InstanceManage.iter_export_instances(query_list, format_permission_dict, on_total=_on_total)
+            InstanceExportService.write_export_file(exporter, _track(instances, exporter.PROGRESS_STEP), export_format, file_path)
+        except Exception as e:
+            InstanceExportService._remove_file(file_path)
+            logger.error(f"[InstanceExport] 后台导出失败 export_id={export_id}, model_id={model_id}, error={e}", exc_info=True)
+            return InstanceExportService.save_export_state(export_id, "error", error=str(e))
+
+        cost = time.perf_counter() - start
+        logger.info(f"[InstanceExport] 后台导出完成 export_id={export_id}, model_id={model_id}, rows={processed}, cost={cost:.2f}s")
+        return InstanceExportService.save_export_state(
+            export_id,
+            "success",
+            processed=processed,
+            file_path=file_path,
+            file_name=InstanceExportService.build_file_name(model_id, export_format),
+            finished_at=int(time.time()),
+        )
@@ -321,6 +321,99 @@ def collect_instance_unique_conflicts(
     return single_field_conflicts + composite_conflicts
 
 
+class UniqueValueIndex:
+    """
+    批次级唯一值哈希索引，替代逐行遍历 exist_items 的唯一性校验。
+    - 单字段唯一（is_only）：attr_id -> 归一化值 -> 实例列表
+    - 组合唯一规则：rule_id -> 规则签名 -> 实例列表
+    每批构建一次（O(M)），逐行校验与登记均为 O(字段数)，校验结果与
+    check_unique_attr / raise_unique_rule_conflict_if_needed 保持一致。
+    """
+
+    def __init__(self, check_attr_map: dict[str, Any], exist_items: list[dict[str, Any]] | None = None):
+        self.is_only: dict[str, str] = dict(check_attr_map.get("is_only") or {})
+        self.rules = parse_unique_rules(check_attr_map.get("unique_rules") or [])
+        self.attrs_by_id = dict(check_attr_map.get("attrs_by_id") or {})
+        self._attr_index: dict[str, dict[str, list[dict[str, Any]]]] = {attr_id: {} for attr_id in self.is_only}
+        self._rule_index: dict[str, dict[tuple[str, ...], list[dict[str, Any]]]] = {rule.rule_id: {} for rule in self.rules}
+        for item in exist_items or []:
+            self.add(item)
+
+    def _keys(self, item: dict[str, Any]):
+        for attr_id, bucket in self._attr_index.items():
+            value = item.get(attr_id)
+            if value:
+                yield bucket, _normalize_compare_value(value)
+        for rule in self.rules:
+            signature = _build_rule_signature(item, rule.field_ids)
+            if signature is not None:
+                yield self._rule_index[rule.rule_id], signature
+
+    def add(self, item: dict[str, Any]) -> None:
+        """登记已存在或本批次已通过校验的实例"""
+        for bucket, key in self._keys(item):
+            bucket.setdefault(key, []).append(item)
+
+    def remove(self, item: dict[str, Any]) -> None:
+        """撤销登记（写入失败的行）"""
+        for bucket, key in self._keys(item):
+            matched = bucket.get(key)
+            if not matched:
+                continue
+            matched[:] = [exist_item for exist_item in matched if exist_item is not item]
+            if not matched:
+                bucket.pop(key, None)
+
+    def check(
+        self,
+        item: dict[str, Any],
+        is_update: bool = False,
+        exclude_instance_ids: set[int] | None = None,
+    ) -> None:
+        """
+        校验单个实例的单字段唯一与组合唯一规则，冲突时抛出 BaseAppException。
+
+        Args:
+            item: 待写入的实例属性。
+            is_update: 更新场景仅校验 item 中出现的单字段唯一属性。
+            exclude_instance_ids: 组合唯一规则校验时忽略的实例 ID（更新自身）。
+        """
+        self.check_attrs(item, is_update=is_update)
+        self.check_rules(item, exclude_instance_ids=exclude_instance_ids)
+
+    def check_attrs(self, item: dict[str, Any], is_update: bool = False) -> None:
+        check_attr_ids = [attr_id for attr_id in self.is_only if attr_id in item] if is_update else list(self.is_only)
+        conflict_attrs = [
+            attr_id
+            for attr_id in check_attr_ids
+            if item.get(attr_id) and self._attr_index[attr_id].get(_normalize_compare_value(item.get(attr_id)))
+        ]
+        if conflict_attrs:
+            raise BaseAppException("".join(f"{self.is_only[attr_id]} exist；" for attr_id in conflict_attrs))
+
+    def check_rules(self, item: dict[str, Any], exclude_instance_ids: set[int] | None = None) -> None:
+        excluded_ids = exclude_instance_ids or set()
+        for rule in self.rules:
+            signature = _build_rule_signature(item, rule.field_ids)
+            if signature is None:
+                continue
+            matched_items = [
+                exist_item for exist_item in self._rule_index[rule.rule_id].get(signature, []) if exist_item.get("_id") not in excluded_ids
+            ]
+            if matched_items:
+                raise BaseAppException(_build_conflict(rule, self.attrs_by_id, item, matched_items).message)
+
+
+def build_unique_key(item: dict[str, Any], unique_key) -> tuple:
+    """批量保存时按唯一字段匹配实例的键（item 中缺失的字段不参与）"""
+    return tuple(item.get(k) for k in unique_key if k in item)
+
+
+def build_exist_item_map(exist_items: list[dict[str, Any]], unique_key) -> dict[tuple, dict[str, Any]]:
+    """已有实例按唯一键建立映射，同键保留最后一个"""
+    return {build_unique_key(item, unique_key): item for item in exist_items}
+
+
 def raise_unique_rule_conflict_if_needed(
     unique_rules: str | list[dict[str, Any]] | list[ModelUniqueRule] | None,
     items: list[dict[str, Any]],
@@ -944,3 +944,13 @@ def finalize_scan_execution(self, execution_id, claim_token):
     from apps.cmdb.services.scan_trigger_service import poll_scan_finalize
 
     return poll_scan_finalize(execution_id, claim_token)
+
+
+@shared_task
+def export_instances_task(export_id: str, export_format: str, export_kwargs: dict) -> dict:
+    """后台导出模型实例，进度与结果写入缓存供前端轮询"""
+    from apps.cmdb.services.instance_export import InstanceExportService
+
+    logger.info(f"[InstanceExport] 开始后台导出 export_id={export_id}, model_id={export_kwargs.get('model_id')}, format={export_format}")
+    state = InstanceExportService.run_export(export_id, export_format, export_kwargs)
+    return InstanceExportService.to_public_state(state)
@@ -158,3 +158,42 @@ def test_export_inst_list_empty():
     stream = Export(_ATTRS, model_id="host").export_inst_list([])
     data = stream.read()
     assert data[:2] == b"PK"
+
+
+# --------------------------------------------------------------------------
+# write_inst_list / iter_inst_list_csv（流式导出）
+# --------------------------------------------------------------------------
+
+
+def test_write_inst_list_matches_export_inst_list(tmp_path):
+    exporter = Export(_ATTRS, model_id="host")
+    insts = [{"_id": i, "inst_name": f"h{i}", "ip": f"10.0.0.{i}", "status": "1"} for i in range(3)]
+    path = tmp_path / "out.xlsx"
+
+    assert exporter.write_inst_list(iter(insts), str(path)) == 3
+
+    streamed = openpyxl.load_workbook(path)
+    full = openpyxl.load_workbook(Export(_ATTRS, model_id="host").export_inst_list(insts))
+    assert streamed.sheetnames == full.sheetnames
+    assert [[c.value for c in r] for r in streamed["host"].iter_rows()] == [[c.value for c in r] for r in full["host"].iter_rows()]
+    assert streamed["host"]["A1"].fill.start_color.rgb.endswith("FFA500")
+    assert [dv.sqref for dv in streamed["host"].data_validations.dataValidation] == [
+        dv.sqref for dv in full["host"].data_validations.dataValidation
+    ]
+
+
+def test_iter_inst_list_csv(monkeypatch):
+    import csv
+    import io
+
+    monkeypatch.setattr(Export, "PROGRESS_STEP", 2)
+    insts = [{"_id": i, "inst_name": f"h{i}", "ip": "", "status": "2"} for i in range(3)]
+    chunks = list(Export(_ATTRS, model_id="host").iter_inst_list_csv(iter(insts)))
+
+    # 表头一块 + 每 2 行一块 + 尾块
+    assert len(chunks) == 3
+    assert chunks[0].startswith("﻿")
+    rows = list(csv.reader(io.StringIO("".join(chunks).lstrip("﻿"))))
+    assert rows[2] == ["字段标识(请勿编辑)", "inst_name", "ip", "status"]
+    assert rows[3] == ["", "h0", "", "停止"]
+    assert len(rows) == 6
@@ -499,9 +499,13 @@ def test_batch_update_node_property_values_rejects_invalid_field():
     assert c._graph.calls == []
 
 
+def _bulk_entity_result(nodes):
+    return FakeResultSet([("idx", "idx"), ("node", "n")], [[i, node] for i, node in enumerate(nodes)])
+
+
 def test_batch_create_entity_mixed_results():
     created = FakeNode(1, ["instance"], {"inst_name": "ok"})
-    c = _client(_entity_result([created]))
+    c = _client(_bulk_entity_result([created]))
     results = c.batch_create_entity(
         label="instance",
         properties_list=[{"inst_name": "ok"}, {"inst_name": ""}],
@@ -512,6 +516,54 @@ def test_batch_create_entity_mixed_results():
     assert results[1]["success"] is False
 
 
+def test_batch_create_entity_writes_chunk_with_single_unwind_query():
+    nodes = [FakeNode(i + 1, ["instance"], {"inst_name": f"h{i}"}) for i in range(3)]
+    c = _client(_bulk_entity_result(nodes))
+    exist_items = [{"inst_name": "dup"}]
+    results = c.batch_create_entity(
+        label="instance",
+        properties_list=[{"inst_name": "h0"}, {"inst_name": "dup"}, {"inst_name": "h1"}, {"inst_name": "h0"}, {"inst_name": "h2"}],
+        check_attr_map={"is_only": {"inst_name": "名称"}, "is_required": {}},
+        exist_items=exist_items,
+    )
+
+    assert [r["success"] for r in results] == [True, False, True, False, True]
+    assert [r["data"]["_id"] for r in results if r["success"]] == [1, 2, 3]
+    assert len(c._graph.calls) == 1
+    cql, params = c._graph.calls[0]
+    assert cql.startswith("UNWIND range(0, size($rows) - 1) AS idx")
+    assert [row["inst_name"] for row in params["rows"]] == ["h0", "h1", "h2"]
+    # 已写入的数据回填 _id，供后续唯一性校验使用
+    assert [item.get("_id") for item in exist_items] == [None, 1, 2, 3]
+
+
+def test_batch_create_entity_falls_back_to_row_writes_when_chunk_fails():
+    created = FakeNode(5, ["instance"], {"inst_name": "ok"})
+
+    def result(cql, params):
+        if cql.startswith("UNWIND"):
+            raise RuntimeError("bulk failed")
+        if params["props"]["inst_name"] == "bad":
+            raise RuntimeError("row failed")
+        return _entity_result([created])
+
+    c = _client(result)
+    handles = (c._client, c._graph)
+    # 查询失败会使连接失效，fake 连接池重连时返回同一个 fake graph
+    c._pool = type("Pool", (), {"invalidate": lambda self: None, "get_connection": lambda self: handles})()
+    exist_items = []
+    results = c.batch_create_entity(
+        label="instance",
+        properties_list=[{"inst_name": "ok"}, {"inst_name": "bad"}],
+        check_attr_map={"is_only": {}, "is_required": {}},
+        exist_items=exist_items,
+    )
+
+    assert results[0]["success"] is True
+    assert results[1]["success"] is False
+    assert [item["inst_name"] for item in exist_items] == ["ok"]
+
+
 # --------------------------------------------------------------------------
 # delete / remove / detach
 # --------------------------------------------------------------------------
@@ -764,27 +816,33 @@ def test_batch_create_edge_mixed():
 
     def result(cql, params):
         if "COUNT(e)" in cql:
-            return FakeResultSet([("count", "count")], [[0]])
+            # 第 2 行的边已存在
+            return FakeResultSet([("idx", "idx"), ("count", "count")], [[1, 1]])
         return FakeResultSet(
-            [("edge", "e")],
-            [[FakeRelEdge(1, "connects", {"model_asst_id": "c", "src_inst_uuid": src_uuid, "dst_inst_uuid": dst_uuid})]],
+            [("idx", "idx"), ("edge", "e")],
+            [[row["idx"], FakeRelEdge(10 + row["idx"], "connects", dict(row["props"]))] for row in params["rows"]],
         )
 
     c = _client(result)
-    edges = [
-        {
-            "src_id": 1,
-            "dst_id": 2,
-            "model_asst_id": "c",
-            "src_inst_uuid": src_uuid,
-            "dst_inst_uuid": dst_uuid,
-        }
-    ]
-    results = c.batch_create_edge("connects", "host", "switch", edges, "model_asst_id")
-    assert results[0]["success"] is True
-    props = c._graph.last_params["props"]
-    assert props["src_inst_uuid"] == src_uuid
-    assert "src_inst_id" not in props
+    edge = {
+        "src_id": 1,
+        "dst_id": 2,
+        "model_asst_id": "c",
+        "src_inst_uuid": src_uuid,
+        "dst_inst_uuid": dst_uuid,
+    }
+    edges = [edge, {**edge, "src_id": 3}, {**edge, "src_id": 2, "dst_id": 1}, {**edge, "src_id": "x"}]
+    results = c.batch_create_edge("instance_association", "instance", "instance", edges, "model_asst_id")
+
+    assert [r["success"] for r in results] == [True, False, False, False]
+    assert "edge already exists" in results[1]["message"]
+    assert "edge already exists" in results[2]["message"]
+    # 存在性校验与创建各一次查询
+    assert len(c._graph.calls) == 2
+    rows = c._graph.last_params["rows"]
+    assert [row["idx"] for row in rows] == [0]
+    assert rows[0]["props"]["src_inst_uuid"] == src_uuid
+    assert "src_inst_id" not in rows[0]["props"]
 
 
 def test_batch_update_entity_properties():
@@ -911,7 +969,7 @@ def test_full_text_by_model_bad_page(patch_exclude):
 
 def test_batch_save_entity_create_only():
     created = FakeNode(1, ["instance"], {"inst_name": "new"})
-    c = _client(_entity_result([created]))
+    c = _client(_bulk_entity_result([created]))
     result = c.batch_save_entity(
         label="instance",
         properties_list=[{"inst_name": "new"}],
@@ -923,6 +981,22 @@ def test_batch_save_entity_create_only():
     assert add_results[0]["success"] is True
 
 
+def test_batch_save_entity_registers_created_nodes_in_shared_map():
+    created = FakeNode(1, ["instance"], {"inst_name": "new"})
+    c = _client(_bulk_entity_result([created]))
+    exist_item_map = {}
+    add_results, update_results = c.batch_save_entity(
+        label="instance",
+        properties_list=[{"inst_name": "new"}],
+        check_attr_map={"is_only": {"inst_name": "名称"}, "is_required": {}, "editable": {}},
+        exist_items=[],
+        exist_item_map=exist_item_map,
+    )
+    assert add_results[0]["success"] is True and update_results == []
+    # 共享映射同步登记新增实例，后续调用无需按 exist_items 重建
+    assert exist_item_map[("new",)]["inst_name"] == "new"
+
+
 # --------------------------------------------------------------------------
 # FalkorDBConnectionPool 线程安全（issue #3661）
 # --------------------------------------------------------------------------
@@ -27,10 +27,11 @@ def _make_import(attrs=None):
     obj.operator = "admin"
     obj.inst_name_id_map = {}
     obj.inst_id_name_map = {}
-    obj.inst_list = []
+    obj.row_count = 0
     obj.model_asso_map = {}
     obj.validation_errors = []
     obj._field_maps = None
+    obj._unique_index = None
     obj.import_result_message = {
         "add": {"success": 0, "error": 0, "data": []},
         "update": {"success": 0, "error": 0, "data": []},
@@ -18,10 +18,12 @@ def _make(attrs):
     obj.operator = "admin"
     obj.inst_name_id_map = {}
     obj.inst_id_name_map = {}
-    obj.inst_list = []
+    obj.row_count = 0
     obj.model_asso_map = {}
     obj.validation_errors = []
     obj._field_maps = None
+    obj._unique_index = None
+    obj._exist_item_map = None
     obj.import_result_message = {
         "add": {"success": 0, "error": 0, "data": []},
         "update": {"success": 0, "error": 0, "data": []},
@@ -424,3 +426,97 @@ def test_format_excel_data_wrong_sheet_name():
     stream.seek(0)
     with pytest.raises(ValueError):
         obj.format_excel_data(stream)
+
+
+def _excel_stream(rows):
+    import io
+
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.title = "host"
+    sheet.append(["实例名(必填)", "IP"])
+    sheet.append(["字符串", "字符串"])
+    sheet.append(["inst_name", "ip"])
+    for row in rows:
+        sheet.append(row)
+    stream = io.BytesIO()
+    wb.save(stream)
+    stream.seek(0)
+    return stream
+
+
+@pytest.mark.django_db
+def test_iter_excel_data_is_lazy_and_skips_empty_rows():
+    obj = _make([{"attr_id": "inst_name", "attr_type": "str", "attr_name": "名称"}])
+    rows, asso_key_map = obj.iter_excel_data(_excel_stream([["h1", "1.1.1.1"], [None, None], ["h2", None]]))
+    assert asso_key_map == {}
+    assert next(rows)["inst_name"] == "h1"
+    assert [i["inst_name"] for i in rows] == ["h2"]
+
+
+@pytest.mark.django_db
+def test_import_support_edit_saves_in_chunks(monkeypatch):
+    obj = _make([{"attr_id": "inst_name", "attr_type": "str", "attr_name": "名称"}])
+    saved_chunks = []
+
+    def fake_update(self, inst_list):
+        saved_chunks.append([i["inst_name"] for i in inst_list])
+        adds = [{"success": True, "data": i, "message": ""} for i in inst_list if i["inst_name"] != "h3"]
+        adds += [{"success": False, "data": i, "message": "boom"} for i in inst_list if i["inst_name"] == "h3"]
+        return adds, []
+
+    monkeypatch.setattr("apps.cmdb.utils.Import.Import.inst_list_update", fake_update)
+    callbacks = []
+    add_r, update_r, asso_r = obj.import_inst_list_support_edit(
+        _excel_stream([[f"h{i}", None] for i in range(1, 6)]),
+        chunk_size=2,
+        on_chunk=lambda adds, updates: callbacks.append(len(adds)),
+    )
+
+    assert saved_chunks == [["h1", "h2"], ["h3", "h4"], ["h5"]]
+    assert callbacks == [2, 2, 1]
+    assert obj.row_count == 5
+    # 传入 on_chunk 时仅保留失败项
+    assert [i["data"]["inst_name"] for i in add_r] == ["h3"]
+    assert obj.import_result_message["add"]["success"] == 4
+    assert obj.import_result_message["add"]["error"] == 1
+
+
+@pytest.mark.django_db
+def test_import_support_edit_dedupes_unique_key_across_chunks(monkeypatch):
+    obj = _make(
+        [
+            {"attr_id": "inst_name", "attr_type": "str", "attr_name": "名称", "is_only": True},
+            {"attr_id": "ip", "attr_type": "str", "attr_name": "IP"},
+        ]
+    )
+    saved_chunks = []
+
+    def fake_update(self, inst_list):
+        saved_chunks.append([(i["inst_name"], i.get("ip")) for i in inst_list])
+        return [{"success": True, "data": i, "message": ""} for i in inst_list], []
+
+    monkeypatch.setattr("apps.cmdb.utils.Import.Import.inst_list_update", fake_update)
+    rows = [["h1", "1.1.1.1"], ["h2", None], ["h3", None], ["h1", "9.9.9.9"], ["h4", "x"]]
+    obj.import_inst_list_support_edit(_excel_stream(rows), chunk_size=2)
+
+    # 重复的 h1 跨块出现：只保存最后一行，且不会先新增再更新
+    assert saved_chunks == [[("h2", None), ("h3", None)], [("h1", "9.9.9.9"), ("h4", "x")]]
+    assert obj.row_count == 4
+
+
+def test_exist_item_map_is_built_once_per_import(monkeypatch):
+    obj = _make([])
+    obj.exist_items = [{"_id": 1, "inst_name": "h1"}]
+    built = []
+    monkeypatch.setattr(
+        "apps.cmdb.utils.Import.build_exist_item_map",
+        lambda items, unique_key: built.append(len(items)) or {},
+    )
+    check_attr_map = {"is_only": {"inst_name": "名称"}}
+
+    first = obj.get_exist_item_map(check_attr_map)
+    assert obj.get_exist_item_map(check_attr_map) is first
+    assert built == [1]
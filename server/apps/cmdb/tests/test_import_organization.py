@@ -22,10 +22,11 @@ def _make(attrs=None):
     obj.operator = "admin"
     obj.inst_name_id_map = {}
     obj.inst_id_name_map = {}
-    obj.inst_list = []
+    obj.row_count = 0
     obj.model_asso_map = {}
     obj.validation_errors = []
     obj._field_maps = None
+    obj._unique_index = None
     obj.import_result_message = {
         "add": {"success": 0, "error": 0, "data": []},
         "update": {"success": 0, "error": 0, "data": []},
@@ -258,8 +259,8 @@ def test_import_inst_list_support_edit(monkeypatch):
         lambda self, lst: ([], []),
     )
     monkeypatch.setattr(
-        "apps.cmdb.utils.Import.Import.format_excel_data",
-        lambda self, fs, allowed_org_ids=None: ([{"inst_name": "h1"}], {}),
+        "apps.cmdb.utils.Import.Import.iter_excel_data",
+        lambda self, fs, allowed_org_ids=None: (iter([{"inst_name": "h1"}]), {}),
     )
     monkeypatch.setattr(
         "apps.cmdb.utils.Import.Import.format_import_asso_data",
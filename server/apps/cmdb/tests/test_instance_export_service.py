@@ -0,0 +1,102 @@
+"""CMDB 实例流式导出/后台导出服务测试（FakeGraphClient + locmem 缓存，不连真实图库）。"""
+
+import csv
+import io
+
+import openpyxl
+import pytest
+
+from apps.cmdb.services.instance import InstanceManage
+from apps.cmdb.services.instance_export import InstanceExportService
+
+MODULE = "apps.cmdb.services.instance"
+
+ATTRS = [{"attr_id": "inst_name", "attr_type": "str", "attr_name": "名称", "is_required": True}]
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    """导出状态依赖缓存在任务与轮询间传递，这里替换全局 DummyCache"""
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@pytest.fixture
+def patch_model(monkeypatch):
+    monkeypatch.setattr("apps.cmdb.services.model.ModelManage.search_model_attr_v2", lambda mid: ATTRS)
+    monkeypatch.setattr("apps.cmdb.services.model.ModelManage.model_association_search", lambda mid, **kwargs: [])
+
+
+def _paged_query(instances):
+    """按 id> 游标与 limit 模拟 query_entity 分页"""
+
+    def _query_entity(label, params, format_permission_dict=None, page=None, include_count=True, **kwargs):
+        cursor = next((p["value"] for p in params if p["type"] == "id>"), -1)
+        rows = [i for i in instances if i["_id"] > cursor][: page["limit"]]
+        return rows, (len(instances) if include_count else None)
+
+    return _query_entity
+
+
+def test_iter_export_instances_pages_by_id_cursor(fake_graph):
+    instances = [{"_id": i, "inst_name": f"h{i}"} for i in range(5)]
+    fake = fake_graph(MODULE, query_entity=_paged_query(instances))
+    totals = []
+
+    rows = list(InstanceManage.iter_export_instances([], {}, page_size=2, on_total=totals.append))
+
+    assert [r["_id"] for r in rows] == [0, 1, 2, 3, 4]
+    assert totals == [5]
+    cursors = [next((p["value"] for p in c[1][1] if p["type"] == "id>"), None) for c in fake.calls]
+    assert cursors == [None, 1, 3]
+    # 仅首页统计总数
+    assert [c[2]["include_count"] for c in fake.calls] == [True, False, False]
+
+
+@pytest.mark.django_db
+def test_stream_export_csv_and_xlsx(fake_graph, patch_model):
+    fake_graph(MODULE, query_entity=_paged_query([{"_id": 1, "inst_name": "h1"}, {"_id": 2, "inst_name": "h2"}]))
+
+    data = b"".join(InstanceExportService.stream_export("csv", model_id="host", ids=[], permissions_map={}))
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+    assert [r[1] for r in rows[3:]] == ["h1", "h2"]
+
+    data = b"".join(InstanceExportService.stream_export("xlsx", model_id="host", ids=[], permissions_map={}))
+    sheet = openpyxl.load_workbook(io.BytesIO(data))["host"]
+    assert [r[1] for r in sheet.iter_rows(min_row=4, values_only=True)] == ["h1", "h2"]
+
+
+@pytest.mark.django_db
+def test_run_export_writes_file_and_reports_progress(fake_graph, patch_model, locmem_cache, monkeypatch, tmp_path):
+    monkeypatch.setenv("CMDB_EXPORT_ARTIFACT_ROOT", str(tmp_path))
+    fake = fake_graph(MODULE, query_entity=_paged_query([{"_id": i, "inst_name": f"h{i}"} for i in range(3)]))
+    InstanceExportService.save_export_state("exp_test", "pending", owner={"username": "admin", "domain": "d"})
+
+    state = InstanceExportService.run_export(
+        "exp_test",
+        "csv",
+        {"model_id": "host", "ids": [], "permissions_map": {"4": {"inst_names": []}}},
+    )
+
+    assert state["status"] == "success"
+    assert state["processed"] == 3 and state["total"] == 3
+    assert state["owner"]["username"] == "admin"
+    assert state["file_name"] == "host_export.csv"
+    assert (tmp_path / "exp_test.csv").exists()
+    # json 序列化后的组织 ID 键还原为整型
+    assert list(fake.calls[0][2]["format_permission_dict"]) == [4]
+    assert "file_path" not in InstanceExportService.to_public_state(state)
+
+
+@pytest.mark.django_db
+def test_run_export_failure_marks_error(patch_model, monkeypatch, tmp_path):
+    monkeypatch.setenv("CMDB_EXPORT_ARTIFACT_ROOT", str(tmp_path))
+
+    def boom(*args, **kwargs):
+        raise RuntimeError("graph down")
+
+    monkeypatch.setattr(InstanceManage, "iter_export_instances", boom)
+    state = InstanceExportService.run_export("exp_fail", "xlsx", {"model_id": "host", "ids": []})
+
+    assert state["status"] == "error"
+    assert "graph down" in state["error"]
+    assert not list(tmp_path.iterdir())
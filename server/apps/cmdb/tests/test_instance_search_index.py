@@ -0,0 +1,261 @@
+"""CMDB 全文检索倒排索引测试（内存 fake redis + fake graph，不连真实服务）。"""
+
+import fnmatch
+
+import pytest
+
+from apps.cmdb.graph.falkordb import FalkorDBClient
+from apps.cmdb.graph.search_index import InstanceSearchIndex
+
+# --------------------------------------------------------------------------
+# fake redis（仅实现索引用到的命令）
+# --------------------------------------------------------------------------
+
+
+class FakePipeline:
+    def __init__(self, conn):
+        self._conn = conn
+        self._ops = []
+
+    def __getattr__(self, name):
+        def _queue(*args, **kwargs):
+            self._ops.append((name, args, kwargs))
+            return self
+
+        return _queue
+
+    def execute(self):
+        ops, self._ops = self._ops, []
+        return [getattr(self._conn, name)(*args, **kwargs) for name, args, kwargs in ops]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _set(self, key):
+        return self.data.setdefault(key, set())
+
+    def sadd(self, key, *members):
+        s = self._set(key)
+        before = len(s)
+        s.update(str(m).encode() for m in members)
+        return len(s) - before
+
+    def srem(self, key, *members):
+        s = self.data.get(key, set())
+        for m in members:
+            s.discard(str(m).encode())
+        if not s:
+            self.data.pop(key, None)
+        return 1
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def scard(self, key):
+        return len(self.data.get(key, set()))
+
+    def sinter(self, keys):
+        sets = [self.data.get(k, set()) for k in keys]
+        return set.intersection(*sets) if sets else set()
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update({k.encode(): str(v).encode() for k, v in mapping.items()})
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def delete(self, *keys):
+        return sum(1 for k in keys if self.data.pop(k, None) is not None)
+
+    def scan_iter(self, match=None, count=None):
+        return [k for k in list(self.data) if fnmatch.fnmatch(k, match)]
+
+
+class FakeNode:
+    def __init__(self, node_id, labels, properties):
+        self.id = node_id
+        self.labels = labels
+        self.properties = properties
+
+
+class FakeResultSet:
+    def __init__(self, header, rows):
+        self.header = header
+        self.result_set = rows
+
+
+class FakeGraph:
+    name = "cmdb_graph"
+
+    def __init__(self, handler):
+        self._handler = handler
+        self.calls = []
+
+    def query(self, cql, params=None):
+        self.calls.append((cql, params))
+        return self._handler(cql, params)
+
+
+class FakeFalkor:
+    def __init__(self, redis):
+        self.connection = redis
+
+
+EXCLUDE = ["organization", "_creator"]
+
+
+@pytest.fixture
+def patch_exclude(monkeypatch):
+    monkeypatch.setattr("apps.cmdb.graph.falkordb.ExcludeFieldsCache.get_exclude_fields", lambda: EXCLUDE)
+
+
+def _client(redis, handler=None):
+    c = FalkorDBClient()
+    c._client = FakeFalkor(redis)
+    c._graph = FakeGraph(handler or (lambda cql, params: FakeResultSet([], [])))
+    return c
+
+
+def _index(redis, docs):
+    index = InstanceSearchIndex(redis, "cmdb_graph")
+    index.index_entities(docs, EXCLUDE)
+    index.mark_ready(EXCLUDE, len(docs))
+    return index
+
+
+# --------------------------------------------------------------------------
+# InstanceSearchIndex
+# --------------------------------------------------------------------------
+
+
+def test_candidate_ids_substring_and_exact():
+    redis = FakeRedis()
+    index = _index(
+        redis,
+        [
+            {"_id": 1, "_labels": "instance", "inst_name": "Web-Server-01", "model_id": "host"},
+            {"_id": 2, "_labels": "instance", "inst_name": "db-01", "model_id": "mysql"},
+        ],
+    )
+    assert index.candidate_ids("server") == [1]
+    assert index.candidate_ids("-01") == [1, 2]
+    assert index.candidate_ids("DB-01", exact=True) == [2]
+    assert index.candidate_ids("nothing") == []
+    # 短于 trigram 的关键词无法由索引处理
+    assert index.candidate_ids("db") is None
+
+
+def test_excluded_fields_and_non_instance_not_indexed():
+    redis = FakeRedis()
+    index = _index(
+        redis,
+        [
+            {"_id": 1, "_labels": "instance", "inst_name": "h1", "organization": [12345]},
+            {"_id": 2, "_labels": "model", "model_name": "12345"},
+        ],
+    )
+    assert index.candidate_ids("12345") == []
+
+
+def test_reindex_replaces_old_terms_and_remove():
+    redis = FakeRedis()
+    index = _index(redis, [{"_id": 1, "_labels": "instance", "inst_name": "alpha"}])
+    index.index_entities([{"_id": 1, "_labels": "instance", "inst_name": "bravo"}], EXCLUDE)
+    assert index.candidate_ids("alpha") == []
+    assert index.candidate_ids("bravo") == [1]
+
+    index.remove_entities([1])
+    assert index.candidate_ids("bravo") == []
+    assert not [k for k in redis.data if k.startswith(f"{index.prefix}:g:")]
+
+
+def test_long_values_are_always_candidates():
+    redis = FakeRedis()
+    index = _index(redis, [{"_id": 7, "_labels": "instance", "config": "x" * (InstanceSearchIndex.MAX_VALUE_LENGTH + 1)}])
+    assert index.candidate_ids("anything") == [7]
+
+
+def test_ready_requires_matching_exclude_signature():
+    redis = FakeRedis()
+    index = _index(redis, [])
+    assert index.is_ready(EXCLUDE)
+    assert not index.is_ready(EXCLUDE + ["status"])
+    index.mark_stale()
+    assert not index.is_ready(EXCLUDE)
+
+
+def test_too_many_candidates_falls_back(monkeypatch):
+    redis = FakeRedis()
+    index = _index(redis, [{"_id": i, "_labels": "instance", "inst_name": f"host{i}"} for i in range(5)])
+    monkeypatch.setattr(InstanceSearchIndex, "MAX_CANDIDATES", 3)
+    assert index.candidate_ids("host") is None
+
+
+# --------------------------------------------------------------------------
+# FalkorDBClient 集成
+# --------------------------------------------------------------------------
+
+
+def test_full_text_stats_uses_candidate_ids(patch_exclude):
+    redis = FakeRedis()
+    _index(redis, [{"_id": 3, "_labels": "instance", "inst_name": "web01", "model_id": "host"}])
+    c = _client(redis, lambda cql, params: FakeResultSet([("model_id", "model_id"), ("count", "count")], [["host", 1]]))
+
+    out = c.full_text_stats("web")
+
+    cql, params = c._graph.calls[-1]
+    assert cql.startswith("UNWIND $candidate_ids AS candidate_id MATCH (n:instance)")
+    assert "ID(n) = candidate_id" in cql
+    assert params["candidate_ids"] == [3]
+    assert out["total"] == 1
+
+
+def test_full_text_returns_empty_without_query_when_no_candidates(patch_exclude):
+    redis = FakeRedis()
+    _index(redis, [{"_id": 3, "_labels": "instance", "inst_name": "web01"}])
+    c = _client(redis)
+
+    assert c.full_text("nomatch") == []
+    assert c.full_text_by_model("nomatch", "host")["total"] == 0
+    assert c._graph.calls == []
+
+
+def test_full_text_scans_when_index_not_ready(patch_exclude):
+    c = _client(FakeRedis(), lambda cql, params: FakeResultSet([], []))
+    c.full_text("web")
+    cql, params = c._graph.calls[-1]
+    assert cql.startswith("MATCH (n:instance) WHERE")
+    assert "candidate_ids" not in params
+
+
+def test_create_and_delete_maintain_index(patch_exclude):
+    redis = FakeRedis()
+    index = _index(redis, [])
+    created = FakeNode(9, ["instance"], {"inst_name": "edge-router", "model_id": "router", "inst_uuid": "u-9"})
+    c = _client(redis, lambda cql, params: FakeResultSet([("node", "n")], [[created]]))
+
+    c.create_entity("instance", {"inst_name": "edge-router", "model_id": "router"}, {}, [])
+    assert index.candidate_ids("router") == [9]
+
+    c.batch_delete_entity("instance", [9])
+    assert index.candidate_ids("router") == []
+
+
+def test_index_failure_marks_stale_and_keeps_write(patch_exclude, monkeypatch):
+    redis = FakeRedis()
+    index = _index(redis, [])
+
+    def boom(*args, **kwargs):
+        raise RuntimeError("redis down")
+
+    monkeypatch.setattr(InstanceSearchIndex, "index_entities", boom)
+    updated = FakeNode(4, ["instance"], {"inst_name": "n4"})
+    c = _client(redis, lambda cql, params: FakeResultSet([("node", "n")], [[updated]]))
+
+    c.batch_update_node_properties("instance", [4], {"inst_name": "n4"})
+    assert not index.is_ready(EXCLUDE)
@@ -216,6 +216,22 @@ def test_inst_export_view(superuser, monkeypatch):
     assert response["Content-Disposition"].startswith("attachment")
 
 
+@pytest.mark.django_db
+def test_inst_export_view_stream_csv(superuser, monkeypatch):
+    monkeypatch.setattr(
+        f"{VIEWS}.InstanceExportService.stream_export",
+        lambda export_format, **k: iter([b"a,b\r\n", b"1,2\r\n"]),
+    )
+    response = InstanceViewSet.as_view({"post": "inst_export"})(
+        _req("post", superuser, data={"stream": True, "export_format": "csv"}), model_id="host"
+    )
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"].startswith("text/csv")
+    assert response["Content-Disposition"].endswith("host_export.csv")
+    assert b"".join(response.streaming_content) == b"a,b\r\n1,2\r\n"
+
+
 # --------------------------------------------------------------------------
 # download_template
 # --------------------------------------------------------------------------
@@ -359,3 +359,56 @@ def test_list_unique_rule_candidate_fields(monkeypatch):
     by_id = {f.attr_id: f for f in out}
     assert by_id["sn"].selectable is True
     assert by_id["inst_name"].selectable is False
+
+
+# --------------------------------------------------------------------------
+# UniqueValueIndex（批次级哈希索引）
+# --------------------------------------------------------------------------
+
+
+def _check_attr_map():
+    return {
+        "is_only": {"ip_addr": "IP"},
+        "unique_rules": [{"rule_id": "r1", "order": 1, "field_ids": ["sn", "vendor"]}],
+        "attrs_by_id": {"sn": {"attr_name": "序列号"}, "vendor": {"attr_name": "厂商"}},
+    }
+
+
+def test_unique_value_index_matches_linear_checks():
+    exist_items = [{"_id": 1, "inst_name": "a", "ip_addr": "10.0.0.1", "sn": "S1", "vendor": "V"}]
+    index = ur.UniqueValueIndex(_check_attr_map(), exist_items)
+
+    with pytest.raises(BaseAppException) as attr_exc:
+        index.check({"ip_addr": "10.0.0.1"})
+    with pytest.raises(BaseAppException) as linear_attr_exc:
+        FalkorDBClient.check_unique_attr({"ip_addr": "10.0.0.1"}, {"ip_addr": "IP"}, exist_items)
+    assert attr_exc.value.message == linear_attr_exc.value.message
+
+    item = {"ip_addr": "10.0.0.2", "sn": "S1", "vendor": "V"}
+    with pytest.raises(BaseAppException) as rule_exc:
+        index.check(item)
+    with pytest.raises(BaseAppException) as linear_rule_exc:
+        ur.raise_unique_rule_conflict_if_needed(_check_attr_map()["unique_rules"], [item], exist_items, _check_attr_map()["attrs_by_id"])
+    assert rule_exc.value.message == linear_rule_exc.value.message
+
+    # 更新自身时排除自身 ID；空值不参与单字段唯一
+    index.check_rules(item, exclude_instance_ids={1})
+    index.check({"ip_addr": "", "sn": "S2", "vendor": "V"})
+
+
+def test_unique_value_index_add_and_remove():
+    index = ur.UniqueValueIndex(_check_attr_map(), [])
+    accepted = {"ip_addr": "10.0.0.9", "sn": "S9", "vendor": "V"}
+    index.add(accepted)
+    with pytest.raises(BaseAppException):
+        index.check({"ip_addr": "10.0.0.9"})
+
+    index.remove(accepted)
+    index.check({"ip_addr": "10.0.0.9", "sn": "S9", "vendor": "V"})
+
+
+def test_unique_value_index_update_checks_only_present_attrs():
+    index = ur.UniqueValueIndex(_check_attr_map(), [{"_id": 1, "ip_addr": "10.0.0.1"}])
+    index.check_attrs({"inst_name": "x"}, is_update=True)
+    with pytest.raises(BaseAppException):
+        index.check_attrs({"ip_addr": "10.0.0.1"}, is_update=True)
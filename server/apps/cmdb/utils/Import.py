@@ -20,7 +20,7 @@ from apps.cmdb.model_ops.extensions import is_file_attr_type
 from apps.cmdb.models import CREATE_INST_ASST
 from apps.cmdb.services.instance_identity import prepare_new_instance_identity
 from apps.cmdb.services.model import ModelManage
-from apps.cmdb.services.unique_rule import build_unique_rule_context
+from apps.cmdb.services.unique_rule import UniqueValueIndex, build_exist_item_map, build_unique_key, build_unique_rule_context
 from apps.cmdb.utils.change_record import create_change_record_by_asso
 from apps.cmdb.validators.field_validator import normalize_tag_field_option, normalize_tag_input_values, validate_tag_values
 from apps.core.exceptions.base_app_exception import BaseAppException
@@ -29,6 +29,9 @@ from apps.system_mgmt.models import Group
 
 
 class Import:
+    # 流式导入每块行数：每块独立完成校验与批量写入，内存占用随块大小有界
+    IMPORT_CHUNK_SIZE = 1000
+
     def __init__(self, model_id, attrs, exist_items, operator):
         self.model_id = model_id
         self.attrs = attrs
@@ -36,7 +39,8 @@ class Import:
         self.operator = operator
         self.inst_name_id_map = {}
         self.inst_id_name_map = {}
-        self.inst_list = []
+        # 已解析并提交保存的数据行数
+        self.row_count = 0
         self.import_result_message = {
             "add": {"success": 0, "error": 0, "data": []},
             "update": {"success": 0, "error": 0, "data": []},
@@ -47,6 +51,10 @@ class Import:
         self.validation_errors = []
         # 缓存的字段映射，由 _build_field_maps 初始化
         self._field_maps = None
+        # 导入批次共享的唯一值索引，由 get_unique_index 初始化
+        self._unique_index = None
+        # 导入批次共享的唯一键 -> 已有实例映射，由 get_exist_item_map 初始化
+        self._exist_item_map = None
 
     @staticmethod
     def _normalize_user_token(token):
@@ -477,31 +485,35 @@ class Import:
 
         return item, row_has_data, row_has_validation_errors
 
-    def format_excel_data(self, excel_meta: bytes, allowed_org_ids: list = None):
-        """格式化excel数据。
+    def iter_excel_data(self, excel_meta: bytes, allowed_org_ids: list = None):
+        """流式读取excel数据（只读模式，逐行解析，不整体加载工作簿）。
+
+        sheet 名称与表头在调用时立即校验；数据行在迭代时才读取，读取结束或中断后关闭工作簿。
 
         Args:
             excel_meta: Excel文件字节流
             allowed_org_ids: 允许的组织ID列表
 
         Returns:
-            tuple: (result_list, asso_key_map)
+            tuple: (row_iterator, asso_key_map)，asso_key_map 在迭代过程中被填充
         """
         allowed_org_set = set(allowed_org_ids) if allowed_org_ids is not None else None
 
         # 构建字段映射
         field_maps = self._build_field_maps()
 
-        # 读取Excel文件
-        wb = openpyxl.load_workbook(excel_meta)
+        # 只读模式读取Excel文件，单元格按需解析
+        wb = openpyxl.load_workbook(excel_meta, read_only=True)
         sheet1 = wb.worksheets[0]
 
         if sheet1.title != self.model_id:
+            wb.close()
             raise ValueError(f"Excel sheet name '{sheet1.title}' does not match model_id '{self.model_id}'.")
 
-        # 获取列键名
-        keys = [cell.value for cell in sheet1[3]]
-        seckeys = [cell.value for cell in sheet1[2]]
+        # 获取列键名（第2行为字段类型，第3行为字段ID）
+        header_rows = list(sheet1.iter_rows(min_row=2, max_row=3, values_only=True))
+        seckeys = list(header_rows[0]) if header_rows else []
+        keys = list(header_rows[1]) if len(header_rows) > 1 else []
 
         # 构建关联字段映射
         asso_key_map = {}
@@ -509,15 +521,86 @@ class Import:
             if idx < len(seckeys) and seckeys[idx] == "关联" and self.model_id in key:
                 asso_key_map[key] = {}
 
-        # 处理数据行
-        result = []
-        for row_index, row in enumerate(sheet1.iter_rows(min_row=4, min_col=1), start=4):
-            item, row_has_data, row_has_errors = self._process_excel_row(row, keys, row_index, field_maps, allowed_org_set, asso_key_map)
+        def _rows():
+            try:
+                if not keys:
+                    return
+                for row_index, row in enumerate(sheet1.iter_rows(min_row=4, min_col=1, max_col=len(keys)), start=4):
+                    item, row_has_data, row_has_errors = self._process_excel_row(
+                        row, keys, row_index, field_maps, allowed_org_set, asso_key_map
+                    )
+                    if row_has_data and len(item) > 1 and not row_has_errors:
+                        yield item
+            finally:
+                wb.close()
+
+        return _rows(), asso_key_map
+
+    def format_excel_data(self, excel_meta: bytes, allowed_org_ids: list = None):
+        """格式化excel数据。
+
+        Args:
+            excel_meta: Excel文件字节流
+            allowed_org_ids: 允许的组织ID列表
+
+        Returns:
+            tuple: (result_list, asso_key_map)
+        """
+        rows, asso_key_map = self.iter_excel_data(excel_meta, allowed_org_ids=allowed_org_ids)
+        return list(rows), asso_key_map
+
+    def _last_row_positions(self, file_stream, allowed_org_ids: list = None):
+        """预读一遍 Excel，记录每个唯一键最后出现的数据行位置（只保留键与位置，不保留行数据）。
 
-            if row_has_data and len(item) > 1 and not row_has_errors:
-                result.append(item)
+        同一唯一键在文件中出现多次时以最后一行为准；先去重再分块，避免重复行跨块时先新增、后更新。
 
-        return result, asso_key_map
+        Returns:
+            set | None: 需要保存的数据行位置，模型无唯一字段时返回 None（不去重）
+        """
+        unique_key = [attr["attr_id"] for attr in self.attrs if attr.get(ModelConstraintKey.unique.value, False)]
+        if not unique_key:
+            return None
+
+        # 预读阶段产生的校验错误与关联数据会在正式读取时再次产生，这里丢弃
+        validation_errors, self.validation_errors = self.validation_errors, []
+        try:
+            rows, _asso_key_map = self.iter_excel_data(file_stream, allowed_org_ids=allowed_org_ids)
+            last_positions = {}
+            for position, item in enumerate(rows):
+                last_positions[build_unique_key(item, unique_key)] = position
+        finally:
+            self.validation_errors = validation_errors
+
+        if hasattr(file_stream, "seek"):
+            file_stream.seek(0)
+        return set(last_positions.values())
+
+    def iter_import_chunks(self, rows, chunk_size: int = None):
+        """将行迭代器按块切分，每块走批量校验+保存（batch_save_entity 的 UNWIND 写入路径）。
+
+        Yields:
+            tuple: (chunk_add_results, chunk_update_results)
+        """
+        chunk_size = max(int(chunk_size or self.IMPORT_CHUNK_SIZE), 1)
+        chunk = []
+        for item in rows:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield self._save_import_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield self._save_import_chunk(chunk)
+
+    def _save_import_chunk(self, chunk):
+        self.row_count += len(chunk)
+        return self.inst_list_update(chunk)
+
+    def get_exist_item_map(self, check_attr_map):
+        """导入批次共享的唯一键 -> 已有实例映射：基于 exist_items 构建一次，新增成功的实例由 batch_save_entity 同步登记"""
+        if self._exist_item_map is None:
+            unique_key = check_attr_map.get(ModelConstraintKey.unique.value, {}).keys()
+            self._exist_item_map = build_exist_item_map(self.exist_items, unique_key)
+        return self._exist_item_map
 
     def get_check_attr_map(self):
         check_attr_map = dict(is_only={}, is_required={}, editable={})
@@ -533,6 +616,12 @@ class Import:
         check_attr_map["attrs_by_id"] = unique_ctx.attrs_by_id
         return check_attr_map
 
+    def get_unique_index(self, check_attr_map):
+        """导入批次共享的唯一值索引：基于 exist_items 构建一次，写入时与 exist_items 同步追加"""
+        if self._unique_index is None:
+            self._unique_index = UniqueValueIndex(check_attr_map, self.exist_items)
+        return self._unique_index
+
     def _prepare_instances_for_save(self, inst_list):
         """预处理实例列表：标签规范化、字段校验、生成 _display 字段。
 
@@ -568,14 +657,17 @@ class Import:
         """实例列表保存"""
         processed_inst_list = [prepare_new_instance_identity(item) for item in self._prepare_instances_for_save(inst_list)]
 
+        check_attr_map = self.get_check_attr_map()
+
         with GraphClient() as ag:
             result = ag.batch_create_entity(
                 INSTANCE,
                 processed_inst_list,
-                self.get_check_attr_map(),
+                check_attr_map,
                 self.exist_items,
                 self.operator,
                 self.attrs,
+                unique_index=self.get_unique_index(check_attr_map),
             )
         return result
 
@@ -583,14 +675,18 @@ class Import:
         """实例列表更新"""
         processed_inst_list = self._prepare_instances_for_save(inst_list)
 
+        check_attr_map = self.get_check_attr_map()
+
         with GraphClient() as ag:
             add_results, update_results = ag.batch_save_entity(
                 INSTANCE,
                 processed_inst_list,
-                self.get_check_attr_map(),
+                check_attr_map,
                 self.exist_items,
                 self.operator,
                 self.attrs,
+                unique_index=self.get_unique_index(check_attr_map),
+                exist_item_map=self.get_exist_item_map(check_attr_map),
             )
         return add_results, update_results
 
@@ -636,12 +732,44 @@ class Import:
         result = self.inst_list_save(inst_list)
         return result
 
-    def import_inst_list_support_edit(self, file_stream: bytes, allowed_org_ids: list = None):
-        """将excel主机数据导入"""
-        inst_list, asso_key_map = self.format_excel_data(file_stream, allowed_org_ids=allowed_org_ids)
-        self.inst_list = inst_list
-        # 执行导入（有错误的已在 format_excel_data 中被过滤）
-        add_results, update_results = self.inst_list_update(inst_list)
+    def import_inst_list_support_edit(
+        self,
+        file_stream: bytes,
+        allowed_org_ids: list = None,
+        chunk_size: int = None,
+        on_chunk=None,
+    ):
+        """将excel主机数据导入（流式读取，分块保存）。
+
+        有唯一字段的模型会先预读一遍文件按唯一键去重（同键以最后一行为准），再流式分块保存。
+
+        Args:
+            file_stream: Excel文件字节流
+            allowed_org_ids: 允许的组织ID列表
+            chunk_size: 每块行数，默认 IMPORT_CHUNK_SIZE
+            on_chunk: 每块保存后回调 on_chunk(add_results, update_results)；
+                传入时成功结果交由回调处理、不再整体保留，返回值仅包含失败项
+
+        Returns:
+            tuple: (add_results, update_results, asso_result)
+        """
+        keep_positions = self._last_row_positions(file_stream, allowed_org_ids=allowed_org_ids)
+        rows, asso_key_map = self.iter_excel_data(file_stream, allowed_org_ids=allowed_org_ids)
+        if keep_positions is not None:
+            rows = (item for position, item in enumerate(rows) if position in keep_positions)
+
+        add_results, update_results = [], []
+        # 执行导入（有错误的已在解析阶段被过滤）
+        for chunk_index, (chunk_add, chunk_update) in enumerate(self.iter_import_chunks(rows, chunk_size), start=1):
+            self.format_import_result_message(chunk_add, chunk_update, [])
+            if on_chunk is not None:
+                on_chunk(chunk_add, chunk_update)
+                chunk_add = [i for i in chunk_add if not i.get("success")]
+                chunk_update = [i for i in chunk_update if not i.get("success")]
+            add_results.extend(chunk_add)
+            update_results.extend(chunk_update)
+
+            logger.info(f"模型 {self.model_id} 导入进度: 第 {chunk_index} 块完成, 累计 {self.row_count} 行")
 
         # 处理关联数据
         if not self.model_asso_map:
@@ -658,12 +786,12 @@ class Import:
             for error in self.validation_errors:
                 validation_failed_results.append({"success": False, "data": {}, "message": error})
 
+        # 格式化结果消息（新增/更新结果已逐块计入）
+        self.format_import_result_message(validation_failed_results, [], asso_result)
+
         # 合并结果：验证失败 + 新增失败/成功 + 更新失败/成功
         all_add_results = validation_failed_results + add_results
 
-        # 格式化结果消息
-        self.format_import_result_message(all_add_results, update_results, asso_result)
-
         return all_add_results, update_results, asso_result
 
     def format_import_result_message(self, add_results, update_results, asso_result):
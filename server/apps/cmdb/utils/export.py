@@ -1,7 +1,9 @@
-from io import BytesIO
+import csv
+from io import BytesIO, StringIO
 import json
 
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
@@ -24,6 +26,9 @@ def serialize_tag_values_for_export(values: list[str]) -> str:
 
 
 class Export:
+    # 流式导出时进度上报/csv 刷新的行间隔
+    PROGRESS_STEP = 500
+
     def __init__(self, attrs, model_id: str = "", association: list = None):
         self.attrs = attrs
         self.model_id = model_id
@@ -66,20 +71,20 @@ class Export:
         cell = sheet.cell(row=row, column=col)
         cell.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
 
-    def generate_header(self):
-        """创建Excel文件, 设置属性与样式"""
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        # 设置sheet名称为model_id
-        sheet.title = self.model_id
-        sheet.sheet_format.defaultColWidth = 20
-        sheet.sheet_format.defaultRowHeight = 15
+    def build_header_rows(self):
+        """计算三行表头与枚举列
+
+        Returns:
+            tuple: (attrs_name, attrs_type, attrs_id, enum_columns)
+                enum_columns: [(attr_name, option, col_index), ...]
+        """
         attrs_name, attrs_type, attrs_id, index = (
             ["字段名(请勿编辑)"],
             ["字段类型(请勿编辑)"],
             ["字段标识(请勿编辑)"],
             0,
         )
+        enum_columns = []
 
         for attr_info in self.attrs:
             # 过滤掉 _display 冗余字段
@@ -98,12 +103,7 @@ class Export:
             index += 1
             if attr_info["attr_type"] in {ENUM}:
                 # 修复：Excel列索引需要+1，因为第一列是"字段名(请勿编辑)"
-                col_index = index + 1
-                sheet.add_data_validation(
-                    self.set_enum_validation_by_sheet_data(
-                        workbook, attr_info["attr_name"], attr_info["option"], col_index
-                    )
-                )
+                enum_columns.append((attr_info["attr_name"], attr_info["option"], index + 1))
             attrs_type.append(ATTR_TYPE_MAP[attr_info["attr_type"]])
 
         for association in self.association:
@@ -123,6 +123,25 @@ class Export:
             attrs_id.append(model_asst_id)
             self.model_asso_id_map[model_asst_id] = {_asst_model: model_asst_id}
 
+        return attrs_name, attrs_type, attrs_id, enum_columns
+
+    def generate_header(self):
+        """创建Excel文件, 设置属性与样式"""
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        # 设置sheet名称为model_id
+        sheet.title = self.model_id
+        sheet.sheet_format.defaultColWidth = 20
+        sheet.sheet_format.defaultRowHeight = 15
+        attrs_name, attrs_type, attrs_id, enum_columns = self.build_header_rows()
+
+        for attr_name, option, col_index in enum_columns:
+            sheet.add_data_validation(
+                self.set_enum_validation_by_sheet_data(
+                    workbook, attr_name, option, col_index
+                )
+            )
+
         sheet.append(attrs_name)
         sheet.append(attrs_type)
         sheet.append(attrs_id)
@@ -136,6 +155,35 @@ class Export:
 
         return workbook
 
+    def generate_write_only_header(self):
+        """创建只写模式的Excel文件, 表头样式与 generate_header 一致, 数据行逐行落盘"""
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=self.model_id)
+        sheet.sheet_format.defaultColWidth = 20
+        sheet.sheet_format.defaultRowHeight = 15
+        attrs_name, attrs_type, attrs_id, enum_columns = self.build_header_rows()
+
+        for attr_name, option, col_index in enum_columns:
+            value_list = [i["name"] for i in option]
+            filed_sheet = workbook.create_sheet(title=attr_name)
+            for value in value_list:
+                filed_sheet.append([value])
+            sheet.data_validations.append(
+                self._build_enum_validation(filed_sheet.title, len(value_list), col_index)
+            )
+
+        for row, color in ((attrs_name, "92D050"), (attrs_type, "C6EFCE"), (attrs_id, "C6EFCE")):
+            cells = []
+            for col, value in enumerate(row):
+                cell = WriteOnlyCell(sheet, value=value)
+                # 第一列使用橘黄色
+                fill_color = "FFA500" if col == 0 else color
+                cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
+                cells.append(cell)
+            sheet.append(cells)
+
+        return workbook, sheet
+
     def return_bytesio(self, workbook):
         """返回一个文件流"""
         file_stream = BytesIO()
@@ -152,11 +200,14 @@ class Export:
         for r, v in enumerate(value_list, start=1):
             filed_sheet.cell(row=r, column=1, value=v)
 
-        # 创建 DataValidation 对象
+        return self._build_enum_validation(filed_sheet.title, len(filed_sheet["A"]), index)
+
+    @staticmethod
+    def _build_enum_validation(sheet_title, last_row, index):
+        """创建 DataValidation 对象, 引用枚举 sheet 的 A 列"""
         col = get_column_letter(index)
-        last_row = len(filed_sheet["A"])
         dv = DataValidation(
-            type="list", formula1=f"='{filed_sheet.title}'!$A$1:$A{last_row}"
+            type="list", formula1=f"='{sheet_title}'!$A$1:$A{last_row}"
         )
         dv.sqref = f"{col}4:{col}999"
 
@@ -167,10 +218,12 @@ class Export:
         workbook = self.generate_header()
         return self.return_bytesio(workbook)
 
-    def export_inst_list(self, inst_list):
-        """导出实例列表"""
-        workbook = self.generate_header()
-        # 找出枚举属性(过滤掉 _display 字段)
+    def build_option_maps(self):
+        """找出枚举/组织/用户属性的选项映射(过滤掉 _display 字段)
+
+        Returns:
+            tuple: (enum_field_dict, user_option_dict)
+        """
         enum_field_dict = {
             attr_info["attr_id"]: {i["id"]: i["name"] for i in attr_info["option"]}
             for attr_info in self.attrs
@@ -182,114 +235,170 @@ class Export:
             for attr_info in self.attrs
             if attr_info["attr_type"] == USER and not attr_info.get("is_display_field")
         }
-        for inst_info in inst_list:
-            sheet_data = [""]
-            for attr in self.attrs:
-                # 过滤掉 _display 冗余字段
-                if attr.get("is_display_field"):
-                    continue
-                if attr["attr_type"] in {ORGANIZATION, USER}:
-                    # attr_id_value = inst_info.get(attr["attr_id"], [])
-                    # if not isinstance(attr_id_value, list):
-                    #     attr_id_value = [attr_id_value]
-                    # sheet_data.append(
-                    #     str([enum_field_dict[attr["attr_id"]].get(i) for i in attr_id_value])
-                    # )
-                    attr_id_value = inst_info.get(attr["attr_id"], "")
-                    # 主要维护人字段（operator）：支持多值，并格式化为 display_name(username)
-                    if attr["attr_type"] == USER and attr.get("attr_id") == "operator":
-                        if isinstance(attr_id_value, list):
-                            formatted = []
-                            for uid in attr_id_value:
-                                text = self._format_user_display_username(
-                                    user_option_dict.get(attr["attr_id"], {}).get(uid)
-                                )
-                                if text:
-                                    formatted.append(text)
-                                else:
-                                    mapped = enum_field_dict.get(
-                                        attr["attr_id"], {}
-                                    ).get(uid)
-                                    if mapped is not None:
-                                        formatted.append(str(mapped))
-                                    elif uid not in (None, ""):
-                                        formatted.append(str(uid))
-                            sheet_data.append(",".join(formatted))
-                        else:
+        return enum_field_dict, user_option_dict
+
+    def format_inst_row(self, inst_info, enum_field_dict, user_option_dict):
+        """将单个实例格式化为一行导出数据"""
+        sheet_data = [""]
+        for attr in self.attrs:
+            # 过滤掉 _display 冗余字段
+            if attr.get("is_display_field"):
+                continue
+            if attr["attr_type"] in {ORGANIZATION, USER}:
+                # attr_id_value = inst_info.get(attr["attr_id"], [])
+                # if not isinstance(attr_id_value, list):
+                #     attr_id_value = [attr_id_value]
+                # sheet_data.append(
+                #     str([enum_field_dict[attr["attr_id"]].get(i) for i in attr_id_value])
+                # )
+                attr_id_value = inst_info.get(attr["attr_id"], "")
+                # 主要维护人字段（operator）：支持多值，并格式化为 display_name(username)
+                if attr["attr_type"] == USER and attr.get("attr_id") == "operator":
+                    if isinstance(attr_id_value, list):
+                        formatted = []
+                        for uid in attr_id_value:
                             text = self._format_user_display_username(
-                                user_option_dict.get(attr["attr_id"], {}).get(
-                                    attr_id_value
-                                )
+                                user_option_dict.get(attr["attr_id"], {}).get(uid)
                             )
                             if text:
-                                sheet_data.append(text)
+                                formatted.append(text)
                             else:
-                                mapped = enum_field_dict.get(attr["attr_id"], {}).get(
-                                    attr_id_value
-                                )
-                                sheet_data.append(
-                                    str(mapped) if mapped is not None else ""
-                                )
-                        continue
-
-                    # 其他组织/用户字段保持原有导出格式
-                    # TODO 目前只支持单选组织和用户，所以导出返回str即可 若支持单选则返回[]
-                    if isinstance(attr_id_value, list):
-                        if len(attr_id_value) > 0:
-                            name = ",".join(
-                                [
-                                    str(enum_field_dict[attr["attr_id"]].get(i))
-                                    for i in attr_id_value
-                                ]
-                            )
-                            sheet_data.append(name)
-                        else:
-                            # 兼容空列表，避免 dict.get(list) 触发 TypeError 导致导出 500
-                            sheet_data.append("")
+                                mapped = enum_field_dict.get(
+                                    attr["attr_id"], {}
+                                ).get(uid)
+                                if mapped is not None:
+                                    formatted.append(str(mapped))
+                                elif uid not in (None, ""):
+                                    formatted.append(str(uid))
+                        sheet_data.append(",".join(formatted))
                     else:
-                        sheet_data.append(
-                            str(enum_field_dict[attr["attr_id"]].get(attr_id_value))
+                        text = self._format_user_display_username(
+                            user_option_dict.get(attr["attr_id"], {}).get(
+                                attr_id_value
+                            )
                         )
+                        if text:
+                            sheet_data.append(text)
+                        else:
+                            mapped = enum_field_dict.get(attr["attr_id"], {}).get(
+                                attr_id_value
+                            )
+                            sheet_data.append(
+                                str(mapped) if mapped is not None else ""
+                            )
                     continue
 
-                if attr["attr_type"] == "tag":
-                    tag_values = inst_info.get(attr["attr_id"], [])
-                    if isinstance(tag_values, list):
-                        sheet_data.append(serialize_tag_values_for_export(tag_values))
-                    elif isinstance(tag_values, str):
-                        sheet_data.append(tag_values)
+                # 其他组织/用户字段保持原有导出格式
+                # TODO 目前只支持单选组织和用户，所以导出返回str即可 若支持单选则返回[]
+                if isinstance(attr_id_value, list):
+                    if len(attr_id_value) > 0:
+                        name = ",".join(
+                            [
+                                str(enum_field_dict[attr["attr_id"]].get(i))
+                                for i in attr_id_value
+                            ]
+                        )
+                        sheet_data.append(name)
                     else:
+                        # 兼容空列表，避免 dict.get(list) 触发 TypeError 导致导出 500
                         sheet_data.append("")
-                    continue
+                else:
+                    sheet_data.append(
+                        str(enum_field_dict[attr["attr_id"]].get(attr_id_value))
+                    )
+                continue
 
-                _value = inst_info.get(attr["attr_id"])
-                if attr["attr_type"] == ENUM:
-                    if isinstance(_value, list):
-                        names = [
-                            str(enum_field_dict[attr["attr_id"]].get(v, v))
-                            for v in _value
-                            if v is not None
-                        ]
-                        _value = ",".join(names)
-                    else:
-                        _value = enum_field_dict[attr["attr_id"]].get(_value)
-                elif attr["attr_type"] == "table":
-                    # table字段导出为单列JSON字符串
-                    if _value:
-                        if isinstance(_value, str):
-                            # 已经是JSON字符串,直接使用
-                            pass
-                        else:
-                            # 如果是列表/字典,序列化为JSON
-                            _value = json.dumps(_value, ensure_ascii=False)
+            if attr["attr_type"] == "tag":
+                tag_values = inst_info.get(attr["attr_id"], [])
+                if isinstance(tag_values, list):
+                    sheet_data.append(serialize_tag_values_for_export(tag_values))
+                elif isinstance(tag_values, str):
+                    sheet_data.append(tag_values)
+                else:
+                    sheet_data.append("")
+                continue
+
+            _value = inst_info.get(attr["attr_id"])
+            if attr["attr_type"] == ENUM:
+                if isinstance(_value, list):
+                    names = [
+                        str(enum_field_dict[attr["attr_id"]].get(v, v))
+                        for v in _value
+                        if v is not None
+                    ]
+                    _value = ",".join(names)
+                else:
+                    _value = enum_field_dict[attr["attr_id"]].get(_value)
+            elif attr["attr_type"] == "table":
+                # table字段导出为单列JSON字符串
+                if _value:
+                    if isinstance(_value, str):
+                        # 已经是JSON字符串,直接使用
+                        pass
                     else:
-                        _value = ""
-                sheet_data.append(_value)
-            # 查询当前实例的全部关联关系数据
-            self.format_inst_asst_name(inst_info, sheet_data)
+                        # 如果是列表/字典,序列化为JSON
+                        _value = json.dumps(_value, ensure_ascii=False)
+                else:
+                    _value = ""
+            sheet_data.append(_value)
+        # 查询当前实例的全部关联关系数据
+        self.format_inst_asst_name(inst_info, sheet_data)
+        return sheet_data
+
+    def export_inst_list(self, inst_list):
+        """导出实例列表"""
+        workbook = self.generate_header()
+        enum_field_dict, user_option_dict = self.build_option_maps()
+        for inst_info in inst_list:
+            sheet_data = self.format_inst_row(inst_info, enum_field_dict, user_option_dict)
             workbook.active.append(sheet_data)
         return self.return_bytesio(workbook)
 
+    def write_inst_list(self, inst_iter, file_obj):
+        """分页导出实例列表到 xlsx 文件(只写模式, 行数据缓冲在磁盘, 内存占用与实例总数无关; 文件在全部写完后才可读取)
+
+        Args:
+            inst_iter: 实例迭代器(通常为分页读取的生成器)
+            file_obj: 文件路径或可写文件对象
+
+        Returns:
+            int: 导出的实例数
+        """
+        workbook, sheet = self.generate_write_only_header()
+        enum_field_dict, user_option_dict = self.build_option_maps()
+        row_count = 0
+        for inst_info in inst_iter:
+            sheet.append(self.format_inst_row(inst_info, enum_field_dict, user_option_dict))
+            row_count += 1
+        workbook.save(file_obj)
+        return row_count
+
+    def iter_inst_list_csv(self, inst_iter):
+        """流式导出实例列表为 csv 文本块, 表头与 xlsx 导出一致(UTF-8 BOM, 兼容 Excel 打开)"""
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+
+        def _flush():
+            data = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return data
+
+        attrs_name, attrs_type, attrs_id, _ = self.build_header_rows()
+        writer.writerows([attrs_name, attrs_type, attrs_id])
+        yield "\ufeff" + _flush()
+
+        enum_field_dict, user_option_dict = self.build_option_maps()
+        row_count = 0
+        for inst_info in inst_iter:
+            writer.writerow(self.format_inst_row(inst_info, enum_field_dict, user_option_dict))
+            row_count += 1
+            if row_count % self.PROGRESS_STEP == 0:
+                yield _flush()
+        tail = _flush()
+        if tail:
+            yield tail
+
     def format_inst_asst_name(self, inst_info, sheet_data):
         from apps.cmdb.services.instance import InstanceManage
 
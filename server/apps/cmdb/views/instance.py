@@ -1,4 +1,6 @@
-from django.http import HttpResponse, JsonResponse
+import os
+
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 
@@ -14,6 +16,7 @@ from apps.cmdb.serializers.k8s_resource_overview import (
 )
 from apps.cmdb.services.application_resource_overview import ApplicationResourceOverviewService
 from apps.cmdb.services.instance import InstanceManage
+from apps.cmdb.services.instance_export import EXPORT_CONTENT_TYPES, InstanceExportService
 from apps.cmdb.services.k8s_resource_overview import K8sResourceOverviewService
 from apps.cmdb.services.model import ModelManage
 from apps.cmdb.services.model_visibility import BusinessModelVisibility
@@ -949,9 +952,29 @@ class InstanceViewSet(CmdbPermissionMixin, viewsets.ViewSet):
             return WebUtils.response_error("实例不存在", status_code=status.HTTP_404_NOT_FOUND)
         export_ids = [item["_id"] for item in selected_instances]
 
+        permissions_map = CmdbRulesFormatUtil.format_user_groups_permissions(request, model_id)
+
+        # stream=true：分页读取实例，适用于大模型导出；csv 逐行生成并边生成边返回，
+        # xlsx 以只写模式先完整写入临时文件（内存有界），写完后再分块返回
+        if request.data.get("stream"):
+            export_format = InstanceExportService.normalize_format(request.data.get("export_format"))
+            response = StreamingHttpResponse(
+                InstanceExportService.stream_export(
+                    export_format,
+                    model_id=model_id,
+                    ids=export_ids,
+                    permissions_map=permissions_map,
+                    attr_list=attr_list,
+                    association_list=association_list,
+                    creator=request.user.username,
+                ),
+                content_type=EXPORT_CONTENT_TYPES[export_format],
+            )
+            response["Content-Disposition"] = f"attachment;filename={InstanceExportService.build_file_name(model_id, export_format)}"
+            return response
+
         response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
         response["Content-Disposition"] = f"attachment;filename={f'{model_id}_export.xlsx'}"
-        permissions_map = CmdbRulesFormatUtil.format_user_groups_permissions(request, model_id)
 
         response.write(
             InstanceManage.inst_export(
@@ -965,6 +988,60 @@ class InstanceViewSet(CmdbPermissionMixin, viewsets.ViewSet):
         )
         return response
 
+    @HasPermission("asset_info-View")
+    @action(methods=["post"], detail=False, url_path=r"(?P<model_id>.+?)/inst_export_async")
+    def inst_export_async(self, request, model_id):
+        """后台导出：提交导出任务，返回 export_id 供轮询进度"""
+        if not self._is_model_visible(model_id):
+            return WebUtils.response_error("模型不存在", status_code=status.HTTP_404_NOT_FOUND)
+        inst_uuids = request.data.get("inst_uuids", [])
+        selected_instances = InstanceManage.query_entity_by_uuids(inst_uuids) if inst_uuids else []
+        if inst_uuids and len(selected_instances) != len(set(inst_uuids)):
+            return WebUtils.response_error("实例不存在", status_code=status.HTTP_404_NOT_FOUND)
+
+        state = InstanceExportService.enqueue_export(
+            model_id,
+            request.data.get("export_format"),
+            dict(
+                ids=[item["_id"] for item in selected_instances],
+                permissions_map=CmdbRulesFormatUtil.format_user_groups_permissions(request, model_id),
+                attr_list=request.data.get("attr_list", []),
+                association_list=request.data.get("association_list", []),
+                creator=request.user.username,
+            ),
+            owner=InstanceExportService.build_owner(request),
+        )
+        return WebUtils.response_success(InstanceExportService.to_public_state(state))
+
+    @HasPermission("asset_info-View")
+    @action(methods=["get"], detail=False, url_path=r"inst_export_task/(?P<export_id>[A-Za-z0-9_]+)")
+    def inst_export_task(self, request, export_id):
+        """后台导出：查询进度"""
+        state = InstanceExportService.get_export_state(export_id)
+        if not state:
+            return WebUtils.response_error("导出任务不存在或已过期", status_code=status.HTTP_404_NOT_FOUND)
+        if not InstanceExportService.can_access_export_state(state, request):
+            return WebUtils.response_403("抱歉！您没有访问该导出任务的权限")
+        return WebUtils.response_success(InstanceExportService.to_public_state(state))
+
+    @HasPermission("asset_info-View")
+    @action(methods=["get"], detail=False, url_path=r"inst_export_task/(?P<export_id>[A-Za-z0-9_]+)/download")
+    def inst_export_download(self, request, export_id):
+        """后台导出：下载导出文件"""
+        state = InstanceExportService.get_export_state(export_id)
+        if not state:
+            return WebUtils.response_error("导出任务不存在或已过期", status_code=status.HTTP_404_NOT_FOUND)
+        if not InstanceExportService.can_access_export_state(state, request):
+            return WebUtils.response_403("抱歉！您没有访问该导出任务的权限")
+        if state.get("status") != "success" or not os.path.exists(state.get("file_path", "")):
+            return WebUtils.response_error("导出文件尚未生成", status_code=status.HTTP_400_BAD_REQUEST)
+        return FileResponse(
+            open(state["file_path"], "rb"),
+            as_attachment=True,
+            filename=state["file_name"],
+            content_type=EXPORT_CONTENT_TYPES[state["export_format"]],
+        )
+
     @HasPermission("search-View")
     @action(methods=["post"], detail=False)
     def fulltext_search(self, request):
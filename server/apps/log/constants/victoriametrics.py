@@ -21,6 +21,9 @@ class VictoriaLogsConstants:
     FIELD_VALUES_LIMIT_MAX = int(os.getenv("VICTORIALOGS_FIELD_VALUES_LIMIT_MAX", "1000"))
     HITS_FIELDS_LIMIT_MAX = int(os.getenv("VICTORIALOGS_HITS_FIELDS_LIMIT_MAX", "100"))
 
+    # 共享连接池大小：策略扫描等批量查询复用 keep-alive 连接，应不小于并发查询线程数
+    POOL_MAXSIZE = int(os.getenv("VICTORIALOGS_POOL_MAXSIZE", "20"))
+
     @staticmethod
     def normalize_bounded_int(value, field_name: str, default: int, max_value: int, clamp: bool = False) -> int:
         if value in (None, ""):
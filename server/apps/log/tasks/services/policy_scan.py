@@ -30,7 +30,8 @@ from apps.log.services.aggregate_group_identity import build_aggregate_group_ide
 from apps.log.services.alert_lifecycle_notify import LogAlertLifecycleNotifier
 from apps.log.tasks.utils.policy import period_to_seconds
 from apps.log.utils.log_group import LogGroupQueryBuilder
-from apps.log.utils.query_log import VictoriaMetricsAPI
+from apps.log.constants.victoriametrics import VictoriaLogsConstants
+from apps.log.utils.query_log import VictoriaMetricsAPI, get_pooled_session
 from apps.monitor.utils.system_mgmt_api import SystemMgmtUtils
 
 
@@ -39,7 +40,7 @@ class LogPolicyScan:
 
     def __init__(self, policy, scan_time=None, window_start=None, window_end=None, execution_key=None, cursor_time=None):
         self.policy = policy
-        self.vlogs_api = VictoriaMetricsAPI()
+        self.vlogs_api = VictoriaMetricsAPI(session=get_pooled_session())
         self.scan_time = scan_time or policy.last_run_time
         self.window_start = window_start
         self.window_end = window_end
@@ -161,18 +162,32 @@ class LogPolicyScan:
         escaped_value = self._escape_log_query_value(value)
         return f'{field}:="{escaped_value}"'
 
+    def _apply_filter(self, final_query, group_filter):
+        query = (final_query or "").strip()
+        if not query or query == "*":
+            return group_filter
+        return f"{query} | filter {group_filter}"
+
     def _build_group_sample_query(self, final_query, group_values):
         filters = []
         for field, value in group_values.items():
             filters.append(self._build_exact_field_filter(field, value))
         if not filters:
             return final_query
-        group_filter = " AND ".join(filters)
+        return self._apply_filter(final_query, " AND ".join(filters))
 
-        query = (final_query or "").strip()
-        if not query or query == "*":
-            return group_filter
-        return f"{query} | filter {group_filter}"
+    def _build_partitioned_sample_query(self, final_query, group_by, group_values_list, sample_limit):
+        """一次查询取回多个分组的样本：按分组值过滤后，用 last N by (_time) partition by (...) 每组保留最新 N 条"""
+        group_filter = " OR ".join(
+            "(" + " AND ".join(self._build_exact_field_filter(field, value) for field, value in group_values.items()) + ")"
+            for group_values in group_values_list
+        )
+        by_fields = ", ".join(group_by)
+        return f"{self._apply_filter(final_query, group_filter)} | last {sample_limit} by (_time) partition by ({by_fields})"
+
+    @staticmethod
+    def _group_key(values, group_by):
+        return tuple(str(values.get(field)) for field in group_by)
 
     def _extract_group_values(self, result, group_by):
         group_values = {}
@@ -279,7 +294,44 @@ class LogPolicyScan:
         }
         return idx, event
 
+    def _grouped_sample_max_workers(self):
+        try:
+            return max(int(os.getenv("LOG_GROUPED_ALERT_MAX_WORKERS", "10")), 1)
+        except (TypeError, ValueError):
+            return 10
+
+    def _fetch_partitioned_samples(self, pending, final_query, group_by, sample_limit, start_timestamp, end_timestamp):
+        """
+        按分组批量取样：每批分组只发一次查询，批大小保证返回行数不超过单次查询上限。
+
+        Returns:
+            (samples, failed, 查询次数): samples 为 分组键 -> 样本日志列表；failed 为查询失败批次中的分组键集合
+        """
+        chunk_size = max(VictoriaLogsConstants.QUERY_LIMIT_MAX // sample_limit, 1)
+        chunks = [pending[i : i + chunk_size] for i in range(0, len(pending), chunk_size)]
+
+        def _query_chunk(chunk):
+            query = self._build_partitioned_sample_query(final_query, group_by, [group_values for _, group_values, _ in chunk], sample_limit)
+            return self.vlogs_api.query(query=query, start=start_timestamp, end=end_timestamp, limit=len(chunk) * sample_limit)
+
+        samples = {}
+        failed = set()
+        with ThreadPoolExecutor(max_workers=min(self._grouped_sample_max_workers(), len(chunks))) as executor:
+            futures = {executor.submit(_query_chunk, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    logger.warning(f"Partitioned sample query failed for policy {self.policy.id}, falling back to per-group queries: {e}")
+                    failed.update(self._group_key(group_values, group_by) for _, group_values, _ in chunk)
+                    continue
+                for row in rows or []:
+                    samples.setdefault(self._group_key(row, group_by), []).append(row)
+        return samples, failed, len(chunks)
+
     def _keyword_grouped_alert_detection(self, final_query, group_by, sample_limit, start_timestamp, end_timestamp):
+        started = time.monotonic()
         group_query = self._build_keyword_group_query(final_query, group_by)
         grouped_results = self.vlogs_api.query(query=group_query, start=start_timestamp, end=end_timestamp, limit=1000)
 
@@ -298,34 +350,56 @@ class LogPolicyScan:
         if not pending:
             return []
 
-        try:
-            max_workers = int(os.getenv("LOG_GROUPED_ALERT_MAX_WORKERS", "10"))
-        except (TypeError, ValueError):
-            max_workers = 10
         results_map = {}
-
-        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
-            futures = {
-                executor.submit(
-                    self._fetch_group_sample,
-                    idx,
-                    group_values,
-                    total_count,
-                    final_query,
-                    start_timestamp,
-                    end_timestamp,
-                    sample_limit,
-                    group_by,
-                ): idx
-                for idx, group_values, total_count in pending
-            }
-            for future in as_completed(futures):
-                try:
-                    idx, event = future.result()
-                    results_map[idx] = event
-                except Exception as e:
-                    logger.warning(f"Unexpected error in grouped sample fetch for policy {self.policy.id}: {e}")
-
+        requests_sent = 1
+        fallback = pending
+        # 默认批量取样（每批一次查询），LOG_GROUPED_SAMPLE_MODE=per_group 时退回逐分组查询
+        if os.getenv("LOG_GROUPED_SAMPLE_MODE", "partition") != "per_group":
+            samples, failed, sent = self._fetch_partitioned_samples(pending, final_query, group_by, sample_limit, start_timestamp, end_timestamp)
+            requests_sent += sent
+            fallback = []
+            for idx, group_values, total_count in pending:
+                key = self._group_key(group_values, group_by)
+                # 批次失败或样本缺失（如该分组日志在两次查询间过期）的分组逐个补查
+                if key in failed or key not in samples:
+                    fallback.append((idx, group_values, total_count))
+                    continue
+                results_map[idx] = {
+                    "source_id": self._build_group_source_id(group_values),
+                    "level": self.policy.alert_level,
+                    "content": self._render_alert_name(group_values, group_by),
+                    "value": total_count,
+                    "raw_data": samples[key][:sample_limit],
+                }
+
+        if fallback:
+            requests_sent += len(fallback)
+            with ThreadPoolExecutor(max_workers=min(self._grouped_sample_max_workers(), len(fallback))) as executor:
+                futures = {
+                    executor.submit(
+                        self._fetch_group_sample,
+                        idx,
+                        group_values,
+                        total_count,
+                        final_query,
+                        start_timestamp,
+                        end_timestamp,
+                        sample_limit,
+                        group_by,
+                    ): idx
+                    for idx, group_values, total_count in fallback
+                }
+                for future in as_completed(futures):
+                    try:
+                        idx, event = future.result()
+                        results_map[idx] = event
+                    except Exception as e:
+                        logger.warning(f"Unexpected error in grouped sample fetch for policy {self.policy.id}: {e}")
+
+        logger.info(
+            f"[LogPolicyScan] keyword grouped policy={self.policy.id} groups={len(pending)} "
+            f"requests={requests_sent} fallback_groups={len(fallback)} duration_ms={int((time.monotonic() - started) * 1000)}"
+        )
         # 按原始分组顺序返回
         return [results_map[idx] for idx, _, _ in pending if idx in results_map]
 
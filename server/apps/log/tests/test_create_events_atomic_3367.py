@@ -71,7 +71,9 @@ def _load_policy_scan_module(monkeypatch, transaction_mock):
         AlertSnapshot=object,
     )
     _install_module(monkeypatch, "apps.log.tasks.utils.policy", period_to_seconds=lambda period: 300)
-    _install_module(monkeypatch, "apps.log.utils.query_log", VictoriaMetricsAPI=lambda: None)
+    _install_module(
+        monkeypatch, "apps.log.utils.query_log", VictoriaMetricsAPI=lambda session=None: None, get_pooled_session=lambda: None
+    )
     _install_module(
         monkeypatch,
         "apps.log.utils.log_group",
@@ -63,7 +63,9 @@ def _load_policy_scan(monkeypatch):
     _install_module(monkeypatch, "apps.log.constants.web", WebConstants=types.SimpleNamespace(URL=_TEST_BASE_URL))
     _install_module(monkeypatch, "apps.log.models.policy", Alert=object, Event=object, EventRawData=object, AlertSnapshot=object)
     _install_module(monkeypatch, "apps.log.tasks.utils.policy", period_to_seconds=lambda period: 300)
-    _install_module(monkeypatch, "apps.log.utils.query_log", VictoriaMetricsAPI=lambda: None)
+    _install_module(
+        monkeypatch, "apps.log.utils.query_log", VictoriaMetricsAPI=lambda session=None: None, get_pooled_session=lambda: None
+    )
     _install_module(
         monkeypatch,
         "apps.log.utils.log_group",
@@ -123,6 +123,50 @@ class TestKeywordAlertDetection:
         assert events[0]["value"] == 5
         assert events[0]["content"] == "h1 报错"
 
+    def test_grouped_detection_fetches_samples_in_one_partitioned_query(self, mocker):
+        policy = _make_policy(alert_condition={"query": "error", "group_by": ["host"], "limit": 2})
+        scan = LogPolicyScan(policy)
+        queries = []
+
+        def fake_query(query, **kwargs):
+            queries.append(query)
+            if "stats by" in query:
+                return [{"host": "h1", "total_count": "5"}, {"host": "h2", "total_count": "1"}]
+            return [
+                {"host": "h1", "_msg": "a"},
+                {"host": "h1", "_msg": "b"},
+                {"host": "h2", "_msg": "c"},
+            ]
+
+        mocker.patch.object(scan.vlogs_api, "query", side_effect=fake_query)
+        events = scan.keyword_alert_detection()
+
+        assert len(queries) == 2
+        assert queries[1] == 'error | filter (host:="h1") OR (host:="h2") | last 2 by (_time) partition by (host)'
+        assert [ev["raw_data"] for ev in events] == [
+            [{"host": "h1", "_msg": "a"}, {"host": "h1", "_msg": "b"}],
+            [{"host": "h2", "_msg": "c"}],
+        ]
+
+    def test_grouped_detection_falls_back_per_group_when_partition_query_fails(self, mocker):
+        policy = _make_policy(alert_condition={"query": "error", "group_by": ["host"], "limit": 2})
+        scan = LogPolicyScan(policy)
+
+        def fake_query(query, **kwargs):
+            if "stats by" in query:
+                return [{"host": "h1", "total_count": "5"}, {"host": "h2", "total_count": "1"}]
+            if "partition by" in query:
+                raise RuntimeError("unsupported pipe")
+            return [{"_msg": query}]
+
+        mocker.patch.object(scan.vlogs_api, "query", side_effect=fake_query)
+        events = scan.keyword_alert_detection()
+
+        assert [ev["raw_data"] for ev in events] == [
+            [{"_msg": 'error | filter host:="h1"'}],
+            [{"_msg": 'error | filter host:="h2"'}],
+        ]
+
     def test_query_exception_propagates(self, mocker):
         policy = _make_policy()
         scan = LogPolicyScan(policy)
@@ -57,6 +57,22 @@ def test_query_ignores_empty_lines(mocker):
     assert result == [{"_msg": "ok"}]
 
 
+def test_query_uses_shared_session_when_given(mocker):
+    from apps.log.utils.query_log import get_pooled_session
+
+    session = get_pooled_session()
+    assert get_pooled_session() is session
+    post_mock = mocker.patch.object(session, "post", return_value=DummyResponse([json.dumps({"_msg": "ok"})]))
+    module_post = mocker.patch("apps.log.utils.query_log.requests.post")
+
+    api = VictoriaMetricsAPI(session=session)
+    api.host = "http://victorialogs.local"
+
+    assert api.query("*", "", "", 10) == [{"_msg": "ok"}]
+    post_mock.assert_called_once()
+    module_post.assert_not_called()
+
+
 def test_query_logs_malformed_line_context(mocker):
     response = DummyResponse(['{"_msg":"bad\nraw-control"}'])
     mocker.patch("apps.log.utils.query_log.requests.post", return_value=response)
@@ -16,10 +16,33 @@ from apps.core.logger import log_logger as logger
 from apps.log.constants.victoriametrics import VictoriaLogsConstants
 
 
+_pooled_session = None
+_pooled_session_lock = threading.Lock()
+
+
+def get_pooled_session() -> requests.Session:
+    """进程内共享的 VictoriaLogs HTTP 会话，复用 keep-alive 连接，避免批量查询逐次建连（含 TLS 握手）"""
+    global _pooled_session
+    if _pooled_session is None:
+        with _pooled_session_lock:
+            if _pooled_session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=VictoriaLogsConstants.POOL_MAXSIZE,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _pooled_session = session
+    return _pooled_session
+
+
 class VictoriaMetricsAPI:
     REQUEST_TIMEOUT = 10
 
-    def __init__(self):
+    def __init__(self, session: requests.Session = None):
+        # 未传入会话时沿用 requests 模块级调用（每次请求独立连接）
+        self.http = session or requests
         self.host = VictoriaLogsConstants.HOST
         self.username = VictoriaLogsConstants.USER or ""
         self.password = VictoriaLogsConstants.PWD or ""
@@ -110,7 +133,7 @@ class VictoriaMetricsAPI:
             "end": end,
             "ignore_pipes": 1,
         }
-        response = requests.get(
+        response = self.http.get(
             self._build_url(self.host, "/select/logsql/field_names"),
             params=data,
             auth=self.auth,
@@ -134,7 +157,7 @@ class VictoriaMetricsAPI:
             "end": end,
             "limit": limit,
         }
-        response = requests.get(
+        response = self.http.get(
             self._build_url(self.host, "/select/logsql/field_values"),
             params=data,
             auth=self.auth,
@@ -152,7 +175,7 @@ class VictoriaMetricsAPI:
             extra={"query": query, "start": start, "end": end, "limit": limit},
         )
         data = {"query": query, "start": start, "end": end, "limit": limit}
-        response = requests.post(
+        response = self.http.post(
             self._build_url(self.host, "/select/logsql/query"),
             params=data,
             auth=self.auth,
@@ -224,7 +247,7 @@ class VictoriaMetricsAPI:
             "step": step,
         }
 
-        response = requests.post(
+        response = self.http.post(
             self._build_url(self.host, "/select/logsql/hits"),
             params=data,
             auth=self.auth,
@@ -236,7 +259,7 @@ class VictoriaMetricsAPI:
 
     def get_disk_usage(self):
         try:
-            response = requests.get(
+            response = self.http.get(
                 self._build_url(self.host, "/metrics"),
                 auth=self.auth,
                 verify=self.ssl_verify,
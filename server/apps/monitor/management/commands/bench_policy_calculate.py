@@ -0,0 +1,85 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.monitor.constants.alert_policy import AlertConstants
+from apps.monitor.tasks.utils.policy_calculate import _parse_finite_float, calculate_alerts, vm_to_dataframe
+
+
+def _legacy_evaluate(df, thresholds, n):
+    """旧实现的核心路径(iterrows + 逐行逐阈值比较),仅用于基准对照,不含模板渲染。"""
+    sorted_thresholds = sorted(thresholds, key=lambda item: AlertConstants.LEVEL_WEIGHT.get(item.get("level"), 0), reverse=True)
+    alerts = infos = 0
+    for _, row in df.iterrows():
+        values = row["values"][-n:]
+        if len(values) < n:
+            continue
+        numeric_values = [_parse_finite_float(value[1]) for value in values]
+        if any(value is None for value in numeric_values):
+            continue
+        row.to_dict()
+        for threshold_info in sorted_thresholds:
+            method = AlertConstants.THRESHOLD_METHODS[threshold_info["method"]]
+            if all(method(value, threshold_info["value"]) for value in numeric_values):
+                alerts += 1
+                break
+        else:
+            infos += 1
+    return alerts, infos
+
+
+def _vm_result(series, points, breach_ratio, seed):
+    rng = random.Random(seed)
+    result = []
+    for i in range(series):
+        base = 95.0 if rng.random() < breach_ratio else 40.0
+        result.append(
+            {
+                "metric": {"__name__": "cpu_usage", "instance_id": f"host-{i // 8}", "device": f"cpu{i % 8}"},
+                "values": [[1700000000 + step * 60, f"{base + rng.random():.3f}"] for step in range(points)],
+            }
+        )
+    return result
+
+
+class Command(BaseCommand):
+    help = "监控策略阈值计算基准:对比 iterrows 逐行计算(旧)与列式计算在 10k/100k/1M 序列上的耗时(合成数据,不读写数据库)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--series", type=int, nargs="*", default=[10000, 100000, 1000000], help="序列数,可多个")
+        parser.add_argument("--trigger-count", type=int, default=3, dest="trigger_count", help="连续触发次数 n")
+        parser.add_argument("--breach-ratio", type=float, default=0.05, dest="breach_ratio", help="超阈值序列占比")
+        parser.add_argument("--legacy-max", type=int, default=100000, dest="legacy_max", help="超过该序列数时跳过旧实现对照")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        n = options["trigger_count"]
+        thresholds = [
+            {"method": ">", "value": 90, "level": "critical"},
+            {"method": ">", "value": 80, "level": "error"},
+            {"method": ">", "value": 70, "level": "warning"},
+        ]
+        context = {"instance_id_keys": ["instance_id", "device"], "monitor_object": "Host", "metric_name": "cpu", "display_unit": "%"}
+        for series in options["series"]:
+            vm_data = _vm_result(series, n, options["breach_ratio"], options["seed"])
+
+            started = time.perf_counter()
+            df = vm_to_dataframe(vm_data, context["instance_id_keys"])
+            frame_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            alerts, infos = calculate_alerts("$instance_name $value", df, thresholds, context, n=n)
+            vector_seconds = time.perf_counter() - started
+            line = (
+                f"series={series:<8} 构建DataFrame={frame_seconds:7.2f}s 列式计算={vector_seconds:7.2f}s "
+                f"alerts={len(alerts)} infos={len(infos)}"
+            )
+
+            if series <= options["legacy_max"]:
+                started = time.perf_counter()
+                legacy_alerts, legacy_infos = _legacy_evaluate(df, thresholds, n)
+                legacy_seconds = time.perf_counter() - started
+                if (legacy_alerts, legacy_infos) != (len(alerts), len(infos)):
+                    self.stderr.write(f"警告:旧实现结果不一致 alerts={legacy_alerts} infos={legacy_infos}")
+                line += f" 旧实现(iterrows)={legacy_seconds:7.2f}s 加速={legacy_seconds / max(vector_seconds, 1e-9):.1f}x"
+            self.stdout.write(line)
@@ -9,6 +9,10 @@ from apps.core.exceptions.base_app_exception import BaseAppException
 from apps.monitor.models import MonitorPolicy
 from apps.core.logger import celery_logger as logger
 from apps.monitor.tasks.services.policy_scan import MonitorPolicyScan
+from apps.monitor.tasks.services.policy_scan.scan_scheduler import (
+    POLICY_GROUP_SCAN_ENABLED,
+    PolicyScanScheduler,
+)
 from apps.monitor.tasks.utils.policy_methods import period_to_seconds
 from apps.monitor.constants.alert_policy import AlertConstants
 
@@ -20,6 +24,46 @@ def _run_scan_and_record_success(policy_obj, scan_time):
     MonitorPolicy.objects.filter(id=policy_obj.id).update(last_run_time=scan_time)
 
 
+def _run_backfill_and_record_success(policy_obj, scan_times):
+    """补偿多个漏扫窗口: 共用一个扫描器与区间查询, 每个窗口成功后推进水位(与逐窗口补偿语义一致)"""
+
+    def _record_success(scan_time):
+        MonitorPolicy.objects.filter(id=policy_obj.id).update(last_run_time=scan_time)
+
+    MonitorPolicyScan(policy_obj).run_backfill(scan_times, on_window_success=_record_success)
+
+
+def _pending_scan_times(policy_obj, current_time):
+    """按水位计算需要扫描的窗口终点: 首次执行或落后不足两个周期时只扫描当前时刻"""
+    if not policy_obj.last_run_time:
+        return [current_time]
+
+    period_seconds = period_to_seconds(policy_obj.period)
+    gap_seconds = (current_time - policy_obj.last_run_time).total_seconds()
+
+    gap_seconds = min(gap_seconds, AlertConstants.MAX_BACKFILL_SECONDS)
+
+    backfill_count = int(gap_seconds // period_seconds)
+
+    if backfill_count <= 1:
+        return [current_time]
+
+    backfill_count = min(backfill_count, AlertConstants.MAX_BACKFILL_COUNT)
+    return [
+        policy_obj.last_run_time + timedelta(seconds=period_seconds * (i + 1))
+        for i in range(backfill_count)
+    ]
+
+
+def _is_policy_due(policy_obj, current_time):
+    """按策略执行周期(schedule)判断是否到期; 预留 30 秒容差吸收调度抖动"""
+    if not policy_obj.last_run_time:
+        return True
+    schedule_seconds = period_to_seconds(policy_obj.schedule or policy_obj.period)
+    elapsed = (current_time - policy_obj.last_run_time).total_seconds()
+    return elapsed >= schedule_seconds - 30
+
+
 def _legacy_alert_center_retry_statuses(*, outbox_enabled, created_retry_enabled):
     # active outbox 在进入 legacy 查询前已返回；其余 disabled/shadow/rollback
     # 阶段都必须继续补偿首次告警，不能因只开启 outbox 双写而退化。
@@ -55,33 +99,23 @@ def scan_policy_task(policy_id):
             )
             return {"success": True, "duration": duration, "message": "策略未启用"}
 
+        if POLICY_GROUP_SCAN_ENABLED:
+            duration = time.time() - start_time
+            logger.debug(f"监控策略 [{policy_id}] 已由分组扫描调度接管，跳过单独执行")
+            return {"success": True, "duration": duration, "message": "由分组扫描调度执行"}
+
         current_time = datetime.now(timezone.utc)
 
+        scan_times = _pending_scan_times(policy_obj, current_time)
+
         if not policy_obj.last_run_time:
             logger.info(f"监控策略 [{policy_id}] 首次执行，扫描时间点: {current_time}")
-            _run_scan_and_record_success(policy_obj, current_time)
-        else:
-            period_seconds = period_to_seconds(policy_obj.period)
-            gap_seconds = (current_time - policy_obj.last_run_time).total_seconds()
-
-            gap_seconds = min(gap_seconds, AlertConstants.MAX_BACKFILL_SECONDS)
 
-            backfill_count = int(gap_seconds // period_seconds)
-
-            if backfill_count <= 1:
-                _run_scan_and_record_success(policy_obj, current_time)
-            else:
-                backfill_count = min(backfill_count, AlertConstants.MAX_BACKFILL_COUNT)
-                logger.info(f"监控策略 [{policy_id}] 需要补偿 {backfill_count} 个周期")
-
-                for i in range(backfill_count):
-                    scan_time = policy_obj.last_run_time + timedelta(
-                        seconds=period_seconds
-                    )
-                    _run_scan_and_record_success(policy_obj, scan_time)
-                    logger.debug(
-                        f"监控策略 [{policy_id}] 完成第 {i + 1}/{backfill_count} 次补偿"
-                    )
+        if len(scan_times) == 1:
+            _run_scan_and_record_success(policy_obj, scan_times[0])
+        else:
+            logger.info(f"监控策略 [{policy_id}] 需要补偿 {len(scan_times)} 个周期")
+            _run_backfill_and_record_success(policy_obj, scan_times)
 
         duration = time.time() - start_time
         logger.info(f"监控策略 [{policy_id}] 扫描完成，耗时: {duration:.2f}s")
@@ -102,6 +136,43 @@ def scan_policy_task(policy_id):
         raise
 
 
+@shared_task(base=Singleton, raise_on_duplicate=False)
+def scan_policy_groups_task():
+    """分组扫描到期策略（MONITOR_POLICY_GROUP_SCAN_ENABLED 开启时生效，每分钟执行）
+
+    正常窗口的策略按聚合查询分组，每组只查询一次 VictoriaMetrics；需要补偿的策略仍逐个走补偿流程。
+    """
+    if not POLICY_GROUP_SCAN_ENABLED:
+        return {"success": True, "message": "分组扫描未启用"}
+
+    start_time = time.time()
+    current_time = datetime.now(timezone.utc)
+    policies = MonitorPolicy.objects.filter(enable=True).select_related("monitor_object")
+
+    grouped, backfill_failed = [], []
+    for policy_obj in policies:
+        try:
+            if not _is_policy_due(policy_obj, current_time):
+                continue
+            scan_times = _pending_scan_times(policy_obj, current_time)
+            if len(scan_times) == 1:
+                grouped.append(policy_obj)
+                continue
+            logger.info(f"监控策略 [{policy_obj.id}] 需要补偿 {len(scan_times)} 个周期")
+            _run_backfill_and_record_success(policy_obj, scan_times)
+        except Exception as e:
+            logger.error(f"监控策略 [{policy_obj.id}] 补偿失败: {e}", exc_info=True)
+            backfill_failed.append(policy_obj.id)
+
+    result = PolicyScanScheduler(grouped, current_time).run()
+    duration = time.time() - start_time
+    logger.info(
+        f"分组扫描完成，策略 {result['policies']} 个，查询组 {result['groups']} 个，"
+        f"失败 {len(result['failed'])} 个，补偿失败 {len(backfill_failed)} 个，耗时: {duration:.2f}s"
+    )
+    return {"success": True, "duration": duration, **result, "backfill_failed": backfill_failed}
+
+
 @shared_task(base=Singleton, raise_on_duplicate=False)
 def retry_alert_center_lifecycle_notify_task():
     """补偿任务：重试推送到告警中心失败的告警通知（每5分钟执行，每次最多处理200条）"""
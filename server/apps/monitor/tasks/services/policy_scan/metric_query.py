@@ -8,7 +8,13 @@ from apps.core.exceptions.base_app_exception import BaseAppException
 from apps.monitor.expression.conditions import compile_filter_to_query
 from apps.monitor.expression.query import build_formula_query
 from apps.monitor.models import Metric
-from apps.monitor.tasks.utils.policy_methods import METHOD, period_to_seconds, query_formula_policy_metrics
+from apps.monitor.tasks.utils.policy_methods import (
+    METHOD,
+    build_formula_policy_query,
+    build_policy_query,
+    period_to_seconds,
+    query_formula_policy_metrics,
+)
 from apps.monitor.utils.dimension import parse_instance_id, ScopedInstanceMatcher
 from apps.monitor.utils.victoriametrics_api import VictoriaMetricsAPI
 from apps.monitor.utils.unit_converter import UnitConverter
@@ -47,6 +53,11 @@ class MetricQueryService:
         self.instance_id_keys = None
         self.metric = None
         self.compiled_formula = None
+        # 补偿模式下的区间缓存: {(步长秒数, 点数): 覆盖全部补偿窗口的一次区间查询结果}
+        self._backfill_window_ends = None
+        self._backfill_cache = {}
+        # 分组扫描预先注入的聚合结果: {(步长秒数, 点数, 窗口终点): VictoriaMetrics 返回}
+        self._primed_results = {}
         self._scoped_instance_matcher = ScopedInstanceMatcher(
             getattr(getattr(self.policy, "monitor_object", None), "instance_id_keys", None)
             or [],
@@ -159,9 +170,19 @@ class MetricQueryService:
         points = max(1, int(points or 1))
         start_timestamp = end_timestamp - period_seconds * points
 
+        primed = self._primed_results.get((period_seconds, points, end_timestamp))
+        if primed is not None:
+            return self._slice_range_result(primed, start_timestamp, end_timestamp)
+
+        backfill_result = self._query_backfill_window(period, points, end_timestamp)
+        if backfill_result is not None:
+            return backfill_result
+        return self._query_aggregation_range(period, start_timestamp, end_timestamp)
+
+    def _query_aggregation_range(self, period, start_timestamp, end_timestamp):
         # 准备查询参数
         query = self.format_pmq()
-        step = self.format_period(period, points)
+        step = self.format_period(period)
         group_by = ",".join(self.get_result_group_by())
 
         # 获取聚合方法
@@ -187,6 +208,99 @@ class MetricQueryService:
             getattr(self.policy, "group_algorithm", None),
         )
 
+    def aggregation_query_spec(self, period, points=1):
+        """返回聚合查询的最终语句与区间,供分组扫描合并多个策略的相同查询
+
+        Returns:
+            tuple: (query, start, end, step),与 query_aggregation_metrics 实际发出的查询一致
+
+        Raises:
+            BaseAppException: 算法方法无效时抛出
+        """
+        end_timestamp = int(self.policy.last_run_time.timestamp())
+        period_seconds = period_to_seconds(period)
+        points = max(1, int(points or 1))
+        query = self.format_pmq()
+        step = self.format_period(period)
+
+        if self.policy.algorithm not in METHOD:
+            raise BaseAppException(f"invalid algorithm method: {self.policy.algorithm}")
+
+        if self.policy.query_condition.get("type") == "formula":
+            final_query = build_formula_policy_query(self.policy.algorithm, query, step)
+        else:
+            final_query = build_policy_query(
+                self.policy.algorithm,
+                query,
+                step,
+                ",".join(self.get_result_group_by()),
+                getattr(self.policy, "group_algorithm", None),
+            )
+        return final_query, end_timestamp - period_seconds * points, end_timestamp, step
+
+    def prime_aggregation_result(self, period, points, vm_data):
+        """注入分组扫描已查询到的聚合结果,当前窗口内同一 (周期, 点数) 的查询不再访问 VictoriaMetrics"""
+        key = (
+            period_to_seconds(period),
+            max(1, int(points or 1)),
+            int(self.policy.last_run_time.timestamp()),
+        )
+        self._primed_results[key] = vm_data
+
+    def enable_backfill_cache(self, window_ends):
+        """开启补偿模式: 同一 (周期, 点数) 的聚合查询对全部补偿窗口只发一次区间查询,再按窗口切片
+
+        Args:
+            window_ends: 按时间顺序排列的补偿窗口终点(datetime)
+        """
+        self._backfill_window_ends = [int(end.timestamp()) for end in window_ends]
+        self._backfill_cache = {}
+
+    def disable_backfill_cache(self):
+        self._backfill_window_ends = None
+        self._backfill_cache = {}
+
+    def _query_backfill_window(self, period, points, end_timestamp):
+        """补偿模式下从区间缓存中切出单个窗口的结果; 不适用时返回 None,由调用方按窗口实时查询
+
+        区间查询与逐窗口查询使用相同的 query/step,步长网格相同,因此只有各窗口终点都落在
+        该步长网格上时才能切片复用(例如无数据周期与策略周期不成整数倍时回退实时查询)。
+        """
+        window_ends = self._backfill_window_ends
+        if not window_ends or end_timestamp not in window_ends:
+            return None
+        period_seconds = period_to_seconds(period)
+        if any((end - window_ends[0]) % period_seconds for end in window_ends):
+            return None
+
+        key = (period_seconds, points)
+        if key not in self._backfill_cache:
+            self._backfill_cache[key] = self._query_aggregation_range(
+                period,
+                window_ends[0] - period_seconds * points,
+                window_ends[-1],
+            )
+            logger.info(
+                f"策略 {self.policy.id}: 补偿区间查询 step={period_seconds}s points={points} "
+                f"windows={len(window_ends)}"
+            )
+        return self._slice_range_result(
+            self._backfill_cache[key],
+            end_timestamp - period_seconds * points,
+            end_timestamp,
+        )
+
+    @staticmethod
+    def _slice_range_result(vm_data, start_timestamp, end_timestamp):
+        """按 [start, end] 截取区间查询结果,返回新的结果字典(不修改缓存)"""
+        data = vm_data.get("data", {})
+        result = []
+        for metric_info in data.get("result", []):
+            values = [value for value in metric_info.get("values", []) if start_timestamp <= float(value[0]) <= end_timestamp]
+            if values:
+                result.append({**metric_info, "values": values})
+        return {**vm_data, "data": {**data, "result": result}}
+
     def query_raw_metrics(self, period, points=1):
         """查询原始指标数据(不进行聚合)
 
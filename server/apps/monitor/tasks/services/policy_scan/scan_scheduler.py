@@ -0,0 +1,143 @@
+"""分组扫描调度 - 多个策略共享同一条 VictoriaMetrics 聚合查询
+
+同一监控对象下的策略往往使用相同的指标、周期与汇聚方式, 只是阈值或范围不同。
+调度器按最终查询语句与查询区间 (即 metric query, period, step) 对到期策略分组,
+每组只发一次查询, 再把结果注入各策略的 MetricQueryService, 由各自的检测器完成判定。
+"""
+
+import os
+import time
+from collections import Counter, defaultdict
+
+from apps.monitor.models import MonitorPolicy
+from apps.monitor.constants.alert_policy import AlertConstants
+from apps.monitor.tasks.services.policy_scan.scanner import MonitorPolicyScan
+from apps.monitor.utils.victoriametrics_api import VictoriaMetricsAPI
+from apps.monitor.utils.vm_query_batch import run_unique_vm_queries
+from apps.core.logger import celery_logger as logger
+
+POLICY_GROUP_SCAN_ENABLED = os.getenv("MONITOR_POLICY_GROUP_SCAN_ENABLED", "false").lower() in {"1", "true", "yes"}
+
+
+class PolicyScanScheduler:
+    """分组扫描执行器: 同一扫描时刻下批量执行多个策略的单窗口扫描"""
+
+    def __init__(self, policies, scan_time):
+        self.policies = list(policies)
+        self.scan_time = scan_time
+        self.group_metrics = []
+
+    def _prepare(self, policy):
+        """构建扫描器并完成前置检查; 返回 None 表示本轮无需扫描"""
+        policy.last_run_time = self.scan_time
+        scan = MonitorPolicyScan(policy)
+        if not scan._pre_check():
+            return None
+        return scan
+
+    @staticmethod
+    def _threshold_spec(scan):
+        if AlertConstants.THRESHOLD not in scan.policy.enable_alerts:
+            return None
+        trigger_count = getattr(scan.policy, "trigger_count", 1) or 1
+        return scan.metric_query_service.aggregation_query_spec(scan.policy.period, trigger_count)
+
+    def _query_groups(self, specs):
+        """按 (start, end, step) 分批, 每批内去重后并发查询; 返回 {(query, start, end, step): 结果}"""
+        batches = defaultdict(list)
+        for spec in specs:
+            query, start, end, step = spec
+            batches[(start, end, step)].append(query)
+
+        results = {}
+        for (start, end, step), queries in batches.items():
+            durations = {}
+
+            def _query(query, start=start, end=end, step=step, durations=durations):
+                started = time.monotonic()
+                try:
+                    return VictoriaMetricsAPI().query_range(query, start, end, step)
+                finally:
+                    durations[query] = time.monotonic() - started
+
+            responses, errors = run_unique_vm_queries(queries, _query)
+            for query, error in errors.items():
+                logger.warning(f"分组扫描查询失败, 组内策略回退为单独查询: step={step} query={query} error={error}")
+            for query, response in responses.items():
+                results[(query, start, end, step)] = response
+            for query, policy_count in Counter(queries).items():
+                self.group_metrics.append(
+                    {
+                        "step": step,
+                        "window_seconds": end - start,
+                        "policies": policy_count,
+                        "series": len((responses.get(query) or {}).get("data", {}).get("result", [])),
+                        "duration_ms": int(durations.get(query, 0) * 1000),
+                        "success": query in responses,
+                    }
+                )
+        return results
+
+    def run(self):
+        """执行本轮分组扫描; 单个策略失败只记录日志, 不影响组内其他策略
+
+        Returns:
+            dict: {"policies": 策略数, "groups": 查询组数, "succeeded": 成功数, "failed": 失败策略ID列表}
+        """
+        started = time.monotonic()
+        scans = []
+        failed = []
+        for policy in self.policies:
+            try:
+                scan = self._prepare(policy)
+            except Exception as e:
+                logger.error(f"分组扫描: 策略 [{policy.id}] 初始化失败: {e}", exc_info=True)
+                failed.append(policy.id)
+                continue
+            if scan is None:
+                self._record_success(policy)
+                continue
+            try:
+                spec = self._threshold_spec(scan)
+            except Exception as e:
+                logger.warning(f"分组扫描: 策略 [{policy.id}] 无法生成分组查询, 改为单独查询: {e}")
+                spec = None
+            scans.append((scan, spec))
+
+        results = self._query_groups([spec for _, spec in scans if spec])
+
+        succeeded = 0
+        for scan, spec in scans:
+            policy = scan.policy
+            if spec in results:
+                trigger_count = getattr(policy, "trigger_count", 1) or 1
+                scan.metric_query_service.prime_aggregation_result(policy.period, trigger_count, results[spec])
+            try:
+                scan.run()
+            except Exception as e:
+                logger.error(f"分组扫描: 策略 [{policy.id}] 执行失败: {e}", exc_info=True)
+                failed.append(policy.id)
+                continue
+            self._record_success(policy)
+            succeeded += 1
+
+        for metric in self.group_metrics:
+            logger.info(
+                f"[PolicyScanGroup] step={metric['step']} window_seconds={metric['window_seconds']} "
+                f"policies={metric['policies']} series={metric['series']} "
+                f"duration_ms={metric['duration_ms']} success={metric['success']}"
+            )
+        logger.info(
+            f"[PolicyScanGroup] scan_time={self.scan_time.isoformat()} policies={len(self.policies)} "
+            f"groups={len(self.group_metrics)} succeeded={succeeded} failed={len(failed)} "
+            f"duration_ms={int((time.monotonic() - started) * 1000)}"
+        )
+        return {
+            "policies": len(self.policies),
+            "groups": len(self.group_metrics),
+            "succeeded": succeeded,
+            "failed": failed,
+        }
+
+    def _record_success(self, policy):
+        MonitorPolicy.objects.filter(id=policy.id).update(last_run_time=self.scan_time)
@@ -1,5 +1,7 @@
 """监控策略扫描执行器 - 主流程编排"""
 
+from django.db import transaction
+
 from apps.monitor.constants.alert_policy import AlertConstants
 from apps.monitor.models import (
     MonitorInstanceOrganization,
@@ -58,6 +60,14 @@ class MonitorPolicyScan:
         self.event_alert_manager = EventAlertManager(policy, self.instances_map, self.active_alerts)
         self.snapshot_recorder = SnapshotRecorder(policy, self.instances_map, self.active_alerts, self.metric_query_service)
 
+    def _refresh_active_alerts(self):
+        """补偿窗口之间重新读取活动告警: 上一窗口新建/恢复的告警会影响下一窗口的判定"""
+        self.active_alerts = self._get_active_alerts()
+        self.alert_detector.active_alerts = self.active_alerts
+        self.event_alert_manager.active_alerts = self.active_alerts
+        self.snapshot_recorder.active_alerts = self.active_alerts
+        self.snapshot_recorder._fallback_raw_data_map = None
+
     def _get_active_alerts(self):
         """获取策略的活动告警"""
         qs = MonitorAlert.objects.filter(policy_id=self.policy.id, status="new")
@@ -240,6 +250,40 @@ class MonitorPolicyScan:
 
         self._record_snapshots(info_events, event_objs, new_alerts)
 
+    def run_backfill(self, scan_times, on_window_success=None):
+        """补偿模式: 按时间顺序评估多个漏扫窗口
+
+        与逐窗口重建扫描器相比: 实例/基准/展示变量映射只构建一次; 同一 (周期, 点数) 的指标
+        对全部窗口只发一次区间查询再按窗口切片; 所有窗口的事件/告警在同一事务中提交,
+        通知在提交后统一发出。每个窗口使用独立保存点, 某窗口失败时只回滚该窗口,
+        此前窗口(含 on_window_success 推进的水位)照常提交, 随后抛出原异常。
+
+        Args:
+            scan_times: 按时间顺序排列的窗口终点
+            on_window_success: 窗口成功后的回调(在该窗口保存点内执行), 参数为窗口终点
+        """
+        error = None
+        self.metric_query_service.enable_backfill_cache(scan_times)
+        try:
+            with transaction.atomic():
+                for index, scan_time in enumerate(scan_times):
+                    self.policy.last_run_time = scan_time
+                    if index:
+                        self._refresh_active_alerts()
+                    try:
+                        with transaction.atomic():
+                            self.run()
+                            if on_window_success:
+                                on_window_success(scan_time)
+                    except Exception as e:
+                        error = e
+                        break
+        finally:
+            self.metric_query_service.disable_backfill_cache()
+
+        if error is not None:
+            raise error
+
     def _sync_baselines(self, alert_events, info_events):
         """同步基准表（只增不删）"""
         if not self.policy.source or not self.instances_map:
@@ -265,6 +309,7 @@ class MonitorPolicyScan:
 
         if metric_instances:
             PolicyBaselineService(self.policy).sync(metric_instances)
+            self.baselines_map.update(metric_instances)
 
     def _pre_check(self):
         """前置检查"""
@@ -1,6 +1,7 @@
 import math
 from string import Template
 
+import numpy as np
 import pandas as pd
 
 from apps.core.exceptions.base_app_exception import BaseAppException
@@ -28,7 +29,11 @@ def vm_to_dataframe(vm_data, instance_id_keys=None):
     else:
         selected_cols = ["metric_instance_id"]
 
-    df["instance_id"] = df[selected_cols].apply(lambda row: tuple(row), axis=1)
+    selected = df[selected_cols]
+    if selected_cols:
+        df["instance_id"] = list(zip(*(selected[col].tolist() for col in selected_cols)))
+    else:
+        df["instance_id"] = [()] * len(df)
 
     return df
 
@@ -48,6 +53,17 @@ def _format_value_with_unit(
     return formatted
 
 
+# 与 AlertConstants.THRESHOLD_METHODS 一一对应的列式比较
+_VECTOR_THRESHOLD_METHODS = {
+    ">": np.greater,
+    "<": np.less,
+    "=": np.equal,
+    "!=": np.not_equal,
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+}
+
+
 def _parse_finite_float(value):
     try:
         number = float(value)
@@ -58,7 +74,46 @@ def _parse_finite_float(value):
     return number
 
 
+def _tail_value_matrix(series_values, n):
+    """取每条序列最后 n 个点的数值矩阵。
+
+    Returns:
+        (rows, matrix): 点数足够且全部为有限数的行号,以及对应的 (len(rows), n) 浮点矩阵
+    """
+    lengths = np.fromiter((len(values) for values in series_values), dtype=np.int64, count=len(series_values))
+    rows = np.flatnonzero(lengths >= n)
+    raw = [[point[1] for point in series_values[row][-n:]] for row in rows]
+    try:
+        matrix = np.array(raw, dtype=float).reshape(len(rows), n)
+    except (TypeError, ValueError):
+        matrix = np.array(
+            [[math.nan if (number := _parse_finite_float(value)) is None else number for value in values] for values in raw],
+            dtype=float,
+        ).reshape(len(rows), n)
+    finite = np.isfinite(matrix).all(axis=1)
+    return rows[finite], matrix[finite]
+
+
+def _threshold_levels(matrix, sorted_thresholds):
+    """按等级从高到低逐列比较,返回每行命中的阈值下标(-1 表示未命中任何阈值)。"""
+    levels = np.full(len(matrix), -1, dtype=np.int64)
+    if not len(matrix):
+        return levels
+    for threshold_info in sorted_thresholds:
+        if threshold_info["method"] not in AlertConstants.THRESHOLD_METHODS:
+            raise BaseAppException(f"Invalid threshold method: {threshold_info['method']}")
+    for index, threshold_info in enumerate(sorted_thresholds):
+        pending = np.flatnonzero(levels < 0)
+        if not len(pending):
+            break
+        compare = _VECTOR_THRESHOLD_METHODS[threshold_info["method"]]
+        hit = compare(matrix[pending], float(threshold_info["value"])).all(axis=1)
+        levels[pending[hit]] = index
+    return levels
+
+
 def calculate_alerts(alert_name, df, thresholds, template_context=None, n=1):
+    """列式阈值计算:数值解析、阈值比较与等级选择在 NumPy 矩阵上完成,只为有效行物化事件字典。"""
     alert_events, info_events = [], []
     template_context = template_context or {}
     instances_map = template_context.get("instances_map", {})
@@ -69,8 +124,24 @@ def calculate_alerts(alert_name, df, thresholds, template_context=None, n=1):
     monitor_instance_id_key = template_context.get("monitor_instance_id_key")
     resource_context_resolver = template_context.get("resource_context_resolver")
 
-    for _, row in df.iterrows():
-        instance_id_tuple = row["instance_id"]
+    if df.empty:
+        return alert_events, info_events
+
+    rows, matrix = _tail_value_matrix(df["values"].tolist(), n)
+    if not len(rows):
+        return alert_events, info_events
+
+    sorted_thresholds = sorted(
+        thresholds,
+        key=lambda item: AlertConstants.LEVEL_WEIGHT.get(item.get("level"), 0),
+        reverse=True,
+    )
+    levels = _threshold_levels(matrix, sorted_thresholds)
+    sub_dimension_keys = [k for k in instance_id_keys if k != "instance_id"]
+    template = Template(alert_name)
+
+    for position, raw_data in enumerate(df.iloc[rows].to_dict("records")):
+        instance_id_tuple = raw_data["instance_id"]
         metric_instance_id = str(instance_id_tuple)
 
         dimensions = build_dimensions(instance_id_tuple, instance_id_keys)
@@ -85,80 +156,12 @@ def calculate_alerts(alert_name, df, thresholds, template_context=None, n=1):
             monitor_instance_id = resource_context.get(
                 "monitor_instance_id", monitor_instance_id
             )
-        resource_name = resource_context.get(
-            "resource_name",
-            instances_map.get(monitor_instance_id, monitor_instance_id),
-        )
-        dimension_str = format_dimension_str(dimensions, instance_id_keys)
-        display_name = (
-            f"{resource_name} - {dimension_str}" if dimension_str else resource_name
-        )
-        sub_dimension_keys = [k for k in instance_id_keys if k != "instance_id"]
-        dimension_value = format_dimension_value(
-            dimensions,
-            ordered_keys=sub_dimension_keys,
-            name_map=dimension_name_map,
-        )
 
-        values = row["values"][-n:]
-        if len(values) < n:
-            continue
-        numeric_values = [_parse_finite_float(value[1]) for value in values]
-        if any(value is None for value in numeric_values):
-            continue
-
-        raw_data = row.to_dict()
+        values = raw_data["values"][-n:]
         raw_data["values"] = values
+        level_index = levels[position]
 
-        alert_triggered = False
-        sorted_thresholds = sorted(
-            thresholds,
-            key=lambda item: AlertConstants.LEVEL_WEIGHT.get(item.get("level"), 0),
-            reverse=True,
-        )
-        for threshold_info in sorted_thresholds:
-            method = AlertConstants.THRESHOLD_METHODS.get(threshold_info["method"])
-            if not method:
-                raise BaseAppException(
-                    f"Invalid threshold method: {threshold_info['method']}"
-                )
-
-            if all(method(value, threshold_info["value"]) for value in numeric_values):
-                alert_value = numeric_values[-1]
-                formatted_value = _format_value_with_unit(
-                    alert_value, display_unit, enum_value_map
-                )
-                context = {
-                    **raw_data,
-                    "monitor_object": template_context.get("monitor_object", ""),
-                    "instance_name": display_name,
-                    "resource_name": resource_name,
-                    "metric_name": template_context.get("metric_name", ""),
-                    "level": threshold_info["level"],
-                    "value": formatted_value,
-                    "dimension_value": dimension_value,
-                    **resource_context,
-                }
-                context.update(build_metric_template_vars(dimensions))
-
-                template = Template(alert_name)
-                content = template.safe_substitute(context)
-
-                event = {
-                    "metric_instance_id": metric_instance_id,
-                    "monitor_instance_id": monitor_instance_id,
-                    "dimensions": dimensions,
-                    "value": alert_value,
-                    "timestamp": values[-1][0],
-                    "level": threshold_info["level"],
-                    "content": content,
-                    "raw_data": raw_data,
-                }
-                alert_events.append(event)
-                alert_triggered = True
-                break
-
-        if not alert_triggered:
+        if level_index < 0:
             info_events.append(
                 {
                     "metric_instance_id": metric_instance_id,
@@ -171,6 +174,51 @@ def calculate_alerts(alert_name, df, thresholds, template_context=None, n=1):
                     "raw_data": raw_data,
                 }
             )
+            continue
+
+        threshold_info = sorted_thresholds[level_index]
+        resource_name = resource_context.get(
+            "resource_name",
+            instances_map.get(monitor_instance_id, monitor_instance_id),
+        )
+        dimension_str = format_dimension_str(dimensions, instance_id_keys)
+        display_name = (
+            f"{resource_name} - {dimension_str}" if dimension_str else resource_name
+        )
+        dimension_value = format_dimension_value(
+            dimensions,
+            ordered_keys=sub_dimension_keys,
+            name_map=dimension_name_map,
+        )
+        alert_value = float(matrix[position, -1])
+        formatted_value = _format_value_with_unit(
+            alert_value, display_unit, enum_value_map
+        )
+        context = {
+            **raw_data,
+            "monitor_object": template_context.get("monitor_object", ""),
+            "instance_name": display_name,
+            "resource_name": resource_name,
+            "metric_name": template_context.get("metric_name", ""),
+            "level": threshold_info["level"],
+            "value": formatted_value,
+            "dimension_value": dimension_value,
+            **resource_context,
+        }
+        context.update(build_metric_template_vars(dimensions))
+
+        alert_events.append(
+            {
+                "metric_instance_id": metric_instance_id,
+                "monitor_instance_id": monitor_instance_id,
+                "dimensions": dimensions,
+                "value": alert_value,
+                "timestamp": values[-1][0],
+                "level": threshold_info["level"],
+                "content": template.safe_substitute(context),
+                "raw_data": raw_data,
+            }
+        )
 
     return alert_events, info_events
 
@@ -137,3 +137,25 @@ def test_calculate_alerts_first_matching_threshold_wins():
     alerts, _ = calculate_alerts("x", df, thresholds, {"instance_id_keys": ["instance_id"]}, n=2)
     assert len(alerts) == 1
     assert alerts[0]["level"] == "error"
+
+
+def test_calculate_alerts_mixed_rows_pick_level_per_row():
+    df = vm_to_dataframe(
+        [
+            {"metric": {"instance_id": "h1"}, "values": [[1, "95"], [2, "96"]]},
+            {"metric": {"instance_id": "h2"}, "values": [[1, "85"], [2, "95"]]},
+            {"metric": {"instance_id": "h3"}, "values": [[1, "10"], [2, "20"]]},
+            {"metric": {"instance_id": "h4"}, "values": [[1, "nan"], [2, "99"]]},
+            {"metric": {"instance_id": "h5"}, "values": [[2, "99"]]},
+        ]
+    )
+    thresholds = [
+        {"method": ">", "value": 80, "level": "warning"},
+        {"method": ">", "value": 90, "level": "critical"},
+    ]
+    alerts, infos = calculate_alerts("x", df, thresholds, {"instance_id_keys": ["instance_id"]}, n=2)
+    assert [(a["metric_instance_id"], a["level"], a["value"]) for a in alerts] == [
+        ("('h1',)", "critical", 96.0),
+        ("('h2',)", "warning", 95.0),
+    ]
+    assert [(i["metric_instance_id"], i["value"]) for i in infos] == [("('h3',)", "20")]
@@ -147,6 +147,90 @@ class TestQueryAggregationMetrics:
             svc.query_aggregation_metrics({"type": "min", "value": 5})
 
 
+class TestBackfillCache:
+    def _svc(self, mocker, vm_result):
+        svc = MetricQueryService(_policy(algorithm="max", group_by=["instance_id"]), {})
+        fake = mocker.patch.dict(
+            "apps.monitor.tasks.services.policy_scan.metric_query.METHOD",
+            {"max": mocker.Mock(return_value=vm_result)},
+            clear=False,
+        )
+        return svc, fake["max"]
+
+    def test_single_range_query_sliced_per_window(self, mocker):
+        t0 = datetime(2026, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+        ends = [t0.replace(minute=5 * i) for i in range(1, 4)]
+        base = int(t0.timestamp())
+        vm_result = {
+            "status": "success",
+            "data": {
+                "result": [
+                    {"metric": {"instance_id": "h1"}, "values": [[base + 300 * i, str(i)] for i in range(4)]},
+                    {"metric": {"instance_id": "h2"}, "values": [[base + 900, "9"]]},
+                ]
+            },
+        }
+        svc, method = self._svc(mocker, vm_result)
+        svc.enable_backfill_cache(ends)
+        windows = []
+        for end in ends:
+            svc.policy.last_run_time = end
+            windows.append(svc.query_aggregation_metrics({"type": "min", "value": 5}, 2))
+
+        method.assert_called_once()
+        args = method.call_args.args
+        assert (args[1], args[2], args[3]) == (base - 300, base + 900, "5m")
+        assert [[p[1] for p in r["values"]] for r in windows[0]["data"]["result"]] == [["0", "1"]]
+        assert [r["values"][-1][1] for r in windows[2]["data"]["result"]] == ["3", "9"]
+        assert windows[2]["status"] == "success"
+        # 切片不修改缓存的原始结果
+        assert len(vm_result["data"]["result"][0]["values"]) == 4
+
+    def test_misaligned_period_falls_back_to_live_query(self, mocker):
+        t0 = datetime(2026, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+        ends = [t0.replace(minute=5), t0.replace(minute=10)]
+        svc, method = self._svc(mocker, {"data": {"result": []}})
+        svc.enable_backfill_cache(ends)
+        for end in ends:
+            svc.policy.last_run_time = end
+            svc.query_aggregation_metrics({"type": "min", "value": 3})
+        assert method.call_count == 2
+
+    def test_disabled_cache_queries_each_time(self, mocker):
+        svc, method = self._svc(mocker, {"data": {"result": []}})
+        svc.enable_backfill_cache([svc.policy.last_run_time])
+        svc.disable_backfill_cache()
+        svc.query_aggregation_metrics({"type": "min", "value": 5})
+        svc.query_aggregation_metrics({"type": "min", "value": 5})
+        assert method.call_count == 2
+
+
+class TestAggregationQuerySpec:
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"algorithm": "max_over_time", "group_algorithm": "avg"},
+            {"algorithm": "sum"},
+            {"algorithm": "avg_over_time", "query_condition": {"type": "pmq", "query": "up"}, "group_by": ["instance_id", "device"]},
+        ],
+    )
+    def test_spec_matches_issued_query(self, mocker, kwargs):
+        svc = MetricQueryService(_policy(**kwargs), {})
+        vm = mocker.patch("apps.monitor.tasks.utils.policy_methods.VictoriaMetricsAPI")
+        vm.return_value.query_range.return_value = {"data": {"result": []}}
+        svc.query_aggregation_metrics({"type": "min", "value": 5}, 3)
+        assert svc.aggregation_query_spec({"type": "min", "value": 5}, 3) == vm.return_value.query_range.call_args.args
+
+    def test_primed_result_skips_query(self, mocker):
+        svc = MetricQueryService(_policy(algorithm="max_over_time", group_algorithm="avg"), {})
+        vm = mocker.patch("apps.monitor.tasks.utils.policy_methods.VictoriaMetricsAPI")
+        primed = {"data": {"result": [{"metric": {"instance_id": "h1"}, "values": [[1767225600, "1"]]}]}}
+        svc.prime_aggregation_result({"type": "min", "value": 5}, 1, primed)
+        out = svc.query_aggregation_metrics({"type": "min", "value": 5})
+        vm.assert_not_called()
+        assert out == primed and out["data"]["result"][0] is not primed["data"]["result"][0]
+
+
 class TestQueryRawMetrics:
     def test_uses_vm_query_range(self, mocker):
         svc = MetricQueryService(_policy(), {})
@@ -232,6 +232,67 @@ class TestRun:
         create.assert_not_called()
 
 
+class TestRunBackfill:
+    def _scan(self, mocker):
+        obj = _make_obj()
+        MonitorInstance.objects.create(id="('h1',)", name="主机1", monitor_object=obj)
+        policy = _make_policy(obj, source={"type": "instance", "values": ["('h1',)"]})
+        scan = MonitorPolicyScan(policy)
+        return policy, scan
+
+    def test_windows_run_in_order_with_refreshed_alerts(self, mocker):
+        policy, scan = self._scan(mocker)
+        scan_times = [policy.last_run_time + timedelta(minutes=5 * i) for i in range(1, 4)]
+        seen = []
+
+        def fake_run():
+            seen.append((scan.policy.last_run_time, scan.alert_detector.active_alerts is scan.active_alerts))
+            assert scan.metric_query_service._backfill_window_ends is not None
+
+        mocker.patch.object(scan, "run", side_effect=fake_run)
+        recorded = []
+        scan.run_backfill(scan_times, on_window_success=recorded.append)
+
+        assert [t for t, _ in seen] == scan_times
+        assert all(shared for _, shared in seen)
+        assert recorded == scan_times
+        assert scan.metric_query_service._backfill_window_ends is None
+
+    def test_failed_window_keeps_previous_watermark(self, mocker):
+        policy, scan = self._scan(mocker)
+        scan_times = [policy.last_run_time + timedelta(minutes=5 * i) for i in range(1, 4)]
+        calls = []
+
+        def fake_run():
+            calls.append(scan.policy.last_run_time)
+            MonitorAlert.objects.create(
+                policy_id=policy.id,
+                monitor_instance_id="('h1',)",
+                metric_instance_id=f"('h1', {len(calls)})",
+                alert_type="alert",
+                level="warning",
+                value=1,
+                content="x",
+                status="new",
+                start_event_time=scan.policy.last_run_time,
+            )
+            if len(calls) == 2:
+                raise RuntimeError("boom")
+
+        def record(scan_time):
+            MonitorPolicy.objects.filter(id=policy.id).update(last_run_time=scan_time)
+
+        mocker.patch.object(scan, "run", side_effect=fake_run)
+        with pytest.raises(RuntimeError, match="boom"):
+            scan.run_backfill(scan_times, on_window_success=record)
+
+        assert calls == scan_times[:2]
+        policy.refresh_from_db()
+        assert policy.last_run_time == scan_times[0]
+        # 失败窗口的写入随保存点回滚，之前窗口照常提交
+        assert list(MonitorAlert.objects.filter(policy_id=policy.id).values_list("metric_instance_id", flat=True)) == ["('h1', 1)"]
+
+
 class TestPodAlertEndToEnd:
     """用隔离测试库和 VictoriaMetrics mock 验证 Pod 告警完整生命周期。"""
 
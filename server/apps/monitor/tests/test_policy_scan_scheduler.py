@@ -0,0 +1,118 @@
+"""PolicyScanScheduler 分组扫描测试。
+
+聚焦相同聚合查询的策略合并为一次 VictoriaMetrics 查询、结果按策略分发、单策略失败隔离与水位推进。
+VictoriaMetricsAPI 通过 mock 替换，MonitorPolicyScan.run 替换为读取注入结果的探针。
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from apps.monitor.models import MonitorInstance
+from apps.monitor.models.monitor_object import MonitorObject
+from apps.monitor.models.monitor_policy import MonitorPolicy
+from apps.monitor.tasks.services.policy_scan.scan_scheduler import PolicyScanScheduler
+from apps.monitor.tasks.services.policy_scan.scanner import MonitorPolicyScan
+
+pytestmark = pytest.mark.django_db
+
+SCAN_TIME = datetime(2026, 1, 1, 0, 10, tzinfo=timezone.utc)
+
+
+def _make_policy(obj, name, **kwargs):
+    base = dict(
+        monitor_object=obj,
+        name=name,
+        algorithm="max_over_time",
+        query_condition={"type": "pmq", "query": "cpu_usage"},
+        source={"type": "instance", "values": ["('h1',)"]},
+        group_by=["instance_id"],
+        enable_alerts=["threshold"],
+        period={"type": "min", "value": 5},
+        schedule={"type": "min", "value": 5},
+        threshold=[{"method": ">", "value": 80, "level": "warning"}],
+        last_run_time=datetime(2026, 1, 1, 0, 5, tzinfo=timezone.utc),
+    )
+    base.update(kwargs)
+    return MonitorPolicy.objects.create(**base)
+
+
+@pytest.fixture
+def monitor_object():
+    obj = MonitorObject.objects.create(name="SchedObj", level="base", instance_id_keys=["instance_id"])
+    MonitorInstance.objects.create(id="('h1',)", name="主机1", monitor_object=obj)
+    return obj
+
+
+@pytest.fixture
+def vm_api(mocker):
+    api = mocker.patch("apps.monitor.tasks.services.policy_scan.scan_scheduler.VictoriaMetricsAPI")
+    api.return_value.query_range.side_effect = lambda query, start, end, step: {
+        "status": "success",
+        "data": {"result": [{"metric": {"instance_id": "h1"}, "values": [[end, "90"]], "query": query}]},
+    }
+    return api.return_value
+
+
+@pytest.fixture
+def probe(mocker):
+    seen = {}
+
+    def fake_run(scan):
+        data = scan.metric_query_service.query_aggregation_metrics(scan.policy.period, scan.policy.trigger_count)
+        seen[scan.policy.id] = data
+        if scan.policy.name == "broken":
+            raise RuntimeError("boom")
+
+    mocker.patch.object(MonitorPolicyScan, "run", autospec=True, side_effect=fake_run)
+    mocker.patch(
+        "apps.monitor.tasks.services.policy_scan.metric_query.MetricQueryService.set_monitor_obj_instance_key",
+        autospec=True,
+        side_effect=lambda svc: setattr(svc, "instance_id_keys", ["instance_id"]),
+    )
+    return seen
+
+
+def test_policies_with_same_query_share_one_request(monitor_object, vm_api, probe):
+    p1 = _make_policy(monitor_object, "p1")
+    p2 = _make_policy(monitor_object, "p2", threshold=[{"method": ">", "value": 50, "level": "error"}])
+    p3 = _make_policy(monitor_object, "p3", period={"type": "min", "value": 10})
+
+    result = PolicyScanScheduler([p1, p2, p3], SCAN_TIME).run()
+
+    assert vm_api.query_range.call_count == 2
+    assert result["groups"] == 2 and result["succeeded"] == 3 and result["failed"] == []
+    assert probe[p1.id]["data"]["result"][0]["values"] == [[int(SCAN_TIME.timestamp()), "90"]]
+    # 每个策略拿到独立副本，单位转换等原地修改不会串到同组其他策略
+    assert probe[p1.id]["data"]["result"][0] is not probe[p2.id]["data"]["result"][0]
+    assert set(MonitorPolicy.objects.values_list("last_run_time", flat=True)) == {SCAN_TIME}
+
+
+def test_failed_policy_does_not_block_group(monitor_object, vm_api, probe):
+    good = _make_policy(monitor_object, "good")
+    broken = _make_policy(monitor_object, "broken")
+
+    result = PolicyScanScheduler([good, broken], SCAN_TIME).run()
+
+    assert vm_api.query_range.call_count == 1
+    assert result["succeeded"] == 1 and result["failed"] == [broken.id]
+    good.refresh_from_db()
+    broken.refresh_from_db()
+    assert good.last_run_time == SCAN_TIME
+    assert broken.last_run_time == datetime(2026, 1, 1, 0, 5, tzinfo=timezone.utc)
+
+
+def test_group_query_error_falls_back_to_policy_query(monitor_object, vm_api, probe, mocker):
+    vm_api.query_range.side_effect = RuntimeError("vm down")
+    fallback = mocker.patch.dict(
+        "apps.monitor.tasks.services.policy_scan.metric_query.METHOD",
+        {"max_over_time": mocker.Mock(return_value={"data": {"result": []}})},
+        clear=False,
+    )
+    policy = _make_policy(monitor_object, "p1")
+
+    result = PolicyScanScheduler([policy], SCAN_TIME).run()
+
+    assert result["succeeded"] == 1
+    fallback["max_over_time"].assert_called_once()
+    assert probe[policy.id] == {"data": {"result": []}}
@@ -2,6 +2,8 @@
 
 from celery.schedules import crontab
 
+from apps.node_mgmt.constants.controller import ControllerConstants
+
 CELERY_BEAT_SCHEDULE = {
     'check_all_region_services': {
         'task': 'apps.node_mgmt.tasks.cloudregion.check_all_region_services',
@@ -11,4 +13,8 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.node_mgmt.tasks.version_discovery.discover_node_versions',
         'schedule': crontab(minute='*/30'),  # 每30分钟执行一次
     },
+    'flush_sidecar_heartbeats': {
+        'task': 'apps.node_mgmt.tasks.sidecar_heartbeat.flush_sidecar_heartbeats',
+        'schedule': ControllerConstants.HEARTBEAT_FLUSH_INTERVAL,  # 心跳合并落库，默认每10秒执行一次
+    },
 }
@@ -1,3 +1,5 @@
+import os
+
 from apps.node_mgmt.constants.node import NodeConstants
 
 
@@ -54,6 +56,15 @@ class ControllerConstants:
     # Etag缓存时间（秒）
     E_CACHE_TIMEOUT = 60 * 5  # 5分钟
 
+    # 心跳合并写：ETag 命中的心跳只写缓存，由定时任务批量落库（依赖 celery beat，默认随 ENABLE_CELERY 开启）
+    HEARTBEAT_COALESCE_ENABLED = os.getenv("NODE_HEARTBEAT_COALESCE_ENABLED", os.getenv("ENABLE_CELERY", "False")).lower() == "true"
+    # 批量落库间隔（秒）
+    HEARTBEAT_FLUSH_INTERVAL = int(os.getenv("NODE_HEARTBEAT_FLUSH_INTERVAL", "10"))
+    # 状态未变化时刷新 updated_at 的最小间隔（秒），需保证 心跳间隔 + 落库间隔 + 该值 小于节点活跃判定窗口(60秒)
+    HEARTBEAT_LIVENESS_REFRESH_SECONDS = int(os.getenv("NODE_HEARTBEAT_LIVENESS_REFRESH_SECONDS", "20"))
+    # 每批处理的节点数
+    HEARTBEAT_FLUSH_BATCH_SIZE = 1000
+
     # 控制器下发目录
     CONTROLLER_INSTALL_DIR = {
         NodeConstants.LINUX_OS: {"storage_dir": "/tmp", "install_dir": "/tmp"},
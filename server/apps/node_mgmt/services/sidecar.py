@@ -20,10 +20,12 @@ from apps.node_mgmt.constants.installer import InstallerConstants
 from apps.node_mgmt.constants.node import NodeConstants
 from apps.node_mgmt.models.action import CollectorActionTask, CollectorActionTaskNode
 from apps.node_mgmt.models.installer import ControllerTaskNode
-from apps.node_mgmt.models.sidecar import Collector, CollectorConfiguration, Node, NodeCollectorConfiguration, NodeOrganization
+from apps.node_mgmt.models.sidecar import ChildConfig, Collector, CollectorConfiguration, Node, NodeCollectorConfiguration, NodeOrganization
 from apps.node_mgmt.services.cloudregion import RegionService
 from apps.node_mgmt.services.node_host_metadata import NodeHostMetadataRenderContext
 from apps.node_mgmt.services.sidecar_cache import build_configuration_etag_cache_key, invalidate_node_configuration_etags
+from apps.node_mgmt.services.sidecar_heartbeat import SidecarHeartbeatAggregator
+from apps.node_mgmt.services.sidecar_render_cache import COMPILED, build_compiled_cache_key, build_configuration_version, get_or_build
 from apps.node_mgmt.tasks.action_task import converge_collector_action_task_for_node
 from apps.node_mgmt.tasks.installer import _matches_install_connectivity_target, converge_controller_install_connectivity_for_node
 from apps.node_mgmt.utils.architecture import normalize_cpu_architecture
@@ -399,7 +401,7 @@ class Sidecar:
     def _cached_heartbeat_updates(node_id: str, node_details: dict) -> tuple[dict, str, bool]:
         """Build the bounded metadata update allowed on an ETag cache hit."""
         request_data = dict(node_details)
-        existing_node = Node.objects.filter(id=node_id).values("ip", "operating_system").first() or {}
+        existing_node = Node.objects.filter(id=node_id).values("ip", "operating_system", "cpu_architecture").first() or {}
         for field in ("ip", "operating_system"):
             if not request_data.get(field):
                 request_data[field] = existing_node.get(field, "")
@@ -414,7 +416,7 @@ class Sidecar:
         if ip_changed:
             updates["ip"] = resolved_ip
         cpu_architecture = Sidecar._fallback_cpu_architecture(node_id, request_data)
-        if cpu_architecture:
+        if cpu_architecture and cpu_architecture != existing_node.get("cpu_architecture"):
             updates["cpu_architecture"] = cpu_architecture
 
         return updates, resolved_ip, ip_changed
@@ -491,6 +493,19 @@ class Sidecar:
 
         return {name: collector for name, (_, collector) in selected_collectors.items()}
 
+    @staticmethod
+    def _apply_cached_heartbeat(node_id, updates, ip_changed):
+        """ETag 命中时写入心跳：仅存活/状态信息时交给聚合器合并落库，否则同步更新节点"""
+        if SidecarHeartbeatAggregator.enabled() and updates.keys() == {"updated_at", "status"}:
+            # 仅存活/状态信息：写入缓存，由定时任务合并落库
+            SidecarHeartbeatAggregator.record(node_id, updates["status"])
+            return
+        updated_count = Node.objects.filter(id=node_id).update(**updates)
+        if updated_count:
+            SidecarHeartbeatAggregator.mark_persisted(node_id, updates["status"])
+        if updated_count and ip_changed:
+            invalidate_node_configuration_etags([node_id])
+
     @staticmethod
     def update_node_client(request, node_id):
         """更新sidecar客户端信息"""
@@ -508,9 +523,7 @@ class Sidecar:
         # 如果缓存的ETag存在且与客户端的相同，则返回304 Not Modified
         if cached_etag and cached_etag == if_none_match:
             updates, node_ip, ip_changed = Sidecar._cached_heartbeat_updates(node_id, node_details)
-            updated_count = Node.objects.filter(id=node_id).update(**updates)
-            if updated_count and ip_changed:
-                invalidate_node_configuration_etags([node_id])
+            Sidecar._apply_cached_heartbeat(node_id, updates, ip_changed)
             Sidecar.trigger_converge_tasks_if_needed(node_id, node_ip, updates["status"])
 
             response = HttpResponse(status=304)
@@ -603,6 +616,8 @@ class Sidecar:
             if not node_info.get("cpu_architecture"):
                 node_info.pop("cpu_architecture", None)
             updated_count = Node.objects.filter(id=node_id).update(**node_info)
+            if updated_count:
+                SidecarHeartbeatAggregator.mark_persisted(node_id, node_info.get("status", {}))
             if updated_count and request_data.get("ip", "") != node.ip:
                 invalidate_node_configuration_etags([node_id])
 
@@ -765,7 +780,6 @@ class Sidecar:
             request,
             node_id,
             configuration_id,
-            include_child_configs=True,
             include_collector=True,
         )
         if error_response:
@@ -775,10 +789,65 @@ class Sidecar:
         configuration = assignment.collector_config
         host_context = NodeHostMetadataRenderContext.build(node.name, node.ip)
 
-        collector = configuration.collector
-        section_headers = {}
+        # 合并后的模板按配置版本在所有绑定节点间共享，配置失效时同一配置只编译一次
+        version = Sidecar.configuration_render_version(configuration)
+        compiled = get_or_build(
+            COMPILED,
+            build_compiled_cache_key(configuration.id, version),
+            lambda: Sidecar.compile_configuration_template(configuration),
+        )
+
+        configuration_data = dict(
+            id=configuration.id,
+            collector_id=configuration.collector_id,
+            name=configuration.name,
+            template=compiled["template"],
+            env_config=configuration.env_config or {},
+        )
+
+        variables = Sidecar.get_variables(node)
+
+        # 如果配置中有 env_config，则合并到变量中
+        if configuration_data.get("env_config"):
+            variables.update(configuration_data["env_config"])
+        variables.update(compiled["child_variables"])
+
+        # 渲染配置模板：变量含云区域解密后的密钥，渲染结果不进入共享缓存
+        configuration_data["template"] = Sidecar.render_template(
+            compiled["template"],
+            variables,
+            trusted_reserved_variables=host_context.variables,
+        )
+
+        # 生成新的 ETag - 基于实际响应内容
+        new_etag = Sidecar.generate_response_etag(configuration_data, request)
+
+        # 更新缓存中的 ETag
+        cache.set(cache_key, host_context.build_cache_entry(new_etag), ControllerConstants.E_CACHE_TIMEOUT)
+
+        # 返回配置信息和新的 ETag
+        return EncryptedJsonResponse(configuration_data, headers={"ETag": new_etag}, request=request)
+
+    @staticmethod
+    def _section_headers(collector) -> dict:
         if collector.default_config:
-            section_headers = collector.default_config.get("config_section", {})
+            return collector.default_config.get("config_section", {})
+        return {}
+
+    @staticmethod
+    def configuration_render_version(configuration) -> str:
+        """配置渲染版本：主模板、采集器分段与子配置(id, 更新时间)任一变化即变化"""
+        child_versions = list(ChildConfig.objects.filter(collector_config_id=configuration.id).values_list("id", "updated_at"))
+        return build_configuration_version(
+            configuration.config_template,
+            Sidecar._section_headers(configuration.collector),
+            child_versions,
+        )
+
+    @staticmethod
+    def compile_configuration_template(configuration) -> dict:
+        """合并主模板与子配置（子配置按自身 env_config 渲染），与节点无关，不含节点与云区域变量"""
+        section_headers = Sidecar._section_headers(configuration.collector)
 
         child_configs = list(configuration.childconfig_set.all())
         # 合并子配置内容到模板。显式分段避免将采集器的全局监听/处理逻辑误认为某个实例模板。
@@ -815,37 +884,11 @@ class Sidecar:
                 merged_template += f"\n# {child_config.collect_type} - {child_config.config_type}\n"
                 merged_template += Sidecar.render_template(child_config.content, child_config.env_config)
 
-        configuration_data = dict(
-            id=configuration.id,
-            collector_id=configuration.collector_id,
-            name=configuration.name,
-            template=merged_template,
-            env_config=configuration.env_config or {},
-        )
-        # TODO test merged_template
-
-        variables = Sidecar.get_variables(node)
-
-        # 如果配置中有 env_config，则合并到变量中
-        if configuration_data.get("env_config"):
-            variables.update(configuration_data["env_config"])
-        variables.update(child_render_variables)
-
-        # 渲染配置模板
-        configuration_data["template"] = Sidecar.render_template(
-            configuration_data["template"],
-            variables,
-            trusted_reserved_variables=host_context.variables,
-        )
-
-        # 生成新的 ETag - 基于实际响应内容
-        new_etag = Sidecar.generate_response_etag(configuration_data, request)
-
-        # 更新缓存中的 ETag
-        cache.set(cache_key, host_context.build_cache_entry(new_etag), ControllerConstants.E_CACHE_TIMEOUT)
-
-        # 返回配置信息和新的 ETag
-        return EncryptedJsonResponse(configuration_data, headers={"ETag": new_etag}, request=request)
+        # 编译结果写入共享缓存；password 类变量在最终渲染时本就被排除，不随编译结果缓存
+        return {
+            "template": merged_template,
+            "child_variables": {key: value for key, value in child_render_variables.items() if "password" not in key.lower()},
+        }
 
     @staticmethod
     def get_node_config_env(request, node_id, configuration_id):
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.core.logger import node_logger as logger
+from apps.node_mgmt.constants.controller import ControllerConstants
+from apps.node_mgmt.models.sidecar import Node
+
+HEARTBEAT_CACHE_PREFIX = "node_heartbeat_"
+HEARTBEAT_PERSISTED_CACHE_PREFIX = "node_heartbeat_persisted_"
+HEARTBEAT_FLUSH_LOCK_KEY = "node_heartbeat_flush_lock"
+# 待落库心跳与落库标记的缓存时间，远大于落库间隔，节点下线后自然过期
+HEARTBEAT_CACHE_TIMEOUT = 60 * 60
+
+
+def _status_digest(status: dict) -> str:
+    payload = json.dumps(status or {}, sort_keys=True, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+class SidecarHeartbeatAggregator:
+    """
+    Sidecar 心跳合并写
+
+    ETag 命中(304)且只携带存活/状态信息的心跳先记录到缓存（生产环境为 Redis），
+    由定时任务按批次落库；状态未变化的节点仅在 updated_at 即将超出活跃判定窗口时才刷新，
+    IP、CPU 架构等元数据变化仍由调用方同步写库。
+    """
+
+    @staticmethod
+    def enabled() -> bool:
+        return ControllerConstants.HEARTBEAT_COALESCE_ENABLED
+
+    @staticmethod
+    def record(node_id: str, status: dict, seen_at: float | None = None):
+        """记录一次心跳，同一节点在落库前的多次心跳只保留最新一次"""
+        cache.set(
+            f"{HEARTBEAT_CACHE_PREFIX}{node_id}",
+            {"seen_at": seen_at or time.time(), "status": status or {}},
+            HEARTBEAT_CACHE_TIMEOUT,
+        )
+
+    @staticmethod
+    def mark_persisted(node_id: str, status: dict, seen_at: float | None = None):
+        """心跳已同步写库：更新落库标记，避免定时任务用更早的缓存心跳覆盖"""
+        if not SidecarHeartbeatAggregator.enabled():
+            return
+        cache.set(
+            f"{HEARTBEAT_PERSISTED_CACHE_PREFIX}{node_id}",
+            {"seen_at": seen_at or time.time(), "digest": _status_digest(status)},
+            HEARTBEAT_CACHE_TIMEOUT,
+        )
+
+    @classmethod
+    def flush(cls) -> dict:
+        """将缓存中的心跳批量写入 Node 表，只写状态变化或存活时间需要刷新的节点"""
+        result = {"pending": 0, "written": 0, "status_changed": 0, "skipped": 0}
+        if not cache.add(HEARTBEAT_FLUSH_LOCK_KEY, "1", ControllerConstants.HEARTBEAT_FLUSH_INTERVAL * 6):
+            logger.info("Sidecar heartbeat flush is already running, skip")
+            return result
+
+        try:
+            batch = []
+            for node_id in Node.objects.values_list("id", flat=True).iterator(chunk_size=ControllerConstants.HEARTBEAT_FLUSH_BATCH_SIZE):
+                batch.append(node_id)
+                if len(batch) >= ControllerConstants.HEARTBEAT_FLUSH_BATCH_SIZE:
+                    cls._flush_batch(batch, result)
+                    batch = []
+            if batch:
+                cls._flush_batch(batch, result)
+        finally:
+            cache.delete(HEARTBEAT_FLUSH_LOCK_KEY)
+
+        logger.info(
+            "Sidecar heartbeat flush finished pending=%d written=%d status_changed=%d skipped=%d",
+            result["pending"],
+            result["written"],
+            result["status_changed"],
+            result["skipped"],
+        )
+        return result
+
+    @staticmethod
+    def _flush_batch(node_ids: list, result: dict):
+        heartbeats = cache.get_many([f"{HEARTBEAT_CACHE_PREFIX}{node_id}" for node_id in node_ids])
+        if not heartbeats:
+            return
+        persisted = cache.get_many([f"{HEARTBEAT_PERSISTED_CACHE_PREFIX}{node_id}" for node_id in node_ids])
+
+        nodes, marks = [], {}
+        for key, heartbeat in heartbeats.items():
+            node_id = key[len(HEARTBEAT_CACHE_PREFIX) :]
+            mark = persisted.get(f"{HEARTBEAT_PERSISTED_CACHE_PREFIX}{node_id}") or {}
+            if heartbeat["seen_at"] <= mark.get("seen_at", 0):
+                continue
+
+            result["pending"] += 1
+            digest = _status_digest(heartbeat["status"])
+            status_changed = digest != mark.get("digest")
+            if not status_changed and heartbeat["seen_at"] - mark["seen_at"] < ControllerConstants.HEARTBEAT_LIVENESS_REFRESH_SECONDS:
+                result["skipped"] += 1
+                continue
+
+            nodes.append(
+                Node(
+                    id=node_id,
+                    status=heartbeat["status"],
+                    updated_at=datetime.fromtimestamp(heartbeat["seen_at"], timezone.utc),
+                )
+            )
+            marks[f"{HEARTBEAT_PERSISTED_CACHE_PREFIX}{node_id}"] = {"seen_at": heartbeat["seen_at"], "digest": digest}
+            result["status_changed"] += int(status_changed)
+
+        if nodes:
+            Node.objects.bulk_update(nodes, ["status", "updated_at"], batch_size=ControllerConstants.HEARTBEAT_FLUSH_BATCH_SIZE)
+            cache.set_many(marks, HEARTBEAT_CACHE_TIMEOUT)
+            result["written"] += len(nodes)
@@ -0,0 +1,110 @@
+"""
+采集器配置渲染缓存
+
+按配置版本（主模板、采集器分段、子配置版本）缓存合并后的模板，所有绑定节点共享。
+只缓存与节点无关的编译结果：最终渲染会带入云区域解密后的密钥，不写入共享缓存。
+同一 key 的并发未命中通过 cache.add 互斥，只有一个请求构建，其余短暂等待其结果。
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.core.logger import node_logger as logger
+
+COMPILED_CACHE_PREFIX = "collector_config_compiled_"
+# 配置版本已编码进 key，内容变化自然换 key，旧条目依赖过期清理
+RENDER_CACHE_TIMEOUT = 60 * 60
+# 构建互斥锁超时，防止构建进程异常退出后锁长期残留
+RENDER_LOCK_TIMEOUT = 30
+# 未抢到构建锁时等待他人结果的最长时间（秒），超时后自行构建
+RENDER_WAIT_SECONDS = 2
+RENDER_WAIT_INTERVAL = 0.05
+# 每处理多少次查找输出一次命中率日志
+STATS_LOG_EVERY = 1000
+
+COMPILED = "compiled"
+
+
+def _digest(payload) -> str:
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), cls=DjangoJSONEncoder)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def build_configuration_version(config_template: str, section_headers: dict, child_versions: list) -> str:
+    return _digest([config_template, section_headers, child_versions])
+
+
+def build_compiled_cache_key(configuration_id, version: str) -> str:
+    return f"{COMPILED_CACHE_PREFIX}{configuration_id}_{version}"
+
+
+class RenderCacheMetrics:
+    """进程内渲染缓存命中统计，coalesced 表示等待到了其他请求的构建结果"""
+
+    OUTCOMES = ("hit", "miss", "coalesced")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {kind: dict.fromkeys(self.OUTCOMES, 0) for kind in (COMPILED,)}
+            self._lookups = 0
+
+    def record(self, kind: str, outcome: str):
+        with self._lock:
+            self._counters[kind][outcome] += 1
+            self._lookups += 1
+            should_log = self._lookups % STATS_LOG_EVERY == 0
+        if should_log:
+            logger.info("Collector config render cache stats: %s", self.snapshot())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = {kind: dict(values) for kind, values in self._counters.items()}
+        for values in counters.values():
+            total = sum(values.values())
+            values["hit_ratio"] = round((values["hit"] + values["coalesced"]) / total, 4) if total else 0.0
+        return counters
+
+
+render_cache_metrics = RenderCacheMetrics()
+
+
+def render_cache_stats() -> dict:
+    return render_cache_metrics.snapshot()
+
+
+def get_or_build(kind: str, key: str, builder):
+    """读取缓存，未命中时由一个请求构建并写回，其余并发请求等待该结果"""
+    value = cache.get(key)
+    if value is not None:
+        render_cache_metrics.record(kind, "hit")
+        return value
+
+    lock_key = f"{key}_lock"
+    if not cache.add(lock_key, "1", RENDER_LOCK_TIMEOUT):
+        deadline = time.monotonic() + RENDER_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(RENDER_WAIT_INTERVAL)
+            value = cache.get(key)
+            if value is not None:
+                render_cache_metrics.record(kind, "coalesced")
+                return value
+        logger.warning("Wait for collector config render timed out, build locally key=%s", key)
+        lock_key = None
+
+    try:
+        value = builder()
+        cache.set(key, value, RENDER_CACHE_TIMEOUT)
+    finally:
+        if lock_key:
+            cache.delete(lock_key)
+    render_cache_metrics.record(kind, "miss")
+    return value
@@ -10,3 +10,4 @@ from apps.node_mgmt.tasks.version_discovery import discover_node_versions
 from apps.node_mgmt.tasks.sidecar_config import sync_node_properties_to_sidecar
 from apps.node_mgmt.tasks.action_task import converge_collector_action_task_for_node
 from apps.node_mgmt.tasks.action_task import timeout_collector_action_task
+from apps.node_mgmt.tasks.sidecar_heartbeat import flush_sidecar_heartbeats
@@ -0,0 +1,11 @@
+from celery import shared_task
+
+from apps.node_mgmt.services.sidecar_heartbeat import SidecarHeartbeatAggregator
+
+
+@shared_task
+def flush_sidecar_heartbeats():
+    """定时任务：将缓存中合并的 Sidecar 心跳批量写入节点表"""
+    if not SidecarHeartbeatAggregator.enabled():
+        return {}
+    return SidecarHeartbeatAggregator.flush()
@@ -113,6 +113,8 @@ def test_cached_heartbeat_ignores_server_owned_and_unknown_fields(monkeypatch, c
     )
     monkeypatch.setattr("apps.node_mgmt.services.sidecar.cache.get", lambda _key: "cached-etag")
     monkeypatch.setattr(Sidecar, "trigger_converge_tasks_if_needed", lambda *args, **kwargs: None)
+    # 校验同步写库路径的字段过滤，心跳合并写见 test_sidecar_heartbeat_coalescing
+    monkeypatch.setattr(ControllerConstants, "HEARTBEAT_COALESCE_ENABLED", False)
     caplog.set_level(logging.WARNING)
 
     request = _heartbeat_request(
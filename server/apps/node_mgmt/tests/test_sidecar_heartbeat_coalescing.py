@@ -0,0 +1,136 @@
+"""Sidecar 心跳合并写：304 心跳写缓存、定时批量落库、元数据变化同步写库。"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+from apps.node_mgmt.constants.controller import ControllerConstants
+from apps.node_mgmt.models import Node
+from apps.node_mgmt.models.cloud_region import CloudRegion
+from apps.node_mgmt.services.sidecar import Sidecar
+from apps.node_mgmt.services.sidecar_heartbeat import SidecarHeartbeatAggregator
+from apps.node_mgmt.tasks.sidecar_heartbeat import flush_sidecar_heartbeats
+
+STALE_UPDATED_AT = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def _locmem_cache(settings):
+    # 全局 conftest 强制 DummyCache，心跳合并依赖真实读写语义，改用 locmem
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "node-mgmt-heartbeat-tests",
+        }
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def coalescing(monkeypatch):
+    monkeypatch.setattr(ControllerConstants, "HEARTBEAT_COALESCE_ENABLED", True)
+
+
+@pytest.fixture
+def node(db):
+    region = CloudRegion.objects.create(name="cr-heartbeat")
+    node = Node.objects.create(
+        id="node-heartbeat",
+        name="n",
+        ip="10.4.4.4",
+        operating_system="linux",
+        cpu_architecture="x86_64",
+        collector_configuration_directory="/etc",
+        cloud_region=region,
+        status={"status": 0},
+    )
+    Node.objects.filter(id=node.id).update(updated_at=STALE_UPDATED_AT)
+    return node
+
+
+def _heartbeat(node, status, ip=None):
+    cache.set(f"node_etag_{node.id}", "cached-etag")
+    request = SimpleNamespace(
+        headers={"If-None-Match": '"cached-etag"'},
+        META={},
+        data={"node_name": node.name, "node_details": {"ip": ip or node.ip, "operating_system": "linux", "status": status}},
+    )
+    with patch.object(Sidecar, "trigger_converge_tasks_if_needed") as trigger:
+        response = Sidecar.update_node_client(request, node.id)
+    assert response.status_code == 304
+    trigger.assert_called_once_with(node.id, ip or node.ip, status)
+
+
+@pytest.mark.django_db
+def test_cached_heartbeat_is_deferred_until_flush(coalescing, node):
+    _heartbeat(node, {"status": 1})
+
+    node.refresh_from_db()
+    assert node.status == {"status": 0}
+    assert node.updated_at == STALE_UPDATED_AT
+
+    result = flush_sidecar_heartbeats()
+
+    node.refresh_from_db()
+    assert result["written"] == 1 and result["status_changed"] == 1
+    assert node.status == {"status": 1}
+    assert node.updated_at > STALE_UPDATED_AT
+
+
+@pytest.mark.django_db
+def test_flush_skips_unchanged_status_until_liveness_refresh_is_due(coalescing, node):
+    now = datetime.now(timezone.utc).timestamp()
+    SidecarHeartbeatAggregator.record(node.id, {"status": 0}, seen_at=now)
+    assert SidecarHeartbeatAggregator.flush()["written"] == 1
+
+    SidecarHeartbeatAggregator.record(node.id, {"status": 0}, seen_at=now + 5)
+    assert SidecarHeartbeatAggregator.flush() == {"pending": 1, "written": 0, "status_changed": 0, "skipped": 1}
+
+    SidecarHeartbeatAggregator.record(node.id, {"status": 2}, seen_at=now + 6)
+    assert SidecarHeartbeatAggregator.flush()["status_changed"] == 1
+
+    refreshed_at = now + 6 + ControllerConstants.HEARTBEAT_LIVENESS_REFRESH_SECONDS
+    SidecarHeartbeatAggregator.record(node.id, {"status": 2}, seen_at=refreshed_at)
+    assert SidecarHeartbeatAggregator.flush()["written"] == 1
+
+    node.refresh_from_db()
+    assert node.status == {"status": 2}
+    assert node.updated_at == datetime.fromtimestamp(refreshed_at, timezone.utc)
+
+
+@pytest.mark.django_db
+def test_ip_change_is_written_immediately_and_invalidates_config_etags(coalescing, node):
+    with patch("apps.node_mgmt.services.sidecar.invalidate_node_configuration_etags") as invalidate:
+        _heartbeat(node, {"status": 3}, ip="10.4.4.5")
+
+    node.refresh_from_db()
+    assert node.ip == "10.4.4.5"
+    assert node.status == {"status": 3}
+    invalidate.assert_called_once_with([node.id])
+    assert SidecarHeartbeatAggregator.flush()["pending"] == 0
+
+
+@pytest.mark.django_db
+def test_synchronous_write_is_not_overwritten_by_older_cached_heartbeat(coalescing, node):
+    earlier = (datetime.now(timezone.utc) - timedelta(seconds=30)).timestamp()
+    SidecarHeartbeatAggregator.record(node.id, {"status": 9}, seen_at=earlier)
+    Node.objects.filter(id=node.id).update(status={"status": 0})
+    SidecarHeartbeatAggregator.mark_persisted(node.id, {"status": 0})
+
+    assert SidecarHeartbeatAggregator.flush()["written"] == 0
+    node.refresh_from_db()
+    assert node.status == {"status": 0}
+
+
+@pytest.mark.django_db
+def test_disabled_coalescing_keeps_synchronous_heartbeat_write(monkeypatch, node):
+    monkeypatch.setattr(ControllerConstants, "HEARTBEAT_COALESCE_ENABLED", False)
+    _heartbeat(node, {"status": 5})
+
+    node.refresh_from_db()
+    assert node.status == {"status": 5}
+    assert flush_sidecar_heartbeats() == {}
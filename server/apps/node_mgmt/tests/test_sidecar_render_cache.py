@@ -0,0 +1,153 @@
+"""采集器配置渲染缓存：按配置版本共享编译结果、渲染结果不落共享缓存、并发未命中合并。"""
+import json
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+from apps.node_mgmt.models import Collector, Node
+from apps.node_mgmt.models.cloud_region import CloudRegion
+from apps.node_mgmt.models.sidecar import ChildConfig, CollectorConfiguration
+from apps.node_mgmt.services import sidecar_render_cache
+from apps.node_mgmt.services.sidecar import Sidecar
+from apps.node_mgmt.services.sidecar_render_cache import COMPILED, get_or_build, render_cache_metrics
+
+
+@pytest.fixture(autouse=True)
+def _locmem_cache(settings):
+    # 全局 conftest 强制 DummyCache，渲染缓存依赖真实读写语义，改用 locmem
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "node-mgmt-render-cache-tests",
+        }
+    }
+    cache.clear()
+    render_cache_metrics.reset()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def shared_config(db):
+    region = CloudRegion.objects.create(name="cr-render-cache")
+    collector = Collector.objects.create(
+        id="collector-render-cache",
+        name="Telegraf",
+        service_type="exec",
+        node_operating_system="linux",
+        executable_path="/opt/telegraf",
+        execute_parameters="--config %s",
+        default_config={},
+    )
+    config = CollectorConfiguration.objects.create(
+        id="cfg-render-cache",
+        name="cfg-render-cache",
+        collector=collector,
+        config_template="[agent]\n  hostname = \"${node__name}\"\n",
+        cloud_region=region,
+    )
+    nodes = [
+        Node.objects.create(
+            id=f"node-render-{index}",
+            name=f"host-{index}",
+            ip=f"10.5.5.{index}",
+            operating_system="linux",
+            collector_configuration_directory="/etc",
+            cloud_region=region,
+        )
+        for index in range(3)
+    ]
+    config.nodes.add(*nodes)
+    child = ChildConfig.objects.create(
+        collect_type="host",
+        config_type="cpu",
+        content="[[inputs.cpu]]\n  interval = \"${interval}s\"\n",
+        collector_config=config,
+        env_config={"interval": 10},
+    )
+    return config, nodes, child
+
+
+def _pull(node, config):
+    response = Sidecar.get_node_config(SimpleNamespace(headers={}, META={}), node.id, config.id)
+    assert response.status_code == 200
+    return json.loads(response.content)["template"]
+
+
+@pytest.mark.django_db
+def test_bound_nodes_share_one_compiled_template(shared_config):
+    config, nodes, _child = shared_config
+
+    with patch.object(Sidecar, "compile_configuration_template", wraps=Sidecar.compile_configuration_template) as compile_mock:
+        templates = [_pull(node, config) for node in nodes]
+        assert _pull(nodes[0], config) == templates[0]
+
+    assert compile_mock.call_count == 1
+    for node, template in zip(nodes, templates):
+        assert f'hostname = "{node.name}"' in template
+        assert 'interval = "10s"' in template
+
+    assert render_cache_metrics.snapshot()["compiled"] == {"hit": 3, "miss": 1, "coalesced": 0, "hit_ratio": 0.75}
+
+
+@pytest.mark.django_db
+def test_rendered_config_with_region_secrets_is_not_cached(shared_config):
+    config, nodes, _child = shared_config
+    config.config_template += 'token = "${api_token}"\n'
+    config.save()
+    secret_variables = {"api_token": "region-secret-value"}
+
+    with patch.object(Sidecar, "get_cloud_region_envconfig", side_effect=lambda _node: dict(secret_variables)):
+        template = _pull(nodes[0], config)
+
+    assert 'token = "region-secret-value"' in template
+    cached_payloads = [cache.get(key.split(":", 2)[-1]) for key in cache._cache]
+    assert cached_payloads and "region-secret-value" not in repr(cached_payloads)
+
+
+@pytest.mark.django_db
+def test_child_config_change_produces_new_version(shared_config):
+    config, nodes, child = shared_config
+    assert 'interval = "10s"' in _pull(nodes[0], config)
+
+    child.env_config = {"interval": 30}
+    child.save()
+
+    assert 'interval = "30s"' in _pull(nodes[0], config)
+    assert render_cache_metrics.snapshot()["compiled"]["miss"] == 2
+
+
+@pytest.mark.django_db
+def test_node_variable_change_renders_again(shared_config):
+    config, nodes, _child = shared_config
+    _pull(nodes[0], config)
+
+    Node.objects.filter(id=nodes[0].id).update(name="renamed-host")
+
+    assert 'hostname = "renamed-host"' in _pull(Node.objects.get(id=nodes[0].id), config)
+    assert render_cache_metrics.snapshot()["compiled"]["hit"] == 1
+
+
+def test_concurrent_miss_waits_for_the_builder():
+    key = "collector_config_compiled_test_coalesce"
+    assert cache.add(f"{key}_lock", "1", 30)
+    threading.Timer(0.1, lambda: cache.set(key, {"template": "built elsewhere"}, 60)).start()
+
+    def builder():
+        raise AssertionError("coalesced request must not build")
+
+    assert get_or_build(COMPILED, key, builder) == {"template": "built elsewhere"}
+    assert render_cache_metrics.snapshot()["compiled"]["coalesced"] == 1
+
+
+def test_stale_build_lock_falls_back_to_local_build(monkeypatch):
+    monkeypatch.setattr(sidecar_render_cache, "RENDER_WAIT_SECONDS", 0.1)
+    key = "collector_config_compiled_test_stale_lock"
+    assert cache.add(f"{key}_lock", "1", 30)
+
+    assert get_or_build(COMPILED, key, lambda: {"template": "local"}) == {"template": "local"}
+    assert cache.get(key) == {"template": "local"}
+    assert render_cache_metrics.snapshot()["compiled"]["miss"] == 1
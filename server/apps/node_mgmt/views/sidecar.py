@@ -315,7 +315,7 @@ class OpenSidecarViewSet(OpenAPIViewSet):
 
         Caching:
             - 支持 ETag 缓存机制
-            - 即使返回 304，也会更新节点的 updated_at 和 status
+            - 即使返回 304，也会更新节点的 updated_at 和 status（开启心跳合并写时由定时任务批量落库）
 
         示例:
             PUT /node/sidecars/node-123
@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from apps.opspilot.services.wiki.embedding_service import cosine
+from apps.opspilot.services.wiki.vector_index import VectorIndex
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[int((len(ordered) - 1) * fraction)] if ordered else 0.0
+
+
+class Command(BaseCommand):
+    help = "Wiki 向量索引基准:对比逐行余弦(旧路径)、NumPy 精确检索与 IVF 近似检索的延迟和召回率(合成数据,不读写数据库)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200000, help="向量条数(模拟分块数)")
+        parser.add_argument("--dim", type=int, default=768, help="向量维度")
+        parser.add_argument("--clusters", type=int, default=500, help="合成数据的主题簇数")
+        parser.add_argument("--queries", type=int, default=50, help="查询次数")
+        parser.add_argument("--top-k", type=int, default=10, dest="top_k")
+        parser.add_argument("--nprobe", type=int, default=None, help="IVF 每次查询扫描的簇数(默认簇数的一半)")
+        parser.add_argument(
+            "--baseline-queries",
+            type=int,
+            default=3,
+            dest="baseline_queries",
+            help="逐行余弦基线的查询次数(纯 Python,较慢)",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rows, dim, top_k = options["rows"], options["dim"], options["top_k"]
+        rng = np.random.default_rng(options["seed"])
+        centers = rng.normal(size=(options["clusters"], dim)).astype(np.float32)
+        data = centers[rng.integers(0, len(centers), rows)] + 0.5 * rng.normal(size=(rows, dim)).astype(np.float32)
+        queries = (centers[rng.integers(0, len(centers), options["queries"])] + 0.5 * rng.normal(size=(options["queries"], dim))).tolist()
+        vectors = data.tolist()
+        source = [(i, i, vectors[i], None) for i in range(rows)]
+
+        started = time.perf_counter()
+        exact_index = VectorIndex.from_rows(source, ann_min_rows=rows + 1)
+        exact_build = time.perf_counter() - started
+        started = time.perf_counter()
+        ann_index = VectorIndex.from_rows(source, ann_min_rows=0, nprobe=options["nprobe"])
+        ann_build = time.perf_counter() - started
+
+        baseline_latencies = []
+        for query in queries[: options["baseline_queries"]]:
+            started = time.perf_counter()
+            scored = sorted(((cosine(query, vec), i) for i, vec in enumerate(vectors)), reverse=True)[:top_k]
+            baseline_latencies.append(time.perf_counter() - started)
+            exact_keys = [key for key, _, _ in exact_index.search(query, top_k=top_k)]
+            if [i for _, i in scored] != exact_keys:
+                self.stderr.write("警告:NumPy 精确检索与逐行余弦结果不一致")
+
+        exact_latencies, ann_latencies, recalls = [], [], []
+        ann_index.search(queries[0], top_k=top_k)  # 预热倒排表
+        for query in queries:
+            started = time.perf_counter()
+            exact = exact_index.search(query, top_k=top_k)
+            exact_latencies.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            approx = ann_index.search(query, top_k=top_k)
+            ann_latencies.append(time.perf_counter() - started)
+            expected = {key for key, _, _ in exact}
+            recalls.append(len(expected & {key for key, _, _ in approx}) / max(1, len(expected)))
+
+        self.stdout.write(f"rows={rows} dim={dim} top_k={top_k} 内存={exact_index.nbytes / 1024 / 1024:.1f}MB")
+        self.stdout.write(f"构建耗时: exact={exact_build:.2f}s ivf={ann_build:.2f}s")
+        for name, latencies in (
+            ("逐行余弦(旧)", baseline_latencies),
+            ("NumPy 精确", exact_latencies),
+            (f"IVF nprobe={ann_index._probe_count()}", ann_latencies),
+        ):
+            self.stdout.write(
+                f"{name:<16} p50={_percentile(latencies, 0.5) * 1000:9.2f}ms p99={_percentile(latencies, 0.99) * 1000:9.2f}ms n={len(latencies)}"
+            )
+        self.stdout.write(f"IVF recall@{top_k}: {sum(recalls) / len(recalls):.3f}")
@@ -0,0 +1,47 @@
+# Generated manually for the generation-owned inverted search index.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("opspilot", "0073_skillchannel_unique_skill_type_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WikiGenerationSearchTerm",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("term", "Term"), ("exact", "Exact Title Or Alias"), ("stats", "Statistics")],
+                        default="term",
+                        max_length=10,
+                    ),
+                ),
+                ("term", models.CharField(blank=True, default="", max_length=255)),
+                ("doc_freq", models.IntegerField(default=0)),
+                ("doc_count", models.IntegerField(default=0)),
+                ("avg_doc_len", models.FloatField(default=0.0)),
+                ("postings", models.JSONField(default=list)),
+                (
+                    "generation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="search_terms",
+                        to="opspilot.wikigeneration",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "opspilot_wiki_generation_search_term",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="wikigenerationsearchterm",
+            constraint=models.UniqueConstraint(fields=("generation", "kind", "term"), name="uniq_wiki_gen_search_term"),
+        ),
+    ]
@@ -468,6 +468,38 @@ class WikiGenerationIndexEntry(TimeInfo):
         ]
 
 
+class WikiGenerationSearchTerm(models.Model):
+    """Generation-owned inverted index row: one term with its postings and BM25 statistics."""
+
+    KIND_CHOICES = (
+        ("term", "Term"),
+        ("exact", "Exact Title Or Alias"),
+        ("stats", "Statistics"),
+    )
+
+    generation = models.ForeignKey(
+        WikiGeneration,
+        on_delete=models.PROTECT,
+        related_name="search_terms",
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default="term")
+    term = models.CharField(max_length=255, blank=True, default="")
+    doc_freq = models.IntegerField(default=0)
+    doc_count = models.IntegerField(default=0)
+    avg_doc_len = models.FloatField(default=0.0)
+    # [[entry_id, page_id, directory_id, weighted_tf, doc_len], ...]
+    postings = models.JSONField(default=list)
+
+    class Meta:
+        db_table = "opspilot_wiki_generation_search_term"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["generation", "kind", "term"],
+                name="uniq_wiki_gen_search_term",
+            )
+        ]
+
+
 class WikiGenerationOverview(TimeInfo):
     """Deterministic navigation overview plus optional semantic enhancement."""
 
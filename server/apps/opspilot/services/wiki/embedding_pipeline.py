@@ -0,0 +1,149 @@
+"""Wiki 嵌入流水线:内容哈希缓存 + 按 token 预算分批 + 有界并发,并统计吞吐。
+
+缓存键为 (provider, model, 文本 sha256),未变化的页面/分块重建索引时直接命中,不再调用嵌入服务;
+未命中的文本去重后按 token 预算切批,多批之间用线程池并发请求(不访问数据库,线程安全)。
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.opspilot.services.wiki.wiki_budget_service import estimate_tokens
+
+logger = logging.getLogger("opspilot")
+
+_CACHE_KEY = "opspilot:wiki_embedding:v1:{provider_id}:{model}:{digest}"
+_local = threading.local()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+@dataclass
+class EmbeddingStats:
+    requests: int = 0
+    texts: int = 0
+    cache_hits: int = 0
+    embedded_texts: int = 0
+    embedded_tokens: int = 0
+    seconds: float = 0.0
+
+    def merge(self, other):
+        self.requests += other.requests
+        self.texts += other.texts
+        self.cache_hits += other.cache_hits
+        self.embedded_texts += other.embedded_texts
+        self.embedded_tokens += other.embedded_tokens
+        self.seconds += other.seconds
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "cache_hits": self.cache_hits,
+            "cache_hit_ratio": round(self.cache_hits / self.texts, 4) if self.texts else 0.0,
+            "embedded_texts": self.embedded_texts,
+            "embedded_tokens": self.embedded_tokens,
+            "seconds": round(self.seconds, 3),
+            "texts_per_second": round(self.texts / self.seconds, 2) if self.seconds else 0.0,
+            "tokens_per_second": round(self.embedded_tokens / self.seconds, 2) if self.seconds else 0.0,
+        }
+
+
+@contextmanager
+def collect_embedding_stats():
+    """收集当前线程内所有嵌入调用的统计;可嵌套,外层同样累计。"""
+    stats = EmbeddingStats()
+    collectors = getattr(_local, "collectors", None)
+    if collectors is None:
+        collectors = _local.collectors = []
+    collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        collectors.remove(stats)
+
+
+def _record(stats):
+    for collector in getattr(_local, "collectors", None) or ():
+        collector.merge(stats)
+
+
+def cache_key(embed_provider, text):
+    model = str(getattr(embed_provider, "model_name", "") or "")
+    return _CACHE_KEY.format(
+        provider_id=getattr(embed_provider, "id", None) or "none",
+        model=hashlib.md5(model.encode("utf-8")).hexdigest()[:12],
+        digest=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+    )
+
+
+def batch_by_tokens(texts, *, max_tokens=None, max_items=None):
+    """按 token 预算与条数上限把文本切成若干批;单条超预算的文本独占一批。"""
+    max_tokens = max_tokens or _setting("WIKI_EMBEDDING_BATCH_TOKENS", 8000)
+    max_items = max_items or _setting("WIKI_EMBEDDING_BATCH_SIZE", 64)
+    batches, current, used = [], [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and (used + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def embed_with_cache(texts, embed_provider, request_batch, *, max_workers=None):
+    """带缓存的批量嵌入。request_batch(list[str]) -> list[vector] 负责单批请求,异常向上抛出。
+
+    返回与 texts 一一对应的向量列表;任一批失败即整体失败(与逐次调用的语义一致)。
+    """
+    texts = [str(text) for text in texts]
+    stats = EmbeddingStats(texts=len(texts))
+    started = time.perf_counter()
+    keys = {text: cache_key(embed_provider, text) for text in texts}
+    found = cache.get_many(list(set(keys.values())))
+    vectors = {text: found[key] for text, key in keys.items() if key in found}
+    missing = [text for text in keys if text not in vectors]
+    stats.cache_hits = sum(1 for text in texts if text in vectors)
+
+    if missing:
+        batches = batch_by_tokens(missing)
+        workers = min(len(batches), max_workers or _setting("WIKI_EMBEDDING_CONCURRENCY", 4))
+
+        def _request(batch):
+            result = request_batch(batch)
+            if len(result) != len(batch):
+                raise ValueError(f"嵌入服务返回数量不一致: expected={len(batch)} got={len(result)}")
+            return result
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wiki-embed") as executor:
+                results = list(executor.map(_request, batches))
+        else:
+            results = [_request(batch) for batch in batches]
+        fresh = {}
+        for batch, result in zip(batches, results):
+            for text, vector in zip(batch, result):
+                vectors[text] = vector
+                if vector:
+                    fresh[keys[text]] = vector
+        if fresh:
+            cache.set_many(fresh, timeout=_setting("WIKI_EMBEDDING_CACHE_TIMEOUT", 7 * 24 * 3600))
+        stats.requests = len(batches)
+        stats.embedded_texts = len(missing)
+        stats.embedded_tokens = sum(estimate_tokens(text) for text in missing)
+
+    stats.seconds = time.perf_counter() - started
+    _record(stats)
+    return [vectors[text] for text in texts]
@@ -1,24 +1,33 @@
 """嵌入与混合检索基础(P6,无需 pgvector)。
 
 策略:**检索后重排(retrieve-then-rerank)**——关键词召回候选 → 对候选做向量相似度重排 →
-RRF 融合关键词序与语义序。只需对小候选集调用嵌入服务,无需存储向量或 pgvector 扩展;
-后续可用 pgvector 索引替换 in-Python 余弦以扩展规模。
+RRF 融合关键词序与语义序。只需对小候选集调用嵌入服务,无需存储向量或 pgvector 扩展。
+已存储的页面/分块嵌入由 vector_index 按知识库加载为 NumPy 矩阵(大库附加 IVF),
+写入路径按页增量更新索引并记录变更页面,其他进程只重新加载变更页面,查询不再逐行读库算余弦。
 
-嵌入调用走 EmbedProvider(OpenAI 兼容);cosine / rrf_fuse 为纯函数,便于测试。
+嵌入调用走 EmbedProvider(OpenAI 兼容),经 embedding_pipeline 做内容哈希缓存、分批与并发;
+批量重建按页面分组一次性嵌入。cosine / rrf_fuse 为纯函数,便于测试。
 """
 
 import logging
 import math
 import re
+import threading
 
+from django.conf import settings
 from django.db import transaction
 from openai import OpenAI
 
 from apps.opspilot.models import KnowledgePage, PageChunk, PageVersion
+from apps.opspilot.services.wiki import vector_index
+from apps.opspilot.services.wiki.embedding_pipeline import embed_with_cache
+from apps.opspilot.services.wiki.vector_index import CHUNK_INDEX, PAGE_INDEX
 
 logger = logging.getLogger("opspilot")
 
 _HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+_clients = {}
+_clients_lock = threading.Lock()
 
 
 def chunk_markdown(body, max_chars=800):
@@ -89,13 +98,82 @@ def index_version(version, embed_provider, embed_fn=None):
         return False
     embed = embed_fn or (lambda texts: embed_texts(texts, embed_provider))
     vecs = embed([body])
-    if not vecs or not vecs[0]:
+    return _store_version_embedding(version, vecs[0] if vecs else None)
+
+
+def _store_version_embedding(version, vector):
+    if not vector:
         return False
-    version.embedding = vecs[0]
+    version.embedding = vector
     version.save(update_fields=["embedding"])
+    _sync_page_vector(version)
     return True
 
 
+def _page_groups(knowledge_base):
+    """按组遍历知识库有效页面,每组的文本合并为一次流水线嵌入调用(分批/并发在流水线内完成)。"""
+    pages = KnowledgePage.objects.filter(knowledge_base=knowledge_base, status="active").select_related("current_version").order_by("id")
+    size = getattr(settings, "WIKI_EMBEDDING_REINDEX_PAGE_GROUP", 100)
+    group = []
+    for page in pages.iterator(chunk_size=size):
+        group.append(page)
+        if len(group) >= size:
+            yield group
+            group = []
+    if group:
+        yield group
+
+
+def _sync_page_vector(version):
+    """当前版本的嵌入变化后,增量更新页面向量索引(事务提交后执行)。"""
+    page = version.page
+    if page.status != "active" or page.current_version_id != version.id:
+        return
+
+    def _apply(index):
+        return index.replace_page(page.id, [(page.id, version.embedding, version.id)])
+
+    transaction.on_commit(lambda: vector_index.registry.update(page.knowledge_base_id, PAGE_INDEX, [page.id], _apply))
+
+
+def _page_index_rows(knowledge_base, page_ids=None):
+    """页面向量索引数据源:有效页面当前版本的嵌入,meta 为版本 id(用于校验索引是否仍对应当前版本)。
+
+    page_ids 非空时只加载这些页面(按变更日志补齐索引)。
+    """
+    rows = KnowledgePage.objects.filter(knowledge_base=knowledge_base, status="active", current_version__isnull=False)
+    if page_ids is not None:
+        rows = rows.filter(id__in=page_ids)
+    rows = rows.values_list("id", "current_version_id", "current_version__embedding")
+    return [(page_id, page_id, embedding, version_id) for page_id, version_id, embedding in rows.iterator(chunk_size=2000)]
+
+
+def _chunk_index_rows(knowledge_base, page_ids=None):
+    rows = PageChunk.objects.filter(page__knowledge_base=knowledge_base, page__status="active")
+    if page_ids is not None:
+        rows = rows.filter(page_id__in=page_ids)
+    rows = rows.values_list("id", "page_id", "embedding")
+    return [(chunk_id, page_id, embedding, None) for chunk_id, page_id, embedding in rows.iterator(chunk_size=2000)]
+
+
+def page_vector_index(knowledge_base):
+    return vector_index.registry.get(
+        knowledge_base.id,
+        PAGE_INDEX,
+        lambda: _page_index_rows(knowledge_base),
+        page_loader=lambda page_ids: _page_index_rows(knowledge_base, page_ids),
+    )
+
+
+def chunk_vector_index(knowledge_base):
+    return vector_index.registry.get(
+        knowledge_base.id,
+        CHUNK_INDEX,
+        lambda: _chunk_index_rows(knowledge_base),
+        page_loader=lambda page_ids: _chunk_index_rows(knowledge_base, page_ids),
+    )
+
+
 def clear_page_vectors(page_ids):
     """Clear page-level and chunk-level embeddings for pages that left active retrieval."""
     ids = list(page_ids or [])
@@ -103,17 +181,31 @@ def clear_page_vectors(page_ids):
         return 0
     PageVersion.objects.filter(page_id__in=ids).update(embedding=[])
     PageChunk.objects.filter(page_id__in=ids).update(embedding=[])
+    kb_pages = {}
+    for page_id, kb_id in KnowledgePage.objects.filter(id__in=ids).values_list("id", "knowledge_base_id"):
+        kb_pages.setdefault(kb_id, []).append(page_id)
+
+    def _remove():
+        for kb_id, kb_page_ids in kb_pages.items():
+            for kind in (PAGE_INDEX, CHUNK_INDEX):
+                vector_index.registry.update(kb_id, kind, kb_page_ids, lambda index, removed=kb_page_ids: index.remove_pages(removed))
+
+    transaction.on_commit(_remove)
     return len(ids)
 
 
 def reindex_knowledge_base(knowledge_base, embed_fn=None):
     """为知识库所有有效页面的当前版本(重新)生成语义索引,返回成功建索引的页面数。"""
+    embed = embed_fn or (lambda texts: embed_texts(texts, knowledge_base.embed_provider))
     count = 0
-    pages = KnowledgePage.objects.filter(knowledge_base=knowledge_base, status="active").select_related("current_version")
-    for page in pages:
-        cv = page.current_version
-        if cv and index_version(cv, knowledge_base.embed_provider, embed_fn=embed_fn):
-            count += 1
+    for group in _page_groups(knowledge_base):
+        versions = [page.current_version for page in group if page.current_version and (page.current_version.body or "").strip()]
+        if not versions:
+            continue
+        vecs = embed([version.body.strip() for version in versions])
+        if not vecs or len(vecs) != len(versions):
+            continue
+        count += sum(1 for version, vec in zip(versions, vecs) if _store_version_embedding(version, vec))
     return count
 
 
@@ -126,29 +218,28 @@ def semantic_search(knowledge_base, query, top_k=5, embed_fn=None):
     qvecs = embed([query])
     if not qvecs or not qvecs[0]:
         return []
-    qv = qvecs[0]
+    hits = page_vector_index(knowledge_base).search(qvecs[0], top_k)
+    if not hits:
+        return []
+    pages = KnowledgePage.objects.filter(id__in=[page_id for page_id, _, _ in hits], status="active").select_related("current_version").in_bulk()
     results = []
-    pages = KnowledgePage.objects.filter(knowledge_base=knowledge_base, status="active").select_related("current_version")
-    for page in pages:
-        cv = page.current_version
-        vec = getattr(cv, "embedding", None) if cv else None
-        if not vec:
+    for page_id, score, version_id in hits:
+        page = pages.get(page_id)
+        # 页面已下线或当前版本已变(新版本尚未建索引)时跳过,与逐页读取当前版本嵌入的语义一致
+        if page is None or page.current_version_id != version_id:
             continue
-        score = cosine(qv, vec)
-        if score > 0:
-            body = cv.body or ""
-            results.append(
-                {
-                    "kind": "page",
-                    "id": page.id,
-                    "title": page.title,
-                    "snippet": body[:300],
-                    "score": score,
-                    "explanation": {"matched_by": ["vector"], "vector_score": score},
-                }
-            )
-    results.sort(key=lambda r: r["score"], reverse=True)
-    return results[:top_k]
+        body = page.current_version.body or ""
+        results.append(
+            {
+                "kind": "page",
+                "id": page.id,
+                "title": page.title,
+                "snippet": body[:300],
+                "score": score,
+                "explanation": {"matched_by": ["vector"], "vector_score": score},
+            }
+        )
+    return results
 
 
 def reindex_page_chunks(page, embed_provider, embed_fn=None):
@@ -160,14 +251,18 @@ def reindex_page_chunks(page, embed_provider, embed_fn=None):
     if not chunks:
         with transaction.atomic():
             PageChunk.objects.filter(page=page).delete()
+            transaction.on_commit(lambda: _sync_page_chunks(page, []))
         return 0
     embed = embed_fn or (lambda texts: embed_texts(texts, embed_provider))
-    vecs = embed([c["text"] for c in chunks])
+    return _replace_page_chunks(page, cv, chunks, embed([c["text"] for c in chunks]))
+
+
+def _replace_page_chunks(page, cv, chunks, vecs):
     if not vecs or len(vecs) != len(chunks):
         return 0
     with transaction.atomic():
         PageChunk.objects.filter(page=page).delete()
-        PageChunk.objects.bulk_create(
+        created = PageChunk.objects.bulk_create(
             [
                 PageChunk(
                     page=page,
@@ -180,61 +275,129 @@ def reindex_page_chunks(page, embed_provider, embed_fn=None):
                 for i, c in enumerate(chunks)
             ]
         )
+        transaction.on_commit(lambda: _sync_page_chunks(page, created))
     return len(chunks)
 
 
+def _sync_page_chunks(page, chunks):
+    """用新建的分块替换分块向量索引中该页的行;数据库未回填主键时整体失效,下次查询重建。"""
+    if any(chunk.pk is None for chunk in chunks):
+        vector_index.registry.invalidate(page.knowledge_base_id, CHUNK_INDEX)
+        return
+
+    def _apply(index):
+        if page.status == "active":
+            return index.replace_page(page.id, [(chunk.pk, chunk.embedding, None) for chunk in chunks])
+        return index.remove_pages([page.id])
+
+    vector_index.registry.update(page.knowledge_base_id, CHUNK_INDEX, [page.id], _apply)
+
+
 def reindex_chunks(knowledge_base, embed_fn=None):
-    """为知识库所有有效页面重建分块索引,返回 (页面数, 块数)。"""
-    pages = KnowledgePage.objects.filter(knowledge_base=knowledge_base, status="active").select_related("current_version")
+    """为知识库所有有效页面重建分块索引,返回 (页面数, 块数)。同组页面的分块合并嵌入。"""
+    embed = embed_fn or (lambda texts: embed_texts(texts, knowledge_base.embed_provider))
     n_pages = n_chunks = 0
-    for page in pages:
-        c = reindex_page_chunks(page, knowledge_base.embed_provider, embed_fn=embed_fn)
-        if c:
-            n_pages += 1
-            n_chunks += c
+    for group in _page_groups(knowledge_base):
+        planned = []
+        for page in group:
+            if not page.current_version:
+                continue
+            chunks = chunk_markdown(page.current_version.body or "")
+            if chunks:
+                planned.append((page, chunks))
+            else:
+                reindex_page_chunks(page, knowledge_base.embed_provider, embed_fn=embed)
+        texts = [c["text"] for _page, chunks in planned for c in chunks]
+        vecs = embed(texts) if texts else []
+        if not vecs or len(vecs) != len(texts):
+            continue
+        offset = 0
+        for page, chunks in planned:
+            c = _replace_page_chunks(page, page.current_version, chunks, vecs[offset : offset + len(chunks)])
+            offset += len(chunks)
+            if c:
+                n_pages += 1
+                n_chunks += c
     return n_pages, n_chunks
 
 
+def prefetch_embeddings(pages, embed_provider):
+    """预热嵌入缓存:把一组页面的正文与分块文本一次性交给流水线(分批/并发)。
+
+    之后逐页 index_version / reindex_page_chunks 直接命中缓存;失败静默,逐页调用会各自兜底。
+    """
+    texts = []
+    for page in pages:
+        version = page.current_version if page.current_version_id else None
+        body = (getattr(version, "body", "") or "").strip()
+        if not body:
+            continue
+        texts.append(body)
+        texts.extend(c["text"] for c in chunk_markdown(version.body or ""))
+    if texts and embed_provider is not None:
+        embed_texts(texts, embed_provider)
+    return len(texts)
+
+
 def chunk_semantic_search(knowledge_base, query, top_k=5, embed_fn=None):
     """块级语义检索:query 嵌入 vs 已存块嵌入余弦,返回 [{page_id,title,heading_path,snippet,score}]。"""
     embed = embed_fn or (lambda texts: embed_texts(texts, knowledge_base.embed_provider))
     qvecs = embed([query])
     if not qvecs or not qvecs[0]:
         return []
-    qv = qvecs[0]
+    hits = chunk_vector_index(knowledge_base).search(qvecs[0], top_k)
+    if not hits:
+        return []
+    chunks = PageChunk.objects.filter(id__in=[chunk_id for chunk_id, _, _ in hits], page__status="active").select_related("page").in_bulk()
     results = []
-    chunks = PageChunk.objects.filter(page__knowledge_base=knowledge_base, page__status="active").select_related("page")
-    for ch in chunks:
-        if not ch.embedding:
+    for chunk_id, score, _ in hits:
+        ch = chunks.get(chunk_id)
+        if ch is None:
             continue
-        score = cosine(qv, ch.embedding)
-        if score > 0:
-            results.append(
-                {
-                    "page_id": ch.page_id,
-                    "title": ch.page.title,
-                    "heading_path": ch.heading_path,
-                    "snippet": (ch.text or "")[:300],
-                    "score": score,
-                    "explanation": {
-                        "matched_by": ["chunk_vector"],
-                        "chunk_index": ch.idx,
-                        "vector_score": score,
-                    },
-                }
-            )
-    results.sort(key=lambda r: r["score"], reverse=True)
-    return results[:top_k]
+        results.append(
+            {
+                "page_id": ch.page_id,
+                "title": ch.page.title,
+                "heading_path": ch.heading_path,
+                "snippet": (ch.text or "")[:300],
+                "score": score,
+                "explanation": {
+                    "matched_by": ["chunk_vector"],
+                    "chunk_index": ch.idx,
+                    "vector_score": score,
+                },
+            }
+        )
+    return results
+
+
+def _client(embed_provider):
+    """按 (客户端工厂, base_url, api_key) 复用 OpenAI 客户端及其连接池,避免每次调用都重新握手。"""
+    key = (OpenAI, embed_provider.base_url, embed_provider.api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            if len(_clients) >= 32:
+                _clients.clear()
+            client = _clients[key] = OpenAI(base_url=embed_provider.base_url, api_key=embed_provider.api_key)
+        return client
 
 
 def embed_texts(texts, embed_provider):
-    """用 EmbedProvider(OpenAI 兼容)批量生成嵌入向量;失败返回 []。"""
+    """用 EmbedProvider(OpenAI 兼容)批量生成嵌入向量;失败返回 []。
+
+    命中内容哈希缓存的文本不再请求;其余按 token 预算分批、有界并发请求。
+    """
     if not texts or embed_provider is None:
         return []
     try:
-        client = OpenAI(base_url=embed_provider.base_url, api_key=embed_provider.api_key)
-        resp = client.embeddings.create(model=embed_provider.model_name, input=list(texts))
-        return [item.embedding for item in resp.data]
+        client = _client(embed_provider)
+
+        def _request(batch):
+            resp = client.embeddings.create(model=embed_provider.model_name, input=list(batch))
+            return [item.embedding for item in resp.data]
+
+        return embed_with_cache(texts, embed_provider, _request)
     except Exception:
         logger.exception("wiki 嵌入生成失败 provider=%s", getattr(embed_provider, "id", None))
         return []
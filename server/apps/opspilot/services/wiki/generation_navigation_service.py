@@ -10,6 +10,7 @@ from dataclasses import dataclass
 from django.db import transaction
 
 from apps.opspilot.models import WikiDirectory, WikiGeneration, WikiGenerationIndexEntry, WikiGenerationOverview
+from apps.opspilot.services.wiki.generation_search_index import build_generation_search_index
 from apps.opspilot.services.wiki.title_service import title_alias_terms_for_enrichment, title_identity_key
 from apps.opspilot.services.wiki.wiki_budget_service import WikiBudgetExceeded, estimate_tokens
 
@@ -381,6 +382,7 @@ def rebuild_generation_navigation(generation_id):
     if index_rows:
         WikiGenerationIndexEntry.objects.bulk_create(index_rows, batch_size=500)
     entries = list(generation.index_entries.select_related("page", "directory").order_by("directory_key", "normalized_title", "page_id"))
+    build_generation_search_index(generation.pk, entries)
 
     directories = list(
         WikiDirectory.objects.filter(
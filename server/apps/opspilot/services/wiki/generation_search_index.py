@@ -0,0 +1,215 @@
+"""Generation 级倒排索引:term → postings(含 BM25 统计),发布时构建、检索时只读命中词项。
+
+Generation 一经发布即不可变,因此索引随导航产物一起在 preparing/ready 阶段构建并持久化;
+检索代价只与查询词项的 postings 数量相关,而不是与 generation 的页面总数相关。
+
+postings 按词项相等匹配;为保留旧版子串匹配的常见命中,文档侧额外索引中英文交界/下划线拆出的子词
+(MySQL数据库 → mysql、redis_cluster → redis)和拉丁词的前缀(configuration → config)。
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Q
+
+from apps.opspilot.models import WikiGenerationIndexEntry, WikiGenerationSearchTerm
+from apps.opspilot.services.wiki.title_service import title_identity_key
+
+_SPLIT_RE = re.compile(r"[\s,，。;；、:：!！?？]+")
+_SEGMENT_RE = re.compile(r"[一-鿿]+|[^\W_一-鿿]+")
+_MAX_TERM_LENGTH = 255
+# 拉丁词前缀:最短 3 个字符,超长的词(哈希、编码串)不展开
+_MIN_PREFIX_LENGTH = 3
+_MAX_PREFIX_WORD_LENGTH = 32
+
+# 与旧版逐条扫描打分保持一致的字段权重
+FIELD_WEIGHTS = (
+    ("title", 12),
+    ("aliases", 10),
+    ("tags", 5),
+    ("keywords", 5),
+    ("entities", 4),
+    ("headings", 3),
+    ("summary", 2),
+    ("page_type", 1),
+)
+EXACT_BONUS = 100
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    entry_id: int
+    page_id: int
+    score: float
+    field_score: int
+    exact: bool
+
+
+def _has_cjk(text):
+    return any("一" <= ch <= "鿿" for ch in text)
+
+
+def query_terms(text):
+    """查询侧分词:空白/标点切分;CJK 长词补充二元组(bigram),以适配中文无空格查询。"""
+    terms = []
+    for tok in _SPLIT_RE.split((text or "").strip().lower()):
+        tok = tok.strip()
+        if not tok:
+            continue
+        terms.append(tok)
+        if _has_cjk(tok) and len(tok) > 2:
+            terms.extend(tok[i : i + 2] for i in range(len(tok) - 1))
+    return terms
+
+
+def document_terms(text):
+    """文档侧分词:在查询侧规则之上补充子词——按非单词字符、下划线与中英文交界拆分
+    (nginx-proxy → nginx/proxy,redis_cluster → redis/cluster,MySQL数据库 → mysql/数据库)。"""
+    terms = query_terms(text)
+    for tok in _SPLIT_RE.split((text or "").strip().lower()):
+        parts = _SEGMENT_RE.findall(tok)
+        if len(parts) > 1 or (parts and parts[0] != tok):
+            terms.extend(parts)
+    return terms
+
+
+def prefix_terms(terms):
+    """拉丁词的前缀词项(configuration → con/conf/.../configuratio),对应旧版子串匹配中的词首命中。"""
+    prefixes = []
+    for term in terms:
+        if len(term) <= _MAX_PREFIX_WORD_LENGTH and term.isascii() and term.isalnum():
+            prefixes.extend(term[:length] for length in range(_MIN_PREFIX_LENGTH, len(term)))
+    return prefixes
+
+
+def _field_text(entry, field):
+    value = getattr(entry, field)
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value)
+    return str(value or "")
+
+
+def _identity_keys(entry):
+    keys = {entry.normalized_title, *(title_identity_key(alias) for alias in (entry.aliases or []))}
+    return {key for key in keys if key and len(key) <= _MAX_TERM_LENGTH}
+
+
+def build_generation_search_index(generation_id, entries=None):
+    """(重)建 generation 的倒排索引;entries 缺省时从 WikiGenerationIndexEntry 读取。返回词项数。"""
+    if entries is None:
+        entries = WikiGenerationIndexEntry.objects.filter(generation_id=generation_id).order_by("id")
+    postings = defaultdict(list)
+    exact_postings = defaultdict(list)
+    doc_count = 0
+    total_len = 0
+    for entry in entries:
+        weighted = Counter()
+        doc_len = 0
+        for field, weight in FIELD_WEIGHTS:
+            terms = document_terms(_field_text(entry, field))
+            # 前缀只用于命中,不计入文档长度,避免长英文词被 BM25 长度归一化压低
+            doc_len += weight * len(terms)
+            for term in terms + prefix_terms(terms):
+                weighted[term] += weight
+        doc_count += 1
+        total_len += doc_len
+        for term, tf in weighted.items():
+            if len(term) <= _MAX_TERM_LENGTH:
+                postings[term].append([entry.pk, entry.page_id, entry.directory_id, tf, doc_len])
+        for key in _identity_keys(entry):
+            exact_postings[key].append([entry.pk, entry.page_id, entry.directory_id, 0, doc_len])
+
+    rows = [
+        WikiGenerationSearchTerm(
+            generation_id=generation_id,
+            kind="stats",
+            term="",
+            doc_count=doc_count,
+            avg_doc_len=total_len / doc_count if doc_count else 0.0,
+        )
+    ]
+    for kind, source in (("term", postings), ("exact", exact_postings)):
+        rows.extend(
+            WikiGenerationSearchTerm(generation_id=generation_id, kind=kind, term=term, doc_freq=len(items), postings=items)
+            for term, items in source.items()
+        )
+    with transaction.atomic():
+        WikiGenerationSearchTerm.objects.filter(generation_id=generation_id).delete()
+        # 并发懒构建时后到者的行与先到者冲突,忽略即可:同一 generation 的两份索引内容一致
+        WikiGenerationSearchTerm.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+    return len(rows) - 1
+
+
+def ensure_generation_search_index(generation_id):
+    """发布前兜底:generation 尚无倒排索引(统计行缺失)时补建。返回是否新建。"""
+    if WikiGenerationSearchTerm.objects.filter(generation_id=generation_id, kind="stats").exists():
+        return False
+    build_generation_search_index(generation_id)
+    return True
+
+
+def search_generation_index(generation_id, terms, *, query, directory_ids=None, top_k=5):
+    """BM25F 检索,返回按 (分数, 精确命中, page_id) 排序的前 top_k 个 SearchHit;索引不存在返回 None。"""
+    terms = sorted({term for term in terms if term and len(term) <= _MAX_TERM_LENGTH})
+    identity = title_identity_key(query)
+    condition = Q(kind="stats")
+    if terms:
+        condition |= Q(kind="term", term__in=terms)
+    if identity and len(identity) <= _MAX_TERM_LENGTH:
+        condition |= Q(kind="exact", term=identity)
+    rows = list(
+        WikiGenerationSearchTerm.objects.filter(condition, generation_id=generation_id).values_list(
+            "kind", "doc_freq", "doc_count", "avg_doc_len", "postings"
+        )
+    )
+    stats = next((row for row in rows if row[0] == "stats"), None)
+    if stats is None:
+        return None
+    doc_count, avg_doc_len = stats[2], stats[3] or 1.0
+    allowed = set(directory_ids) if directory_ids is not None else None
+
+    scores = defaultdict(float)
+    field_scores = defaultdict(int)
+    page_ids = {}
+    exact = set()
+    for kind, doc_freq, _doc_count, _avg, items in rows:
+        if kind == "stats":
+            continue
+        idf = math.log(1 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+        for entry_id, page_id, directory_id, tf, doc_len in items:
+            if allowed is not None and directory_id not in allowed:
+                continue
+            page_ids[entry_id] = page_id
+            if kind == "exact":
+                exact.add(entry_id)
+                continue
+            norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_doc_len)
+            scores[entry_id] += idf * tf * (BM25_K1 + 1) / norm
+            field_scores[entry_id] += tf
+    for entry_id in exact:
+        scores[entry_id] += EXACT_BONUS
+        field_scores[entry_id] += EXACT_BONUS
+
+    selected = heapq.nsmallest(
+        int(top_k),
+        (entry_id for entry_id, score in scores.items() if score > 0),
+        key=lambda entry_id: (-scores[entry_id], entry_id not in exact, page_ids[entry_id]),
+    )
+    return [
+        SearchHit(
+            entry_id=entry_id,
+            page_id=page_ids[entry_id],
+            score=round(scores[entry_id], 6),
+            field_score=field_scores[entry_id],
+            exact=entry_id in exact,
+        )
+        for entry_id in selected
+    ]
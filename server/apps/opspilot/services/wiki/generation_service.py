@@ -24,6 +24,7 @@ from apps.opspilot.models import (
 )
 from apps.opspilot.services.wiki.generation_consistency_contract import ActivationFacts, ActivationOutcome, decide_activation
 from apps.opspilot.services.wiki.generation_navigation_service import navigation_validation_issues, rebuild_generation_navigation
+from apps.opspilot.services.wiki.generation_search_index import ensure_generation_search_index
 from apps.opspilot.services.wiki.title_service import title_identity_key
 
 ACTIVE_GENERATION_PAGE_STATUS = "active"
@@ -1013,6 +1014,7 @@ def activate_generation(
             knowledge_base=locked_kb,
             status="active",
         ).update(status="superseded")
+    ensure_generation_search_index(candidate.pk)
     candidate.status = "active"
     candidate.save(update_fields=["status", "updated_at"])
     locked_kb.active_generation = candidate
@@ -1,11 +1,17 @@
 """Wiki 索引重建记录服务。
 
 页面级、资料级重建都走同一套阶段统计和 BuildRecord 记录格式,避免前端诊断口径分叉。
+嵌入吞吐(请求数、缓存命中率、文本/token 每秒)一并记入 maintenance["embedding"]。
 """
 
+import logging
+
 from apps.opspilot.models import BuildRecord
+from apps.opspilot.services.wiki.embedding_pipeline import collect_embedding_stats
 from apps.opspilot.services.wiki.maintenance_errors import stage_failed
 
+logger = logging.getLogger("opspilot")
+
 
 def _stage_success(count=0):
     return {"status": "success", "count": count}
@@ -29,8 +35,12 @@ def rebuild_page_indexes(
     inputs=None,
     index_fn,
     chunk_index_fn,
+    prefetch_fn=None,
 ):
-    """重建一组页面的页面级与 chunk 级索引,返回落库后的 BuildRecord。"""
+    """重建一组页面的页面级与 chunk 级索引,返回落库后的 BuildRecord。
+
+    prefetch_fn(pages, embed_provider) 可选:先把全部文本分批/并发嵌入进缓存,逐页索引时直接命中。
+    """
     page_list = list(pages or [])
     affected_page_ids = [page.id for page in page_list]
     build = BuildRecord.objects.create(
@@ -48,21 +58,27 @@ def rebuild_page_indexes(
     indexed_chunks = 0
     page_errors = []
     chunk_errors = []
-    for page in page_list:
-        if not page.current_version_id:
-            page_errors.append(f"{page.title}: 无当前版本")
-            chunk_errors.append(f"{page.title}: 无当前版本")
-            continue
-        if index_fn(page.current_version, knowledge_base.embed_provider):
-            indexed_pages += 1
-        else:
-            page_errors.append(f"{page.title}: 页面索引未生成")
-
-        chunk_count = chunk_index_fn(page, knowledge_base.embed_provider)
-        if chunk_count:
-            indexed_chunks += chunk_count
-        else:
-            chunk_errors.append(f"{page.title}: 分块索引未生成")
+    with collect_embedding_stats() as embedding_stats:
+        if prefetch_fn is not None and page_list:
+            try:
+                prefetch_fn(page_list, knowledge_base.embed_provider)
+            except Exception:
+                logger.exception("wiki 索引重建预热嵌入失败 kb=%s build=%s", knowledge_base.id, build.id)
+        for page in page_list:
+            if not page.current_version_id:
+                page_errors.append(f"{page.title}: 无当前版本")
+                chunk_errors.append(f"{page.title}: 无当前版本")
+                continue
+            if index_fn(page.current_version, knowledge_base.embed_provider):
+                indexed_pages += 1
+            else:
+                page_errors.append(f"{page.title}: 页面索引未生成")
+
+            chunk_count = chunk_index_fn(page, knowledge_base.embed_provider)
+            if chunk_count:
+                indexed_chunks += chunk_count
+            else:
+                chunk_errors.append(f"{page.title}: 分块索引未生成")
 
     stages = {
         "page_embedding": _stage_failed("; ".join(page_errors)) if page_errors else _stage_success(indexed_pages),
@@ -76,7 +92,16 @@ def rebuild_page_indexes(
         "stages": stages,
         "indexed_pages": indexed_pages,
         "indexed_chunks": indexed_chunks,
+        "embedding": embedding_stats.as_dict(),
     }
+    logger.info(
+        "wiki 索引重建完成 kb=%s build=%s pages=%s chunks=%s embedding=%s",
+        knowledge_base.id,
+        build.id,
+        indexed_pages,
+        indexed_chunks,
+        maintenance["embedding"],
+    )
     build.stage = "done"
     build.progress = 100
     build.status = status
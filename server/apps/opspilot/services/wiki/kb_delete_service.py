@@ -22,6 +22,7 @@ from apps.opspilot.models import (
     WikiGenerationIndexEntry,
     WikiGenerationOverview,
     WikiGenerationPage,
+    WikiGenerationSearchTerm,
     WikiImportPreflight,
     WikiKnowledgeBase,
     WikiStructureRevision,
@@ -46,6 +47,7 @@ def delete_knowledge_base(knowledge_base: WikiKnowledgeBase) -> dict:
     # generation / page 侧受 PROTECT 的派生表先删
     if gen_ids:
         PageRelation.objects.filter(generation_id__in=gen_ids).delete()
+        WikiGenerationSearchTerm.objects.filter(generation_id__in=gen_ids).delete()
         WikiGenerationIndexEntry.objects.filter(generation_id__in=gen_ids).delete()
         WikiGenerationOverview.objects.filter(generation_id__in=gen_ids).delete()
         WikiGenerationPage.objects.filter(generation_id__in=gen_ids).delete()
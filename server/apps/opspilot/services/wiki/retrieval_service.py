@@ -8,7 +8,6 @@ pgvector 语义检索为后期可选增强(P6),不在此处。
 import hashlib
 import json
 import logging
-import re
 
 from django.core.cache import cache
 
@@ -22,28 +21,21 @@ from apps.opspilot.services.wiki.active_generation_query_service import (
     page_queryset,
     page_snapshot,
 )
-from apps.opspilot.services.wiki.embedding_service import cosine, embed_texts, rrf_fuse
-from apps.opspilot.services.wiki.title_service import title_identity_key
+from apps.opspilot.services.wiki.embedding_service import cosine, embed_texts, page_vector_index, rrf_fuse
+from apps.opspilot.services.wiki.generation_search_index import (
+    EXACT_BONUS,
+    FIELD_WEIGHTS,
+    build_generation_search_index,
+    query_terms,
+    search_generation_index,
+)
 
 logger = logging.getLogger("opspilot")
 
 
-def _has_cjk(text):
-    return any("一" <= ch <= "鿿" for ch in text)
-
-
 def _tokenize(query):
     """分词:空白/标点切分;CJK 长词补充二元组(bigram),以适配中文无空格查询。"""
-    terms = set()
-    for tok in re.split(r"[\s,，。;；、:：!！?？]+", (query or "").strip().lower()):
-        tok = tok.strip()
-        if not tok:
-            continue
-        terms.add(tok)
-        if _has_cjk(tok) and len(tok) > 2:
-            for i in range(len(tok) - 1):
-                terms.add(tok[i : i + 2])
-    return [t for t in terms if t]
+    return list(dict.fromkeys(query_terms(query)))
 
 
 def _score(text, terms):
@@ -91,32 +83,14 @@ def _fallback_answer(contexts):
     return f"{_FALLBACK_PREFIX}根据《{top['title']}》：\n{top['snippet']}"
 
 
-def _index_score(entry, terms, query):
-    title = entry.title or ""
-    aliases = " ".join(entry.aliases or [])
-    tags = " ".join(entry.tags or [])
-    headings = " ".join(entry.headings or [])
-    keywords = " ".join(entry.keywords or [])
-    entities = " ".join(entry.entities or [])
-    summary = entry.summary or ""
-    normalized_query = title_identity_key(query)
-    exact = bool(normalized_query) and normalized_query in {
-        entry.normalized_title,
-        *(title_identity_key(alias) for alias in (entry.aliases or [])),
-    }
-    score = (
-        _score(title, terms) * 12
-        + _score(aliases, terms) * 10
-        + _score(tags, terms) * 5
-        + _score(keywords, terms) * 5
-        + _score(entities, terms) * 4
-        + _score(headings, terms) * 3
-        + _score(summary, terms) * 2
-        + _score(entry.page_type, terms)
-    )
-    if exact:
-        score += 100
-    return score, exact
+def _index_score(entry, terms, *, exact):
+    """字段加权子串词频(与倒排索引之前的逐条打分同一量纲),用于路由置信度与 keyword_score。"""
+    score = 0
+    for field, weight in FIELD_WEIGHTS:
+        value = getattr(entry, field)
+        text = " ".join(str(item) for item in value) if isinstance(value, (list, tuple)) else value
+        score += _score(text, terms) * weight
+    return score + EXACT_BONUS if exact else score
 
 
 def _generation_search_cache_key(scope, query, directory_ids, top_k):
@@ -131,7 +105,7 @@ def _generation_search_cache_key(scope, query, directory_ids, top_k):
         separators=(",", ":"),
     ).encode("utf-8")
     digest = hashlib.sha256(payload).hexdigest()
-    return f"wiki:generation-index-search:v1:{scope.generation_id}:{digest}"
+    return f"wiki:generation-index-search:v3:{scope.generation_id}:{digest}"
 
 
 def _generation_index_search(scope, terms, *, query, directory_ids, top_k):
@@ -144,27 +118,27 @@ def _generation_index_search(scope, terms, *, query, directory_ids, top_k):
     cached = cache.get(cache_key)
     if isinstance(cached, list):
         return cached
-    queryset = WikiGenerationIndexEntry.objects.filter(
-        generation_id=scope.generation_id,
-    )
-    if directory_ids is not None:
-        queryset = queryset.filter(directory_id__in=directory_ids)
-    ranked = []
-    for entry in queryset.order_by("page_id"):
-        score, exact = _index_score(entry, terms, query)
-        if score <= 0:
-            continue
-        ranked.append((score, exact, entry))
-    ranked.sort(key=lambda item: (-item[0], not item[1], item[2].normalized_title, item[2].page_id))
-    selected = ranked[:top_k]
-    top_score = selected[0][0] if selected else 0
-    second_score = selected[1][0] if len(selected) > 1 else 0
-    high_confidence = bool(selected) and (
-        selected[0][1] or top_score >= 20 or (top_score >= 8 and top_score >= max(second_score * 1.8, second_score + 4))
+    hits = search_generation_index(scope.generation_id, terms, query=query, directory_ids=directory_ids, top_k=top_k)
+    if hits is None:
+        # 迁移前发布的 generation 没有倒排索引:首次检索时补建一次(generation 不可变,建好即可复用)
+        logger.info("wiki generation search index missing, building generation=%s", scope.generation_id)
+        build_generation_search_index(scope.generation_id)
+        hits = search_generation_index(scope.generation_id, terms, query=query, directory_ids=directory_ids, top_k=top_k) or []
+    entries = WikiGenerationIndexEntry.objects.in_bulk([hit.entry_id for hit in hits])
+    # postings 只负责召回与 BM25 排序;路由置信度按候选的子串打分重算,沿用旧版阈值
+    keyword_scores = {hit.entry_id: _index_score(entries[hit.entry_id], terms, exact=hit.exact) for hit in hits if hit.entry_id in entries}
+    ranked_scores = sorted(keyword_scores.values(), reverse=True)
+    top_score = ranked_scores[0] if ranked_scores else 0
+    second_score = ranked_scores[1] if len(ranked_scores) > 1 else 0
+    high_confidence = bool(hits) and (
+        hits[0].exact or top_score >= 20 or (top_score >= 8 and top_score >= max(second_score * 1.8, second_score + 4))
     )
-    versions = PageVersion.objects.in_bulk([entry.page_version_id for _score_value, _exact, entry in selected])
+    versions = PageVersion.objects.in_bulk([entry.page_version_id for entry in entries.values()])
     results = []
-    for score, exact, entry in selected:
+    for hit in hits:
+        entry = entries.get(hit.entry_id)
+        if entry is None:
+            continue
         page_version = versions.get(entry.page_version_id)
         if page_version is None:
             logger.warning(
@@ -185,7 +159,7 @@ def _generation_index_search(scope, terms, *, query, directory_ids, top_k):
                 "page_version_id": entry.page_version_id,
                 "title": entry.title,
                 "snippet": _dynamic_snippet(page_version.body, terms),
-                "score": score,
+                "score": hit.score,
                 "generation_id": scope.generation_id,
                 "directory_id": entry.directory_id,
                 "directory_key": entry.directory_key,
@@ -193,9 +167,10 @@ def _generation_index_search(scope, terms, *, query, directory_ids, top_k):
                 "heading_path": heading_path,
                 "route_confidence": "high" if high_confidence else "low",
                 "explanation": {
-                    **_keyword_explanation(score, terms, entry.search_text),
+                    **_keyword_explanation(keyword_scores[hit.entry_id], terms, entry.search_text),
                     "matched_by": ["generation_index"],
-                    "exact_title_or_alias": exact,
+                    "bm25_score": hit.score,
+                    "exact_title_or_alias": hit.exact,
                     "index_fingerprint": entry.content_fingerprint,
                 },
             }
@@ -292,6 +267,19 @@ def search(
     return results
 
 
+def _indexed_page_vector(index, candidate, dim):
+    """候选页面在页面向量索引中的已存嵌入;版本不一致/维度不符/非页面候选返回 None。"""
+    if index is None or candidate.get("kind") != "page" or index.dim != dim:
+        return None
+    hit = index.get(candidate["id"])
+    if hit is None:
+        return None
+    vector, version_id = hit
+    if candidate.get("page_version_id") not in (None, version_id):
+        return None
+    return vector.tolist()
+
+
 def hybrid_search(
     knowledge_base,
     query,
@@ -305,6 +293,7 @@ def hybrid_search(
 ):
     """混合检索:关键词召回候选 → 语义重排 → RRF 融合。无嵌入/失败时回退关键词。
 
+    候选全部为已建索引的页面时复用已存的正文嵌入,否则所有候选统一嵌入"标题+摘要",同一次排序只用一种向量。
     embed_fn(texts)->List[vector] 可注入以便测试;默认走知识库的 EmbedProvider。
     """
     candidates = search(
@@ -326,11 +315,21 @@ def hybrid_search(
 
     embed = embed_fn or (lambda texts: embed_texts(texts, knowledge_base.embed_provider))
     qvecs = embed([query])
-    cvecs = embed([f"{c['title']} {c['snippet']}" for c in candidates])
-    if not qvecs or not cvecs or len(cvecs) != len(candidates):
+    if not qvecs or not qvecs[0]:
         return candidates[:top_k]  # 无嵌入 → 回退关键词
-
     qv = qvecs[0]
+
+    # 所有候选都是已建索引的页面时直接复用已存的正文嵌入;否则全部候选统一按"标题+摘要"嵌入。
+    # 正文嵌入与标题+摘要嵌入的余弦分布不同,混在一起排序会系统性偏向其中一类
+    cvecs = [None]
+    if all(c["kind"] == "page" for c in candidates):
+        index = page_vector_index(knowledge_base)
+        cvecs = [_indexed_page_vector(index, c, len(qv)) for c in candidates]
+    if any(vec is None for vec in cvecs):
+        cvecs = embed([f"{c['title']} {c['snippet']}" for c in candidates])
+        if not cvecs or len(cvecs) != len(candidates):
+            return candidates[:top_k]  # 无嵌入 → 回退关键词
+
     vector_scores = {i: cosine(qv, cvecs[i]) for i in range(len(candidates))}
     order = sorted(range(len(candidates)), key=lambda i: vector_scores[i], reverse=True)
     sem_rank = [_key(candidates[i]) for i in order]
@@ -0,0 +1,481 @@
+"""知识库向量索引(进程内,按知识库 LRU 缓存)。
+
+- 每个知识库的页面/分块向量各建一份 float32 连续矩阵,行预先归一化,查询即一次矩阵乘
+- 行数超过 ANN_MIN_ROWS(默认 20 万)时附加 IVF 倒排(球面 k-means 聚类);默认扫描一半的簇以保证召回,
+  规模更小时精确检索本身只需毫秒级,不启用近似
+- 索引对查询是不可变快照:写入路径(index_version / reindex_page_chunks / clear_page_vectors)生成新快照后
+  整体替换,正在进行的查询继续读取旧快照
+- 多进程一致性:共享缓存中每个索引有一个纪元(epoch)和递增版本号,每次写入把变更页面 id 记入该版本的变更日志;
+  其他进程查询时发现版本落后,只按日志从数据库重新加载变更页面,日志缺失/纪元变化时才整体重建
+"""
+
+import copy
+import logging
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("opspilot")
+
+PAGE_INDEX = "page"
+CHUNK_INDEX = "chunk"
+
+_EPOCH_KEY = "opspilot:wiki_vector_index:{kb_id}:{kind}:epoch"
+_VERSION_KEY = "opspilot:wiki_vector_index:{kb_id}:{kind}:version"
+_CHANGE_KEY = "opspilot:wiki_vector_index:{kb_id}:{kind}:change:{version}"
+_LOAD_BATCH_SIZE = 2000
+_KMEANS_SAMPLE_ROWS = 20000
+_KMEANS_ITERATIONS = 8
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class VectorIndex:
+    """单个知识库的向量矩阵快照。keys 为行主键(页面 id / 分块 id),page_ids 用于按页增量更新。
+
+    replace_pages 等写入方法不修改当前快照,而是返回新快照(写时复制)。新快照与旧快照共享只追加的行缓冲区:
+    新行写在旧快照的可见范围之外(预留容量,摊销 O(1)),删除只清除新快照自己的存活掩码;
+    死行超过 1/4 时新快照整体压缩到新的缓冲区。旧快照查询结果不变,但 get() 只认最新快照的行。
+    """
+
+    def __init__(self, dim, keys=(), page_ids=(), vectors=None, metas=(), *, ann_min_rows=None, nprobe=None):
+        self.dim = int(dim)
+        keys = list(keys)
+        if vectors is None or not keys:
+            vectors = np.empty((0, self.dim), dtype=np.float32)
+        self._buffer = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._page_ids = np.asarray(list(page_ids), dtype=np.int64)
+        self._size = len(keys)
+        self._keys = keys
+        self._metas = list(metas)
+        self._live = np.ones(self._size, dtype=bool)
+        self._dead = 0
+        # 是否可以在共享缓冲区的预留容量内追加行;派生新快照时转交给新快照
+        self._owns_tail = True
+        self.ann_min_rows = int(ann_min_rows if ann_min_rows is not None else _setting("WIKI_VECTOR_INDEX_ANN_MIN_ROWS", 200000))
+        # 未配置时按簇数的一半扫描(见 _probe_count)
+        self.nprobe = nprobe if nprobe is not None else _setting("WIKI_VECTOR_INDEX_NPROBE", None)
+        self.epoch = None
+        self.version = None
+        # 与快照共享:新快照会改写其中的条目,get() 按本快照的范围与存活掩码校验
+        self._row_by_key = {key: row for row, key in enumerate(keys)}
+        self._centroids = None
+        self._assign = None
+        self._lists = None
+        self._ann_trained_rows = 0
+        self._maybe_train_ann()
+
+    @classmethod
+    def from_rows(cls, rows, **kwargs):
+        """rows: 可迭代的 (key, page_id, vector, meta)。
+
+        只保留出现最多的维度(更换嵌入模型后残留的旧维度向量与查询向量无法比较),跳过空/零向量。
+        """
+        rows = [row for row in rows if row[2]]
+        if not rows:
+            return cls(0, **kwargs)
+        dim = Counter(len(row[2]) for row in rows).most_common(1)[0][0]
+        rows = [row for row in rows if len(row[2]) == dim]
+        vectors = _normalize(np.asarray([row[2] for row in rows], dtype=np.float32))
+        keep = np.flatnonzero(np.any(vectors != 0, axis=1))
+        return cls(
+            dim,
+            keys=[rows[i][0] for i in keep],
+            page_ids=[rows[i][1] for i in keep],
+            vectors=vectors[keep],
+            metas=[rows[i][3] for i in keep],
+            **kwargs,
+        )
+
+    def __len__(self):
+        return self._size - self._dead
+
+    @property
+    def matrix(self):
+        return self._buffer[: self._size]
+
+    @property
+    def nbytes(self):
+        return int(self._buffer.nbytes + self._page_ids.nbytes + self._live.nbytes)
+
+    @property
+    def uses_ann(self):
+        return self._centroids is not None
+
+    # ---------- 查询 ----------
+
+    def search(self, query_vector, top_k=5, *, exact=False):
+        """返回 [(key, score, meta)],按余弦降序,仅含 score > 0 的存活行。"""
+        if not len(self) or not query_vector or len(query_vector) != self.dim or top_k <= 0:
+            return []
+        query = _normalize(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+        if not np.any(query):
+            return []
+        if self.uses_ann and not exact:
+            rows = self._probe_rows(query)
+            scores = self.matrix[rows] @ query
+            if self._dead:
+                scores[~self._live[rows]] = 0
+        else:
+            rows = None
+            scores = self.matrix @ query
+            if self._dead:
+                scores[~self._live] = 0
+        k = min(top_k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for position in top:
+            score = float(scores[position])
+            if score <= 0:
+                break
+            row = int(rows[position]) if rows is not None else int(position)
+            results.append((self._keys[row], score, self._metas[row]))
+        return results
+
+    def get(self, key):
+        """按主键取 (归一化向量, meta);不存在返回 None。"""
+        row = self._row_by_key.get(key)
+        if row is None or row >= self._size or not self._live[row] or self._keys[row] != key:
+            return None
+        return self._buffer[row], self._metas[row]
+
+    # ---------- 增量更新(写时复制) ----------
+
+    def replace_pages(self, page_rows):
+        """返回新快照:page_rows{page_id: [(key, vector, meta)]} 中每页的行整体替换,空列表即删除该页。
+
+        维度不一致的向量被忽略;当前快照保持不变。
+        """
+        index = self._fork()
+        page_ids = [int(page_id) for page_id in page_rows]
+        index._remove_rows(page_ids)
+        for page_id, rows in page_rows.items():
+            index._append_rows(int(page_id), rows)
+        if index._dead > max(1024, index._size // 4):
+            index._compact()
+        index._maybe_train_ann()
+        return index
+
+    def replace_page(self, page_id, rows):
+        return self.replace_pages({page_id: rows})
+
+    def remove_pages(self, page_ids):
+        return self.replace_pages({page_id: [] for page_id in page_ids or []})
+
+    def _fork(self):
+        index = copy.copy(self)
+        index._live = self._live.copy()
+        if self._owns_tail:
+            self._owns_tail = False
+            return index
+        # 预留区已转交给更新的快照:从旧快照派生时复制出独立的主键表,缓冲区在首次追加时重新分配
+        index._keys = self._keys[: self._size]
+        index._metas = self._metas[: self._size]
+        index._row_by_key = {key: row for row, key in enumerate(index._keys) if index._live[row]}
+        index._buffer = self._buffer[: self._size]
+        index._page_ids = self._page_ids[: self._size]
+        index._owns_tail = True
+        return index
+
+    def _remove_rows(self, page_ids):
+        if not page_ids or not self._size:
+            return
+        rows = np.flatnonzero(np.isin(self._page_ids[: self._size], page_ids) & self._live)
+        for row in rows:
+            key = self._keys[row]
+            if self._row_by_key.get(key) == row:
+                del self._row_by_key[key]
+        self._live[rows] = False
+        self._dead += len(rows)
+
+    def _append_rows(self, page_id, rows):
+        rows = [row for row in rows if row[1] and (not self.dim or len(row[1]) == self.dim)]
+        if not rows:
+            return
+        vectors = _normalize(np.asarray([row[1] for row in rows], dtype=np.float32))
+        if not self.dim:
+            self.dim = vectors.shape[1]
+            self._buffer = np.empty((0, self.dim), dtype=np.float32)
+        start = self._size
+        self._reserve(start + len(rows))
+        self._buffer[start : start + len(rows)] = vectors
+        self._page_ids[start : start + len(rows)] = page_id
+        for offset, (key, _, meta) in enumerate(rows):
+            self._keys.append(key)
+            self._metas.append(meta)
+            self._row_by_key[key] = start + offset
+        self._size += len(rows)
+        self._live = np.concatenate([self._live, np.ones(len(rows), dtype=bool)])
+        if self._centroids is not None:
+            self._assign = np.concatenate([self._assign, np.argmax(vectors @ self._centroids.T, axis=1)])
+            self._lists = None
+
+    def _reserve(self, size):
+        capacity = len(self._buffer)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 64)
+        buffer = np.zeros((capacity, self.dim), dtype=np.float32)
+        buffer[: self._size] = self._buffer[: self._size]
+        page_ids = np.full(capacity, -1, dtype=np.int64)
+        page_ids[: self._size] = self._page_ids[: self._size]
+        self._buffer, self._page_ids = buffer, page_ids
+
+    def _compact(self):
+        keep = np.flatnonzero(self._live)
+        self._buffer = np.ascontiguousarray(self._buffer[keep])
+        self._page_ids = self._page_ids[keep]
+        self._keys = [self._keys[i] for i in keep]
+        self._metas = [self._metas[i] for i in keep]
+        self._row_by_key = {key: row for row, key in enumerate(self._keys)}
+        self._live = np.ones(len(keep), dtype=bool)
+        if self._assign is not None:
+            self._assign = self._assign[keep]
+            self._lists = None
+        self._size = len(keep)
+        self._dead = 0
+        self._owns_tail = True
+
+    # ---------- IVF ----------
+
+    def _maybe_train_ann(self):
+        n = len(self)
+        if n < self.ann_min_rows:
+            self._centroids = self._assign = self._lists = None
+            self._ann_trained_rows = 0
+            return
+        # 增量追加使规模翻倍后重新聚类,避免簇严重失衡
+        if self._centroids is not None and n < 2 * self._ann_trained_rows:
+            return
+        if self._dead:
+            self._compact()
+        n_lists = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(0)
+        matrix = self.matrix
+        sample = matrix[rng.choice(n, size=min(n, _KMEANS_SAMPLE_ROWS), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=min(n_lists, len(sample)), replace=False)].copy()
+        for _ in range(_KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(len(centroids)):
+                members = sample[assign == cluster]
+                if len(members):
+                    centroids[cluster] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+        self._centroids = np.ascontiguousarray(centroids)
+        step = _LOAD_BATCH_SIZE * 10
+        self._assign = np.concatenate(
+            [np.argmax(matrix[start : start + step] @ self._centroids.T, axis=1) for start in range(0, n, step)]
+        )
+        self._lists = None
+        self._ann_trained_rows = n
+
+    def _probe_count(self):
+        n_lists = len(self._centroids)
+        nprobe = int(self.nprobe) if self.nprobe else (n_lists + 1) // 2
+        return max(1, min(nprobe, n_lists))
+
+    def _probe_rows(self, query):
+        lists = self._lists
+        if lists is None:
+            # 快照内只构建一次;并发查询重复构建的结果相同,直接覆盖即可
+            order = np.argsort(self._assign, kind="stable")
+            bounds = np.searchsorted(self._assign[order], np.arange(len(self._centroids) + 1))
+            lists = self._lists = [order[bounds[i] : bounds[i + 1]] for i in range(len(self._centroids))]
+        nprobe = self._probe_count()
+        clusters = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([lists[cluster] for cluster in clusters])
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _group_rows_by_page(page_ids, rows):
+    """把 loader 返回的 (key, page_id, vector, meta) 按页分组;没有行的页面对应空列表(即删除)。"""
+    page_rows = {int(page_id): [] for page_id in page_ids}
+    for key, page_id, vector, meta in rows:
+        page_rows.setdefault(int(page_id), []).append((key, vector, meta))
+    return page_rows
+
+
+class VectorIndexRegistry:
+    """按 (知识库, 索引类型) 缓存 VectorIndex 快照,超出知识库数或内存上限时按 LRU 淘汰。"""
+
+    def __init__(self, max_indexes=None, max_bytes=None):
+        self.max_indexes = max_indexes
+        self.max_bytes = max_bytes
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def _limits(self):
+        max_indexes = self.max_indexes if self.max_indexes is not None else _setting("WIKI_VECTOR_INDEX_MAX_INDEXES", 16)
+        max_bytes = self.max_bytes if self.max_bytes is not None else _setting("WIKI_VECTOR_INDEX_MAX_BYTES", 1 << 30)
+        return int(max_indexes), int(max_bytes)
+
+    @staticmethod
+    def _state_keys(kb_id, kind):
+        return _EPOCH_KEY.format(kb_id=kb_id, kind=kind), _VERSION_KEY.format(kb_id=kb_id, kind=kind)
+
+    def _shared_state(self, kb_id, kind):
+        """共享的 (纪元, 版本);缓存不可用时返回 (None, None)。"""
+        epoch_key, version_key = self._state_keys(kb_id, kind)
+        try:
+            values = cache.get_many([epoch_key, version_key])
+        except Exception:
+            logger.exception("wiki 向量索引状态读取失败 kb=%s kind=%s", kb_id, kind)
+            return None, None
+        return values.get(epoch_key), values.get(version_key)
+
+    def _start_epoch(self, kb_id, kind):
+        """开启新纪元:所有进程下次查询时整体重建。返回 (纪元, 0),缓存不可用时返回 (None, None)。"""
+        epoch_key, version_key = self._state_keys(kb_id, kind)
+        epoch = uuid.uuid4().hex
+        try:
+            cache.set_many({version_key: 0, epoch_key: epoch}, timeout=None)
+        except Exception:
+            logger.exception("wiki 向量索引状态写入失败 kb=%s kind=%s", kb_id, kind)
+            return None, None
+        return epoch, 0
+
+    def _record_change(self, kb_id, kind, page_ids):
+        """版本号加一并写入该版本的变更页面;计数器缺失时开启新纪元。返回写入后的 (纪元, 版本)。"""
+        epoch_key, version_key = self._state_keys(kb_id, kind)
+        try:
+            version = cache.incr(version_key)
+        except ValueError:
+            return self._start_epoch(kb_id, kind)
+        except Exception:
+            logger.exception("wiki 向量索引版本递增失败 kb=%s kind=%s", kb_id, kind)
+            return None, None
+        try:
+            cache.set(
+                _CHANGE_KEY.format(kb_id=kb_id, kind=kind, version=version),
+                sorted({int(page_id) for page_id in page_ids}),
+                timeout=_setting("WIKI_VECTOR_INDEX_CHANGE_LOG_TTL", 24 * 3600),
+            )
+            return cache.get(epoch_key), version
+        except Exception:
+            logger.exception("wiki 向量索引变更日志写入失败 kb=%s kind=%s", kb_id, kind)
+            return None, None
+
+    def _changed_pages(self, kb_id, kind, since, until):
+        """版本 (since, until] 的变更页面;日志缺失(过期/尚未写入)或落后过多时返回 None。"""
+        if until - since > _setting("WIKI_VECTOR_INDEX_MAX_CATCHUP", 500):
+            return None
+        keys = [_CHANGE_KEY.format(kb_id=kb_id, kind=kind, version=version) for version in range(since + 1, until + 1)]
+        try:
+            entries = cache.get_many(keys)
+        except Exception:
+            logger.exception("wiki 向量索引变更日志读取失败 kb=%s kind=%s", kb_id, kind)
+            return None
+        if len(entries) != len(keys):
+            return None
+        return sorted({page_id for page_ids in entries.values() for page_id in page_ids})
+
+    def _build_lock(self, key):
+        with self._lock:
+            return self._build_locks.setdefault(key, threading.Lock())
+
+    def _store(self, key, index):
+        with self._lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            self._evict()
+
+    def _cached(self, key, epoch, version):
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None and epoch is not None and index.epoch == epoch and index.version == version:
+                self._indexes.move_to_end(key)
+                return index
+            return None
+
+    def get(self, kb_id, kind, loader, page_loader=None):
+        """取可用索引快照。
+
+        loader() -> rows 全量构建;page_loader(page_ids) -> rows 只加载指定页面,用于按变更日志补齐落后的版本。
+        同一索引的构建/补齐与写入串行执行,查询只读取快照。
+        """
+        key = (kb_id, kind)
+        index = self._cached(key, *self._shared_state(kb_id, kind))
+        if index is not None:
+            return index
+        with self._build_lock(key):
+            # 先取状态再读库:读库期间若有其他进程写入,版本已变,下次查询按日志补齐
+            epoch, version = self._shared_state(kb_id, kind)
+            index = self._cached(key, epoch, version)
+            if index is not None:
+                return index
+            with self._lock:
+                current = self._indexes.get(key)
+            if current is not None and page_loader is not None and epoch is not None and current.epoch == epoch:
+                if version is not None and current.version is not None and current.version < version:
+                    page_ids = self._changed_pages(kb_id, kind, current.version, version)
+                    if page_ids is not None:
+                        index = current.replace_pages(_group_rows_by_page(page_ids, page_loader(page_ids)))
+                        index.epoch, index.version = epoch, version
+                        self._store(key, index)
+                        logger.info("wiki 向量索引已按变更日志补齐 kb=%s kind=%s pages=%s", kb_id, kind, len(page_ids))
+                        return index
+            if epoch is None or version is None:
+                epoch, version = self._start_epoch(kb_id, kind)
+            index = VectorIndex.from_rows(loader())
+            index.epoch, index.version = epoch, version
+            self._store(key, index)
+            logger.info("wiki 向量索引已构建 kb=%s kind=%s rows=%s ann=%s", kb_id, kind, len(index), index.uses_ann)
+            return index
+
+    def update(self, kb_id, kind, page_ids, apply):
+        """增量更新:把变更页面记入共享变更日志;本进程快照恰好处于上一版本时换成 apply(index) 返回的新快照。
+
+        本进程落后(有其他进程的写入尚未回放)时不就地更新,下次查询按日志统一补齐(含本次变更)。
+        """
+        key = (kb_id, kind)
+        with self._build_lock(key):
+            epoch, version = self._record_change(kb_id, kind, page_ids)
+            with self._lock:
+                index = self._indexes.get(key)
+            if index is None:
+                return False
+            if epoch is None or index.epoch != epoch or index.version != version - 1:
+                if epoch is None:
+                    with self._lock:
+                        self._indexes.pop(key, None)
+                return False
+            updated = apply(index)
+            updated.epoch, updated.version = epoch, version
+            self._store(key, updated)
+            return True
+
+    def invalidate(self, kb_id, kind=None):
+        for each in (kind,) if kind else (PAGE_INDEX, CHUNK_INDEX):
+            with self._lock:
+                self._indexes.pop((kb_id, each), None)
+            self._start_epoch(kb_id, each)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def _evict(self):
+        max_indexes, max_bytes = self._limits()
+        while len(self._indexes) > 1 and (
+            len(self._indexes) > max_indexes or sum(index.nbytes for index in self._indexes.values()) > max_bytes
+        ):
+            (kb_id, kind), _ = self._indexes.popitem(last=False)
+            logger.info("wiki 向量索引 LRU 淘汰 kb=%s kind=%s", kb_id, kind)
+
+
+registry = VectorIndexRegistry()
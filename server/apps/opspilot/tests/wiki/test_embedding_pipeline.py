@@ -0,0 +1,117 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    from django.core.cache import cache
+
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "wiki-embedding"}}
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _provider(pk=1, model="embed-model"):
+    return SimpleNamespace(id=pk, model_name=model, base_url="http://embed", api_key="secret")
+
+
+def test_batch_by_tokens_respects_budget_and_item_limit():
+    from apps.opspilot.services.wiki.embedding_pipeline import batch_by_tokens
+
+    texts = ["a" * 30, "b" * 30, "c" * 30, "d" * 300]
+
+    assert batch_by_tokens(texts, max_tokens=25, max_items=10) == [["a" * 30, "b" * 30], ["c" * 30], ["d" * 300]]
+    assert batch_by_tokens(texts, max_tokens=10000, max_items=3) == [texts[:3], texts[3:]]
+
+
+def test_embed_with_cache_skips_unchanged_texts_and_keys_by_provider_model(locmem_cache):
+    from apps.opspilot.services.wiki.embedding_pipeline import collect_embedding_stats, embed_with_cache
+
+    requested = []
+
+    def request(batch):
+        requested.append(list(batch))
+        return [[float(len(text))] for text in batch]
+
+    with collect_embedding_stats() as stats:
+        assert embed_with_cache(["aa", "b", "aa"], _provider(), request) == [[2.0], [1.0], [2.0]]
+        assert embed_with_cache(["b", "ccc"], _provider(), request) == [[1.0], [3.0]]
+    assert requested == [["aa", "b"], ["ccc"]]
+    assert stats.texts == 5 and stats.cache_hits == 1 and stats.embedded_texts == 3 and stats.requests == 2
+
+    embed_with_cache(["b"], _provider(model="other-model"), request)
+    embed_with_cache(["b"], _provider(pk=2), request)
+    assert requested[-2:] == [["b"], ["b"]]
+
+
+def test_embed_with_cache_runs_batches_with_bounded_concurrency(settings):
+    from apps.opspilot.services.wiki.embedding_pipeline import embed_with_cache
+
+    settings.WIKI_EMBEDDING_BATCH_SIZE = 1
+    lock = threading.Lock()
+    active, peak = [0], [0]
+    gate = threading.Barrier(2, timeout=5)
+
+    def request(batch):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            gate.wait()
+        except threading.BrokenBarrierError:
+            pass
+        with lock:
+            active[0] -= 1
+        return [[1.0] for _ in batch]
+
+    texts = [f"t{i}" for i in range(6)]
+    assert embed_with_cache(texts, _provider(), request, max_workers=2) == [[1.0]] * 6
+    assert peak[0] == 2
+
+
+def test_embed_with_cache_fails_whole_call_on_short_batch():
+    from apps.opspilot.services.wiki.embedding_pipeline import embed_with_cache
+
+    with pytest.raises(ValueError):
+        embed_with_cache(["a", "b"], _provider(), lambda batch: [[1.0]])
+
+
+def test_embed_texts_reuses_client_across_calls(monkeypatch):
+    from apps.opspilot.services.wiki import embedding_service
+
+    created = []
+
+    class FakeOpenAI:
+        def __init__(self, base_url, api_key):
+            created.append(base_url)
+            self.embeddings = SimpleNamespace(
+                create=lambda model, input: SimpleNamespace(data=[SimpleNamespace(embedding=[1.0]) for _ in input])
+            )
+
+    monkeypatch.setattr(embedding_service, "OpenAI", FakeOpenAI)
+
+    assert embedding_service.embed_texts(["a"], _provider()) == [[1.0]]
+    assert embedding_service.embed_texts(["b", "c"], _provider()) == [[1.0], [1.0]]
+    assert created == ["http://embed"]
+
+
+@pytest.mark.django_db
+def test_reindex_chunks_embeds_all_pages_in_one_call():
+    from apps.opspilot.models import WikiKnowledgeBase
+    from apps.opspilot.services.wiki.embedding_service import reindex_chunks
+    from apps.opspilot.services.wiki.page_service import create_manual_page
+
+    kb = WikiKnowledgeBase.objects.create(name="kb", team=[1])
+    create_manual_page(kb, page_type="concept", title="A", body="# A\nrestart", created_by="u")
+    create_manual_page(kb, page_type="concept", title="B", body="# B\nbackup\n## C\nmore", created_by="u")
+    calls = []
+
+    def stub(texts):
+        calls.append(len(texts))
+        return [[1.0, 0.0] for _ in texts]
+
+    assert reindex_chunks(kb, embed_fn=stub) == (2, 3)
+    assert calls == [3]
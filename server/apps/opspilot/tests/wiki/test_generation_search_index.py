@@ -0,0 +1,134 @@
+import pytest
+
+
+class _Entry:
+    def __init__(self, pk, title, *, aliases=(), tags=(), summary="", directory_id=1, page_type="concept"):
+        from apps.opspilot.services.wiki.title_service import title_identity_key
+
+        self.pk = pk
+        self.page_id = pk * 10
+        self.directory_id = directory_id
+        self.title = title
+        self.normalized_title = title_identity_key(title)
+        self.aliases = list(aliases)
+        self.tags = list(tags)
+        self.keywords = []
+        self.entities = []
+        self.headings = []
+        self.summary = summary
+        self.page_type = page_type
+
+
+def test_query_terms_match_retrieval_tokenizer_and_document_terms_add_subwords():
+    from apps.opspilot.services.wiki.generation_search_index import document_terms, query_terms
+    from apps.opspilot.services.wiki.retrieval_service import _tokenize
+
+    assert set(_tokenize("重启服务, Nginx")) == {"重启服务", "重启", "启服", "服务", "nginx"}
+    assert set(query_terms("重启服务, Nginx")) == set(_tokenize("重启服务, Nginx"))
+    assert {"nginx-proxy", "nginx", "proxy"} <= set(document_terms("nginx-proxy 配置"))
+
+
+def test_document_terms_split_mixed_script_and_snake_case_and_index_latin_prefixes():
+    from apps.opspilot.services.wiki.generation_search_index import document_terms, prefix_terms
+
+    assert {"mysql", "数据库运维"} <= set(document_terms("MySQL数据库运维"))
+    assert {"redis_cluster", "redis", "cluster"} <= set(document_terms("redis_cluster"))
+    assert "config" in prefix_terms(document_terms("configuration"))
+    assert not any(len(term) < 3 for term in prefix_terms(document_terms("configuration")))
+    assert prefix_terms(["数据库运维"]) == []
+
+
+def _active_generation(wiki_factory):
+    from apps.opspilot.services.wiki.structure_service import bootstrap_knowledge_base
+
+    knowledge_base = wiki_factory.knowledge_base()
+    bootstrap_knowledge_base(knowledge_base, operator="admin")
+    return knowledge_base
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bm25_ranking_exact_title_and_directory_filter(wiki_factory):
+    from apps.opspilot.models import WikiGenerationSearchTerm
+    from apps.opspilot.services.wiki.generation_search_index import build_generation_search_index, search_generation_index
+    from apps.opspilot.services.wiki.retrieval_service import _tokenize
+
+    generation_id = _active_generation(wiki_factory).active_generation_id
+    entries = [
+        _Entry(1, "Nginx 重启", summary="nginx nginx 重启步骤", directory_id=1),
+        _Entry(2, "数据库备份", aliases=["nginx 备份"], directory_id=2),
+        _Entry(3, "Redis", summary="缓存", directory_id=1),
+    ]
+    assert build_generation_search_index(generation_id, entries) > 0
+    assert WikiGenerationSearchTerm.objects.get(generation_id=generation_id, kind="stats").doc_count == 3
+
+    hits = search_generation_index(generation_id, _tokenize("nginx"), query="nginx", top_k=5)
+    assert [hit.page_id for hit in hits] == [10, 20]
+    assert hits[0].score > hits[1].score and not hits[0].exact
+
+    exact = search_generation_index(generation_id, _tokenize("Redis"), query="Redis", top_k=5)
+    assert exact[0].page_id == 30 and exact[0].exact and exact[0].field_score >= 100
+
+    scoped = search_generation_index(generation_id, _tokenize("nginx"), query="nginx", directory_ids=[2], top_k=5)
+    assert [hit.page_id for hit in scoped] == [20]
+    assert search_generation_index(generation_id + 1, ["nginx"], query="nginx") is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_published_generation_is_indexed_and_searched_through_postings(wiki_factory):
+    from apps.opspilot.models import WikiGenerationSearchTerm
+    from apps.opspilot.services.wiki.retrieval_service import search
+
+    knowledge_base = _active_generation(wiki_factory)
+    page = wiki_factory.page(knowledge_base=knowledge_base, title="主机监控快速入门", body="安装采集器后查看主机指标")
+    wiki_factory.page(knowledge_base=knowledge_base, title="日志采集", body="配置日志源")
+    knowledge_base.refresh_from_db()
+    generation_id = knowledge_base.active_generation_id
+    assert WikiGenerationSearchTerm.objects.filter(generation_id=generation_id, kind="term", term="监控").exists()
+
+    results = search(knowledge_base, "主机监控")
+
+    assert results[0]["id"] == page.id
+    assert results[0]["explanation"]["matched_by"] == ["generation_index"]
+
+    # 迁移前发布的 generation 没有索引行:首次检索时补建
+    WikiGenerationSearchTerm.objects.filter(generation_id=generation_id).delete()
+    assert search(knowledge_base, "主机监控快速入门")[0]["id"] == page.id
+    assert WikiGenerationSearchTerm.objects.filter(generation_id=generation_id, kind="stats").exists()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("query", ["mysql", "redis", "config", "数据库", "nginx"])
+def test_index_returns_pages_matched_by_substring_scoring(wiki_factory, query):
+    from apps.opspilot.services.wiki.generation_search_index import build_generation_search_index, search_generation_index
+    from apps.opspilot.services.wiki.retrieval_service import _index_score, _tokenize
+
+    generation_id = _active_generation(wiki_factory).active_generation_id
+    entries = [
+        _Entry(1, "MySQL数据库运维"),
+        _Entry(2, "缓存集群", aliases=["redis_cluster"]),
+        _Entry(3, "Nginx configuration 指南", tags=["nginx-proxy"]),
+        _Entry(4, "日志采集", summary="配置日志源"),
+    ]
+    build_generation_search_index(generation_id, entries)
+    terms = _tokenize(query)
+
+    hits = search_generation_index(generation_id, terms, query=query, top_k=10)
+
+    # 与倒排索引之前的逐条子串打分命中同一批页面
+    assert {hit.page_id for hit in hits} == {entry.page_id for entry in entries if _index_score(entry, terms, exact=False) > 0}
+    assert hits
+
+
+@pytest.mark.django_db(transaction=True)
+def test_route_confidence_uses_substring_score_scale(wiki_factory):
+    from apps.opspilot.services.wiki.retrieval_service import search
+
+    knowledge_base = _active_generation(wiki_factory)
+    page = wiki_factory.page(knowledge_base=knowledge_base, title="MySQL数据库运维", body="主从切换与备份")
+    wiki_factory.page(knowledge_base=knowledge_base, title="日志采集", body="配置日志源")
+
+    results = search(knowledge_base, "mysql")
+
+    assert results[0]["id"] == page.id
+    assert results[0]["route_confidence"] == "high"
+    assert results[0]["explanation"]["keyword_score"] >= 12
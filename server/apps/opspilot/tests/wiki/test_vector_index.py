@@ -0,0 +1,262 @@
+import pytest
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    from django.core.cache import cache
+
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "wiki-vector-index"}}
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _kb():
+    from apps.opspilot.models import WikiKnowledgeBase
+
+    return WikiKnowledgeBase.objects.create(name="kb", team=[1])
+
+
+def _page(kb, title, body):
+    from apps.opspilot.services.wiki.page_service import create_manual_page
+
+    return create_manual_page(kb, page_type="concept", title=title, body=body, created_by="u")
+
+
+def test_search_matches_brute_force_cosine_and_skips_non_positive():
+    from apps.opspilot.services.wiki.embedding_service import cosine
+    from apps.opspilot.services.wiki.vector_index import VectorIndex
+
+    vectors = {1: [1.0, 0.0], 2: [0.6, 0.8], 3: [-1.0, 0.0], 4: [], 5: [0.0, 0.0]}
+    index = VectorIndex.from_rows([(key, key, vec, f"m{key}") for key, vec in vectors.items()])
+    query = [0.9, 0.1]
+
+    hits = index.search(query, top_k=5)
+
+    assert [key for key, _, _ in hits] == [1, 2]
+    assert hits[0][1] == pytest.approx(cosine(query, vectors[1]), abs=1e-6)
+    assert hits[0][2] == "m1"
+    assert index.search([1.0, 0.0, 0.0], top_k=5) == []  # 维度不一致
+
+
+def test_replace_and_remove_pages_incrementally():
+    from apps.opspilot.services.wiki.vector_index import VectorIndex
+
+    index = VectorIndex.from_rows([(10, 1, [1.0, 0.0], None), (11, 1, [0.9, 0.1], None), (20, 2, [0.0, 1.0], None)])
+
+    index = index.replace_page(1, [(12, [0.0, 1.0], None)])
+    assert [key for key, _, _ in index.search([1.0, 0.0], top_k=5)] == []
+    assert {key for key, _, _ in index.search([0.0, 1.0], top_k=5)} == {12, 20}
+    index = index.remove_pages([2])
+    assert len(index) == 1
+    assert index.get(20) is None
+    assert index.get(12)[0].tolist() == [0.0, 1.0]
+
+
+def test_updates_leave_existing_snapshot_unchanged():
+    from apps.opspilot.services.wiki.vector_index import VectorIndex
+
+    snapshot = VectorIndex.from_rows([(10, 1, [1.0, 0.0], "v1"), (20, 2, [0.0, 1.0], "v2")])
+    before = snapshot.search([1.0, 0.0], top_k=5)
+
+    updated = snapshot.replace_pages({1: [(11, [0.6, 0.8], "v3")], 3: [(30, [1.0, 0.0], "v4")]})
+    removed = updated.remove_pages([3])
+
+    # 查询中的旧快照不受写入影响
+    assert snapshot.search([1.0, 0.0], top_k=5) == before
+    assert len(snapshot) == 2
+    assert [key for key, _, _ in updated.search([1.0, 0.0], top_k=5)] == [30, 11]
+    assert [key for key, _, _ in removed.search([1.0, 0.0], top_k=5)] == [11]
+    # 从旧快照再派生时复制独立的主键表,不影响已派生的新快照
+    branched = snapshot.replace_page(2, [(21, [0.8, 0.6], None)])
+    assert branched.get(21) is not None and removed.get(21) is None
+    assert removed.get(11)[1] == "v3"
+
+
+def _random_rows(n, dim, seed):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    data = rng.normal(size=(n, dim))
+    return rng, [(i, i, row.tolist(), None) for i, row in enumerate(data)]
+
+
+def _recall(index, queries, top_k=10):
+    recalls = []
+    for query in queries:
+        exact = {key for key, _, _ in index.search(query, top_k=top_k, exact=True)}
+        approx = {key for key, _, _ in index.search(query, top_k=top_k)}
+        recalls.append(len(exact & approx) / len(exact))
+    return sum(recalls) / len(recalls)
+
+
+def test_ivf_recall_on_clustered_vectors():
+    import numpy as np
+
+    from apps.opspilot.services.wiki.vector_index import VectorIndex
+
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(40, 16))
+    data = centers[rng.integers(0, 40, 4000)] + 0.2 * rng.normal(size=(4000, 16))
+    index = VectorIndex.from_rows([(i, i, row.tolist(), None) for i, row in enumerate(data)], ann_min_rows=1000, nprobe=8)
+    assert index.uses_ann
+
+    queries = [(center + 0.2 * rng.normal(size=16)).tolist() for center in centers[:10]]
+    assert _recall(index, queries) >= 0.9
+
+
+def test_ivf_default_nprobe_keeps_recall_on_unclustered_vectors():
+    from apps.opspilot.services.wiki.vector_index import VectorIndex
+
+    rng, rows = _random_rows(3000, 32, seed=3)
+    index = VectorIndex.from_rows(rows, ann_min_rows=1000)
+    assert index.uses_ann
+
+    assert _recall(index, rng.normal(size=(20, 32)).tolist()) >= 0.9
+
+
+def test_default_settings_search_small_indexes_exactly():
+    from apps.opspilot.services.wiki.vector_index import VectorIndex
+
+    rng, rows = _random_rows(3000, 32, seed=5)
+    index = VectorIndex.from_rows(rows)
+
+    assert not index.uses_ann
+    assert _recall(index, rng.normal(size=(5, 32)).tolist()) == 1.0
+
+
+def test_registry_reuses_index_until_epoch_changes_and_evicts_lru(locmem_cache):
+    from apps.opspilot.services.wiki.vector_index import PAGE_INDEX, VectorIndexRegistry
+
+    registry = VectorIndexRegistry(max_indexes=2)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return [(1, 1, [1.0, 0.0], None)]
+
+    first = registry.get(1, PAGE_INDEX, loader)
+    assert registry.get(1, PAGE_INDEX, loader) is first
+    assert len(loads) == 1
+
+    assert registry.update(1, PAGE_INDEX, [2], lambda index: index.replace_page(2, [(2, [0.0, 1.0], None)])) is True
+    second = registry.get(1, PAGE_INDEX, loader)
+    assert second is not first and len(second) == 2 and len(first) == 1
+    assert len(loads) == 1
+
+    # 其他进程整体失效(新纪元) → 本进程重建
+    VectorIndexRegistry().invalidate(1, PAGE_INDEX)
+    assert registry.get(1, PAGE_INDEX, loader) is not second
+    assert len(loads) == 2
+
+    registry.get(2, PAGE_INDEX, loader)
+    registry.get(3, PAGE_INDEX, loader)
+    assert list(registry._indexes) == [(2, PAGE_INDEX), (3, PAGE_INDEX)]
+
+
+def test_registry_catches_up_changed_pages_from_other_process(locmem_cache):
+    from django.core.cache import cache
+
+    from apps.opspilot.services.wiki import vector_index
+    from apps.opspilot.services.wiki.vector_index import PAGE_INDEX, VectorIndexRegistry
+
+    pages = {1: [(1, 1, [1.0, 0.0], None)]}
+    loads = []
+
+    def loader():
+        loads.append("full")
+        return [row for rows in pages.values() for row in rows]
+
+    def page_loader(page_ids):
+        loads.append(tuple(page_ids))
+        return [row for page_id in page_ids for row in pages.get(page_id, [])]
+
+    writer, reader = VectorIndexRegistry(), VectorIndexRegistry()
+    stale = reader.get(1, PAGE_INDEX, loader, page_loader)
+    writer.get(1, PAGE_INDEX, loader, page_loader)
+
+    pages[2] = [(2, 2, [0.0, 1.0], None)]
+    assert writer.update(1, PAGE_INDEX, [2], lambda index: index.replace_page(2, [(2, [0.0, 1.0], None)])) is True
+
+    # 读进程只重新加载变更页面
+    caught_up = reader.get(1, PAGE_INDEX, loader, page_loader)
+    assert loads == ["full", "full", (2,)]
+    assert {key for key, _, _ in caught_up.search([0.0, 1.0], top_k=5)} == {2}
+    assert len(stale) == 1
+
+    del pages[1]
+    writer.update(1, PAGE_INDEX, [1], lambda index: index.remove_pages([1]))
+    assert len(reader.get(1, PAGE_INDEX, loader, page_loader)) == 1
+    assert loads[-1] == (1,)
+
+    # 变更日志过期 → 整体重建
+    writer.update(1, PAGE_INDEX, [2], lambda index: index)
+    cache.delete(vector_index._CHANGE_KEY.format(kb_id=1, kind=PAGE_INDEX, version=3))
+    reader.get(1, PAGE_INDEX, loader, page_loader)
+    assert loads[-1] == "full"
+
+
+@pytest.mark.django_db
+def test_semantic_search_skips_page_whose_current_version_changed():
+    from apps.opspilot.services.wiki.embedding_service import index_version, semantic_search
+
+    kb = _kb()
+    page = _page(kb, "重启", "restart service")
+    assert index_version(page.current_version, None, embed_fn=lambda texts: [[1.0, 0.0]]) is True
+    assert [r["id"] for r in semantic_search(kb, "q", embed_fn=lambda texts: [[1.0, 0.0]])] == [page.id]
+
+    new_version = page.current_version
+    new_version.pk = None
+    new_version.no += 1
+    new_version.embedding = []
+    new_version.save()
+    page.current_version = new_version
+    page.save(update_fields=["current_version"])
+
+    assert semantic_search(kb, "q", embed_fn=lambda texts: [[1.0, 0.0]]) == []
+
+
+@pytest.mark.django_db
+def test_hybrid_search_reuses_indexed_page_vectors():
+    from apps.opspilot.services.wiki.embedding_service import index_version
+    from apps.opspilot.services.wiki.retrieval_service import hybrid_search
+
+    kb = _kb()
+    first = _page(kb, "重启服务", "使用 systemctl restart 重启")
+    second = _page(kb, "重启流程", "重启前先摘流量再重启")
+    assert index_version(first.current_version, None, embed_fn=lambda texts: [[0.0, 1.0]]) is True
+    assert index_version(second.current_version, None, embed_fn=lambda texts: [[1.0, 0.0]]) is True
+    embedded = []
+
+    def stub(texts):
+        embedded.append(list(texts))
+        return [[1.0, 0.0] for _ in texts]
+
+    results = hybrid_search(kb, "重启", embed_fn=stub)
+
+    assert embedded == [["重启"]]
+    scores = {r["id"]: r["explanation"]["vector_score"] for r in results}
+    assert scores == {first.id: pytest.approx(0.0, abs=1e-6), second.id: pytest.approx(1.0)}
+
+
+@pytest.mark.django_db
+def test_hybrid_search_embeds_all_candidates_when_any_is_not_indexed():
+    from apps.opspilot.services.wiki.embedding_service import index_version
+    from apps.opspilot.services.wiki.retrieval_service import hybrid_search
+
+    kb = _kb()
+    indexed = _page(kb, "重启服务", "使用 systemctl restart 重启")
+    _page(kb, "重启流程", "重启前先摘流量再重启")
+    assert index_version(indexed.current_version, None, embed_fn=lambda texts: [[0.0, 1.0]]) is True
+    embedded = []
+
+    def stub(texts):
+        embedded.append(list(texts))
+        return [[1.0, 0.0] if text == "重启" or text.startswith("重启服务") else [0.0, 1.0] for text in texts]
+
+    results = hybrid_search(kb, "重启", embed_fn=stub)
+
+    # 同一次排序只用"标题+摘要"一种嵌入,已存的正文嵌入([0, 1])不参与
+    assert len(embedded[1]) == 2
+    scores = {r["id"]: r["explanation"]["vector_score"] for r in results}
+    assert scores[indexed.id] == pytest.approx(1.0)
@@ -17,6 +17,7 @@ from apps.opspilot.services.wiki.directory_enable_service import WikiDirectoryEn
 from apps.opspilot.services.wiki.directory_readiness_service import audit_knowledge_base_readiness
 from apps.opspilot.services.wiki.embedding_service import chunk_semantic_search as wiki_chunk_search
 from apps.opspilot.services.wiki.embedding_service import index_version
+from apps.opspilot.services.wiki.embedding_service import prefetch_embeddings
 from apps.opspilot.services.wiki.embedding_service import reindex_chunks as wiki_reindex_chunks
 from apps.opspilot.services.wiki.embedding_service import reindex_page_chunks
 from apps.opspilot.services.wiki.embedding_service import semantic_search as wiki_semantic_search
@@ -456,6 +457,7 @@ class WikiKnowledgeBaseViewSet(WikiTeamScopeMixin, AuthViewSet):
             inputs={"knowledge_base_id": kb.id, "knowledge_base_name": kb.name},
             index_fn=index_version,
             chunk_index_fn=reindex_page_chunks,
+            prefetch_fn=prefetch_embeddings,
         )
         log_operation(request, "execute", "opspilot", f"重建知识库索引: {kb.name}")
         return JsonResponse({"result": True, "data": BuildRecordSerializer(record).data})
@@ -9,7 +9,7 @@ from apps.core.utils.viewset_utils import AuthViewSet
 from apps.opspilot import tasks as _opspilot_tasks
 from apps.opspilot.models import BuildRecord, KnowledgePage, Material, MaterialVersion, PageEvidence
 from apps.opspilot.serializers.wiki_serializers import BuildRecordSerializer, MaterialSerializer
-from apps.opspilot.services.wiki.embedding_service import index_version, reindex_page_chunks
+from apps.opspilot.services.wiki.embedding_service import index_version, prefetch_embeddings, reindex_page_chunks
 from apps.opspilot.services.wiki.index_rebuild_service import rebuild_page_indexes
 from apps.opspilot.services.wiki.material_service import load_parsed_markdown
 from apps.opspilot.services.wiki.material_source_service import MaterialSourceError, source_metadata
@@ -441,6 +441,7 @@ class WikiMaterialViewSet(WikiTeamScopeMixin, AuthViewSet):
             inputs={"material_id": material.id, "material_name": material.name},
             index_fn=index_version,
             chunk_index_fn=reindex_page_chunks,
+            prefetch_fn=prefetch_embeddings,
         )
         log_operation(request, "execute", "opspilot", f"重建资料关联索引: {material.name}")
         return JsonResponse({"result": True, "data": BuildRecordSerializer(record).data})
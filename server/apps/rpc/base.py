@@ -4,6 +4,7 @@ import os
 from django.conf import settings
 
 import nats_client
+from nats_client.pool import run_coroutine
 
 DEFAULT_REQUEST_TIMEOUT = 60
 
@@ -23,7 +24,7 @@ class RpcClient(object):
             request_coro = nats_client.request(self.namespace, method_name, *args, **kwargs)
             if effective_timeout and effective_timeout > 0:
                 request_coro = asyncio.wait_for(request_coro, timeout=effective_timeout)
-            return asyncio.run(request_coro)
+            return run_coroutine(request_coro)
         except TimeoutError:
             raise TimeoutError(f"RPC request timeout: namespace={self.namespace}, method={method_name}, timeout={effective_timeout}s")
 
@@ -34,10 +35,25 @@ class RpcClient(object):
             request_coro = nats_client.nat_request(self.namespace, method_name, **kwargs)
             if effective_timeout and effective_timeout > 0:
                 request_coro = asyncio.wait_for(request_coro, timeout=effective_timeout)
-            return asyncio.run(request_coro)
+            return run_coroutine(request_coro)
         except TimeoutError:
             raise TimeoutError(f"RPC request timeout: namespace={self.namespace}, method={method_name}, timeout={effective_timeout}s")
 
+    def run_many(self, calls, _timeout=None):
+        """
+        批量调用，一次往返完成
+        :param calls: [(method_name, args, kwargs), ...]
+        :return: 按 calls 顺序的结果列表，单项失败时该位置为异常实例
+        """
+        effective_timeout = _timeout if _timeout is not None else getattr(settings, "NATS_REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT)
+        try:
+            request_coro = nats_client.request_many(self.namespace, calls, _timeout=_timeout)
+            if effective_timeout and effective_timeout > 0:
+                request_coro = asyncio.wait_for(request_coro, timeout=effective_timeout)
+            return run_coroutine(request_coro)
+        except TimeoutError:
+            raise TimeoutError(f"RPC batch request timeout: namespace={self.namespace}, calls={len(calls)}, timeout={effective_timeout}s")
+
 
 class AppClient(object):
     def __init__(self, path):
@@ -50,6 +66,16 @@ class AppClient(object):
             raise ValueError(f"Method {method_name} not found in {self.path}")
         return method(*args, **kwargs)
 
+    def run_many(self, calls, _timeout=None):
+        """与 RpcClient.run_many 保持一致的返回约定：逐项执行，失败项以异常实例占位"""
+        results = []
+        for method_name, args, kwargs in calls:
+            try:
+                results.append(self.run(method_name, *(args or ()), **(kwargs or {})))
+            except Exception as e:  # noqa
+                results.append(e)
+        return results
+
 
 class OperationAnalysisRpc(RpcClient):
     """
@@ -65,7 +91,7 @@ class OperationAnalysisRpc(RpcClient):
     def run(self, method_name, *args, **kwargs):
         nats_user = kwargs.pop("_nats_user", None)
         nats_password = kwargs.pop("_nats_password", None)
-        return_data = asyncio.run(
+        return_data = run_coroutine(
             nats_client.request_v2(
                 self.namespace,
                 method_name,
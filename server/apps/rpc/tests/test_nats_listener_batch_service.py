@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from nats_client.management.commands import nats_listener
+
+from .nats_listener_test_utils import cancel_tasks_created_after
+
+pytestmark = pytest.mark.unit
+
+
+def _registry(**funcs):
+    return {
+        f"bklite.{name}": {"func": func, "namespace": "bklite", "name": name, "js": name.startswith("js.")}
+        for name, func in funcs.items()
+    }
+
+
+async def test_batch_envelope_dispatches_items_in_one_reply(monkeypatch, settings):
+    existing_tasks = set(asyncio.all_tasks())
+    callbacks = {}
+    published = []
+
+    class FakeNats:
+        async def subscribe(self, subject, queue, cb, **kwargs):
+            callbacks[subject] = cb
+
+        async def publish(self, reply, payload):
+            published.append((reply, json.loads(payload)))
+
+    async def fake_get_nc_client(client):
+        return client
+
+    async def add(a, b):
+        return a + b
+
+    async def broken():
+        raise ValueError("bad input")
+
+    async def hidden():
+        return "js only"
+
+    monkeypatch.setattr(nats_listener, "get_nc_client", fake_get_nc_client)
+    monkeypatch.setattr(nats_listener.default_registry, "registry", _registry(add=add, broken=broken, **{"js.hidden": hidden}))
+    settings.NATS_JETSTREAM_ENABLED = False
+    settings.NATS_HANDLER_CONCURRENCY = 2
+    settings.NATS_HANDLER_QUEUE_SIZE = 4
+    command = nats_listener.Command()
+    command.nats = FakeNats()
+    await command.nats_coroutine()
+
+    envelope = {
+        "items": [
+            {"method": "add", "args": [1, 2], "kwargs": {}},
+            {"method": "broken", "args": [], "kwargs": {}},
+            {"method": "js.hidden", "args": [], "kwargs": {}},
+            {"method": "add", "args": [], "kwargs": {"a": 3, "b": 4}},
+        ]
+    }
+    try:
+        assert "bklite.__batch__" in callbacks
+        await callbacks["bklite.__batch__"](
+            SimpleNamespace(data=json.dumps(envelope).encode(), subject="bklite.__batch__", reply="reply-1")
+        )
+        await asyncio.wait_for(command._message_queue.join(), timeout=1)
+
+        assert len(published) == 1
+        reply, body = published[0]
+        assert reply == "reply-1" and body["success"] is True
+        add_result, broken_result, hidden_result, kwargs_result = body["result"]
+        assert add_result == {"success": True, "result": 3}
+        assert broken_result == {"success": False, "error": "ValueError", "message": "bad input"}
+        assert hidden_result["success"] is False and "No function found" in hidden_result["message"]
+        assert kwargs_result == {"success": True, "result": 7}
+    finally:
+        await command.shutdown()
+        await cancel_tasks_created_after(existing_tasks)
+
+
+async def test_batch_item_with_unserializable_result_fails_alone(settings, monkeypatch):
+    async def fine():
+        return "ok"
+
+    async def opaque():
+        return object()
+
+    monkeypatch.setattr(nats_listener.default_registry, "registry", _registry(fine=fine, opaque=opaque))
+    settings.NATS_BATCH_ITEM_CONCURRENCY = 1
+
+    payload = await nats_listener.Command().handle_batch(
+        "bklite.__batch__", {"items": [{"method": "opaque"}, {"method": "fine"}]}
+    )
+
+    opaque_result, fine_result = json.loads(payload)["result"]
+    assert opaque_result["success"] is False and opaque_result["error"] == "TypeError"
+    assert fine_result == {"success": True, "result": "ok"}
+
+
+async def test_sync_batch_items_run_concurrently_on_batch_pool(settings, monkeypatch):
+    barrier = threading.Barrier(2, timeout=2)
+
+    def wait_for_peer():
+        # 两项串行执行时 barrier 超时失败
+        barrier.wait()
+        return threading.current_thread().name
+
+    monkeypatch.setattr(nats_listener.default_registry, "registry", _registry(first=wait_for_peer, second=wait_for_peer))
+    settings.NATS_BATCH_ITEM_CONCURRENCY = 2
+    command = nats_listener.Command()
+    try:
+        payload = await command.handle_batch("bklite.__batch__", {"items": [{"method": "first"}, {"method": "second"}]})
+    finally:
+        await command.shutdown()
+
+    results = json.loads(payload)["result"]
+    assert all(item["success"] for item in results)
+    assert all(item["result"].startswith("nats-batch") for item in results)
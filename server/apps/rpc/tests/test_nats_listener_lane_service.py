@@ -0,0 +1,168 @@
+import asyncio
+import threading
+
+import pytest
+
+from config.components import nats as nats_config
+from nats_client.management.commands import nats_listener
+from nats_client.metrics import LatencyHistogram
+
+from .nats_listener_test_utils import cancel_tasks_created_after
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def lane_settings(settings):
+    settings.NATS_HANDLER_CONCURRENCY = 1
+    settings.NATS_HANDLER_QUEUE_SIZE = 4
+    settings.NATS_HANDLER_LANES = {"fast": {"concurrency": 1, "queue_size": 4}, "bulk": {"concurrency": 1, "queue_size": 1}}
+    settings.NATS_HANDLER_LANE_ROUTES = [("bklite.check_*", "fast"), ("bklite.ingest*", "bulk"), ("bklite.ghost", "missing")]
+    settings.NATS_HANDLER_STATS_INTERVAL = 0
+    return settings
+
+
+async def test_saturated_bulk_lane_does_not_delay_fast_lane(lane_settings):
+    existing_tasks = set(asyncio.all_tasks())
+    release = asyncio.Event()
+    done = []
+
+    async def handler(func_name, _data, reply=None):
+        if func_name.startswith("bklite.ingest"):
+            await release.wait()
+        done.append(func_name)
+
+    command = nats_listener.Command()
+    command.handler = handler
+    command._start_workers()
+    try:
+        await command._enqueue("bklite.ingest_from_source", "{}")
+        await asyncio.sleep(0)
+        await command._enqueue("bklite.ingest_from_source", "{}")
+        blocked = asyncio.create_task(command._enqueue("bklite.ingest_from_source", "{}"))
+        await asyncio.sleep(0)
+        assert not blocked.done(), "bulk 通道已满时只阻塞 bulk 的入队"
+
+        await asyncio.wait_for(command._enqueue("bklite.check_permission", "{}"), timeout=1)
+        await asyncio.wait_for(command._enqueue("bklite.other", "{}"), timeout=1)
+        for _ in range(20):
+            await asyncio.sleep(0)
+        assert done == ["bklite.check_permission", "bklite.other"]
+
+        release.set()
+        await asyncio.wait_for(blocked, timeout=1)
+        await asyncio.wait_for(asyncio.gather(*(lane.queue.join() for lane in command._lanes.values())), timeout=1)
+        stats = {(row["lane"], row["subject"]): row for row in command._stats.snapshot()}
+        assert stats[("bulk", "bklite.ingest_from_source")]["handle"]["count"] == 3
+        assert stats[("fast", "bklite.check_permission")]["queue_wait"]["count"] == 1
+    finally:
+        await command.shutdown()
+        await cancel_tasks_created_after(existing_tasks)
+
+
+async def test_lane_resolution_prefers_registered_lane(lane_settings, monkeypatch):
+    monkeypatch.setattr(
+        nats_listener.default_registry,
+        "registry",
+        {"bklite.ingest_small": {"func": None, "namespace": "bklite", "name": "ingest_small", "js": False, "lane": "fast"}},
+    )
+    command = nats_listener.Command()
+    command._start_workers()
+    try:
+        assert command._lane_name("bklite.ingest_small") == "fast"
+        assert command._lane_name("bklite.ingest_big") == "bulk"
+        assert command._lane_name("bklite.ghost") == "default"
+        assert command._lane_for("bklite.anything") is command._lanes["default"]
+    finally:
+        await command.shutdown()
+
+
+async def test_sync_handler_runs_on_lane_thread_pool(lane_settings, monkeypatch):
+    existing_tasks = set(asyncio.all_tasks())
+    published = []
+    threads = []
+
+    def check_permission():
+        threads.append(threading.current_thread().name)
+        return True
+
+    class FakeNats:
+        async def publish(self, reply, payload):
+            published.append(reply)
+
+    monkeypatch.setattr(
+        nats_listener.default_registry,
+        "registry",
+        {"bklite.check_permission": {"func": check_permission, "namespace": "bklite", "name": "check_permission", "js": False}},
+    )
+    command = nats_listener.Command()
+    command.nats = FakeNats()
+    command._start_workers()
+    try:
+        await command._enqueue("bklite.check_permission", '{"args": [], "kwargs": {}}', reply="r1")
+        await asyncio.wait_for(command._lanes["fast"].queue.join(), timeout=2)
+        assert published == ["r1"]
+        assert threads[0].startswith("nats-fast")
+    finally:
+        await command.shutdown()
+        await cancel_tasks_created_after(existing_tasks)
+
+
+async def test_lane_filter_limits_subscriptions(lane_settings, monkeypatch):
+    existing_tasks = set(asyncio.all_tasks())
+    subscribed = []
+
+    class FakeNats:
+        async def subscribe(self, subject, queue, cb, **kwargs):
+            subscribed.append((subject, queue))
+
+    async def fake_get_nc_client(client):
+        return client
+
+    async def noop():
+        return None
+
+    monkeypatch.setattr(nats_listener, "get_nc_client", fake_get_nc_client)
+    monkeypatch.setattr(
+        nats_listener.default_registry,
+        "registry",
+        {
+            f"bklite.{name}": {"func": noop, "namespace": "bklite", "name": name, "js": False}
+            for name in ("check_permission", "ingest_from_source", "node_list")
+        },
+    )
+    lane_settings.NATS_JETSTREAM_ENABLED = False
+    command = nats_listener.Command()
+    command.nats = FakeNats()
+    command._lane_filter = {"fast"}
+    await command.nats_coroutine()
+    try:
+        assert subscribed == [("bklite.check_permission", "bklite.check_permission")]
+    finally:
+        await command.shutdown()
+        await cancel_tasks_created_after(existing_tasks)
+
+
+def test_lane_and_route_settings_parse_env(monkeypatch):
+    monkeypatch.setenv("NATS_HANDLER_LANES", "fast:4:64, bad, bulk:2:8")
+    monkeypatch.setenv("NATS_HANDLER_LANE_ROUTES", "*.verify_token=fast,broken,*ingest*=bulk")
+
+    assert nats_config._read_lanes("NATS_HANDLER_LANES", {}) == {
+        "fast": {"concurrency": 4, "queue_size": 64},
+        "bulk": {"concurrency": 2, "queue_size": 8},
+    }
+    assert nats_config._read_lane_routes("NATS_HANDLER_LANE_ROUTES", []) == [("*.verify_token", "fast"), ("*ingest*", "bulk")]
+
+
+def test_latency_histogram_quantiles_use_bucket_bounds():
+    histogram = LatencyHistogram()
+    for seconds in [0.001] * 90 + [0.2] * 9 + [45]:
+        histogram.observe(seconds)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["p50_ms"] == 5.0
+    assert snapshot["p95_ms"] == 250.0
+    assert snapshot["p99_ms"] == 250.0
+    assert snapshot["max_ms"] == 45000.0
+    assert snapshot["buckets"]["+Inf"] == 1
@@ -20,6 +20,36 @@ def _read_number(name, default, cast, minimum):
     return value
 
 
+def _read_lanes(name, default):
+    """"fast:8:256,bulk:4:256" → {"fast": {"concurrency": 8, "queue_size": 256}, ...}"""
+    raw_value = os.getenv(name)
+    if raw_value is None:
+        return default
+    lanes = {}
+    for spec in filter(None, (item.strip() for item in raw_value.split(","))):
+        try:
+            lane, concurrency, queue_size = (part.strip() for part in spec.split(":"))
+            lanes[lane] = {"concurrency": max(1, int(concurrency)), "queue_size": max(1, int(queue_size))}
+        except ValueError:
+            logger.warning("NATS 配置 {}={!r} 中的通道 {!r} 非法，已忽略", name, raw_value, spec)
+    return lanes
+
+
+def _read_lane_routes(name, default):
+    """"*.verify_token=fast,*ingest_from_source=bulk" → [("*.verify_token", "fast"), ...]，按顺序首个匹配生效"""
+    raw_value = os.getenv(name)
+    if raw_value is None:
+        return default
+    routes = []
+    for spec in filter(None, (item.strip() for item in raw_value.split(","))):
+        pattern, sep, lane = spec.rpartition("=")
+        if not sep or not pattern.strip() or not lane.strip():
+            logger.warning("NATS 配置 {}={!r} 中的路由 {!r} 非法，已忽略", name, raw_value, spec)
+            continue
+        routes.append((pattern.strip(), lane.strip()))
+    return routes
+
+
 NATS_SERVERS = os.getenv("NATS_SERVERS", "")
 NATS_NAMESPACE = os.getenv("NATS_NAMESPACE", "bklite")
 NATS_JETSTREAM_ENABLED = False
@@ -37,6 +67,33 @@ NATS_CORE_PENDING_BYTES_LIMIT = _read_number("NATS_CORE_PENDING_BYTES_LIMIT", 12
 NATS_JETSTREAM_IN_PROGRESS_INTERVAL = _read_number("NATS_JETSTREAM_IN_PROGRESS_INTERVAL", 10.0, float, 0.1)
 NATS_FETCH_RETRY_DELAY = _read_number("NATS_FETCH_RETRY_DELAY", 1.0, float, 0.0)
 NATS_HANDLER_SHUTDOWN_TIMEOUT = _read_number("NATS_HANDLER_SHUTDOWN_TIMEOUT", 30.0, float, 0.1)
+# 处理通道：除 default（NATS_HANDLER_CONCURRENCY/NATS_HANDLER_QUEUE_SIZE）外的独立队列与并发上限，
+# 通道内同步处理函数使用独立线程池，互不抢占。subject 按注册时的 lane 参数或下列通配路由归入通道。
+NATS_HANDLER_LANES = _read_lanes(
+    "NATS_HANDLER_LANES",
+    {"fast": {"concurrency": 8, "queue_size": 256}, "bulk": {"concurrency": 4, "queue_size": 256}},
+)
+NATS_HANDLER_LANE_ROUTES = _read_lane_routes(
+    "NATS_HANDLER_LANE_ROUTES",
+    [
+        ("*.verify_token", "fast"),
+        ("*.verify_bk_token", "fast"),
+        ("*.get_pilot_permission_by_token", "fast"),
+        ("*.get_user_rules*", "fast"),
+        ("*.get_user_menus", "fast"),
+        ("*.get_authorized_*", "fast"),
+        ("*ingest_from_source", "bulk"),
+        ("*.receive_alert_events", "bulk"),
+        ("*.import_collectors", "bulk"),
+    ],
+)
+# 每隔多少秒输出一次各 subject 的队列等待/处理耗时直方图摘要，0 表示关闭
+NATS_HANDLER_STATS_INTERVAL = _read_number("NATS_HANDLER_STATS_INTERVAL", 60.0, float, 0.0)
+# 批量 RPC：客户端单个信封的最大调用数 / listener 内单个信封的并发执行数
+NATS_BATCH_MAX_ITEMS = _read_number("NATS_BATCH_MAX_ITEMS", 100, int, 1)
+NATS_BATCH_ITEM_CONCURRENCY = _read_number("NATS_BATCH_ITEM_CONCURRENCY", 16, int, 1)
+# 同步 RPC 调用复用进程级长连接（nats_client.pool），关闭后回退为每次调用新建连接
+NATS_CONNECTION_POOL_ENABLED = os.getenv("NATS_CONNECTION_POOL_ENABLED", "true").lower() == "true"
 
 
 def _create_ssl_context():
@@ -1,22 +1,25 @@
-__all__ = ["nat_request", "request", "request_sync", "publish", "publish_sync", "js_publish", "js_publish_sync", "request_v2", "subscribe_lines_sync", "publish_raw", "publish_raw_sync", "ensure_stream", "ensure_stream_sync", "iter_jetstream_subject"]
+__all__ = ["nat_request", "request", "request_sync", "request_many", "request_many_sync", "publish", "publish_sync", "js_publish", "js_publish_sync", "request_v2", "subscribe_lines_sync", "publish_raw", "publish_raw_sync", "ensure_stream", "ensure_stream_sync", "iter_jetstream_subject"]
 
 import asyncio
 import functools
 import json
 import queue
+import time
 from typing import Optional
 from urllib.parse import unquote, urlsplit, urlunsplit
 
 from django.conf import settings
 from nats.aio.client import Client
+from nats.errors import NoRespondersError
 from nats.js.api import DiscardPolicy, StreamConfig
 
 from apps.core.logger import nats_logger as logger
 from apps.rpc.sensitive import sanitize_sensitive_data
 
 from .exceptions import NatsClientException
+from .pool import connection_pool, run_coroutine
 from .types import ResponseType
-from .utils import parse_arguments
+from .utils import BATCH_METHOD, parse_arguments, parse_batch_arguments
 
 DEFAULT_REQUEST_TIMEOUT = 60
 
@@ -106,6 +109,38 @@ def _sanitize_connection_error(error, servers, user=None, password=None) -> str:
     return detail
 
 
+def _error_response_exception(parsed: dict) -> NatsClientException:
+    """把失败响应转换为 NatsClientException（兼容 Go 服务错误格式与旧 pickled_exc 格式）"""
+    # 优先使用新的error字段（Go服务的规范化错误格式）
+    if "error" in parsed and parsed["error"]:
+        error_message = parsed["error"]
+        if "message" in parsed and parsed["message"]:
+            error_message += f": {_stringify_error_detail(parsed['message'])}"
+        elif error_message == "BaseAppException":
+            decoded_message = _extract_legacy_exception_message(parsed.get("pickled_exc"))
+            if decoded_message:
+                error_message += f": {_stringify_error_detail(decoded_message)}"
+        # 如果有result字段，将其作为详细信息添加
+        if "result" in parsed and parsed["result"]:
+            error_message += f" | Output: {_stringify_error_detail(parsed['result'])}"
+        exc = NatsClientException(error_message)
+    elif "result" in parsed and parsed["result"]:
+        # 兼容仅返回 result 的服务端实现
+        exc = NatsClientException(_stringify_error_detail(parsed["result"]))
+    else:
+        # 向后兼容：尝试使用旧的pickled_exc格式
+        decoded_message = _extract_legacy_exception_message(parsed.get("pickled_exc"))
+        if decoded_message:
+            exc = NatsClientException(_stringify_error_detail(decoded_message))
+        else:
+            # 最后的降级方案：打印完整响应便于排查
+            logger.error("NATS error response missing error details, full response: %s", sanitize_sensitive_data(parsed))
+            fallback_message = parsed.get("message", "Unknown error occurred")
+            exc = NatsClientException(_stringify_error_detail(fallback_message))
+
+    return exc
+
+
 async def nat_request(
     namespace: str,
     method_name: str,
@@ -114,12 +149,9 @@ async def nat_request(
     **kwargs,
 ) -> ResponseType:
     payload = json.dumps(kwargs).encode()
-    nc = await get_nc_client()
+    nc, pooled = await _acquire_connection()
     timeout = _timeout or getattr(settings, "NATS_REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT)
-    try:
-        response = await nc.request(f"{namespace}.{method_name}", payload, timeout=timeout)
-    finally:
-        await nc.close()
+    response = await _request_on(nc, pooled, f"{namespace}.{method_name}", payload, timeout)
     data = response.data.decode()
     parsed = json.loads(data)
     return parsed
@@ -151,6 +183,7 @@ async def get_nc_client(nc=None, server: str = "", user: Optional[str] = None, p
 
     # 连接超时保护：避免 connect 阶段无上限阻塞
     connect_timeout = options.pop("connect_timeout", getattr(settings, "NATS_CONNECT_TIMEOUT", 10))
+    started = time.perf_counter()
     try:
         await asyncio.wait_for(
             nc.connect(servers=servers, **options),
@@ -163,18 +196,52 @@ async def get_nc_client(nc=None, server: str = "", user: Optional[str] = None, p
             _sanitize_connection_error(e, servers, user=effective_user, password=effective_password),
         )
         raise
+    connection_pool.metrics.record_handshake(time.perf_counter() - started)
     return nc
 
 
+async def _acquire_connection(**connect_kwargs):
+    """返回 (连接, 是否为池化长连接)；仅在连接池后台循环内复用长连接，其余情况按次建连"""
+    if connection_pool.owns_running_loop():
+        return await connection_pool.acquire(get_nc_client, **connect_kwargs), True
+    return await get_nc_client(**connect_kwargs), False
+
+
+async def _release_connection(nc, pooled: bool, error: Optional[Exception] = None) -> None:
+    if not pooled:
+        await nc.close()
+    elif error is not None and connection_pool.is_connection_error(error):
+        await connection_pool.discard(nc, error)
+
+
+async def _timed_request(nc, subject: str, payload: bytes, timeout: float):
+    started = time.perf_counter()
+    failed = True
+    try:
+        response = await nc.request(subject, payload, timeout=timeout)
+        failed = False
+        return response
+    finally:
+        connection_pool.metrics.record_request(time.perf_counter() - started, failed=failed)
+
+
+async def _request_on(nc, pooled: bool, subject: str, payload: bytes, timeout: float):
+    error = None
+    try:
+        return await _timed_request(nc, subject, payload, timeout)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        await _release_connection(nc, pooled, error)
+
+
 async def request(namespace: str, method_name: str, *args, _timeout: Optional[float] = None, _raw=False, **kwargs) -> ResponseType:
     payload = parse_arguments(args, kwargs)
-    nc = await get_nc_client()
+    nc, pooled = await _acquire_connection()
 
     timeout = _timeout or getattr(settings, "NATS_REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT)
-    try:
-        response = await nc.request(f"{namespace}.{method_name}", payload, timeout=timeout)
-    finally:
-        await nc.close()
+    response = await _request_on(nc, pooled, f"{namespace}.{method_name}", payload, timeout)
 
     data = response.data.decode()
     parsed = json.loads(data)
@@ -183,34 +250,7 @@ async def request(namespace: str, method_name: str, *args, _timeout: Optional[fl
         return parsed
 
     if not parsed["success"]:
-        # 优先使用新的error字段（Go服务的规范化错误格式）
-        if "error" in parsed and parsed["error"]:
-            error_message = parsed["error"]
-            if "message" in parsed and parsed["message"]:
-                error_message += f": {_stringify_error_detail(parsed['message'])}"
-            elif error_message == "BaseAppException":
-                decoded_message = _extract_legacy_exception_message(parsed.get("pickled_exc"))
-                if decoded_message:
-                    error_message += f": {_stringify_error_detail(decoded_message)}"
-            # 如果有result字段，将其作为详细信息添加
-            if "result" in parsed and parsed["result"]:
-                error_message += f" | Output: {_stringify_error_detail(parsed['result'])}"
-            exc = NatsClientException(error_message)
-        elif "result" in parsed and parsed["result"]:
-            # 兼容仅返回 result 的服务端实现
-            exc = NatsClientException(_stringify_error_detail(parsed["result"]))
-        else:
-            # 向后兼容：尝试使用旧的pickled_exc格式
-            decoded_message = _extract_legacy_exception_message(parsed.get("pickled_exc"))
-            if decoded_message:
-                exc = NatsClientException(_stringify_error_detail(decoded_message))
-            else:
-                # 最后的降级方案：打印完整响应便于排查
-                logger.error("NATS error response missing error details, full response: %s", sanitize_sensitive_data(parsed))
-                fallback_message = parsed.get("message", "Unknown error occurred")
-                exc = NatsClientException(_stringify_error_detail(fallback_message))
-
-        raise exc
+        raise _error_response_exception(parsed)
 
     if "result" not in parsed:
         return parsed
@@ -218,28 +258,17 @@ async def request(namespace: str, method_name: str, *args, _timeout: Optional[fl
     return parsed["result"]
 
 
-async def request_v2(
-    namespace: str,
-    method_name: str,
-    server: str = "",
-    *args,
-    _nats_user: Optional[str] = None,
-    _nats_password: Optional[str] = None,
-    _timeout: Optional[float] = None,
-    _raw=False,
-    **kwargs,
-) -> ResponseType:
-    payload = parse_arguments(args, kwargs)
-
+async def _acquire_server_connection(caller: str, method_name: str, server: str, user: Optional[str], password: Optional[str]):
     connection_exception = None
     try:
-        nc = await get_nc_client(server=server, user=_nats_user, password=_nats_password)
+        nc, pooled = await _acquire_connection(server=server, user=user, password=password)
     except Exception as e:  # noqa
         logger.error(
-            "request_v2 NATS connect failed, method_name=%s, server=%s, error=%s",
+            "%s NATS connect failed, method_name=%s, server=%s, error=%s",
+            caller,
             method_name,
             _mask_server_url(server),
-            _sanitize_connection_error(e, server, user=_nats_user, password=_nats_password),
+            _sanitize_connection_error(e, server, user=user, password=password),
         )
         # Raise outside the active exception handler so the sanitized exception
         # does not retain the third-party exception and its credential-bearing frames.
@@ -248,12 +277,25 @@ async def request_v2(
         )
     if connection_exception is not None:
         raise connection_exception
+    return nc, pooled
+
+
+async def request_v2(
+    namespace: str,
+    method_name: str,
+    server: str = "",
+    *args,
+    _nats_user: Optional[str] = None,
+    _nats_password: Optional[str] = None,
+    _timeout: Optional[float] = None,
+    _raw=False,
+    **kwargs,
+) -> ResponseType:
+    payload = parse_arguments(args, kwargs)
+    nc, pooled = await _acquire_server_connection("request_v2", method_name, server, _nats_user, _nats_password)
 
     timeout = _timeout or getattr(settings, "NATS_REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT)
-    try:
-        response = await nc.request(f"{namespace}.{method_name}", payload, timeout=timeout)
-    finally:
-        await nc.close()
+    response = await _request_on(nc, pooled, f"{namespace}.{method_name}", payload, timeout)
 
     data = response.data.decode()
     parsed = json.loads(data)
@@ -263,59 +305,107 @@ async def request_v2(
         return parsed
 
     if not parsed["success"]:
-        # 优先使用新的error字段（Go服务的规范化错误格式）
-        if "error" in parsed and parsed["error"]:
-            error_message = parsed["error"]
-            if "message" in parsed and parsed["message"]:
-                error_message += f": {_stringify_error_detail(parsed['message'])}"
-            elif error_message == "BaseAppException":
-                decoded_message = _extract_legacy_exception_message(parsed.get("pickled_exc"))
-                if decoded_message:
-                    error_message += f": {_stringify_error_detail(decoded_message)}"
-            # 如果有result字段，将其作为详细信息添加
-            if "result" in parsed and parsed["result"]:
-                error_message += f" | Output: {_stringify_error_detail(parsed['result'])}"
-            exc = NatsClientException(error_message)
-        elif "result" in parsed and parsed["result"]:
-            # 兼容仅返回 result 的服务端实现
-            exc = NatsClientException(_stringify_error_detail(parsed["result"]))
-        else:
-            # 向后兼容：尝试使用旧的pickled_exc格式
-            decoded_message = _extract_legacy_exception_message(parsed.get("pickled_exc"))
-            if decoded_message:
-                exc = NatsClientException(_stringify_error_detail(decoded_message))
-            else:
-                # 最后的降级方案：打印完整响应便于排查
-                logger.error("NATS error response missing error details, full response: %s", sanitize_sensitive_data(parsed))
-                fallback_message = parsed.get("message", "Unknown error occurred")
-                exc = NatsClientException(_stringify_error_detail(fallback_message))
-
-        raise exc
+        raise _error_response_exception(parsed)
 
     return parsed["result"]
 
 
+def _item_result(parsed: dict):
+    if parsed.get("success"):
+        return parsed.get("result")
+    return _error_response_exception(parsed)
+
+
+async def _request_batch_chunk(nc, namespace: str, chunk: list, timeout: float) -> list:
+    try:
+        response = await _timed_request(nc, f"{namespace}.{BATCH_METHOD}", parse_batch_arguments(chunk), timeout)
+    except NoRespondersError:
+        # 对端 listener 未订阅批量信封（旧版本），退化为同一连接上的并发单次请求
+        responses = await asyncio.gather(
+            *(
+                _timed_request(nc, f"{namespace}.{method_name}", parse_arguments(args, kwargs), timeout)
+                for method_name, args, kwargs in chunk
+            )
+        )
+        return [_item_result(json.loads(item.data.decode())) for item in responses]
+
+    parsed = json.loads(response.data.decode())
+    if not parsed["success"]:
+        error = _error_response_exception(parsed)
+        return [error] * len(chunk)
+    return [_item_result(item) for item in parsed["result"]]
+
+
+async def request_many(
+    namespace: str,
+    calls,
+    server: str = "",
+    _nats_user: Optional[str] = None,
+    _nats_password: Optional[str] = None,
+    _timeout: Optional[float] = None,
+) -> list:
+    """
+    一次往返执行多个 RPC 调用
+
+    calls 为 [(method_name, args, kwargs), ...]，结果按 calls 顺序返回；单项业务失败时该位置为
+    NatsClientException 实例（不抛出），连接/超时等传输错误仍直接抛出。
+    调用按 NATS_BATCH_MAX_ITEMS 分片，每片作为一个批量信封发往 {namespace}.__batch__，各分片在同一连接上并发。
+    """
+    calls = [(method_name, list(args or ()), dict(kwargs or {})) for method_name, args, kwargs in calls]
+    if not calls:
+        return []
+
+    nc, pooled = await _acquire_server_connection("request_many", BATCH_METHOD, server, _nats_user, _nats_password)
+    timeout = _timeout or getattr(settings, "NATS_REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT)
+    chunk_size = getattr(settings, "NATS_BATCH_MAX_ITEMS", 100)
+    error = None
+    try:
+        chunk_results = await asyncio.gather(
+            *(
+                _request_batch_chunk(nc, namespace, calls[offset : offset + chunk_size], timeout)
+                for offset in range(0, len(calls), chunk_size)
+            )
+        )
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        await _release_connection(nc, pooled, error)
+    return [item for chunk in chunk_results for item in chunk]
+
+
 def request_sync(*args, **kwargs):
-    return asyncio.run(request(*args, **kwargs))
+    return run_coroutine(request(*args, **kwargs))
+
+
+def request_many_sync(*args, **kwargs):
+    return run_coroutine(request_many(*args, **kwargs))
 
 
 async def publish(namespace: str, method_name: str, *args, _js=False, **kwargs) -> None:
     payload = parse_arguments(args, kwargs)
 
-    nc = await get_nc_client()
+    nc, pooled = await _acquire_connection()
 
+    error = None
     try:
         if _js:
             js = nc.jetstream()
             await js.publish(f"{namespace}.js.{method_name}", payload)
         else:
             await nc.publish(f"{namespace}.{method_name}", payload)
+            if pooled:
+                # 长连接不会随 close 冲刷缓冲区，显式 flush 保证返回前消息已送达服务端
+                await nc.flush()
+    except Exception as e:
+        error = e
+        raise
     finally:
-        await nc.close()
+        await _release_connection(nc, pooled, error)
 
 
 def publish_sync(*args, **kwargs):
-    return asyncio.run(publish(*args, **kwargs))
+    return run_coroutine(publish(*args, **kwargs))
 
 
 js_publish = functools.partial(publish, _js=True)
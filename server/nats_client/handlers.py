@@ -4,7 +4,7 @@ from .registry import default_registry
 from .utils import database_sync_to_async
 
 
-async def nats_handler(key: str, data):
+async def nats_handler(key: str, data, executor=None):
     args = data.get('args', [])
     kwargs = data.get('kwargs', {})
 
@@ -14,6 +14,10 @@ async def nats_handler(key: str, data):
 
     func = data['func']
     if not asyncio.iscoroutinefunction(func):
-        func = database_sync_to_async(func)
+        if executor is not None:
+            # 独立通道的线程池，避免与 default 通道共用单线程执行器
+            func = database_sync_to_async(func, thread_sensitive=False, executor=executor)
+        else:
+            func = database_sync_to_async(func)
 
     return await func(*args, **kwargs)
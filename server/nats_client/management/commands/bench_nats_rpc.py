@@ -0,0 +1,93 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nats_client import clients
+from nats_client.pool import connection_pool, connection_pool_stats
+
+
+class _EchoResponder:
+    """独立线程/连接上的回显服务，使压测不依赖 nats_listener 与业务处理耗时"""
+
+    def __init__(self, subject):
+        self.subject = subject
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.nc = None
+
+    def start(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._subscribe(), self.loop).result(timeout=30)
+
+    async def _subscribe(self):
+        self.nc = await clients.get_nc_client()
+
+        async def reply(msg):
+            await self.nc.publish(msg.reply, json.dumps({"success": True, "result": "pong"}).encode())
+
+        await self.nc.subscribe(self.subject, cb=reply)
+        await self.nc.flush()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.nc.close(), self.loop).result(timeout=10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=10)
+
+
+class Command(BaseCommand):
+    help = "NATS RPC 同步调用压测：对比每次调用新建连接(旧)与进程级长连接池的调用吞吐（需要可用的 NATS 服务）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=2000, help="每种模式的调用次数")
+        parser.add_argument("--concurrency", type=int, default=8, help="并发调用线程数（模拟 Web worker 线程）")
+        parser.add_argument("--mode", choices=["legacy", "pooled", "both"], default="both")
+        parser.add_argument("--namespace", default="bench")
+
+    def handle(self, *args, **options):
+        method = f"echo_{uuid.uuid4().hex[:8]}"
+        responder = _EchoResponder(f"{options['namespace']}.{method}")
+        try:
+            responder.start()
+        except Exception as e:
+            raise CommandError(f"无法连接 NATS: {e}")
+
+        modes = ["legacy", "pooled"] if options["mode"] == "both" else [options["mode"]]
+        try:
+            for mode in modes:
+                self._run(mode, options["namespace"], method, options["calls"], options["concurrency"])
+        finally:
+            connection_pool.close()
+            responder.stop()
+
+    def _run(self, mode, namespace, method, calls, concurrency):
+        if mode == "legacy":
+            # 旧实现：每次调用 asyncio.run 新建事件循环并握手建连
+            call = lambda: asyncio.run(clients.request(namespace, method))  # noqa: E731
+        else:
+            call = lambda: clients.request_sync(namespace, method)  # noqa: E731
+
+        def timed(_):
+            started = time.perf_counter()
+            call()
+            return time.perf_counter() - started
+
+        connection_pool.metrics.reset()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = sorted(executor.map(timed, range(calls)))
+        elapsed = time.perf_counter() - started
+
+        stats = connection_pool_stats()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"mode={mode:<7} calls={calls} concurrency={concurrency} "
+            f"吞吐={calls / max(elapsed, 1e-9):,.0f} calls/s "
+            f"耗时 p50={statistics.median(latencies) * 1000:.2f}ms p95={p95 * 1000:.2f}ms "
+            f"握手次数={stats['handshakes']} 平均握手={stats['handshake_avg_ms']}ms"
+        )
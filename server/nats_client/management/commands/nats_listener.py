@@ -1,6 +1,12 @@
 import asyncio
+import fnmatch
 import json
-from dataclasses import dataclass
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 
 import jsonpickle
 import nats.errors
@@ -8,6 +14,7 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.management import BaseCommand
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
 from django.utils import autoreload
 from nats.aio.client import Client
 from nats.aio.errors import ErrNoServers, ErrTimeout
@@ -17,7 +24,9 @@ from apps.core.logger import nats_logger as logger
 
 from ...clients import get_nc_client
 from ...handlers import nats_handler
+from ...metrics import HandlerStats
 from ...registry import default_registry
+from ...utils import BATCH_METHOD
 
 
 @dataclass
@@ -27,12 +36,24 @@ class _QueuedMessage:
     reply: str | None = None
     jetstream_message: Msg | None = None
     progress_task: asyncio.Task | None = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Lane:
+    name: str
+    queue: asyncio.Queue
+    concurrency: int
+    executor: ThreadPoolExecutor | None = None
 
 
 class _ListenerOverloadedError(RuntimeError):
     pass
 
 
+DEFAULT_LANE = "default"
+
+
 class Command(BaseCommand):
     help = "Starts a NATS listener."
 
@@ -40,6 +61,11 @@ class Command(BaseCommand):
         self.nats = Client()
         self.js = None
         self._message_queue = None
+        self._lanes = {}
+        self._lane_cache = {}
+        self._lane_filter = None
+        self._batch_executor = None
+        self._stats = HandlerStats()
         self._worker_tasks = set()
         self._fetch_tasks = set()
         self._progress_tasks = set()
@@ -55,15 +81,57 @@ class Command(BaseCommand):
             dest="reload",
             help="Enable autoreload in development environment.",
         )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of listener processes; they share work through NATS queue groups.",
+        )
+        parser.add_argument(
+            "--lanes",
+            default="",
+            help="Comma separated lanes this listener serves (default: all), e.g. `fast` or `default,bulk`.",
+        )
 
     def handle(self, *args, **options):
         reload = options.get("reload", False)
-        print("** Starting NATS listener" + (" with reload enabled" if reload else ""))
+        lanes = [lane.strip() for lane in (options.get("lanes") or "").split(",") if lane.strip()]
+        self._lane_filter = set(lanes) or None
+        processes = max(1, options.get("processes") or 1)
+        print(
+            "** Starting NATS listener"
+            + (" with reload enabled" if reload else "")
+            + (f", lanes={','.join(lanes)}" if lanes else "")
+            + (f", processes={processes}" if processes > 1 else "")
+        )
         if reload:
+            if processes > 1:
+                print("** --processes is ignored with --reload")
             autoreload.run_with_reloader(self.inner_run, *args, **options)
+        elif processes > 1:
+            self._run_processes(processes, *args, **options)
         else:
             self.inner_run(*args, **options)
 
+    def _run_processes(self, processes, *args, **options):
+        """fork 多个 listener 进程：core 订阅与 JetStream durable 消费者都按队列组分摊消息"""
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        children = [context.Process(target=self.inner_run, args=args, kwargs=options, daemon=False) for _ in range(processes)]
+        for child in children:
+            child.start()
+
+        def forward(signum, _frame):
+            # 子进程以 KeyboardInterrupt 走优雅关闭（排空已接收消息）
+            for child in children:
+                if child.is_alive():
+                    os.kill(child.pid, signal.SIGINT)
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for child in children:
+            child.join()
+
     def inner_run(self, *args, **options):
         print("** Initializing Loop")
         loop = asyncio.new_event_loop()
@@ -119,17 +187,99 @@ class Command(BaseCommand):
         if self._worker_tasks:
             return
 
-        concurrency = settings.NATS_HANDLER_CONCURRENCY
-        queue_size = settings.NATS_HANDLER_QUEUE_SIZE
-        self._message_queue = asyncio.Queue(maxsize=queue_size)
-        for _ in range(concurrency):
-            self._create_tracked_task(self._worker(), self._worker_tasks, "worker")
+        self._message_queue = asyncio.Queue(maxsize=settings.NATS_HANDLER_QUEUE_SIZE)
+        self._lane_cache = {}
+        self._lanes = {
+            DEFAULT_LANE: _Lane(DEFAULT_LANE, self._message_queue, settings.NATS_HANDLER_CONCURRENCY),
+        }
+        for name, spec in getattr(settings, "NATS_HANDLER_LANES", {}).items():
+            if name == DEFAULT_LANE:
+                continue
+            self._lanes[name] = _Lane(
+                name,
+                asyncio.Queue(maxsize=spec["queue_size"]),
+                spec["concurrency"],
+                ThreadPoolExecutor(max_workers=spec["concurrency"], thread_name_prefix=f"nats-{name}"),
+            )
+        for lane in self._lanes.values():
+            for _ in range(lane.concurrency):
+                self._create_tracked_task(self._worker(lane), self._worker_tasks, f"{lane.name} worker")
+
+        stats_interval = getattr(settings, "NATS_HANDLER_STATS_INTERVAL", 0)
+        if stats_interval:
+            self._create_tracked_task(self._report_stats(stats_interval), self._worker_tasks, "stats reporter")
+
+    def _lane_name(self, func_name):
+        """注册时声明的 lane 优先，其次按 NATS_HANDLER_LANE_ROUTES 通配匹配，未配置的通道归入 default"""
+        cached = self._lane_cache.get(func_name)
+        if cached is not None:
+            return cached
+        lane = (default_registry.registry.get(func_name) or {}).get("lane")
+        if lane is None:
+            for pattern, routed_lane in getattr(settings, "NATS_HANDLER_LANE_ROUTES", []):
+                if fnmatch.fnmatchcase(func_name, pattern):
+                    lane = routed_lane
+                    break
+        configured = self._lanes or getattr(settings, "NATS_HANDLER_LANES", {})
+        if lane is None or lane not in configured:
+            lane = DEFAULT_LANE
+        if self._lanes:
+            self._lane_cache[func_name] = lane
+        return lane
+
+    def _lane_for(self, func_name):
+        return self._lanes.get(self._lane_name(func_name)) or self._lanes[DEFAULT_LANE]
+
+    def _executor_for(self, func_name):
+        if not self._lanes:
+            return None
+        return self._lane_for(func_name).executor
+
+    def _batch_item_executor(self, func_name):
+        """批量信封内的同步调用需并发执行：所在通道没有独立线程池时使用批量专用线程池"""
+        executor = self._executor_for(func_name)
+        if executor is not None:
+            return executor
+        if self._batch_executor is None:
+            self._batch_executor = ThreadPoolExecutor(
+                max_workers=settings.NATS_BATCH_ITEM_CONCURRENCY,
+                thread_name_prefix="nats-batch",
+            )
+        return self._batch_executor
 
-    async def _worker(self):
+    def _serves(self, func_name):
+        return self._lane_filter is None or self._lane_name(func_name) in self._lane_filter
+
+    async def _report_stats(self, interval):
         while True:
-            message = await self._message_queue.get()
+            await asyncio.sleep(interval)
+            for row in self._stats.snapshot(reset=True):
+                logger.info(
+                    "NATS handler stats lane=%s subject=%s count=%s errors=%s "
+                    "handle_p50_ms=%s handle_p95_ms=%s handle_p99_ms=%s wait_p95_ms=%s wait_max_ms=%s",
+                    row["lane"],
+                    row["subject"],
+                    row["handle"]["count"],
+                    row["errors"],
+                    row["handle"]["p50_ms"],
+                    row["handle"]["p95_ms"],
+                    row["handle"]["p99_ms"],
+                    row["queue_wait"]["p95_ms"],
+                    row["queue_wait"]["max_ms"],
+                )
+            for lane in self._lanes.values():
+                if lane.queue.qsize():
+                    logger.info("NATS lane backlog lane=%s queued=%s", lane.name, lane.queue.qsize())
+
+    async def _worker(self, lane=None):
+        lane = lane or self._lanes[DEFAULT_LANE]
+        while True:
+            message = await lane.queue.get()
+            started = time.monotonic()
+            failed = True
             try:
                 await self.handler(message.func_name, message.data, reply=message.reply)
+                failed = False
             except asyncio.CancelledError:
                 raise
             except Exception:  # pylint: disable=broad-except
@@ -144,13 +294,14 @@ class Command(BaseCommand):
                     except Exception:  # pylint: disable=broad-except
                         logger.exception("JetStream ack failed; message will be redelivered: %s", message.func_name)
             finally:
+                self._stats.observe(lane.name, message.func_name, started - message.enqueued_at, time.monotonic() - started, failed)
                 if message.progress_task is not None:
                     message.progress_task.cancel()
                     await asyncio.gather(message.progress_task, return_exceptions=True)
-                self._message_queue.task_done()
+                lane.queue.task_done()
 
     async def _enqueue(self, func_name, data, reply=None, jetstream_message=None, progress_task=None):
-        await self._message_queue.put(
+        await self._lane_for(func_name).queue.put(
             _QueuedMessage(
                 func_name=func_name,
                 data=data,
@@ -251,7 +402,7 @@ class Command(BaseCommand):
                         "NATS listener input drain failed",
                         exc_info=(type(result), result, result.__traceback__),
                     )
-            await self._message_queue.join()
+            await asyncio.gather(*(lane.queue.join() for lane in self._lanes.values()))
 
         try:
             await asyncio.wait_for(drain_accepted_messages(), timeout=shutdown_timeout)
@@ -267,15 +418,27 @@ class Command(BaseCommand):
         self._worker_tasks.clear()
         self._progress_tasks.clear()
         self._core_subscriptions.clear()
+        for lane in self._lanes.values():
+            if lane.executor is not None:
+                lane.executor.shutdown(wait=False)
+        if self._batch_executor is not None:
+            self._batch_executor.shutdown(wait=False)
+            self._batch_executor = None
+        self._lanes = {}
         self._message_queue = None
 
-    async def _publish_failure(self, reply, error):
+    @staticmethod
+    def _failure_message(error):
         message = error.message_dict if isinstance(error, ValidationError) else str(error)
         if not isinstance(error, ValidationError):
             try:
                 message = json.loads(message)
             except json.JSONDecodeError:
                 pass
+        return message
+
+    async def _publish_failure(self, reply, error):
+        message = self._failure_message(error)
         await self.nats.publish(
             reply,
             json.dumps(
@@ -338,10 +501,11 @@ class Command(BaseCommand):
                     await self._publish_failure(reply, error)
 
         print("** Listened on:")
+        batch_namespaces = []
         for data in default_registry.registry.values():
             if data["js"]:
                 full_name = f'{data["namespace"]}.js.{data["name"]}'
-                if self.js is None:
+                if self.js is None or not self._serves(full_name):
                     continue
 
                 full_name_no_dot = full_name.replace(".", "-")
@@ -357,6 +521,10 @@ class Command(BaseCommand):
                 )
             else:
                 full_name = f'{data["namespace"]}.{data["name"]}'
+                if data["namespace"] not in batch_namespaces:
+                    batch_namespaces.append(data["namespace"])
+                if not self._serves(full_name):
+                    continue
 
                 # 默认使用消息组模式,支持负载均衡，以后可以考虑根据注册参数来决定是否使用消息组模式
                 subscription = await self.nats.subscribe(
@@ -370,10 +538,64 @@ class Command(BaseCommand):
                     self._core_subscriptions.append(subscription)
             print(f"     - {full_name}" + (" (JetStream)" if data["js"] else ""))
 
+        # 批量信封：一条消息携带多次调用，由 handler 分发给同命名空间下的已注册函数
+        for namespace_name in batch_namespaces:
+            full_name = f"{namespace_name}.{BATCH_METHOD}"
+            if not self._serves(full_name):
+                continue
+            subscription = await self.nats.subscribe(
+                full_name,
+                full_name,
+                cb=callback,
+                pending_msgs_limit=settings.NATS_CORE_PENDING_MSGS_LIMIT,
+                pending_bytes_limit=settings.NATS_CORE_PENDING_BYTES_LIMIT,
+            )
+            if subscription is not None:
+                self._core_subscriptions.append(subscription)
+            print(f"     - {full_name} (batch)")
+
+    async def _dispatch_batch_item(self, namespace, item, semaphore):
+        async with semaphore:
+            try:
+                key = f"{namespace}.{item['method']}"
+                registered = default_registry.registry.get(key)
+                if registered is None or registered["js"]:
+                    raise ValueError(f"No function found for `{key}`")
+                result = await nats_handler(key, item, executor=self._batch_item_executor(key))
+                return json.dumps({"success": True, "result": result}, cls=DjangoJSONEncoder)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.exception("NATS batch item failed: %s", item.get("method") if isinstance(item, dict) else item)
+                return json.dumps(
+                    {"success": False, "error": e.__class__.__name__, "message": self._failure_message(e)},
+                    cls=DjangoJSONEncoder,
+                )
+
+    async def handle_batch(self, func_name: str, data) -> bytes:
+        """执行批量信封内的全部调用，按原顺序返回逐项结果；单项失败不影响其他项"""
+        namespace = func_name[: -len(BATCH_METHOD) - 1]
+        items = data.get("items")
+        if not isinstance(items, list):
+            raise ValueError("Batch envelope requires an `items` list")
+        semaphore = asyncio.Semaphore(settings.NATS_BATCH_ITEM_CONCURRENCY)
+        encoded = await asyncio.gather(*(self._dispatch_batch_item(namespace, item, semaphore) for item in items))
+        # 逐项预先编码，单项结果无法序列化时只影响该项
+        return ('{"success": true, "result": [' + ",".join(encoded) + "]}").encode()
+
     async def handler(self, func_name: str, body, reply=None):
+        if func_name.endswith(f".{BATCH_METHOD}"):
+            try:
+                payload = await self.handle_batch(func_name, json.loads(body))
+            except Exception as e:  # pylint: disable=broad-except
+                if reply:
+                    await self._publish_failure(reply, e)
+                raise e
+            if reply:
+                await self.nats.publish(reply, payload)
+            return
+
         try:
             data = json.loads(body)
-            r = await nats_handler(func_name, data)
+            r = await nats_handler(func_name, data, executor=self._executor_for(func_name))
         except Exception as e:  # pylint: disable=broad-except
             if reply:
                 await self._publish_failure(reply, e)
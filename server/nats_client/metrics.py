@@ -0,0 +1,81 @@
+"""nats_listener 处理指标：按 (通道, subject) 统计队列等待与处理耗时的固定桶直方图。
+
+直方图只在 listener 事件循环内更新，无需加锁；分位数取所在桶的上界，足以观察长尾与通道间相互影响。
+"""
+
+from bisect import bisect_left
+
+# 桶上界（毫秒），最后一个桶为 +Inf
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, ratio: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = ratio * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank and bucket:
+                return float(BUCKETS_MS[index]) if index < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": dict(zip([*map(str, BUCKETS_MS), "+Inf"], self.buckets)),
+        }
+
+
+class HandlerStats:
+    """按 (通道, subject) 聚合的处理指标"""
+
+    def __init__(self):
+        self._entries = {}
+
+    def observe(self, lane: str, subject: str, wait_seconds: float, handle_seconds: float, failed: bool = False):
+        entry = self._entries.get((lane, subject))
+        if entry is None:
+            entry = self._entries[(lane, subject)] = {
+                "wait": LatencyHistogram(),
+                "handle": LatencyHistogram(),
+                "errors": 0,
+            }
+        entry["wait"].observe(wait_seconds)
+        entry["handle"].observe(handle_seconds)
+        if failed:
+            entry["errors"] += 1
+
+    def snapshot(self, reset: bool = False) -> list:
+        rows = [
+            {
+                "lane": lane,
+                "subject": subject,
+                "errors": entry["errors"],
+                "queue_wait": entry["wait"].snapshot(),
+                "handle": entry["handle"].snapshot(),
+            }
+            for (lane, subject), entry in self._entries.items()
+        ]
+        if reset:
+            self._entries = {}
+        return sorted(rows, key=lambda row: row["handle"]["count"], reverse=True)
@@ -0,0 +1,213 @@
+"""进程级 NATS 长连接池。
+
+同步调用方（RpcClient、request_sync、publish_sync 等）不再为每次调用创建事件循环并重新握手：
+协程被投递到一个常驻后台线程的事件循环上执行，该循环内按 (server, user, password) 复用长连接。
+连接由 nats-py 自带的断线重连维持；连接彻底关闭或出现连接级错误时丢弃，下一次调用重新建连。
+在其他事件循环中直接 await 的异步调用保持原有“按次建连、用完关闭”的行为。
+"""
+
+import asyncio
+import atexit
+import os
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from nats.errors import ConnectionClosedError, NoServersError, StaleConnectionError
+
+from apps.core.logger import nats_logger as logger
+
+# 出现这些错误说明连接本身不可用，丢弃后由下一次调用重新建连
+_CONNECTION_ERRORS = (ConnectionClosedError, NoServersError, StaleConnectionError)
+_LATENCY_SAMPLES = 2048
+_CLOSE_TIMEOUT = 5
+
+
+def _percentile(samples, ratio):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+class NatsClientMetrics:
+    """NATS 客户端调用指标：握手次数/耗时、请求次数/错误数与最近请求耗时分位数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.handshakes = 0
+            self.handshake_seconds = 0.0
+            self.requests = 0
+            self.errors = 0
+            self.discarded = 0
+            self._latencies = deque(maxlen=_LATENCY_SAMPLES)
+
+    def record_handshake(self, seconds: float):
+        with self._lock:
+            self.handshakes += 1
+            self.handshake_seconds += seconds
+
+    def record_request(self, seconds: float, failed: bool = False):
+        with self._lock:
+            self.requests += 1
+            if failed:
+                self.errors += 1
+            self._latencies.append(seconds)
+
+    def record_discard(self):
+        with self._lock:
+            self.discarded += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                "handshakes": self.handshakes,
+                "handshake_avg_ms": round(self.handshake_seconds / self.handshakes * 1000, 2) if self.handshakes else 0.0,
+                "requests": self.requests,
+                "errors": self.errors,
+                "discarded_connections": self.discarded,
+                "latency_p50_ms": round(_percentile(latencies, 0.5) * 1000, 2),
+                "latency_p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+                "latency_p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+            }
+
+
+class NatsConnectionPool:
+    """
+    后台事件循环 + 按服务器/凭据分组的长连接
+
+    - run(coro)：把协程投递到后台循环并同步等待结果，供同步调用方使用；
+    - acquire(factory, **connect_kwargs)：仅能在后台循环内调用，返回可复用的连接；
+    - 进程 fork 后（Celery prefork / gunicorn）自动丢弃继承来的循环与连接，在子进程内重新创建。
+    """
+
+    def __init__(self, metrics: Optional[NatsClientMetrics] = None):
+        self.metrics = metrics or NatsClientMetrics()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._connections: Dict[Tuple, object] = {}
+        self._connect_locks: Dict[Tuple, asyncio.Lock] = {}
+
+    @staticmethod
+    def enabled() -> bool:
+        return getattr(settings, "NATS_CONNECTION_POOL_ENABLED", True)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        pid = os.getpid()
+        if self._pid == pid and self._loop is not None and self._thread.is_alive():
+            return self._loop
+        with self._lock:
+            if self._pid != pid:
+                # fork 继承的 socket 与父进程共享，不能关闭，只丢弃引用
+                self._connections = {}
+                self._connect_locks = {}
+                self._loop = None
+            if self._loop is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="nats-connection-pool", daemon=True)
+                thread.start()
+                self._loop, self._thread, self._pid = loop, thread, pid
+            return self._loop
+
+    def owns_running_loop(self) -> bool:
+        """当前协程是否运行在连接池的后台循环上"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return running is self._loop and self._pid == os.getpid()
+
+    def run(self, coro: Awaitable):
+        """在后台循环上执行协程并阻塞等待结果；超时由协程自身（wait_for / 请求 timeout）控制"""
+        if self.owns_running_loop():
+            coro.close()
+            raise RuntimeError("NATS connection pool loop cannot wait on itself")
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return future.result()
+
+    async def acquire(self, factory: Callable[..., Awaitable], **connect_kwargs):
+        key = (connect_kwargs.get("server") or "", connect_kwargs.get("user"), connect_kwargs.get("password"))
+        nc = self._connections.get(key)
+        if nc is not None and not getattr(nc, "is_closed", True):
+            return nc
+        lock = self._connect_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            nc = self._connections.get(key)
+            if nc is not None and not getattr(nc, "is_closed", True):
+                return nc
+            if nc is not None:
+                logger.warning("[nats-pool] 长连接已关闭，重新建连 reconnects=%s", nc.stats.get("reconnects"))
+            nc = await factory(**connect_kwargs)
+            self._connections[key] = nc
+            return nc
+
+    async def discard(self, nc, error: Exception):
+        """连接级错误后丢弃连接，避免后续调用继续使用失效连接"""
+        for key, pooled in list(self._connections.items()):
+            if pooled is nc:
+                del self._connections[key]
+        self.metrics.record_discard()
+        logger.warning("[nats-pool] 丢弃失效连接 error=%s", error.__class__.__name__)
+        try:
+            await nc.close()
+        except Exception:  # noqa
+            pass
+
+    @staticmethod
+    def is_connection_error(error: Exception) -> bool:
+        return isinstance(error, _CONNECTION_ERRORS)
+
+    def connection_count(self) -> int:
+        return len(self._connections)
+
+    def close(self):
+        """关闭全部长连接并停止后台循环（进程退出或测试清理时调用）"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            connections = list(self._connections.values()) if self._pid == os.getpid() else []
+            self._connections = {}
+            self._connect_locks = {}
+            self._loop = self._thread = self._pid = None
+        if loop is None or thread is None or not thread.is_alive():
+            return
+
+        async def _close_all():
+            for nc in connections:
+                try:
+                    await nc.close()
+                except Exception:  # noqa
+                    pass
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close_all(), loop).result(timeout=_CLOSE_TIMEOUT)
+        except Exception as e:  # noqa
+            logger.warning("[nats-pool] 关闭连接超时或失败: %s", e)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=_CLOSE_TIMEOUT)
+        if not thread.is_alive():
+            loop.close()
+
+
+connection_pool = NatsConnectionPool()
+atexit.register(connection_pool.close)
+
+
+def run_coroutine(coro: Awaitable):
+    """同步执行 NATS 协程：启用连接池时复用后台循环上的长连接，否则沿用 asyncio.run"""
+    if connection_pool.enabled():
+        return connection_pool.run(coro)
+    return asyncio.run(coro)
+
+
+def connection_pool_stats() -> dict:
+    stats = connection_pool.metrics.snapshot()
+    stats["pooled_connections"] = connection_pool.connection_count()
+    return stats
@@ -38,6 +38,8 @@ class FunctionRegistry:
             'namespace': namespace,
             'name': name,
             'js': js,
+            # 处理通道（见 NATS_HANDLER_LANES），None 时按 NATS_HANDLER_LANE_ROUTES 或 default
+            'lane': kwargs.get('lane'),
         }
         return func
 
@@ -0,0 +1,88 @@
+# server/nats_client/tests/test_batch_request.py
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from nats.errors import NoRespondersError
+
+from nats_client import clients
+from nats_client.exceptions import NatsClientException
+
+pytestmark = pytest.mark.unit
+
+
+class _Response:
+    def __init__(self, payload):
+        self.data = json.dumps(payload).encode()
+
+
+class _BatchNc:
+    """模拟支持批量信封的 listener：method 为 fail 的项返回失败"""
+
+    def __init__(self, batch_supported=True):
+        self.batch_supported = batch_supported
+        self.subjects = []
+        self.closed = 0
+
+    async def request(self, subject, payload, timeout):
+        self.subjects.append(subject)
+        body = json.loads(payload)
+        if subject.endswith(".__batch__"):
+            if not self.batch_supported:
+                raise NoRespondersError()
+            return _Response({"success": True, "result": [self._item(item["method"], item["args"]) for item in body["items"]]})
+        return _Response(self._item(subject.split(".", 1)[1], body["args"]))
+
+    @staticmethod
+    def _item(method, args):
+        if method == "fail":
+            return {"success": False, "error": "ValueError", "message": "bad input"}
+        return {"success": True, "result": [method, *args]}
+
+    async def close(self):
+        self.closed += 1
+
+
+def _run(nc, calls, **kwargs):
+    async def _fake_get(**_kwargs):
+        return nc
+
+    with patch.object(clients, "get_nc_client", side_effect=_fake_get):
+        return asyncio.run(clients.request_many("ns", calls, **kwargs))
+
+
+def test_request_many_sends_one_envelope_and_keeps_order():
+    nc = _BatchNc()
+    results = _run(nc, [("a", [1], {}), ("fail", [], {}), ("b", (2,), None)])
+
+    assert nc.subjects == ["ns.__batch__"]
+    assert results[0] == ["a", 1] and results[2] == ["b", 2]
+    assert isinstance(results[1], NatsClientException)
+    assert str(results[1]) == "ValueError: bad input"
+    assert nc.closed == 1
+
+
+def test_request_many_splits_large_batches(settings):
+    settings.NATS_BATCH_MAX_ITEMS = 2
+    nc = _BatchNc()
+    results = _run(nc, [(f"m{i}", [i], {}) for i in range(5)])
+
+    assert nc.subjects == ["ns.__batch__"] * 3
+    assert results == [[f"m{i}", i] for i in range(5)]
+
+
+def test_request_many_falls_back_to_concurrent_requests_without_batch_listener():
+    nc = _BatchNc(batch_supported=False)
+    results = _run(nc, [("a", [1], {}), ("fail", [], {})])
+
+    assert nc.subjects[0] == "ns.__batch__"
+    assert sorted(nc.subjects[1:]) == ["ns.a", "ns.fail"]
+    assert results[0] == ["a", 1]
+    assert isinstance(results[1], NatsClientException)
+
+
+def test_request_many_without_calls_does_not_connect():
+    with patch.object(clients, "get_nc_client") as get_client:
+        assert asyncio.run(clients.request_many("ns", [])) == []
+    get_client.assert_not_called()
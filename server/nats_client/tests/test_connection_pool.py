@@ -0,0 +1,121 @@
+# server/nats_client/tests/test_connection_pool.py
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from nats.errors import ConnectionClosedError
+
+from nats_client import clients
+from nats_client.pool import connection_pool, connection_pool_stats, run_coroutine
+
+pytestmark = pytest.mark.unit
+
+
+class _FakeResponse:
+    data = json.dumps({"success": True, "result": "ok"}).encode()
+
+
+class _FakeNc:
+    def __init__(self, error=None):
+        self.is_closed = False
+        self.stats = {"reconnects": 0}
+        self.error = error
+        self.requests = 0
+        self.published = []
+        self.closed = 0
+
+    async def request(self, subject, payload, timeout):
+        self.requests += 1
+        if self.error is not None:
+            raise self.error
+        return _FakeResponse()
+
+    async def publish(self, subject, payload):
+        self.published.append(subject)
+
+    async def flush(self):
+        return None
+
+    async def close(self):
+        self.closed += 1
+        self.is_closed = True
+
+
+@pytest.fixture
+def fake_connections():
+    created = []
+
+    async def _fake_get(**kwargs):
+        nc = _FakeNc()
+        nc.connect_kwargs = kwargs
+        created.append(nc)
+        return nc
+
+    connection_pool.close()
+    connection_pool.metrics.reset()
+    with patch.object(clients, "get_nc_client", side_effect=_fake_get):
+        yield created
+    connection_pool.close()
+
+
+def test_request_sync_reuses_one_connection(fake_connections):
+    results = [clients.request_sync("ns", "method", key=i) for i in range(3)]
+    clients.publish_sync("ns", "notify", data=1)
+
+    assert results == ["ok", "ok", "ok"]
+    assert len(fake_connections) == 1
+    nc = fake_connections[0]
+    assert nc.requests == 3 and nc.published == ["ns.notify"] and nc.closed == 0
+    stats = connection_pool_stats()
+    assert stats["requests"] == 3 and stats["pooled_connections"] == 1
+
+
+def test_closed_connection_is_replaced(fake_connections):
+    clients.request_sync("ns", "method")
+    fake_connections[0].is_closed = True
+
+    clients.request_sync("ns", "method")
+
+    assert len(fake_connections) == 2
+    assert fake_connections[1].requests == 1
+
+
+def test_connection_error_discards_pooled_connection(fake_connections):
+    clients.request_sync("ns", "method")
+    fake_connections[0].error = ConnectionClosedError()
+
+    with pytest.raises(ConnectionClosedError):
+        clients.request_sync("ns", "method")
+    assert fake_connections[0].closed == 1
+    assert connection_pool_stats()["discarded_connections"] == 1
+
+    clients.request_sync("ns", "method")
+    assert len(fake_connections) == 2
+
+
+def test_request_v2_pools_per_server_and_credentials(fake_connections):
+    for _ in range(2):
+        run_coroutine(clients.request_v2("ns", "m", server="nats://a:4222", _nats_user="u", _nats_password="p"))
+        run_coroutine(clients.request_v2("ns", "m", server="nats://b:4222"))
+
+    assert [nc.connect_kwargs for nc in fake_connections] == [
+        {"server": "nats://a:4222", "user": "u", "password": "p"},
+        {"server": "nats://b:4222", "user": None, "password": None},
+    ]
+
+
+def test_pool_disabled_falls_back_to_per_call_connection(fake_connections, settings):
+    settings.NATS_CONNECTION_POOL_ENABLED = False
+
+    clients.request_sync("ns", "method")
+    clients.request_sync("ns", "method")
+
+    assert len(fake_connections) == 2
+    assert all(nc.closed == 1 for nc in fake_connections)
+
+
+def test_coroutine_awaited_on_foreign_loop_keeps_per_call_connection(fake_connections):
+    assert asyncio.run(clients.request("ns", "method")) == "ok"
+    assert fake_connections[0].closed == 1
+    assert connection_pool_stats()["pooled_connections"] == 0
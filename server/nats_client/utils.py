@@ -13,6 +13,18 @@ def parse_arguments(args: tuple, kwargs: dict) -> bytes:
     return json.dumps(msg, cls=DjangoJSONEncoder).encode()
 
 
+# 批量 RPC 信封的方法名：{namespace}.__batch__，由 nats_listener 在同一消息内分发给已注册函数
+BATCH_METHOD = '__batch__'
+
+
+def parse_batch_arguments(calls) -> bytes:
+    """calls: [(method_name, args, kwargs), ...]"""
+    msg = {
+        'items': [{'method': method_name, 'args': args, 'kwargs': kwargs} for method_name, args, kwargs in calls],
+    }
+    return json.dumps(msg, cls=DjangoJSONEncoder).encode()
+
+
 # pylint: disable=invalid-name
 class DatabaseSyncToAsync(SyncToAsync):
     """